@@ -1,7 +1,3 @@
-# This file marks the directory as a Python package
-from .models.models import User, Opportunity, Vehicle, AdasSystem
-from .models import Base, SessionLocal, engine
-
 __all__ = [
     'Base',
     'SessionLocal',
@@ -12,4 +8,15 @@ __all__ = [
     'AdasSystem'
 ]
 
-# This makes the app directory a Python package 
\ No newline at end of file
+# Loaded on first access; importing app.ui must not pull in SQLAlchemy and
+# connect to the database before the login screen is up
+def __getattr__(name):
+    if name in ('Base', 'SessionLocal', 'engine'):
+        from . import models
+        return getattr(models, name)
+    if name in __all__:
+        from .models import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# This makes the app directory a Python package
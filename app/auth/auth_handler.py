@@ -23,9 +23,11 @@ def verify_pin(pin: str, hashed_pin: str) -> bool:
     """Verify a PIN against its hash"""
     return hash_pin(pin) == hashed_pin
 
-def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token"""
+def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None, role: Optional[str] = None) -> str:
+    """Create a JWT access token; the role is signed along, so a saved session cannot raise it"""
     to_encode = {"user_id": str(user_id)}  # Ensure UUID is converted to string
+    if role is not None:
+        to_encode["role"] = role
     
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -40,15 +42,21 @@ def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the user_id if valid"""
+def decode_token(token: str) -> Optional[dict]:
+    """Verify a JWT token and return its claims if valid"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-        if user_id:
-            return str(user_id)  # Ensure UUID is returned as string
+        if payload.get("user_id"):
+            return payload
         return None
     except jwt.ExpiredSignatureError:
         return None
-    except jwt.JWTError:
-        return None 
\ No newline at end of file
+    except jwt.InvalidTokenError:
+        return None
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the user_id if valid"""
+    payload = decode_token(token)
+    if payload:
+        return str(payload["user_id"])  # Ensure UUID is returned as string
+    return None 
\ No newline at end of file
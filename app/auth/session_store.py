@@ -0,0 +1,84 @@
+import json
+import os
+from app.auth.auth_handler import decode_token
+from app.config import SESSION_STORE_PATH
+from app.database.local_cache import encode_value, decode_value
+from app.models.models import User
+
+# Never written to disk; the background revalidation loads it from the server
+EXCLUDED_PROFILE_COLUMNS = {'pin'}
+
+def _protect(data: bytes) -> bytes:
+    """Encrypt for the current Windows account with DPAPI; elsewhere the file is only readable by its owner"""
+    try:
+        import win32crypt
+    except ImportError:
+        return data
+    return win32crypt.CryptProtectData(data, "SI Opportunity Manager session", None, None, None, 0)
+
+def _unprotect(data: bytes) -> bytes:
+    try:
+        import win32crypt
+    except ImportError:
+        return data
+    return win32crypt.CryptUnprotectData(data, None, None, None, 0)[1]
+
+def save_session(user, token, path=SESSION_STORE_PATH):
+    """Keep the token and the user's profile so the next launch can skip the login"""
+    profile = {
+        column.name: encode_value(getattr(user, column.name, None))
+        for column in User.__table__.columns if column.name not in EXCLUDED_PROFILE_COLUMNS
+    }
+    try:
+        data = _protect(json.dumps({'token': token, 'profile': profile}).encode('utf-8'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except Exception as e:
+        # The next launch shows the login form
+        print(f"Could not save the session: {str(e)}")
+
+def clear_session(path=SESSION_STORE_PATH):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def load_session(path=SESSION_STORE_PATH):
+    """The stored user, rebuilt from the profile, if its token is still valid; None otherwise.
+
+    The token is checked locally, so this needs no round trip. The user is a
+    detached User without a PIN; it has not been checked against the server,
+    but its id and role are the ones signed into the token.
+    """
+    try:
+        with open(path, 'rb') as f:
+            session = json.loads(_unprotect(f.read()).decode('utf-8'))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Discarding unreadable saved session: {str(e)}")
+        clear_session(path)
+        return None
+
+    profile = session.get('profile') or {}
+    claims = decode_token(session.get('token') or '')
+    if not claims or str(claims['user_id']) != profile.get('id'):
+        print("Saved session expired")
+        clear_session(path)
+        return None
+    # The profile is not signed; tokens from before roles were signed have no role
+    if claims.get('role') is None or claims['role'] != profile.get('role'):
+        print("Saved session does not match its token")
+        clear_session(path)
+        return None
+
+    user = User(**{
+        column.name: decode_value(column, profile[column.name])
+        for column in User.__table__.columns if column.name in profile
+    })
+    user.token = session['token']
+    return user
@@ -7,4 +7,46 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STORAGE_DIR = os.path.join(BASE_DIR, 'storage', 'files')
 
 # Ensure storage directory exists
-os.makedirs(STORAGE_DIR, exist_ok=True) 
\ No newline at end of file
+os.makedirs(STORAGE_DIR, exist_ok=True) 
+# Local SQLite replica used when the remote database is slow or unreachable
+CACHE_DB_PATH = os.getenv('LOCAL_CACHE_PATH', os.path.join(BASE_DIR, 'storage', 'cache', 'local_cache.db'))
+
+# Fingerprints and progress of the storage maintenance scan
+STORAGE_SCAN_PATH = os.getenv('STORAGE_SCAN_PATH', os.path.join(BASE_DIR, 'storage', 'cache', 'storage_scan.db'))
+
+# Downscaled attachment images shown on the dashboard, evicted least recently used first
+THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', os.path.join(BASE_DIR, 'storage', 'cache', 'thumbnails'))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+# Pooled connections opened, and how long the prefetched dashboard stays fresh, while the login screen is up
+STARTUP_POOL_CONNECTIONS = int(os.getenv('STARTUP_POOL_CONNECTIONS', '3'))
+STARTUP_PREFETCH_MAX_AGE = int(os.getenv('STARTUP_PREFETCH_MAX_AGE', '120'))  # seconds
+
+# Progress of interrupted data-repair jobs, so they resume where they stopped
+BATCH_CHECKPOINT_DIR = os.getenv('BATCH_CHECKPOINT_DIR', os.path.join(BASE_DIR, 'storage', 'cache', 'batch_jobs'))
+
+# Full and incremental database backups, one directory per backup
+BACKUP_DIR = os.getenv('BACKUP_DIR', os.path.join(BASE_DIR, 'storage', 'backups'))
+
+# Token and profile of the last login with "Remember me", so the next launch skips the login form
+SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', os.path.join(BASE_DIR, 'storage', 'cache', 'session.dat'))
+
+# Optional read replica for the heavy read screens (dashboard list, statistics, exports).
+# Reads fall back to the primary while the replica is unreachable or more than
+# REPLICA_MAX_LAG seconds behind, and for REPLICA_MAX_LAG seconds after this client writes.
+READ_REPLICA_URL = os.getenv('READ_REPLICA_URL')
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '10'))  # seconds
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))  # seconds between lag probes
+REPLICA_MAX_BACKOFF = float(os.getenv('REPLICA_MAX_BACKOFF', '300'))  # longest wait between probes of an unreachable replica
+
+# Monthly partitions of activity_log: months created ahead, months kept attached (0 keeps all),
+# and where detached months are archived as compressed CSV before being dropped
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', '0'))
+PARTITION_ARCHIVE_DIR = os.getenv('PARTITION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'storage', 'archive'))
+
+# Activity log entries waiting for the background writer: the most held in memory before
+# they go to the spill file, entries per INSERT, and where entries wait while the database is down
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '1000'))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+AUDIT_SPILL_PATH = os.getenv('AUDIT_SPILL_PATH', os.path.join(BASE_DIR, 'storage', 'cache', 'audit_spill.ndjson'))
@@ -2,59 +2,18 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from sqlalchemy import text
 from app.database.connection import SessionLocal
 from app.models.models import Vehicle
+from app.services import vehicle_catalog
 
 def add_2026_vehicles():
     """Add 2026 vehicles by duplicating 2024 data"""
     db = SessionLocal()
     try:
-        print("Checking current vehicle data...")
-        
-        # Check current counts
-        count_2024 = db.query(Vehicle).filter(Vehicle.year == '2024').count()
-        count_2026 = db.query(Vehicle).filter(Vehicle.year == '2026').count()
-        
-        print(f"Current 2024 vehicles: {count_2024}")
-        print(f"Current 2026 vehicles: {count_2026}")
-        
-        if count_2026 > 0:
-            print("2026 vehicles already exist. Skipping...")
-            return
-            
-        if count_2024 == 0:
-            print("No 2024 vehicles found to duplicate. Cannot proceed.")
-            return
-            
-        print(f"Adding 2026 vehicles by duplicating {count_2024} vehicles from 2024...")
-        
-        # Use raw SQL for efficiency
-        sql = """
-        INSERT INTO vehicles (id, year, make, model, is_custom, created_at)
-        SELECT 
-            gen_random_uuid() as id,
-            '2026' as year,
-            make,
-            model,
-            false as is_custom,
-            CURRENT_TIMESTAMP as created_at
-        FROM vehicles 
-        WHERE year = '2024'
-        """
-        
-        result = db.execute(text(sql))
+        # Safe to re-run, vehicles that already exist for 2026 are left as they are
+        counts = vehicle_catalog.copy_year(db, '2024', '2026')
         db.commit()
-        
-        # Verify results
-        final_count = db.query(Vehicle).filter(Vehicle.year == '2026').count()
-        print(f"Successfully added {final_count} vehicles for 2026")
-        
-        # Show sample
-        sample_vehicles = db.query(Vehicle).filter(Vehicle.year == '2026').limit(3).all()
-        print("Sample 2026 vehicles:")
-        for vehicle in sample_vehicles:
-            print(f"  - {vehicle.year} {vehicle.make} {vehicle.model}")
+        print(f"Added {counts['inserted']} vehicles for 2026, {counts['unchanged']} already existed")
             
     except Exception as e:
         db.rollback()
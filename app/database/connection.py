@@ -1,8 +1,15 @@
 import os
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from app.database.hot_queries import track_compile_cache
+from datetime import datetime, timezone
+import random
+import threading
 import time
 
 load_dotenv()
@@ -11,9 +18,8 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-# Create engine with enhanced configuration for Neon
-engine = create_engine(
-    DATABASE_URL,
+# Engine configuration for Neon, shared by the primary and the read replica
+ENGINE_OPTIONS = dict(
     connect_args={
         "sslmode": "require",
         "connect_timeout": 10,
@@ -29,27 +35,150 @@ engine = create_engine(
     pool_pre_ping=True  # Enable connection health checks
 )
 
-# Add event listeners for connection debugging
+engine = create_engine(DATABASE_URL, **ENGINE_OPTIONS)
+
+# SQLSTATE codes that mean the server (not the query) is unavailable
+TRANSIENT_PGCODES = {
+    '57P01',  # admin_shutdown
+    '57P02',  # crash_shutdown
+    '57P03',  # cannot_connect_now (e.g. Neon compute waking up)
+    '53300',  # too_many_connections
+}
+
+def is_transient_error(error):
+    """Return True if the error is a connectivity problem that is worth retrying"""
+    if isinstance(error, DisconnectionError):
+        return True
+    if not isinstance(error, DBAPIError):
+        return False
+    if error.connection_invalidated:
+        return True
+    if not isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    pgcode = getattr(error.orig, 'pgcode', None)
+    # No SQLSTATE means the failure happened before the server answered
+    return pgcode is None or pgcode.startswith('08') or pgcode in TRANSIENT_PGCODES
+
+class ConnectionHealth:
+    """Central record of database connectivity, fed by engine events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.is_healthy = True
+        self.consecutive_failures = 0
+        self.last_success = None
+        self.last_failure = None
+        self.last_error = None
+
+    def record_success(self):
+        with self._lock:
+            self.is_healthy = True
+            self.consecutive_failures = 0
+            self.last_success = datetime.now(timezone.utc)
+
+    def record_failure(self, error):
+        with self._lock:
+            self.is_healthy = False
+            self.consecutive_failures += 1
+            self.last_failure = datetime.now(timezone.utc)
+            self.last_error = str(error)
+
+    def snapshot(self):
+        """Return a copy of the current health state"""
+        with self._lock:
+            return {
+                'is_healthy': self.is_healthy,
+                'consecutive_failures': self.consecutive_failures,
+                'last_success': self.last_success,
+                'last_failure': self.last_failure,
+                'last_error': self.last_error
+            }
+
+connection_health = ConnectionHealth()
+
+# Add event listeners for connection debugging and health tracking
 @event.listens_for(engine, 'connect')
 def receive_connect(dbapi_connection, connection_record):
     print('New connection established')
+    connection_health.record_success()
 
 @event.listens_for(engine, 'checkout')
 def receive_checkout(dbapi_connection, connection_record, connection_proxy):
+    # Checkout only fires after pool_pre_ping has confirmed the connection is alive
     print('Connection retrieved from pool')
+    connection_health.record_success()
 
 @event.listens_for(engine, 'checkin')
 def receive_checkin(dbapi_connection, connection_record):
     print('Connection returned to pool')
 
+@event.listens_for(engine, 'handle_error')
+def receive_handle_error(context):
+    if context.is_disconnect or is_transient_error(context.sqlalchemy_exception):
+        connection_health.record_failure(context.original_exception)
+
+track_compile_cache(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# libpq options in a URL that asyncpg does not accept as keyword arguments
+LIBPQ_ONLY_OPTIONS = {'sslmode', 'channel_binding', 'connect_timeout', 'options', 'target_session_attrs'}
+
+def make_async_engine(url, **kwargs):
+    """An AsyncEngine on the asyncpg driver for a postgresql:// URL.
+
+    sslmode in the URL becomes asyncpg's ssl argument (require when absent, as
+    for the sync engine) and the other libpq-only options are dropped.
+    """
+    try:
+        import asyncpg  # noqa: F401
+    except ImportError:
+        raise RuntimeError("The async engine requires the asyncpg package (pip install asyncpg)")
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url)
+    connect_args = kwargs.pop('connect_args', {})
+    connect_args.setdefault('ssl', url.query.get('sslmode', 'require'))
+    if connect_args['ssl'] == 'disable':
+        connect_args['ssl'] = False
+    url = url.set(drivername='postgresql+asyncpg').difference_update_query(LIBPQ_ONLY_OPTIONS)
+    return create_async_engine(url, connect_args=connect_args, **kwargs)
+
+async_engine = None
+AsyncSessionLocal = None
+_async_engine_lock = threading.Lock()
+
+def get_async_engine():
+    """The shared AsyncEngine for DATABASE_URL, created on first use so asyncpg stays optional"""
+    global async_engine, AsyncSessionLocal
+    with _async_engine_lock:
+        if async_engine is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+            async_engine = make_async_engine(
+                DATABASE_URL,
+                connect_args={"timeout": 10},
+                pool_size=5,
+                max_overflow=10,
+                pool_timeout=30,
+                pool_recycle=1800,
+                pool_pre_ping=True
+            )
+            # Events are registered on the sync engine the async one wraps
+            event.listen(async_engine.sync_engine, 'handle_error', receive_handle_error)
+            track_compile_cache(async_engine.sync_engine)
+            # Loaded attributes stay usable after commit without another (awaited) load
+            AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=8.0):
+    """Exponential backoff with full jitter for the given zero-based attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
 def get_db():
+    # Liveness is handled by pool_pre_ping when the first statement checks out a connection
     db = SessionLocal()
     try:
-        # Test the connection with proper text() wrapper
-        db.execute(text("SELECT 1"))
         yield db
     except Exception as e:
         print(f"Database connection error: {str(e)}")
@@ -58,19 +187,53 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Async counterpart of get_db for the FastAPI service"""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            print(f"Database connection error: {str(e)}")
+            await db.rollback()
+            raise
+
 def get_db_with_retry(max_retries=3, delay=1):
-    """Get a database session with retry logic"""
+    """Get a database session with retry logic.
+
+    Checking out the connection runs the pool's pre-ping, so no extra probe
+    query is sent. Only connectivity errors are retried, with exponential
+    backoff and jitter; anything else is raised immediately.
+    """
     for attempt in range(max_retries):
+        db = SessionLocal()
         try:
-            db = SessionLocal()
-            # Test the connection with proper text() wrapper
-            db.execute(text("SELECT 1"))
+            db.connection()
             return db
         except Exception as e:
+            db.close()
+            if not is_transient_error(e):
+                raise
             print(f"Database connection attempt {attempt + 1} failed: {str(e)}")
-            if db:
-                db.close()
             if attempt < max_retries - 1:
-                time.sleep(delay)
+                time.sleep(backoff_delay(attempt, base_delay=delay))
             else:
-                raise 
\ No newline at end of file
+                raise
+
+def warm_pool(count):
+    """Open count pooled connections at once so the first queries skip the connect handshake.
+
+    The connections are returned to the pool straight away; count should not
+    exceed pool_size or the extra ones are closed again on checkin.
+    """
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="pool-warmup") as pool:
+        futures = [pool.submit(engine.connect) for _ in range(count)]
+    errors = []
+    for future in futures:
+        try:
+            future.result().close()
+        except Exception as e:
+            errors.append(e)
+    if errors:
+        raise errors[0]
+    return count
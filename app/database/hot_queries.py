@@ -0,0 +1,70 @@
+import functools
+import threading
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+
+# Builders of the statements the app runs on every refresh, by name
+HOT_QUERIES = {}
+
+def hot_query(builder):
+    """Register a builder of a lambda_stmt as a hot query; the decorated function takes db first and runs it.
+
+    A lambda statement is built once per code path; later calls only pull the
+    new bound values out of the closures, and the compiled SQL is reused from
+    the engine's cache. Values must be used directly in the lambdas: one handed
+    to a helper function inside a lambda is frozen at its first value, and so
+    are all of them after .execution_options() on the statement, which is why
+    the name for the cache statistics is passed to execute instead.
+    """
+    name = builder.__name__
+
+    @functools.wraps(builder)
+    def run(db, *args, **kwargs):
+        return db.execute(builder(*args, **kwargs), execution_options={'hot_query': name})
+
+    HOT_QUERIES[name] = builder
+    return run
+
+class CompileCacheStats:
+    """Compiled-statement cache hits and misses, per hot query"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, name, outcome):
+        with self._lock:
+            self._counts.setdefault(name, Counter())[outcome] += 1
+
+    def snapshot(self):
+        """{name: {'hits', 'misses', 'hit_ratio'}}; 'other' holds the statements that are not hot queries"""
+        with self._lock:
+            counts = {name: Counter(outcomes) for name, outcomes in self._counts.items()}
+        stats = {}
+        for name, outcomes in sorted(counts.items()):
+            hits = outcomes[CacheStats.CACHE_HIT]
+            total = sum(outcomes.values())
+            stats[name] = {'hits': hits, 'misses': total - hits, 'hit_ratio': hits / total if total else 0.0}
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+    def report(self):
+        lines = ["Compiled statement cache:"]
+        for name, entry in self.snapshot().items():
+            lines.append(f"  {name}: {entry['hits']} hit(s), {entry['misses']} miss(es), "
+                         f"{entry['hit_ratio']:.0%} hit ratio")
+        return "\n".join(lines)
+
+compile_cache_stats = CompileCacheStats()
+
+def track_compile_cache(engine, stats=compile_cache_stats):
+    """Count the compiled-cache outcome of every statement engine runs"""
+    @event.listens_for(engine, 'after_cursor_execute')
+    def receive_after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            stats.record(context.execution_options.get('hot_query', 'other'),
+                         getattr(context, 'cache_hit', CacheStats.NO_CACHE_KEY))
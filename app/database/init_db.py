@@ -3,7 +3,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.database.connection import Base, engine
-from app.models.models import User, Vehicle, Opportunity, AdasSystem, FileAttachment
+from app.models.models import User, Vehicle, Opportunity, AdasSystem, File, Blob
 
 def init_database():
     print("Creating database tables...")
@@ -0,0 +1,547 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.types import DateTime, Interval
+from sqlalchemy.dialects.postgresql import UUID
+from app.config import CACHE_DB_PATH
+from app.database.connection import is_transient_error
+from app.database.session_scope import session_scope
+from app.models.models import Opportunity, User, Vehicle, AdasSystem, ActivityLog, Comment, Notification
+from app.services.search_service import InvertedIndex, SEARCH_LIMIT
+from app.services.ticket_systems import names_system
+
+# Tables mirrored locally, with the expression that tells when a remote row last changed
+CACHED_TABLES = {
+    'opportunities': (Opportunity, func.coalesce(Opportunity.updated_at, Opportunity.created_at)),
+    'users': (User, func.coalesce(User.updated_at, User.created_at)),
+    'vehicles': (Vehicle, func.coalesce(Vehicle.last_modified_at, Vehicle.created_at)),
+    'adas_systems': (AdasSystem, AdasSystem.created_at),
+    # Comments are append-only, so created_at is a complete change marker
+    'comments': (Comment, Comment.created_at),
+}
+
+# Columns that never leave the server
+EXCLUDED_COLUMNS = {
+    'users': {'pin'},
+    'opportunities': {'search_vector'},
+    'comments': {'search_vector'},
+}
+
+# Tables the outbox may write to
+OUTBOX_TABLES = {
+    'opportunities': Opportunity,
+    'users': User,
+    'vehicles': Vehicle,
+    'activity_log': ActivityLog,
+    'comments': Comment,
+    'notifications': Notification,
+}
+
+# Column compared against the value the client saw, to detect conflicting remote edits
+CONFLICT_COLUMNS = {
+    'opportunities': 'updated_at',
+    'users': 'updated_at',
+    'vehicles': 'last_modified_at',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cached_rows (
+    table_name TEXT NOT NULL,
+    id TEXT NOT NULL,
+    changed_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (table_name, id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at TEXT
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    row_id TEXT,
+    op TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    base_value TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_status ON outbox (status, id);
+"""
+
+class OutboxConflict(Exception):
+    """A queued write whose row was changed remotely after the client read it"""
+
+def encode_value(value):
+    """Convert a column value into something json can store"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+def decode_value(column, value):
+    """Convert a stored json value back to the Python type of the column"""
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Interval):
+        return timedelta(seconds=value)
+    if isinstance(column.type, UUID):
+        return uuid.UUID(value)
+    return value
+
+class CachedRow:
+    """Read-only stand-in for a model instance, built from a cached row"""
+
+    def __init__(self, table, data):
+        for column in table.columns:
+            if column.name in data:
+                setattr(self, column.name, decode_value(column, data[column.name]))
+
+class CachedOpportunity(CachedRow):
+    """Cached opportunity with the attributes the dashboard cards read"""
+
+    def __init__(self, data, users, comment_count=0):
+        super().__init__(Opportunity.__table__, data)
+        self.creator = users.get(str(self.creator_id))
+        self.acceptor = users.get(str(self.acceptor_id)) if self.acceptor_id else None
+        self.comment_count = comment_count
+        # Files live on the server; cards show none while offline
+        self.files = []
+
+    @property
+    def display_title(self):
+        return f"{self.year} {self.make} {self.model}" if all([self.year, self.make, self.model]) else "No Vehicle Specified"
+
+class LocalCache:
+    """SQLite replica of reference data and tickets, plus an outbox for offline writes"""
+
+    def __init__(self, path=CACHE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._search_index = None  # Built on the first search, dropped when cached rows change
+
+    def _connection(self):
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Reads
+
+    def has_data(self, table_name='opportunities'):
+        """Return True once the table has been synced at least once"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT synced_at FROM sync_state WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def rows(self, table_name):
+        """Return the decoded json data of every cached row in a table"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "SELECT data FROM cached_rows WHERE table_name = ?", (table_name,)
+            )
+            return [json.loads(data) for (data,) in cursor]
+
+    def get_row(self, table_name, row_id):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data FROM cached_rows WHERE table_name = ? AND id = ?",
+                (table_name, str(row_id))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def users_by_id(self):
+        table = User.__table__
+        return {data['id']: CachedRow(table, data) for data in self.rows('users')}
+
+    def get_opportunities(self, status=None, user_id=None, creator_id=None, acceptor_id=None,
+                          created_from=None, created_to=None, system=None, portion=None):
+        """Return cached opportunities matching the dashboard filters, newest first"""
+        users = self.users_by_id()
+        comment_counts = self.comment_counts()
+        opportunities = []
+        for data in self.rows('opportunities'):
+            if data.get('archived_at'):
+                continue
+            if status and (data.get('status') or '').lower() != status.lower():
+                continue
+            if user_id and str(user_id) not in (data.get('creator_id'), data.get('acceptor_id')):
+                continue
+            if creator_id and data.get('creator_id') != str(creator_id):
+                continue
+            if acceptor_id and data.get('acceptor_id') != str(acceptor_id):
+                continue
+            if not names_system(data.get('systems'), system, portion):
+                continue
+            opportunity = CachedOpportunity(data, users, comment_counts.get(data['id'], 0))
+            if created_from and (not opportunity.created_at or opportunity.created_at < created_from):
+                continue
+            if created_to and (not opportunity.created_at or opportunity.created_at > created_to):
+                continue
+            opportunities.append(opportunity)
+
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        opportunities.sort(key=lambda opp: opp.created_at or epoch, reverse=True)
+        return opportunities
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """Cached tickets matching every word of text, best match first"""
+        index = self._search_index
+        if index is None:
+            index = self._build_search_index()
+        matches = index.search(text, limit)
+        if not matches:
+            return []
+        users = self.users_by_id()
+        comment_counts = self.comment_counts()
+        opportunities = []
+        for opportunity_id in matches:
+            data = self.get_row('opportunities', opportunity_id)
+            if data:
+                opportunities.append(CachedOpportunity(data, users, comment_counts.get(opportunity_id, 0)))
+        return opportunities
+
+    def _build_search_index(self):
+        index = InvertedIndex()
+        visible = set()
+        for data in self.rows('opportunities'):
+            if data.get('archived_at'):
+                continue
+            systems = data.get('systems') if isinstance(data.get('systems'), list) else []
+            codes = ' '.join(str(entry.get('system', '')) for entry in systems if isinstance(entry, dict))
+            created_at = data.get('created_at')
+            index.add(data['id'], [
+                (' '.join(str(data.get(key) or '') for key in ('title', 'year', 'make', 'model')), 'A'),
+                (codes, 'A'),
+                (data.get('description'), 'B'),
+            ], datetime.fromisoformat(created_at) if created_at else None)
+            visible.add(data['id'])
+        for data in self.rows('comments'):
+            if data.get('opportunity_id') in visible:
+                index.add(data['id'], [(data.get('text'), 'C')], ticket_id=data['opportunity_id'])
+        self._search_index = index
+        return index
+
+    def comment_counts(self):
+        with self._lock:
+            cursor = self._connection().execute(
+                "SELECT json_extract(data, '$.opportunity_id'), COUNT(*) FROM cached_rows "
+                "WHERE table_name = 'comments' GROUP BY 1"
+            )
+            return dict(cursor.fetchall())
+
+    def get_comments(self, opportunity_id, before=None, limit=20):
+        """Cached comments of one ticket older than the (created_at, id) cursor, newest first"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "SELECT data FROM cached_rows WHERE table_name = 'comments' "
+                "AND json_extract(data, '$.opportunity_id') = ?",
+                (str(opportunity_id),)
+            )
+            rows = [json.loads(data) for (data,) in cursor]
+        table = Comment.__table__
+        comments = [CachedRow(table, data) for data in rows]
+        comments.sort(key=lambda comment: (comment.created_at, str(comment.id)), reverse=True)
+        if before is not None:
+            comments = [c for c in comments if (c.created_at, str(c.id)) < (before[0], str(before[1]))]
+        return comments[:limit]
+
+    def get_vehicles(self):
+        table = Vehicle.__table__
+        return [CachedRow(table, data) for data in self.rows('vehicles')]
+
+    def get_systems(self):
+        table = AdasSystem.__table__
+        return [CachedRow(table, data) for data in self.rows('adas_systems')]
+
+    # Sync
+
+    def _pending_row_ids(self, conn, table_name):
+        return {row_id for (row_id,) in conn.execute(
+            "SELECT DISTINCT row_id FROM outbox WHERE table_name = ? AND status = 'pending'",
+            (table_name,)
+        )}
+
+    def _cached_columns(self, table_name):
+        model, _ = CACHED_TABLES[table_name]
+        excluded = EXCLUDED_COLUMNS.get(table_name, set())
+        return [column for column in model.__table__.columns if column.name not in excluded]
+
+    def _store_row(self, conn, table_name, columns, record):
+        """Cache a row fetched with _cached_columns() and its changed_at; returns its id"""
+        data = {column.name: encode_value(record._mapping[column.name]) for column in columns}
+        conn.execute(
+            "INSERT OR REPLACE INTO cached_rows (table_name, id, changed_at, data) VALUES (?, ?, ?, ?)",
+            (table_name, data['id'], encode_value(record._mapping['changed_at']), json.dumps(data))
+        )
+        return data['id']
+
+    def sync_table(self, table_name, full=False):
+        """Pull rows changed since the table's watermark; returns the number of rows stored"""
+        model, changed_at = CACHED_TABLES[table_name]
+        columns = self._cached_columns(table_name)
+
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT watermark FROM sync_state WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        watermark = None if full or not row or not row[0] else datetime.fromisoformat(row[0])
+
+        query = select(*columns, changed_at.label('changed_at'))
+        if watermark is not None:
+            # Rows that share the watermark timestamp are fetched again; upserts make that harmless
+            query = query.where(changed_at >= watermark)
+
+        with session_scope(read_only=True) as db:
+            result = db.execute(query).all()
+
+        new_watermark = watermark
+        with self._lock:
+            conn = self._connection()
+            # Local edits waiting in the outbox win until they are replayed
+            pending = self._pending_row_ids(conn, table_name)
+            with conn:
+                if full:
+                    # A full sync also drops rows that were deleted remotely
+                    conn.execute(
+                        "DELETE FROM cached_rows WHERE table_name = ? AND id NOT IN "
+                        "(SELECT row_id FROM outbox WHERE table_name = ? AND status = 'pending')",
+                        (table_name, table_name)
+                    )
+                stored = 0
+                for record in result:
+                    # Skipped rows may be passed by the watermark; refresh_rows() fetches
+                    # them again if their outbox entries are rejected
+                    if str(record._mapping['id']) in pending:
+                        continue
+                    self._store_row(conn, table_name, columns, record)
+                    row_changed_at = record._mapping['changed_at']
+                    stored += 1
+                    if row_changed_at and (new_watermark is None or row_changed_at > new_watermark):
+                        new_watermark = row_changed_at
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (table_name, watermark, synced_at) VALUES (?, ?, ?)",
+                    (table_name, encode_value(new_watermark), datetime.now(timezone.utc).isoformat())
+                )
+        if stored or full:
+            self._search_index = None
+        return stored
+
+    def refresh_rows(self, table_name, row_ids):
+        """Replace the cached copies of row_ids with the server's, dropping those the server does not have.
+
+        Rows with other local edits still pending keep them.
+        """
+        model, changed_at = CACHED_TABLES[table_name]
+        columns = self._cached_columns(table_name)
+        table = model.__table__
+        ids = [decode_value(table.c.id, row_id) for row_id in row_ids]
+        with session_scope(read_only=True) as db:
+            result = db.execute(select(*columns, changed_at.label('changed_at')).where(table.c.id.in_(ids))).all()
+
+        with self._lock:
+            conn = self._connection()
+            pending = self._pending_row_ids(conn, table_name)
+            with conn:
+                for row_id in row_ids:
+                    if row_id not in pending:
+                        conn.execute("DELETE FROM cached_rows WHERE table_name = ? AND id = ?", (table_name, row_id))
+                for record in result:
+                    if str(record._mapping['id']) not in pending:
+                        self._store_row(conn, table_name, columns, record)
+        self._search_index = None
+
+    def sync(self, full=False):
+        """Sync every cached table; returns rows stored per table"""
+        return {table_name: self.sync_table(table_name, full=full) for table_name in CACHED_TABLES}
+
+    # Outbox
+
+    def new_group(self):
+        """Return an id that ties several queued writes into one action"""
+        return str(uuid.uuid4())
+
+    def queue_update(self, table_name, row_id, changes, base_value, group_id=None):
+        """Queue an update and apply it to the cached row right away.
+
+        base_value is the conflict column (updated_at) as the client last saw it;
+        the update is only replayed if the server still holds that value.
+        """
+        payload = {key: encode_value(value) for key, value in changes.items()}
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO outbox (group_id, table_name, row_id, op, payload, base_value, created_at) "
+                    "VALUES (?, ?, ?, 'update', ?, ?, ?)",
+                    (group_id or self.new_group(), table_name, str(row_id), json.dumps(payload),
+                     json.dumps(encode_value(base_value)), datetime.now(timezone.utc).isoformat())
+                )
+                row = conn.execute(
+                    "SELECT data FROM cached_rows WHERE table_name = ? AND id = ?",
+                    (table_name, str(row_id))
+                ).fetchone()
+                if row:
+                    data = json.loads(row[0])
+                    data.update(payload)
+                    conn.execute(
+                        "UPDATE cached_rows SET data = ? WHERE table_name = ? AND id = ?",
+                        (json.dumps(data), table_name, str(row_id))
+                    )
+        self._search_index = None
+
+    def queue_insert(self, table_name, values, group_id=None):
+        """Queue an insert; rows of cached tables are also visible locally right away"""
+        values = dict(values)
+        values.setdefault('id', str(uuid.uuid4()))
+        payload = {key: encode_value(value) for key, value in values.items()}
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO outbox (group_id, table_name, row_id, op, payload, created_at) "
+                    "VALUES (?, ?, ?, 'insert', ?, ?)",
+                    (group_id or self.new_group(), table_name, payload['id'], json.dumps(payload),
+                     datetime.now(timezone.utc).isoformat())
+                )
+                if table_name in CACHED_TABLES:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cached_rows (table_name, id, changed_at, data) VALUES (?, ?, NULL, ?)",
+                        (table_name, payload['id'], json.dumps(payload))
+                    )
+        self._search_index = None
+
+    def pending_count(self):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def conflicts(self):
+        """Return queued writes that were rejected because the row changed remotely"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "SELECT id, table_name, row_id, payload, last_error, created_at FROM outbox "
+                "WHERE status = 'conflict' ORDER BY id"
+            )
+            return [
+                {'id': entry_id, 'table_name': table_name, 'row_id': row_id,
+                 'changes': json.loads(payload), 'error': error, 'created_at': created_at}
+                for entry_id, table_name, row_id, payload, error, created_at in cursor
+            ]
+
+    def discard(self, entry_id):
+        """Drop a conflicting or failed outbox entry"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def _apply_entry(self, db, table_name, row_id, op, payload, base_value):
+        table = OUTBOX_TABLES[table_name].__table__
+        values = {key: decode_value(table.c[key], value) for key, value in payload.items()}
+        if op == 'insert':
+            db.execute(insert(table).values(**values))
+            return
+
+        statement = update(table).where(table.c.id == decode_value(table.c.id, row_id))
+        conflict_column = CONFLICT_COLUMNS.get(table_name)
+        if conflict_column:
+            base = decode_value(table.c[conflict_column], json.loads(base_value)) if base_value else None
+            statement = statement.where(table.c[conflict_column].is_not_distinct_from(base))
+        result = db.execute(statement.values(**values))
+        if result.rowcount == 0:
+            raise OutboxConflict(f"{table_name} {row_id} was changed on the server")
+
+    def replay_outbox(self):
+        """Send queued writes to the server, one transaction per action.
+
+        Stops at the first connectivity error so the queue keeps its order.
+        Returns counts of applied, conflicting and failed actions.
+        """
+        with self._lock:
+            entries = self._connection().execute(
+                "SELECT id, group_id, table_name, row_id, op, payload, base_value FROM outbox "
+                "WHERE status = 'pending' ORDER BY id"
+            ).fetchall()
+
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry[1], []).append(entry)
+
+        counts = {'applied': 0, 'conflicts': 0, 'failed': 0}
+        for group_id, group in groups.items():
+            try:
+                with session_scope() as db:
+                    for _, _, table_name, row_id, op, payload, base_value in group:
+                        self._apply_entry(db, table_name, row_id, op, json.loads(payload), base_value)
+            except OutboxConflict as e:
+                self._mark_group(group_id, 'conflict', str(e))
+                self._refresh_group(group)
+                counts['conflicts'] += 1
+                continue
+            except Exception as e:
+                if is_transient_error(e):
+                    self._mark_group(group_id, 'pending', str(e))
+                    print(f"Outbox replay paused, server unreachable: {str(e)}")
+                    break
+                self._mark_group(group_id, 'failed', str(e))
+                self._refresh_group(group)
+                counts['failed'] += 1
+                continue
+
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("DELETE FROM outbox WHERE group_id = ?", (group_id,))
+            counts['applied'] += 1
+        return counts
+
+    def _refresh_group(self, group):
+        """Put the server's rows back in place of the local edits of a rejected group"""
+        row_ids = {}
+        for _, _, table_name, row_id, *_ in group:
+            if table_name in CACHED_TABLES:
+                row_ids.setdefault(table_name, set()).add(row_id)
+        try:
+            for table_name, ids in row_ids.items():
+                self.refresh_rows(table_name, sorted(ids))
+        except Exception as e:
+            # The next full sync corrects them
+            print(f"Could not refresh rejected rows from the server: {str(e)}")
+
+    def _mark_group(self, group_id, status, error):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE group_id = ?",
+                    (status, error, group_id)
+                )
+
+local_cache = LocalCache()
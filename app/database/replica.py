@@ -0,0 +1,114 @@
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from app.config import READ_REPLICA_URL, REPLICA_MAX_LAG, REPLICA_CHECK_INTERVAL, REPLICA_MAX_BACKOFF
+from app.database.connection import engine, ENGINE_OPTIONS
+from app.database.hot_queries import track_compile_cache
+
+# Seconds of WAL the replica has yet to replay; 0 when it has caught up or is not a standby
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+class ReplicaRouter:
+    """Chooses the engine for reads that may be served by the replica.
+
+    The replica is used only while it answers and is at most max_lag seconds
+    behind, and not within max_lag seconds of a commit by this client, so a
+    user always sees their own changes. Otherwise reads go to the primary.
+    The lag is probed every check_interval seconds on a background thread, so
+    a read never waits for the replica to answer; until the first probe
+    returns, and once a measurement is max_lag seconds overdue, reads go to
+    the primary. After failed probes the interval doubles up to max_backoff.
+    """
+
+    def __init__(self, primary, replica=None, max_lag=REPLICA_MAX_LAG, check_interval=REPLICA_CHECK_INTERVAL,
+                 max_backoff=REPLICA_MAX_BACKOFF):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self.last_write = None
+        self.lag = None
+        self.checked_at = None
+        self.failures = 0
+        self.next_check = None
+        self._probing = False
+        if replica is not None:
+            event.listen(Session, 'after_commit', self.receive_commit)
+
+    def receive_commit(self, session):
+        # User actions commit through sessions; background writers such as the
+        # audit log use connections of their own and are not this user's writes
+        if session.get_bind() is self.primary:
+            self.note_write()
+
+    def note_write(self):
+        with self._lock:
+            self.last_write = time.monotonic()
+
+    def probe(self):
+        """Measure the lag now and schedule the next probe; returns the lag, or None when the replica cannot be reached"""
+        try:
+            with self.replica.connect() as connection:
+                lag = connection.execute(LAG_QUERY).scalar()
+            # Nothing replayed yet since the standby started
+            lag = float('inf') if lag is None else float(lag)
+        except Exception as e:
+            lag = None
+            error = e
+        with self._lock:
+            self.failures = 0 if lag is not None else self.failures + 1
+            delay = min(self.check_interval * 2 ** self.failures, self.max_backoff)
+            self.lag = lag
+            self.checked_at = time.monotonic()
+            self.next_check = self.checked_at + delay
+            self._probing = False
+        if lag is None:
+            print(f"Read replica unavailable, reading from the primary for {delay:.0f}s: {str(error)}")
+        return lag
+
+    def replica_lag(self):
+        """The last measured lag, or None when the replica could not be reached or has not been measured lately.
+
+        A probe that is due is started in the background; this never waits for it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = not self._probing and (self.next_check is None or now >= self.next_check)
+            if due:
+                self._probing = True
+            lag = self.lag
+            if self.checked_at is None or now - self.checked_at > self.check_interval + self.max_lag:
+                lag = None
+        if due:
+            threading.Thread(target=self.probe, name="replica-probe", daemon=True).start()
+        return lag
+
+    def read_bind(self):
+        """The replica if it may serve a read right now, else the primary"""
+        if self.replica is None:
+            return self.primary
+        lag = self.replica_lag()
+        if lag is None:
+            return self.primary
+        if lag > self.max_lag:
+            print(f"Read replica is {lag:.1f}s behind, reading from the primary")
+            return self.primary
+        with self._lock:
+            wrote_recently = self.last_write is not None and time.monotonic() - self.last_write <= self.max_lag
+        return self.primary if wrote_recently else self.replica
+
+replica_engine = None
+if READ_REPLICA_URL:
+    replica_engine = create_engine(READ_REPLICA_URL, **ENGINE_OPTIONS)
+    track_compile_cache(replica_engine)
+
+replica_router = ReplicaRouter(engine, replica_engine)
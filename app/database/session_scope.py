@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import engine
+from app.database.replica import replica_router
+
+# Sessions handed out per user action. Objects stay readable after commit because
+# the action owns the whole transaction and nothing else writes through them.
+ActionSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+_current_session = ContextVar('current_session', default=None)
+
+def current_session():
+    """Return the session of the action in progress, or None outside of one"""
+    return _current_session.get()
+
+@contextmanager
+def session_scope(read_only=False, replica=False):
+    """Provide one session and one transaction for a user action.
+
+    Scopes opened while another scope is active join it instead of creating a
+    new session, so helpers such as load_opportunities() or check_updates()
+    called from update_status() share its connection and identity map.
+    A write scope nested inside a read-only one upgrades the outer scope so it
+    commits. A nested write scope runs in a savepoint: an error in it undoes
+    only its own statements and propagates, and the outermost scope commits
+    or rolls back the action depending on whether the error reaches it.
+    A nested read-only scope takes no savepoint, so reads cost no extra round
+    trips; a database error in one leaves the transaction aborted, and the
+    action rolls back when the outermost scope tries to commit.
+    Read-only scopes never flush or commit; their transaction is released
+    when the connection returns to the pool.
+    replica=True makes a read-only scope that the replica router may serve
+    from the read replica; nested inside another scope it reads through that
+    scope's session, and a write scope cannot be nested inside it.
+    """
+    read_only = read_only or replica
+    db = _current_session.get()
+    if db is not None:
+        if read_only:
+            yield db
+            return
+        if db.info.get('replica'):
+            raise RuntimeError("A write cannot join a scope that reads from the replica")
+        db.info['read_only'] = False
+        # A failed step is undone back to its savepoint, so the action's earlier
+        # work survives and the outermost scope decides whether to commit
+        savepoint = db.begin_nested()
+        try:
+            yield db
+        except Exception:
+            if savepoint.is_active:
+                savepoint.rollback()
+            raise
+        if savepoint.is_active:
+            savepoint.commit()
+        return
+
+    bind = replica_router.read_bind() if replica else engine
+    db = ActionSessionLocal(bind=bind)
+    db.info['read_only'] = read_only
+    db.info['replica'] = bind is not engine
+    token = _current_session.set(db)
+    try:
+        yield db
+        if not db.info['read_only']:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        db.close()
@@ -4,7 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from sqlalchemy import text
 from app.database.connection import SessionLocal
-from app.models.models import User, Opportunity, ActivityLog, Notification, File, FileAttachment
+from app.models.models import User, Opportunity, ActivityLog, Notification, File, Blob
 
 def check_users_table():
     """Check the number of users in the users table"""
@@ -21,14 +21,14 @@ def clear_all_tables():
     db = SessionLocal()
     try:
         # Delete in order of dependencies
-        print("Deleting file attachments...")
-        deleted_count = db.query(FileAttachment).delete()
-        print(f"Deleted {deleted_count} file attachments")
-        
         print("Deleting files...")
         deleted_count = db.query(File).delete()
         print(f"Deleted {deleted_count} files")
         
+        print("Deleting blobs...")
+        deleted_count = db.query(Blob).delete()
+        print(f"Deleted {deleted_count} blobs")
+        
         print("Deleting notifications...")
         deleted_count = db.query(Notification).delete()
         print(f"Deleted {deleted_count} notifications")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Table, Boolean, JSON, LargeBinary, Interval
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Table, Boolean, JSON, LargeBinary, Interval, Index, UniqueConstraint, select
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR, ARRAY
+from sqlalchemy.orm import relationship, column_property, deferred
 from sqlalchemy.sql import func
 import uuid
 from ..database.connection import Base
@@ -8,13 +8,19 @@ from ..database.connection import Base
 def generate_uuid():
     return str(uuid.uuid4())
 
-# Many-to-many relationship table for opportunities and systems
+# Many-to-many relationship table for opportunities and systems. One row per
+# ticket and catalog system in Opportunity.systems, written by a trigger that
+# keeps it in step with the JSON (migration 019); read it, do not write it.
 opportunity_systems = Table(
     'opportunity_systems', 
     Base.metadata,
     Column('id', UUID(as_uuid=True), primary_key=True, default=generate_uuid),
-    Column('opportunity_id', UUID(as_uuid=True), ForeignKey('opportunities.id')),
-    Column('system_id', UUID(as_uuid=True), ForeignKey('adas_systems.id'))
+    Column('opportunity_id', UUID(as_uuid=True), ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=False),
+    Column('system_id', UUID(as_uuid=True), ForeignKey('adas_systems.id', ondelete='CASCADE'), nullable=False),
+    Column('affected_portions', ARRAY(Text), nullable=False, server_default='{}'),
+    UniqueConstraint('opportunity_id', 'system_id', name='uq_opportunity_systems_ticket_system'),
+    # System filters
+    Index('ix_opportunity_systems_system', 'system_id', 'opportunity_id'),
 )
 
 class User(Base):
@@ -46,6 +52,10 @@ class User(Base):
 
 class Vehicle(Base):
     __tablename__ = "vehicles"
+    # Catalog imports upsert on this (migration 017)
+    __table_args__ = (
+        UniqueConstraint('year', 'make', 'model', name='uq_vehicles_year_make_model'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
     year = Column(String, nullable=False)
@@ -53,9 +63,9 @@ class Vehicle(Base):
     model = Column(String, nullable=False)
     is_custom = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True))
-    created_by_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
+    created_by_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'))
     last_modified_at = Column(DateTime(timezone=True))
-    last_modified_by_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
+    last_modified_by_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'))
     notes = Column(String)
 
     # Relationships
@@ -67,43 +77,88 @@ class Vehicle(Base):
 
 class Opportunity(Base):
     __tablename__ = "opportunities"
+    __table_args__ = (
+        Index('ix_opportunities_created_at', 'created_at'),
+        Index('ix_opportunities_created_at_id', 'created_at', 'id'),
+        Index('ix_opportunities_title', 'title'),
+        Index('ix_opportunities_search_vector', 'search_vector', postgresql_using='gin'),
+        # Containment filters on systems: portions, and codes outside the ADAS catalog
+        Index('ix_opportunities_systems', 'systems', postgresql_using='gin',
+              postgresql_ops={'systems': 'jsonb_path_ops'}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
     title = Column(String, nullable=False)
     description = Column(Text)
     status = Column(String)
     creator_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
-    acceptor_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
+    acceptor_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'))
     year = Column(String)
     make = Column(String)
     model = Column(String)
     systems = Column(JSONB)
     affected_portions = Column(JSONB)
     meta_data = Column(JSONB)
-    comments = Column(JSONB, default=list)  # Store comments as a list of dictionaries
     created_at = Column(DateTime(timezone=True))
     updated_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     started_at = Column(DateTime(timezone=True))
     response_time = Column(Interval)
     work_time = Column(Interval)
+    archived_at = Column(DateTime(timezone=True))  # Soft delete; archived tickets are hidden from the boards
+    # Title, vehicle, system codes and description; kept current by a trigger (migration 015)
+    search_vector = deferred(Column(TSVECTOR))
 
     # Relationships
     creator = relationship("User", back_populates="created_opportunities", foreign_keys=[creator_id])
     acceptor = relationship("User", back_populates="accepted_opportunities", foreign_keys=[acceptor_id])
-    files = relationship("File", back_populates="opportunity")
-    notifications = relationship("Notification", back_populates="opportunity")
-    activity_logs = relationship("ActivityLog", back_populates="opportunity")
-    systems_rel = relationship("AdasSystem", secondary="opportunity_systems", back_populates="opportunities")
-    file_attachments = relationship("FileAttachment", back_populates="opportunity")
-    attachments = relationship("Attachment", back_populates="opportunity")
+    files = relationship("File", back_populates="opportunity", passive_deletes=True)
+    notifications = relationship("Notification", back_populates="opportunity", passive_deletes=True)
+    activity_logs = relationship("ActivityLog", back_populates="opportunity", passive_deletes=True)
+    systems_rel = relationship("AdasSystem", secondary="opportunity_systems", back_populates="opportunities", viewonly=True)
+    comments = relationship("Comment", back_populates="opportunity", order_by="Comment.created_at", lazy="dynamic", passive_deletes=True)
 
     @property
     def display_title(self):
         return f"{self.year} {self.make} {self.model}" if all([self.year, self.make, self.model]) else "No Vehicle Specified"
 
+class Comment(Base):
+    __tablename__ = "comments"
+    __table_args__ = (
+        # Serves both the per-ticket history pages and the comment counts
+        Index('ix_comments_opportunity_created', 'opportunity_id', 'created_at', 'id'),
+        Index('ix_comments_created_at', 'created_at'),
+        Index('ix_comments_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
+    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'))
+    user_name = Column(String)  # Name at the time of writing
+    text = Column(Text, nullable=False)
+    comment_type = Column(String)  # Status the ticket moved to, for comments left with a status change
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    search_vector = deferred(Column(TSVECTOR))  # Kept current by a trigger (migration 015)
+
+    # Relationships
+    opportunity = relationship("Opportunity", back_populates="comments")
+    user = relationship("User")
+
+# Deferred so only views that show the count pay for the subquery
+Opportunity.comment_count = column_property(
+    select(func.count(Comment.id))
+    .where(Comment.opportunity_id == Opportunity.id)
+    .correlate_except(Comment)
+    .scalar_subquery(),
+    deferred=True
+)
+
 class AdasSystem(Base):
     __tablename__ = "adas_systems"
+    # Tickets name systems by code; populate_systems.py upserts on it (migration 019)
+    __table_args__ = (
+        UniqueConstraint('code', name='uq_adas_systems_code'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
     code = Column(String, nullable=False)
@@ -112,26 +167,35 @@ class AdasSystem(Base):
     created_at = Column(DateTime(timezone=True))
 
     # Relationships
-    opportunities = relationship("Opportunity", secondary="opportunity_systems", back_populates="systems_rel")
+    opportunities = relationship("Opportunity", secondary="opportunity_systems", back_populates="systems_rel", viewonly=True)
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    hash = Column(String, primary_key=True)  # SHA-256 of the content; 'legacy-' keys for rows migrated without one
+    storage_path = Column(String, nullable=False, unique=True)  # Path in storage system
+    size = Column(Integer)
+    mime_type = Column(String)
+    created_at = Column(DateTime(timezone=True))
 
 class File(Base):
+    """An attachment of a ticket; identical uploads share one Blob"""
     __tablename__ = "files"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
-    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id'), nullable=False)
+    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=False)
     uploader_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    blob_hash = Column(String, ForeignKey('blobs.hash'), nullable=False, index=True)
     name = Column(String, nullable=False)
     original_name = Column(String, nullable=False)  # Original filename before storage
-    storage_path = Column(String, nullable=False)  # Path in storage system
-    size = Column(Integer)
-    mime_type = Column(String)
-    hash = Column(String)
     created_at = Column(DateTime(timezone=True))
     is_deleted = Column(Boolean, default=False)  # Soft delete flag
 
     # Relationships
     opportunity = relationship("Opportunity", back_populates="files")
     uploader = relationship("User")
+    # Joined so listing a ticket's files stays one query
+    blob = relationship("Blob", lazy="joined", innerjoin=True)
 
     @property
     def display_name(self):
@@ -143,40 +207,28 @@ class File(Base):
         """Return the URL/path to access this file"""
         return f"/files/{self.id}/{self.name}"
 
-class FileAttachment(Base):
-    __tablename__ = "file_attachments"
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
-    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id'))
-    filename = Column(String, nullable=False)
-    file_type = Column(String)
-    file_path = Column(String, nullable=False)
-    file_size = Column(Integer)
-    uploaded_at = Column(DateTime(timezone=True))
-    uploaded_by_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
-
-    # Relationships
-    opportunity = relationship("Opportunity", back_populates="file_attachments")
-    uploaded_by = relationship("User")
+    @property
+    def storage_path(self):
+        return self.blob.storage_path
 
-class Attachment(Base):
-    __tablename__ = "attachments"
+    @property
+    def hash(self):
+        return self.blob_hash
 
-    id = Column(Integer, primary_key=True)
-    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id'))
-    file_path = Column(String, nullable=False)
-    file_type = Column(String)
-    created_at = Column(DateTime(timezone=True))
+    @property
+    def size(self):
+        return self.blob.size
 
-    # Relationships
-    opportunity = relationship("Opportunity", back_populates="attachments")
+    @property
+    def mime_type(self):
+        return self.blob.mime_type
 
 class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
-    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id'))
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id', ondelete='CASCADE'))
     type = Column(String, nullable=False)
     message = Column(Text, nullable=False)
     read = Column(Boolean)
@@ -188,13 +240,18 @@ class Notification(Base):
 
 class ActivityLog(Base):
     __tablename__ = "activity_log"
+    # Range-partitioned by month of created_at in the database (migration 018), where
+    # the primary key is (id, created_at); entries are still looked up by id alone
+    __table_args__ = (
+        Index('ix_activity_log_created_at', 'created_at'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=generate_uuid)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
-    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id'))
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    opportunity_id = Column(UUID(as_uuid=True), ForeignKey('opportunities.id', ondelete='CASCADE'))
     action = Column(String, nullable=False)
     details = Column(JSONB)
-    created_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     # Relationships
     user = relationship("User")
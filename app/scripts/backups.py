@@ -0,0 +1,49 @@
+"""Create, list and restore backups of the tickets, their comments and the users.
+
+    python app/scripts/backups.py create
+    python app/scripts/backups.py create --full --compression gzip
+    python app/scripts/backups.py list
+    python app/scripts/backups.py restore
+    python app/scripts/backups.py restore 20250626_204004_123456
+
+create backs up what changed since the latest backup, or everything when
+there is none yet or --full is given. restore loads the full backup and the
+incremental ones up to the given backup (default the latest) in one
+transaction, and deletes again the rows deleted up to that backup.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.config import BACKUP_DIR
+from app.services.backup import create_backup, list_backups, restore_backup
+
+def main():
+    parser = argparse.ArgumentParser(description="SI Opportunity backups")
+    parser.add_argument('--dir', default=BACKUP_DIR, help="Directory holding the backups")
+    commands = parser.add_subparsers(dest='command', required=True)
+    create = commands.add_parser('create', help="Back up the changes since the latest backup")
+    create.add_argument('--full', action='store_true', help="Back up everything and start a new chain")
+    create.add_argument('--compression', choices=['zstd', 'gzip'])
+    commands.add_parser('list', help="Show the backups")
+    restore = commands.add_parser('restore', help="Restore the database to a backup")
+    restore.add_argument('backup_id', nargs='?', help="Backup to restore to, default the latest")
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        manifest = create_backup(full=args.full, compression=args.compression, backup_dir=args.dir)
+        print(f"✓ Backup {manifest['id']} created in {args.dir}")
+    elif args.command == 'list':
+        for manifest in list_backups(args.dir):
+            rows = sum(entry['rows'] for entry in manifest['tables'].values())
+            kind = f"after {manifest['parent']}" if manifest['parent'] else "full"
+            print(f"{manifest['id']}  {kind:<32} {rows:>8} row(s)  {manifest['compression']}")
+    else:
+        restore_backup(args.backup_id, backup_dir=args.dir)
+
+if __name__ == "__main__":
+    main()
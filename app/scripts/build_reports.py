@@ -0,0 +1,63 @@
+"""Refresh the daily reporting rollups and render them to XLSX or CSV.
+
+    python app/scripts/build_reports.py refresh
+    python app/scripts/build_reports.py refresh --rebuild
+    python app/scripts/build_reports.py render --from 2025-06-02 --to 2025-06-08 --by team -o weekly.xlsx
+
+Schedule `refresh` (Task Scheduler or cron) to keep the rollups current;
+`render` refreshes first unless --no-refresh is given.
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.database.session_scope import session_scope
+from app.services.reporting import DIMENSIONS, refresh_rollups, fetch_report, write_report
+
+def refresh(rebuild=False):
+    start = time.perf_counter()
+    with session_scope() as db:
+        days = refresh_rollups(db, rebuild=rebuild)
+    print(f"Refreshed rollups for {days} day(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def render(args):
+    if not args.no_refresh:
+        refresh()
+
+    start = time.perf_counter()
+    with session_scope(read_only=True) as db:
+        rows = fetch_report(db, args.start, args.end, args.by, daily=args.daily)
+    write_report(rows, args.output, args.by, daily=args.daily)
+    print(f"Wrote {len(rows)} row(s) to {args.output} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="SI Opportunity reporting rollups")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    refresh_parser = commands.add_parser('refresh', help="Update rollups for days changed since the last refresh")
+    refresh_parser.add_argument('--rebuild', action='store_true', help="Recompute the whole history")
+
+    today = date.today()
+    render_parser = commands.add_parser('render', help="Write a report for a date range")
+    render_parser.add_argument('--from', dest='start', type=date.fromisoformat, default=today - timedelta(days=6))
+    render_parser.add_argument('--to', dest='end', type=date.fromisoformat, default=today)
+    render_parser.add_argument('--by', choices=DIMENSIONS, default='all')
+    render_parser.add_argument('--daily', action='store_true', help="One row per day and value")
+    render_parser.add_argument('-o', '--output', default=f"SI_Report_{today.strftime('%Y%m%d')}.xlsx",
+                               help="Output path; .csv writes CSV, anything else XLSX")
+    render_parser.add_argument('--no-refresh', action='store_true')
+
+    args = parser.parse_args()
+    if args.command == 'refresh':
+        refresh(rebuild=args.rebuild)
+    else:
+        render(args)
+
+if __name__ == "__main__":
+    main()
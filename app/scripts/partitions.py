@@ -0,0 +1,57 @@
+"""Create upcoming monthly partitions and retire old ones.
+
+    python app/scripts/partitions.py
+    python app/scripts/partitions.py --list
+    python app/scripts/partitions.py --keep-months 24 --archive
+    python app/scripts/partitions.py --keep-months 24 --drop
+
+Run it at least monthly (e.g. from a scheduled task): it creates the
+partitions of the current month and the next --months-ahead months, and
+moves entries that fell into the default partition into their month. With
+--keep-months, older months are detached; --archive writes each one to
+PARTITION_ARCHIVE_DIR as compressed CSV and drops it, --drop drops it without
+a copy, and otherwise it is left in the database as a table of its own.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from sqlalchemy import text
+from app.config import ACTIVITY_LOG_RETENTION_MONTHS, PARTITION_ARCHIVE_DIR, PARTITION_MONTHS_AHEAD
+from app.database.connection import engine
+from app.services.partitions import PARTITIONED_TABLES, ensure_partitions, detach_partitions, list_partitions
+
+def main():
+    parser = argparse.ArgumentParser(description="SI Opportunity partition maintenance")
+    parser.add_argument('--table', choices=PARTITIONED_TABLES, action='append',
+                        help="Table to maintain, default all partitioned tables")
+    parser.add_argument('--list', action='store_true', help="Show the partitions and their row counts")
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument('--keep-months', type=int, default=ACTIVITY_LOG_RETENTION_MONTHS,
+                        help="Detach months older than this many, 0 keeps everything")
+    retire = parser.add_mutually_exclusive_group()
+    retire.add_argument('--archive', action='store_true', help="Archive detached months as CSV and drop them")
+    retire.add_argument('--drop', action='store_true', help="Drop detached months without a copy")
+    parser.add_argument('--archive-dir', default=PARTITION_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    for table in args.table or PARTITIONED_TABLES:
+        if args.list:
+            with engine.connect() as connection:
+                for name, month in list_partitions(connection, table):
+                    rows = connection.execute(text(f'SELECT COUNT(*) FROM "{name}"')).scalar()
+                    print(f"{name:28} {month:%Y-%m}  {rows:>10} row(s)")
+            continue
+        created = ensure_partitions(table, months_ahead=args.months_ahead)
+        detached = []
+        if args.keep_months:
+            detached = detach_partitions(table, args.keep_months, archive=args.archive, drop=args.drop,
+                                         archive_dir=args.archive_dir)
+        print(f"✓ {table}: {len(created)} partition(s) created, {len(detached)} detached")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from pathlib import Path
 root_dir = Path(__file__).parent.parent.parent
 sys.path.append(str(root_dir))
 
+from sqlalchemy.dialects.postgresql import insert
 from app.models import SessionLocal, AdasSystem
 
 ADAS_SYSTEMS = [
@@ -128,19 +129,13 @@ ADAS_SYSTEMS = [
 def populate_systems():
     db = SessionLocal()
     try:
-        # Clear existing data
-        db.query(AdasSystem).delete()
-        db.commit()
-        
-        # Add new systems
-        for system in ADAS_SYSTEMS:
-            adas_system = AdasSystem(
-                code=system['code'],
-                name=system['name'],
-                description=system['description']
-            )
-            db.add(adas_system)
-        
+        # Upserted by code: tickets reference the existing rows through opportunity_systems
+        statement = insert(AdasSystem.__table__).values(ADAS_SYSTEMS)
+        db.execute(statement.on_conflict_do_update(
+            constraint='uq_adas_systems_code',
+            set_={'name': statement.excluded.name, 'description': statement.excluded.description}
+        ))
+        # Tickets already naming codes that were just added get their rows from the catalog triggers
         db.commit()
         print("Successfully populated ADAS systems!")
         
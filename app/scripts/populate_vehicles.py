@@ -1,104 +1,47 @@
-import csv
+"""Load the vehicle catalog from a CSV file, or copy a model year forward.
+
+    python app/scripts/populate_vehicles.py
+    python app/scripts/populate_vehicles.py path/to/catalog.csv
+    python app/scripts/populate_vehicles.py --copy-year 2025 2026
+
+The CSV needs Year, Make and Model columns and may have a Notes column. New
+vehicles are inserted and existing ones updated in place, so the import can
+be re-run safely.
+"""
+import argparse
 import sys
+import time
 from pathlib import Path
 
 # Add the project root directory to Python path
 root_dir = Path(__file__).parent.parent.parent
 sys.path.append(str(root_dir))
 
-from app.models import SessionLocal, Vehicle
+from app.database.session_scope import session_scope
+from app.services import vehicle_catalog
+
+def main():
+    parser = argparse.ArgumentParser(description="SI Opportunity vehicle catalog import")
+    parser.add_argument('csv_path', nargs='?', default=str(root_dir / 'VehicleDataSheet.csv'),
+                        help="Catalog CSV, VehicleDataSheet.csv by default")
+    parser.add_argument('--copy-year', nargs=2, metavar=('FROM_YEAR', 'TO_YEAR'),
+                        help="Add the catalog vehicles of FROM_YEAR for TO_YEAR instead of reading a CSV")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with session_scope() as db:
+        if args.copy_year:
+            counts = vehicle_catalog.copy_year(db, *args.copy_year)
+        else:
+            if not Path(args.csv_path).exists():
+                print(f"Error: Vehicle data file not found at {args.csv_path}")
+                sys.exit(1)
+            counts = vehicle_catalog.import_csv(db, args.csv_path)
 
-def populate_vehicles():
-    db = SessionLocal()
-    try:
-        # Read the CSV file
-        csv_path = Path(root_dir) / 'VehicleDataSheet.csv'
-        
-        if not csv_path.exists():
-            print(f"Error: Vehicle data file not found at {csv_path}")
-            return
-            
-        with open(csv_path, 'r', encoding='utf-8-sig') as file:
-            # First, let's check the CSV structure
-            sample = file.readline()
-            file.seek(0)  # Reset to start of file
-            
-            if ',' in sample:
-                delimiter = ','
-            elif ';' in sample:
-                delimiter = ';'
-            else:
-                delimiter = None
-            
-            csv_reader = csv.DictReader(file, delimiter=delimiter)
-            
-            # Get the actual fieldnames from the CSV
-            fieldnames = csv_reader.fieldnames
-            print(f"Found CSV columns: {fieldnames}")
-            
-            # Track unique combinations to avoid duplicates
-            existing_vehicles = set()
-            added_count = 0
-            
-            for row in csv_reader:
-                try:
-                    # Try to get year, make, model from the CSV columns
-                    year = int(str(row.get('Year', '')).strip())  # Convert to integer
-                    make = str(row.get('Make', '')).strip()
-                    model = str(row.get('Model', '')).strip()
-                    
-                    # Skip if missing required data
-                    if not all([year, make, model]):
-                        print(f"Skipping row due to missing data: {row}")
-                        continue
-                        
-                    # Create unique key for vehicle
-                    vehicle_key = (year, make, model)
-                    
-                    # Skip if we've already added this vehicle
-                    if vehicle_key in existing_vehicles:
-                        continue
-                        
-                    existing_vehicles.add(vehicle_key)
-                    
-                    # Create new vehicle entry
-                    vehicle = Vehicle(
-                        year=year,
-                        make=make,
-                        model=model,
-                        is_custom=False
-                    )
-                    
-                    # Print what we're about to add
-                    print(f"Adding vehicle: Year={vehicle.year}, Make={vehicle.make}, Model={vehicle.model}")
-                    
-                    db.add(vehicle)
-                    added_count += 1
-                    
-                    # Commit every 100 vehicles to avoid memory issues
-                    if added_count % 100 == 0:
-                        db.commit()
-                        print(f"Added {added_count} vehicles...")
-                    
-                except Exception as e:
-                    print(f"Error processing row {row}: {str(e)}")
-                    continue
-            
-            # Final commit for remaining vehicles
-            db.commit()
-            print(f"\nSuccessfully populated vehicle data! Added {added_count} unique vehicles.")
-            
-            # Query and print a few vehicles to verify data
-            print("\nVerifying data in database:")
-            vehicles = db.query(Vehicle).limit(5).all()
-            for v in vehicles:
-                print(f"Vehicle record: Year={v.year}, Make={v.make}, Model={v.model}")
-            
-    except Exception as e:
-        print(f"Error populating vehicle data: {str(e)}")
-        db.rollback()
-    finally:
-        db.close()
+    print(f"Imported {counts['vehicles']} vehicles in {time.monotonic() - started:.1f} s")
+    print(f"  Inserted: {counts['inserted']}, updated: {counts['updated']}, unchanged: {counts['unchanged']}")
+    if counts.get('skipped'):
+        print(f"  Skipped invalid rows: {counts['skipped']}")
 
 if __name__ == "__main__":
-    populate_vehicles() 
\ No newline at end of file
+    main()
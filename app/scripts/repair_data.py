@@ -0,0 +1,42 @@
+"""Run a data-repair job over the tickets, showing what it would change unless --apply is given.
+
+    python app/scripts/repair_data.py extract_vehicle
+    python app/scripts/repair_data.py smart_fix_vehicles --apply --workers 4
+    python app/scripts/repair_data.py default_vehicle --apply --restart
+
+Rows are read in chunks from a server-side cursor and each chunk is written
+back with one UPDATE. Rows someone changed after they were read are left
+alone and counted. An interrupted --apply run resumes after the last chunk
+it wrote unless --restart is given.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.services.batch_jobs import BatchRunner, BATCH_CHUNK_SIZE, BATCH_WORKERS
+from app.services.repair_jobs import JOBS
+
+def main():
+    parser = argparse.ArgumentParser(description="SI Opportunity data repair")
+    parser.add_argument('job', choices=sorted(JOBS))
+    parser.add_argument('--apply', action='store_true', help="Write the changes instead of listing them")
+    parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1, help=f"Chunks fixed at once, e.g. {BATCH_WORKERS}")
+    parser.add_argument('--restart', action='store_true', help="Ignore the progress of an interrupted run")
+    parser.add_argument('--show', type=int, default=50, help="Changes listed in a dry run")
+    args = parser.parse_args()
+
+    BatchRunner(
+        JOBS[args.job](),
+        dry_run=not args.apply,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        diff_limit=args.show
+    ).run(restart=args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Check STORAGE_DIR against the blobs table and optionally remove orphaned blobs.
+
+    python app/scripts/storage_maintenance.py
+    python app/scripts/storage_maintenance.py --delete-orphans --report storage_report.csv
+    python app/scripts/storage_maintenance.py --verify-all
+
+Reports stored files no blob row or file row uses (orphans), blob rows whose
+bytes are gone (missing) and blobs whose bytes no longer match their hash.
+Hashes are only recomputed for blobs whose size or mtime changed since the
+last scan. An interrupted scan resumes where it stopped unless --restart is
+given.
+"""
+import argparse
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.services.storage_maintenance import StorageScan, ORPHAN_GRACE, SCAN_WORKERS
+
+def main():
+    parser = argparse.ArgumentParser(description="SI Opportunity file storage maintenance")
+    parser.add_argument('--delete-orphans', action='store_true', help="Remove unreferenced blobs")
+    parser.add_argument('--grace-hours', type=float, default=ORPHAN_GRACE.total_seconds() / 3600,
+                        help="Leave unreferenced blobs younger than this alone")
+    parser.add_argument('--verify-all', action='store_true', help="Rehash every blob, not only changed ones")
+    parser.add_argument('--restart', action='store_true', help="Ignore the progress of an interrupted scan")
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS)
+    parser.add_argument('--report', help="Write the problems found to this CSV file")
+    args = parser.parse_args()
+
+    counts = StorageScan(
+        delete_orphans=args.delete_orphans,
+        verify_all=args.verify_all,
+        grace=timedelta(hours=args.grace_hours),
+        workers=args.workers,
+        report_path=args.report
+    ).run(restart=args.restart)
+
+    print(f"Scanned {counts['blobs']} blob(s) ({counts['bytes'] / 1024 / 1024:.1f} MB) "
+          f"in {counts['directories']} directories and {counts['rows']} blob row(s) "
+          f"in {counts['elapsed_seconds']} s")
+    print(f"  Hashed: {counts['hashed']}, unchanged since last check: {counts['unchanged']}")
+    print(f"  Orphans: {counts['orphans']} ({counts['orphans_deleted']} removed), "
+          f"too recent to judge: {counts['recent']}")
+    print(f"  Missing blobs: {counts['missing']}, hash mismatches: {counts['mismatched']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.config import AUDIT_BATCH_SIZE, AUDIT_QUEUE_SIZE, AUDIT_SPILL_PATH
+from app.database.connection import backoff_delay, is_transient_error
+from app.models.models import ActivityLog
+
+# Attempts per batch before it is spilled to disk, and how long spilled entries wait between replays
+WRITE_ATTEMPTS = 3
+SPILL_RETRY_SECONDS = 30
+
+PENDING_KEY = 'audit_events'
+# {savepoint: number of entries pending when it began}, so its rollback drops only its own
+SAVEPOINTS_KEY = 'audit_savepoints'
+
+def record(db, user_id, action, details=None, opportunity_id=None):
+    """Queue an activity_log entry to be written once db commits; it is dropped if db rolls back,
+    or if the savepoint it was recorded in does.
+
+    The entry is timestamped now, but written by the background writer, so the
+    user's transaction does not wait on the insert.
+    """
+    db.info.setdefault(PENDING_KEY, []).append({
+        'id': str(uuid4()),
+        'user_id': str(user_id),
+        'opportunity_id': str(opportunity_id) if opportunity_id else None,
+        'action': action,
+        'details': details,
+        'created_at': datetime.now(timezone.utc),
+    })
+
+@event.listens_for(Session, 'after_commit')
+def receive_after_commit(session):
+    session.info.pop(SAVEPOINTS_KEY, None)
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        audit_writer(session.get_bind()).submit(events)
+
+@event.listens_for(Session, 'after_transaction_create')
+def receive_after_transaction_create(session, transaction):
+    if transaction.nested:
+        session.info.setdefault(SAVEPOINTS_KEY, {})[transaction] = len(session.info.get(PENDING_KEY, ()))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def receive_after_soft_rollback(session, previous_transaction):
+    # A nested session_scope that fails rolls back its savepoint only; the
+    # action goes on and its earlier entries are written when it commits
+    if previous_transaction.nested:
+        start = session.info.get(SAVEPOINTS_KEY, {}).pop(previous_transaction, None)
+        if start is not None:
+            del session.info.get(PENDING_KEY, [])[start:]
+        return
+    session.info.pop(SAVEPOINTS_KEY, None)
+    session.info.pop(PENDING_KEY, None)
+
+def _encode(entry):
+    return json.dumps({**entry, 'created_at': entry['created_at'].isoformat()})
+
+def _decode(line):
+    entry = json.loads(line)
+    entry['created_at'] = datetime.fromisoformat(entry['created_at'])
+    return entry
+
+class AuditWriter:
+    """Writes activity_log entries for one engine from a bounded in-memory queue.
+
+    A background thread inserts what is queued in batches of batch_size, each
+    batch one multi-row INSERT that skips entries already written, so replays
+    are harmless. Connectivity errors are retried with backoff; a batch that
+    still fails, and entries arriving while the queue is full, are appended to
+    spill_path and replayed when the database answers again. Entries the
+    database rejects outright are kept in spill_path + '.rejected'. Entries
+    still in memory are written by close(), which runs at exit.
+    Queued entries are also appended to spill_path + '.journal' before
+    submit() returns, and the journal is cleared whenever the queue drains, so
+    a crash loses nothing: the next writer moves the journal to the spill file.
+    """
+
+    def __init__(self, bind, spill_path=AUDIT_SPILL_PATH, max_queue=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE):
+        self.bind = bind
+        self.spill_path = spill_path
+        self.journal_path = spill_path + '.journal'
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self._events = deque()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._stopping = False
+        self._last_replay = None
+        # Entries of a batch that failed unexpectedly, spilled before the journal may be cleared
+        self._unsaved = []
+        self._recover_journal()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, events):
+        queued, overflow = [], []
+        with self._condition:
+            for entry in events:
+                if not self._stopping and len(self._events) + len(queued) < self.max_queue:
+                    queued.append(entry)
+                else:
+                    overflow.append(entry)
+            if queued:
+                # Journaled under the lock, so the writer cannot clear the journal before they are queued
+                self._append(self.journal_path, queued)
+                self._events.extend(queued)
+            self._condition.notify_all()
+        if overflow:
+            print(f"Audit queue full or closed, spilling {len(overflow)} entry(ies) to {self.spill_path}")
+            self._spill(overflow)
+
+    def flush(self, timeout=10):
+        """Wait until everything queued has been written or spilled; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._events and not self._in_flight, timeout)
+
+    def close(self, timeout=10):
+        self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._events or self._stopping, SPILL_RETRY_SECONDS)
+                if self._stopping and not self._events:
+                    return
+                batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                self._in_flight = len(batch)
+            try:
+                if batch:
+                    self._write(batch)
+                elif os.path.exists(self.spill_path) or os.path.exists(self.spill_path + '.replaying'):
+                    self.replay_spill()
+            except Exception as e:
+                # Never let the writer die; the batch is spilled, and the journal kept until it is
+                print(f"Audit writer error: {str(e)}")
+                self._unsaved.extend(batch)
+            finally:
+                if self._unsaved:
+                    try:
+                        self._spill(self._unsaved)
+                        self._unsaved = []
+                    except Exception as e:
+                        print(f"Could not spill {len(self._unsaved)} audit entry(ies), retrying: {str(e)}")
+                with self._condition:
+                    self._in_flight = 0
+                    # Everything journaled has been written or spilled
+                    if not self._events and not self._unsaved:
+                        self._clear_journal()
+                    self._condition.notify_all()
+
+    def _insert(self, entries):
+        with self.bind.begin() as connection:
+            connection.execute(insert(ActivityLog.__table__).on_conflict_do_nothing(), entries)
+
+    def _write(self, entries):
+        """Insert entries, retrying connectivity errors; returns False if they were spilled"""
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                self._insert(entries)
+                return True
+            except Exception as e:
+                if not is_transient_error(e):
+                    self._write_each(entries)
+                    return True
+                print(f"Audit write attempt {attempt + 1} failed: {str(e)}")
+                if attempt < WRITE_ATTEMPTS - 1:
+                    time.sleep(backoff_delay(attempt))
+        self._spill(entries)
+        return False
+
+    def _write_each(self, entries):
+        """Insert entries one at a time so only the ones the database rejects are set aside"""
+        rejected = []
+        for entry in entries:
+            try:
+                self._insert([entry])
+            except Exception as e:
+                if is_transient_error(e):
+                    self._spill([entry])
+                else:
+                    rejected.append(entry)
+                    print(f"Audit entry {entry['id']} rejected: {str(e)}")
+        if rejected:
+            self._spill(rejected, self.spill_path + '.rejected')
+
+    def _append(self, path, entries):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{_encode(entry)}\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _spill(self, entries, path=None):
+        with self._spill_lock:
+            self._append(path or self.spill_path, entries)
+
+    def _clear_journal(self):
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def _recover_journal(self):
+        """Spill the entries a previous run journaled but may not have written; replays skip the written ones"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as f:
+            # A crash can cut the last line short; that entry was never acknowledged
+            entries = []
+            for line in f:
+                try:
+                    entries.append(_decode(line))
+                except ValueError:
+                    pass
+        if entries:
+            print(f"Recovering {len(entries)} journaled audit entry(ies)")
+            self._spill(entries)
+        self._clear_journal()
+
+    def replay_spill(self):
+        """Write the spilled entries, at most every SPILL_RETRY_SECONDS; returns the number written"""
+        now = time.monotonic()
+        if self._last_replay is not None and now - self._last_replay < SPILL_RETRY_SECONDS:
+            return 0
+        self._last_replay = now
+        replaying = self.spill_path + '.replaying'
+        with self._spill_lock:
+            # A replay interrupted by a crash left its file behind; it goes first
+            if not os.path.exists(replaying):
+                if not os.path.exists(self.spill_path):
+                    return 0
+                os.replace(self.spill_path, replaying)
+        with open(replaying, encoding='utf-8') as f:
+            entries = [_decode(line) for line in f if line.strip()]
+        written = 0
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            if not self._write(batch):
+                # Spilled again, together with the rest of the file
+                self._spill(entries[start + self.batch_size:])
+                break
+            written += len(batch)
+        os.remove(replaying)
+        if written:
+            print(f"Replayed {written} spilled audit entry(ies)")
+        return written
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def audit_writer(bind):
+    """The writer for bind's database, started on first use"""
+    with _writers_lock:
+        writer = _writers.get(bind)
+        if writer is None:
+            writer = _writers[bind] = AuditWriter(bind)
+        return writer
+
+@atexit.register
+def close_all(timeout=10):
+    """Write what is still queued; called on exit"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close(timeout)
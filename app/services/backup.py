@@ -0,0 +1,321 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from app.config import BACKUP_DIR
+from app.database.connection import engine
+
+# Tables in the backups, parents first so a restore satisfies the foreign keys,
+# with the columns that tell when a row changed
+BACKUP_TABLES = {
+    'users': ('updated_at', 'created_at'),
+    'opportunities': ('updated_at', 'created_at'),
+    # Comments are append-only, so created_at is a complete change marker
+    'comments': ('created_at',),
+}
+
+# Columns rebuilt by triggers on restore
+EXCLUDED_COLUMNS = {
+    'opportunities': {'search_vector'},
+    'comments': {'search_vector'},
+}
+
+# Rows deleted from the tables above, recorded by triggers (migration 021), so a
+# restore deletes them again instead of bringing them back from older backups
+TOMBSTONE_TABLE = 'deleted_rows'
+TOMBSTONE_COLUMNS = ('deleted_at',)
+
+# Re-read changes this far behind the last backup; updated_at comes from client clocks
+# and a transaction may commit after the backup that should have seen it
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Rows fetched per round trip from the server-side cursor
+BACKUP_FETCH_SIZE = 5000
+
+MANIFEST = 'manifest.json'
+
+def _zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+def default_compression():
+    """zstd when the zstandard package is installed, gzip otherwise"""
+    return 'zstd' if _zstandard() else 'gzip'
+
+def _open_compressed(path, mode, compression):
+    """Text stream over a compressed file"""
+    if compression == 'gzip':
+        return gzip.open(path, f"{mode}t", encoding='utf-8', compresslevel=6)
+    zstandard = _zstandard()
+    if zstandard is None:
+        raise RuntimeError("zstd backups require the zstandard package (pip install zstandard)")
+    if mode == 'w':
+        raw = zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+    else:
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def list_backups(backup_dir=BACKUP_DIR):
+    """Manifests of the backups in backup_dir, oldest first"""
+    manifests = []
+    if not os.path.isdir(backup_dir):
+        return manifests
+    for name in sorted(os.listdir(backup_dir)):
+        path = os.path.join(backup_dir, name, MANIFEST)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                manifests.append(json.load(f))
+    return manifests
+
+def backup_chain(backup_id=None, backup_dir=BACKUP_DIR):
+    """Manifests from the full backup up to backup_id (default the latest), in the order to restore them"""
+    manifests = {manifest['id']: manifest for manifest in list_backups(backup_dir)}
+    if not manifests:
+        raise ValueError(f"No backups in {backup_dir}")
+    manifest = manifests.get(backup_id or max(manifests))
+    if manifest is None:
+        raise ValueError(f"Backup {backup_id} not found in {backup_dir}")
+    chain = [manifest]
+    while chain[-1]['parent']:
+        parent = manifests.get(chain[-1]['parent'])
+        if parent is None:
+            raise ValueError(f"Backup {chain[-1]['id']} needs {chain[-1]['parent']}, which is missing")
+        chain.append(parent)
+    return list(reversed(chain))
+
+def _has_tombstones(connection):
+    """Whether migration 021 has created the tombstone table"""
+    return connection.execute(text("SELECT to_regclass(:table)"), {'table': TOMBSTONE_TABLE}).scalar() is not None
+
+def _export_table(connection, table, since, path, compression, change_columns):
+    """Write the rows of table changed since `since` (all when None) as NDJSON; returns the row count"""
+    excluded = ''.join(f" - '{column}'" for column in sorted(EXCLUDED_COLUMNS.get(table, ())))
+    query = f"SELECT (to_jsonb(t){excluded})::text FROM {table} t"
+    params = {}
+    if since is not None:
+        query += " WHERE " + " OR ".join(f"{column} > :since" for column in change_columns)
+        params['since'] = since
+    rows = 0
+    result = connection.execution_options(stream_results=True, yield_per=BACKUP_FETCH_SIZE).execute(
+        text(query), params)
+    with _open_compressed(path, 'w', compression) as f:
+        for chunk in result.partitions():
+            f.write(''.join(f"{line}\n" for line, in chunk))
+            rows += len(chunk)
+    return rows
+
+def create_backup(full=False, compression=None, backup_dir=BACKUP_DIR, bind=None):
+    """Back up the rows changed since the latest backup, or everything; returns the new manifest.
+
+    Each backup is a directory holding one compressed NDJSON file per table and
+    a manifest naming its parent, so a restore replays a full backup and the
+    incremental ones after it. All tables are read in one repeatable-read
+    snapshot, and the time of that snapshot becomes the next backup's watermark.
+    """
+    bind = bind or engine
+    compression = compression or default_compression()
+    previous = list_backups(backup_dir)
+    parent = None if full or not previous else previous[-1]
+
+    with bind.connect() as connection:
+        connection = connection.execution_options(isolation_level='REPEATABLE READ')
+        with connection.begin():
+            watermark = connection.execute(text("SELECT now()")).scalar()
+            since = None
+            if parent:
+                since = datetime.fromisoformat(parent['watermark']) - WATERMARK_OVERLAP
+            backup_id = watermark.astimezone(timezone.utc).strftime('%Y%m%d_%H%M%S_%f')
+            path = os.path.join(backup_dir, backup_id)
+            os.makedirs(path, exist_ok=True)
+            print(f"Creating {'incremental' if parent else 'full'} backup {backup_id}"
+                  + (f" of changes since {since.isoformat()}" if since else ""))
+
+            tables = {}
+            extension = 'ndjson.zst' if compression == 'zstd' else 'ndjson.gz'
+            exported = dict(BACKUP_TABLES)
+            if _has_tombstones(connection):
+                exported[TOMBSTONE_TABLE] = TOMBSTONE_COLUMNS
+            else:
+                print("  Deleted rows are not recorded; run migration 021")
+            for table, change_columns in exported.items():
+                file_name = f"{table}.{extension}"
+                rows = _export_table(connection, table, since, os.path.join(path, file_name), compression,
+                                     change_columns)
+                tables[table] = {'file': file_name, 'rows': rows,
+                                 'sha256': _sha256(os.path.join(path, file_name))}
+                print(f"  {table}: {rows} row(s)")
+
+    manifest = {
+        'id': backup_id,
+        'parent': parent['id'] if parent else None,
+        'since': since.isoformat() if since else None,
+        'watermark': watermark.isoformat(),
+        'compression': compression,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'tables': tables,
+    }
+    # Written last, so a backup that fails halfway is not part of the chain
+    with open(os.path.join(path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def verify_backup(manifest, backup_dir=BACKUP_DIR):
+    """Raise ValueError when a file of the backup is missing or changed"""
+    for table, entry in manifest['tables'].items():
+        path = os.path.join(backup_dir, manifest['id'], entry['file'])
+        if not os.path.exists(path):
+            raise ValueError(f"Backup {manifest['id']} is missing {entry['file']}")
+        if _sha256(path) != entry['sha256']:
+            raise ValueError(f"{entry['file']} of backup {manifest['id']} does not match its checksum")
+
+class _CopyLines:
+    """File-like view of NDJSON lines as COPY text format rows (position in the chain, jsonb value)"""
+
+    def __init__(self, lines, position):
+        self.lines = iter(lines)
+        self.prefix = f"{position}\t"
+        self.pending = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.pending) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            # Backslash is COPY's escape character; JSON text has no raw tabs or newlines
+            self.pending += self.prefix + line.replace('\\', '\\\\')
+        if size < 0:
+            size = len(self.pending)
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+def _load_backup_rows(connection, files):
+    """COPY the lines of (position, path, compression) files into a fresh backup_rows temp table; returns the row count"""
+    connection.execute(text("DROP TABLE IF EXISTS backup_rows; "
+                            "CREATE TEMP TABLE backup_rows (position int, doc jsonb) ON COMMIT DROP"))
+    rows = 0
+    cursor = connection.connection.cursor()
+    try:
+        for position, path, compression in files:
+            with _open_compressed(path, 'r', compression) as f:
+                cursor.copy_expert("COPY backup_rows (position, doc) FROM STDIN", _CopyLines(f, position))
+            rows += cursor.rowcount
+    finally:
+        cursor.close()
+    return rows
+
+def _load_tombstones(connection, files):
+    """Collect the tombstones of (position, path, compression) files into backup_tombstones, latest per row"""
+    _load_backup_rows(connection, files)
+    connection.execute(text("""
+        DROP TABLE IF EXISTS backup_tombstones;
+        CREATE TEMP TABLE backup_tombstones ON COMMIT DROP AS
+        SELECT DISTINCT ON (doc->>'table_name', doc->>'row_id')
+               position, doc->>'table_name' AS table_name, (doc->>'row_id')::uuid AS row_id
+        FROM backup_rows ORDER BY doc->>'table_name', doc->>'row_id', position DESC
+    """))
+
+def _restore_table(connection, table, files):
+    """Upsert the rows of table from (position, path, compression) files, oldest first; returns (rows read, rows written)
+
+    Rows deleted in the same or a later backup are left out, and tombstones that
+    a later backup of their row supersedes are dropped from backup_tombstones.
+    """
+    columns = [row[0] for row in connection.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :table
+        ORDER BY ordinal_position
+    """), {'table': table}) if row[0] not in EXCLUDED_COLUMNS.get(table, ())]
+    column_list = ', '.join(columns)
+    rows = _load_backup_rows(connection, files)
+    # Each row once, as of its latest backup
+    connection.execute(text(f"""
+        DELETE FROM backup_tombstones tombstone
+        USING backup_rows backed_up
+        WHERE tombstone.table_name = :table AND tombstone.row_id = (backed_up.doc->>'id')::uuid
+          AND backed_up.position > tombstone.position;
+        DROP TABLE IF EXISTS backup_latest;
+        CREATE TEMP TABLE backup_latest ON COMMIT DROP AS
+        SELECT record.* FROM (
+            SELECT DISTINCT ON (doc->>'id') position, doc FROM backup_rows ORDER BY doc->>'id', position DESC
+        ) latest, jsonb_populate_record(NULL::{table}, doc) record
+        WHERE NOT EXISTS (
+            SELECT 1 FROM backup_tombstones tombstone
+            WHERE tombstone.table_name = :table AND tombstone.row_id = record.id
+        );
+        ANALYZE backup_latest
+    """), {'table': table})
+    # Updated and inserted separately rather than with ON CONFLICT, whose insert
+    # attempt fires the search triggers for every row, even those that match
+    written = connection.execute(text(f"""
+        UPDATE {table} AS target SET {', '.join(f'{column} = latest.{column}' for column in columns if column != 'id')}
+        FROM backup_latest latest
+        WHERE target.id = latest.id
+          AND ({', '.join(f'target.{column}' for column in columns)})
+              IS DISTINCT FROM ({', '.join(f'latest.{column}' for column in columns)})
+    """)).rowcount
+    written += connection.execute(text(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT {column_list} FROM backup_latest latest
+        WHERE NOT EXISTS (SELECT 1 FROM {table} existing WHERE existing.id = latest.id)
+    """)).rowcount
+    if _has_tombstones(connection):
+        # The rows are back, so later backups must not carry their deletes
+        connection.execute(text(f"""
+            DELETE FROM {TOMBSTONE_TABLE}
+            WHERE table_name = :table AND row_id IN (SELECT id FROM backup_latest)
+        """), {'table': table})
+    return rows, written
+
+def restore_backup(backup_id=None, backup_dir=BACKUP_DIR, bind=None):
+    """Restore the database to a backup (default the latest) in one transaction; returns rows written per table.
+
+    The files of the full backup and every incremental one up to backup_id are
+    loaded with COPY, and each row is upserted by id once, as of its latest
+    backup. Rows that already match are skipped and rows that are not in the
+    backups are left alone. Rows the backups record as deleted are deleted
+    again, children first.
+    """
+    bind = bind or engine
+    chain = backup_chain(backup_id, backup_dir)
+    for manifest in chain:
+        verify_backup(manifest, backup_dir)
+    print(f"Restoring {len(chain)} backup(s) up to {chain[-1]['id']}")
+    counts = {}
+
+    def files(table):
+        # Backups taken before migration 021 have no tombstones
+        return [(position, os.path.join(backup_dir, manifest['id'], manifest['tables'][table]['file']),
+                 manifest['compression'])
+                for position, manifest in enumerate(chain)
+                if manifest['tables'].get(table, {}).get('rows')]
+
+    with bind.begin() as connection:
+        _load_tombstones(connection, files(TOMBSTONE_TABLE))
+        for table in BACKUP_TABLES:
+            table_files = files(table)
+            if not table_files:
+                counts[table] = 0
+                continue
+            rows, counts[table] = _restore_table(connection, table, table_files)
+            print(f"  {table}: {counts[table]} of {rows} backed up row(s) written")
+        for table in reversed(BACKUP_TABLES):
+            deleted = connection.execute(text(f"""
+                DELETE FROM {table}
+                WHERE id IN (SELECT row_id FROM backup_tombstones WHERE table_name = :table)
+            """), {'table': table}).rowcount
+            if deleted:
+                print(f"  {table}: {deleted} deleted row(s) removed")
+    return counts
@@ -0,0 +1,213 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from app.config import BATCH_CHECKPOINT_DIR
+from app.database.connection import engine
+
+# Rows read from the server-side cursor, fixed and written back per transaction
+BATCH_CHUNK_SIZE = 1000
+
+# Chunks fixed at the same time with --workers; the reader stays this far ahead
+BATCH_WORKERS = 4
+
+class BatchJob:
+    """A data repair over the rows of one table, run by BatchRunner.
+
+    Subclasses name the table, the columns fix() reads and the columns it may
+    change, narrow the rows with where(), and return the new values of a row
+    from fix(), or None to leave it alone. fix() runs on worker threads and
+    must not touch the database; load what it needs in prepare().
+    """
+    name = None
+    table = None
+    columns = ()  # Read for fix(), besides the primary key
+    updates = ()  # Columns fix() may change
+
+    def where(self):
+        """Conditions selecting the rows to look at"""
+        return []
+
+    def prepare(self, db):
+        """Load lookups once before the rows are read"""
+
+    def fix(self, row):
+        """{column: new value} for a row, or None when it needs no change"""
+        raise NotImplementedError
+
+    def describe(self, row):
+        """How a row is named in the dry-run diff"""
+        return str(row.id)
+
+class BatchRunner:
+    """Runs a BatchJob in keyset-ordered chunks with optional dry run, resume and parallel workers.
+
+    Rows stream through a server-side cursor, so memory use does not grow with
+    the table. Each chunk's changes are written with one UPDATE ... FROM
+    unnest(...) that only applies where the changed columns still hold the
+    values that were read, so rows edited meanwhile are counted as conflicts
+    instead of overwritten. After every chunk, the id up to which all chunks
+    are written is checkpointed and an interrupted run resumes from there.
+    A dry run prints what would change and writes nothing.
+    """
+
+    def __init__(self, job, dry_run=True, chunk_size=BATCH_CHUNK_SIZE, workers=1,
+                 checkpoint_dir=BATCH_CHECKPOINT_DIR, diff_limit=50, out=print, bind=None):
+        self.job = job
+        self.bind = bind or engine
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.checkpoint_path = os.path.join(checkpoint_dir, f"{job.name}.json")
+        self.diff_limit = diff_limit
+        self.out = out
+        self.counts = {'scanned': 0, 'changed': 0, 'written': 0, 'conflicts': 0, 'chunks': 0}
+        self.diffs_shown = 0
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_checkpoint(self, last_id):
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'last_id': last_id, 'counts': self.counts}, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except OSError:
+            pass
+
+    def read_chunks(self, after_id):
+        """Lists of rows in primary key order, from a server-side cursor"""
+        table = self.job.table
+        key = table.c.id
+        query = select(key, *[table.c[name] for name in self.job.columns]).where(*self.job.where())
+        if after_id is not None:
+            query = query.where(key > after_id)
+        with self.bind.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=self.chunk_size).execute(
+                query.order_by(key))
+            for chunk in result.partitions():
+                yield chunk
+
+    def fix_chunk(self, chunk):
+        """(row, changes) pairs for the rows of chunk that change"""
+        fixed = []
+        for row in chunk:
+            changes = self.job.fix(row)
+            if not changes:
+                continue
+            changes = {name: value for name, value in changes.items() if getattr(row, name, None) != value}
+            if changes:
+                fixed.append((row, changes))
+        return fixed
+
+    def write_chunk(self, fixed):
+        """Apply one chunk's changes in one statement; returns the number of rows written"""
+        if not fixed:
+            return 0
+        table = self.job.table
+        names = list(self.job.updates)
+        quote = self.bind.dialect.identifier_preparer.quote
+        # One array per column, so the statement is the same whatever the chunk size
+        arrays = {'id': (table.c.id.type, [row.id for row, _ in fixed])}
+        for name in names:
+            arrays[f"new_{name}"] = (table.c[name].type, [changes.get(name, getattr(row, name)) for row, changes in fixed])
+            arrays[f"old_{name}"] = (table.c[name].type, [getattr(row, name) for row, _ in fixed])
+        assignments = [f"{quote(name)} = fixed.new_{name}" for name in names]
+        if 'updated_at' in table.c and 'updated_at' not in names:
+            # So the local caches pick the repair up
+            assignments.append("updated_at = now()")
+        statement = text(f"""
+            UPDATE {quote(table.name)} AS target SET {', '.join(assignments)}
+            FROM unnest({', '.join(f':{key}' for key in arrays)}) AS fixed({', '.join(arrays)})
+            WHERE target.id = fixed.id
+              {''.join(f' AND target.{quote(name)} IS NOT DISTINCT FROM fixed.old_{name}' for name in names)}
+        """).bindparams(*[bindparam(key, values, type_=ARRAY(column_type))
+                          for key, (column_type, values) in arrays.items()])
+        with self.bind.begin() as connection:
+            return connection.execute(statement).rowcount
+
+    def show_diff(self, fixed):
+        for row, changes in fixed:
+            if self.diffs_shown >= self.diff_limit:
+                return
+            self.diffs_shown += 1
+            described = ", ".join(f"{name}: {getattr(row, name, None)!r} -> {value!r}" for name, value in changes.items())
+            self.out(f"  {self.job.describe(row)}: {described}")
+
+    def process(self, chunk):
+        fixed = self.fix_chunk(chunk)
+        written = 0 if self.dry_run else self.write_chunk(fixed)
+        return fixed, written
+
+    def record(self, chunk, fixed, written):
+        self.counts['chunks'] += 1
+        self.counts['scanned'] += len(chunk)
+        self.counts['changed'] += len(fixed)
+        self.counts['written'] += written
+        if not self.dry_run:
+            self.counts['conflicts'] += len(fixed) - written
+        if self.dry_run:
+            self.show_diff(fixed)
+
+    def run(self, restart=False):
+        """Run the job to the end; returns the counts"""
+        started = time.monotonic()
+        after_id = None
+        if not self.dry_run and not restart:
+            checkpoint = self.load_checkpoint()
+            if checkpoint:
+                after_id = checkpoint['last_id']
+                self.counts.update(checkpoint['counts'])
+                self.out(f"Resuming {self.job.name} after {after_id}")
+
+        with Session(self.bind) as db:
+            self.job.prepare(db)
+
+        mode = "Dry run of" if self.dry_run else "Running"
+        self.out(f"{mode} {self.job.name} in chunks of {self.chunk_size} with {self.workers} worker(s)")
+        if self.workers == 1:
+            for chunk in self.read_chunks(after_id):
+                fixed, written = self.process(chunk)
+                self.record(chunk, fixed, written)
+                self.checkpoint(chunk[-1].id)
+        else:
+            self.run_parallel(after_id)
+
+        if not self.dry_run:
+            self.clear_checkpoint()
+        self.counts['elapsed_seconds'] = round(time.monotonic() - started, 2)
+        self.out(f"{self.job.name}: {self.counts['scanned']} rows scanned, {self.counts['changed']} to change, "
+                 f"{self.counts['written']} written, {self.counts['conflicts']} changed by someone else "
+                 f"in {self.counts['elapsed_seconds']} s")
+        return self.counts
+
+    def run_parallel(self, after_id):
+        """Fix and write chunks on worker threads, checkpointing only past chunks that are all done"""
+        pending = []  # (last id, chunk, future) in read order
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"batch-{self.job.name}") as pool:
+            for chunk in self.read_chunks(after_id):
+                pending.append((chunk[-1].id, chunk, pool.submit(self.process, chunk)))
+                # Bound the chunks in memory and checkpoint what has finished in order
+                while pending and (pending[0][2].done() or len(pending) > self.workers * 2):
+                    last_id, done_chunk, future = pending.pop(0)
+                    self.record(done_chunk, *future.result())
+                    self.checkpoint(last_id)
+            for last_id, done_chunk, future in pending:
+                self.record(done_chunk, *future.result())
+                self.checkpoint(last_id)
+
+    def checkpoint(self, last_id):
+        if not self.dry_run:
+            self.save_checkpoint(str(last_id))
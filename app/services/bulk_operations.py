@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from sqlalchemy import delete, select, update, union
+from app.models.models import (User, Opportunity, Vehicle, Comment, File, Notification, ActivityLog,
+                               opportunity_systems)
+from app.services import audit_log
+
+# Rows that belong to a ticket and go with it. The foreign keys cascade as well
+# (migration 013); the explicit deletes keep this working on databases that
+# have not been migrated yet and let the blob hashes be collected on the way.
+OPPORTUNITY_CHILDREN = (
+    Notification.__table__,
+    ActivityLog.__table__,
+    Comment.__table__,
+    opportunity_systems,
+)
+
+# Columns that only point at a user for reference and are cleared when the user goes
+USER_REFERENCES = (
+    (Opportunity.__table__, 'acceptor_id'),
+    (Comment.__table__, 'user_id'),
+    (Vehicle.__table__, 'created_by_id'),
+    (Vehicle.__table__, 'last_modified_by_id'),
+)
+
+def _id_list(ids):
+    return list(dict.fromkeys(ids))
+
+def _log(db, actor, action, details, opportunity_id=None):
+    # Written by the audit writer once the caller commits
+    now = datetime.now(timezone.utc)
+    audit_log.record(db, actor.id, action, {**details, "at": now.isoformat()}, opportunity_id)
+
+def delete_opportunities(db, opportunity_ids, actor):
+    """Delete tickets and everything attached to them with one statement per table.
+
+    Returns (deleted_count, blob_hashes); the hashes are the blobs of the deleted
+    files, to be handed to file_storage.collect_garbage_async once the caller
+    has committed.
+    """
+    ids = _id_list(opportunity_ids)
+    if not ids:
+        return 0, []
+
+    tickets = db.execute(
+        select(Opportunity.id, Opportunity.title, Opportunity.status).where(Opportunity.id.in_(ids))
+    ).all()
+    if not tickets:
+        return 0, []
+    ids = [ticket.id for ticket in tickets]
+
+    blob_hashes = db.execute(
+        delete(File.__table__).where(File.__table__.c.opportunity_id.in_(ids))
+        .returning(File.__table__.c.blob_hash)
+    ).scalars().all()
+    for table in OPPORTUNITY_CHILDREN:
+        db.execute(delete(table).where(table.c.opportunity_id.in_(ids)))
+    deleted = db.execute(delete(Opportunity.__table__).where(Opportunity.__table__.c.id.in_(ids))).rowcount
+
+    # Logged without opportunity_id, the ticket is gone
+    _log(db, actor, "deleted", {
+        "tickets": [{"id": str(t.id), "title": t.title, "status": t.status} for t in tickets]
+    })
+    print(f"Deleted {deleted} opportunities and {len(blob_hashes)} file records")
+    return deleted, sorted(set(blob_hashes))
+
+def archive_opportunities(db, opportunity_ids, actor):
+    """Hide tickets from the boards without deleting them; returns the number archived"""
+    ids = _id_list(opportunity_ids)
+    if not ids:
+        return 0
+    now = datetime.now(timezone.utc)
+    # updated_at moves too so the local caches pick the change up
+    archived = db.execute(
+        update(Opportunity.__table__)
+        .where(Opportunity.__table__.c.id.in_(ids), Opportunity.__table__.c.archived_at.is_(None))
+        .values(archived_at=now, updated_at=now)
+    ).rowcount
+    _log(db, actor, "archived", {"tickets": [str(i) for i in ids]})
+    return archived
+
+def restore_opportunities(db, opportunity_ids, actor):
+    """Bring archived tickets back; returns the number restored"""
+    ids = _id_list(opportunity_ids)
+    if not ids:
+        return 0
+    restored = db.execute(
+        update(Opportunity.__table__)
+        .where(Opportunity.__table__.c.id.in_(ids), Opportunity.__table__.c.archived_at.isnot(None))
+        .values(archived_at=None, updated_at=datetime.now(timezone.utc))
+    ).rowcount
+    _log(db, actor, "restored", {"tickets": [str(i) for i in ids]})
+    return restored
+
+def users_with_owned_records(db, user_ids):
+    """String ids among user_ids that still created tickets or uploaded files and cannot be deleted"""
+    return set(str(user_id) for user_id in db.execute(union(
+        select(Opportunity.creator_id).where(Opportunity.creator_id.in_(user_ids)),
+        select(File.uploader_id).where(File.uploader_id.in_(user_ids))
+    )).scalars())
+
+def delete_users(db, users, actor):
+    """Delete users with one statement per table; returns (deleted_users, blocked_users).
+
+    Users who created tickets or uploaded files are left in place and returned as
+    blocked, their history would otherwise lose its author. Deactivate them instead.
+    """
+    users = [user for user in users if str(user.id) != str(actor.id)]
+    if not users:
+        return [], []
+
+    blocked_ids = users_with_owned_records(db, [user.id for user in users])
+    blocked = [user for user in users if str(user.id) in blocked_ids]
+    deletable = [user for user in users if str(user.id) not in blocked_ids]
+    ids = [user.id for user in deletable]
+    if not ids:
+        return [], blocked
+
+    db.execute(delete(Notification.__table__).where(Notification.__table__.c.user_id.in_(ids)))
+    db.execute(delete(ActivityLog.__table__).where(ActivityLog.__table__.c.user_id.in_(ids)))
+    for table, column in USER_REFERENCES:
+        db.execute(update(table).where(table.c[column].in_(ids)).values({column: None}))
+    db.execute(delete(User.__table__).where(User.__table__.c.id.in_(ids)))
+
+    _log(db, actor, "user_deleted", {
+        "deleted_users": [
+            {
+                "id": str(user.id),
+                "username": user.username,
+                "name": f"{user.first_name} {user.last_name}",
+                "role": user.role,
+                "team": user.team
+            }
+            for user in deletable
+        ]
+    })
+    return deletable, blocked
+
+def deactivate_users(db, user_ids, actor):
+    """Soft-delete users by switching off their login; returns the number deactivated"""
+    ids = _id_list(user_ids)
+    if not ids:
+        return 0
+    deactivated = db.execute(
+        update(User.__table__)
+        .where(User.__table__.c.id.in_(ids), User.__table__.c.is_active.isnot(False))
+        .values(is_active=False, updated_at=datetime.now(timezone.utc))
+    ).rowcount
+    _log(db, actor, "user_deactivated", {"users": [str(i) for i in ids]})
+    return deactivated
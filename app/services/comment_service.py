@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, tuple_
+from app.models.models import Comment
+
+# Comments loaded per page in the comment history
+COMMENT_PAGE_SIZE = 20
+
+def add_comment(db, opportunity_id, user, text, comment_type=None, created_at=None):
+    """Append a comment as its own row; the ticket row is neither read nor rewritten"""
+    comment = Comment(
+        opportunity_id=opportunity_id,
+        user_id=user.id if user else None,
+        user_name=f"{user.first_name} {user.last_name}" if user else "Unknown",
+        text=text,
+        comment_type=comment_type,
+        created_at=created_at or datetime.now(timezone.utc)
+    )
+    db.add(comment)
+    return comment
+
+def fetch_comments(db, opportunity_id, before=None, limit=COMMENT_PAGE_SIZE):
+    """Return up to limit comments older than the (created_at, id) cursor, newest first"""
+    query = select(Comment).where(Comment.opportunity_id == opportunity_id)
+    if before is not None:
+        query = query.where(tuple_(Comment.created_at, Comment.id) < tuple_(*before))
+    query = query.order_by(Comment.created_at.desc(), Comment.id.desc()).limit(limit)
+    return db.execute(query).scalars().all()
+
+def comment_cursor(comment):
+    """Keyset cursor for the page that follows this comment"""
+    return (comment.created_at, comment.id)
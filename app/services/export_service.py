@@ -0,0 +1,205 @@
+import csv
+import os
+from itertools import islice
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from app.database.session_scope import session_scope
+from app.models.models import Opportunity, User
+
+EXPORT_HEADERS = [
+    "Ticket Number", "Year", "Make", "Model",
+    "Creator", "Acceptor", "Date Created",
+    "Date Completed", "Total Time", "Work Time"
+]
+
+# One sheet per status, in the order managers expect them
+STATUS_SHEETS = [
+    ("completed", "Completed Tickets"),
+    ("in progress", "In Progress Tickets"),
+    ("needs info", "Needs Info Tickets"),
+    ("new", "New Tickets"),
+]
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# Rows fetched per round trip from the server-side cursor
+BATCH_SIZE = 1000
+# Rows inspected to size the spreadsheet columns
+WIDTH_SAMPLE_SIZE = 200
+MAX_COLUMN_WIDTH = 60
+
+class ExportCancelled(Exception):
+    """Raised when the user cancels an export in progress"""
+
+def format_duration(duration):
+    if duration is None:
+        return "N/A"
+    total_seconds = int(duration.total_seconds())
+    days = total_seconds // 86400
+    hours = (total_seconds % 86400) // 3600
+    minutes = (total_seconds % 3600) // 60
+    return f"{days}d {hours}h {minutes}m"
+
+def format_timestamp(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value else "N/A"
+
+def ticket_query(status):
+    """Select only the columns the export writes, with creator and acceptor names joined in"""
+    creator = aliased(User)
+    acceptor = aliased(User)
+    return (
+        select(
+            Opportunity.id, Opportunity.year, Opportunity.make, Opportunity.model,
+            creator.first_name, creator.last_name,
+            acceptor.first_name, acceptor.last_name,
+            Opportunity.created_at, Opportunity.completed_at,
+            Opportunity.response_time, Opportunity.work_time
+        )
+        .join(creator, Opportunity.creator_id == creator.id)
+        .outerjoin(acceptor, Opportunity.acceptor_id == acceptor.id)
+        .where(func.lower(Opportunity.status) == status)
+        .order_by(Opportunity.created_at)
+    )
+
+def format_row(row):
+    (ticket_id, year, make, model, creator_first, creator_last, acceptor_first, acceptor_last,
+     created_at, completed_at, response_time, work_time) = row
+    return [
+        str(ticket_id), year, make, model,
+        f"{creator_first} {creator_last}",
+        f"{acceptor_first} {acceptor_last}" if acceptor_first is not None else "N/A",
+        format_timestamp(created_at),
+        format_timestamp(completed_at),
+        format_duration(response_time),
+        format_duration(work_time)
+    ]
+
+def iter_ticket_rows(db, status, batch_size=BATCH_SIZE):
+    """Stream formatted rows for one status through a server-side cursor"""
+    result = db.execute(ticket_query(status).execution_options(yield_per=batch_size))
+    for row in result:
+        yield format_row(row)
+
+def count_by_status(db):
+    counts = db.execute(
+        select(func.lower(Opportunity.status), func.count())
+        .group_by(func.lower(Opportunity.status))
+    ).all()
+    return {status: count for status, count in counts}
+
+def sample_widths(sample):
+    """Column widths from the header and a sample of rows, not the whole dataset"""
+    widths = [len(header) for header in EXPORT_HEADERS]
+    for row in sample:
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+class TicketExporter:
+    """Writes all tickets grouped by status to XLSX, CSV or Parquet without holding them in memory.
+
+    progress(done, total) is called after every batch; should_cancel() is polled
+    at the same points and aborts the export, leaving no partial file behind.
+    """
+
+    def __init__(self, file_path, export_format='xlsx', progress=None, should_cancel=None,
+                 batch_size=BATCH_SIZE):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        self.file_path = file_path
+        self.export_format = export_format
+        self.progress = progress or (lambda done, total: None)
+        self.should_cancel = should_cancel or (lambda: False)
+        self.batch_size = batch_size
+        self.done = 0
+        self.total = 0
+
+    def run(self):
+        """Run the export and return the number of tickets written"""
+        # Write next to the target and rename at the end so a cancelled or failed
+        # export never leaves a truncated file under the chosen name
+        temp_path = f"{self.file_path}.partial"
+        try:
+            with session_scope(replica=True) as db:
+                counts = count_by_status(db)
+                self.total = sum(counts.get(status, 0) for status, _ in STATUS_SHEETS)
+                self.progress(0, self.total)
+                writer = getattr(self, f"write_{self.export_format}")
+                writer(db, temp_path)
+            os.replace(temp_path, self.file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return self.done
+
+    def batches(self, rows):
+        """Split a row stream into lists of batch_size, reporting progress between them"""
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            if self.should_cancel():
+                raise ExportCancelled()
+            yield batch
+            self.done += len(batch)
+            self.progress(self.done, self.total)
+
+    def write_xlsx(self, db, path):
+        wb = Workbook(write_only=True)
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header_font = Font(color="FFFFFF", bold=True)
+
+        for status, title in STATUS_SHEETS:
+            sheet = wb.create_sheet(title)
+            rows = iter_ticket_rows(db, status, self.batch_size)
+            sample = list(islice(rows, WIDTH_SAMPLE_SIZE))
+
+            # Write-only sheets need their widths before the first row is appended
+            for index, width in enumerate(sample_widths(sample), 1):
+                sheet.column_dimensions[get_column_letter(index)].width = width
+
+            header_row = []
+            for header in EXPORT_HEADERS:
+                cell = WriteOnlyCell(sheet, value=header)
+                cell.fill = header_fill
+                cell.font = header_font
+                header_row.append(cell)
+            sheet.append(header_row)
+
+            for batch in self.batches(iter(sample)):
+                for row in batch:
+                    sheet.append(row)
+            for batch in self.batches(rows):
+                for row in batch:
+                    sheet.append(row)
+
+        wb.save(path)
+
+    def write_csv(self, db, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Status"] + EXPORT_HEADERS)
+            for status, _ in STATUS_SHEETS:
+                for batch in self.batches(iter_ticket_rows(db, status, self.batch_size)):
+                    writer.writerows([status.title()] + row for row in batch)
+
+    def write_parquet(self, db, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the pyarrow package (pip install pyarrow)")
+
+        columns = ["Status"] + EXPORT_HEADERS
+        schema = pa.schema([(name, pa.string()) for name in columns])
+        with pq.ParquetWriter(path, schema) as writer:
+            for status, _ in STATUS_SHEETS:
+                for batch in self.batches(iter_ticket_rows(db, status, self.batch_size)):
+                    data = [[status.title()] * len(batch)] + [list(values) for values in zip(*batch)]
+                    writer.write_table(pa.Table.from_arrays(
+                        [pa.array(values, type=pa.string()) for values in data], schema=schema
+                    ))
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import delete, exists, select, text
+from sqlalchemy.dialects.postgresql import insert
+from app.config import STORAGE_DIR
+from app.database.session_scope import session_scope
+from app.models.models import Blob, File
+
+def calculate_file_hash(file_path):
+    """Calculate SHA-256 hash of a file"""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+def store_file(source_path, file_hash):
+    """Store file in storage directory with hash-based name, reusing the stored copy of identical content"""
+    with session_scope(read_only=True) as db:
+        existing = db.execute(select(Blob.storage_path).where(Blob.hash == file_hash)).scalar()
+    if existing and os.path.isfile(os.path.join(STORAGE_DIR, existing)):
+        return existing
+
+    # Create year/month based subdirectories
+    date_dir = datetime.now().strftime('%Y/%m')
+    target_dir = os.path.join(STORAGE_DIR, date_dir)
+    os.makedirs(target_dir, exist_ok=True)
+    
+    # Get file extension
+    _, ext = os.path.splitext(source_path)
+    
+    # Create target path with hash name
+    target_path = os.path.join(target_dir, f"{file_hash}{ext}")
+    
+    # Copy file to storage
+    shutil.copy2(source_path, target_path)
+    
+    # Return relative storage path
+    return os.path.relpath(target_path, STORAGE_DIR)
+
+def lock_blobs(db, blob_hashes):
+    """Hold the advisory locks of the given blobs until db's transaction ends.
+
+    Registering a blob for a new file and removing unreferenced blobs take the
+    same locks, so a cleanup cannot drop a blob or its bytes between the check
+    a submit makes and the commit of the file that references it.
+    """
+    # Taken in sorted order so two sessions locking several blobs cannot deadlock
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('blob:' || h)) FROM unnest(CAST(:hashes AS text[])) h"),
+               {'hashes': sorted(set(blob_hashes))})
+
+def register_blob(db, file_hash, storage_path, size=None, mime_type=None, source_path=None):
+    """Record stored content once; returns the hash for File.blob_hash.
+
+    store_file may have handed out the path of an existing blob when the file
+    was attached, and a cleanup may have removed that blob since. Under the
+    blob's lock this checks the row and the bytes again and stores the bytes
+    from source_path if they are gone. If another upload registered the same
+    content first, its row is kept and the copy at storage_path becomes an
+    orphan for the storage scan to remove.
+    """
+    lock_blobs(db, [file_hash])
+    existing = db.execute(select(Blob.storage_path).where(Blob.hash == file_hash)).scalar()
+    target = existing or storage_path
+    full_path = os.path.join(STORAGE_DIR, target)
+    if not os.path.isfile(full_path):
+        if not source_path or not os.path.isfile(source_path):
+            raise FileNotFoundError(f"The stored copy of {os.path.basename(storage_path)} was removed; attach the file again")
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        shutil.copy2(source_path, full_path)
+        print(f"Stored {target} again, a cleanup had removed it")
+    if existing is None:
+        db.execute(
+            insert(Blob)
+            .values(hash=file_hash, storage_path=storage_path, size=size, mime_type=mime_type,
+                    created_at=datetime.now(timezone.utc))
+            .on_conflict_do_nothing()
+        )
+    return file_hash
+
+def resolve_storage_path(storage_path):
+    """Absolute path of a stored blob, or None if the path points outside STORAGE_DIR"""
+    root = os.path.realpath(STORAGE_DIR)
+    full_path = os.path.realpath(os.path.join(root, storage_path))
+    if os.path.commonpath([root, full_path]) != root:
+        return None
+    return full_path
+
+def remove_files(storage_paths):
+    """Delete stored files from disk; returns the number removed"""
+    removed = 0
+    for storage_path in storage_paths:
+        full_path = resolve_storage_path(storage_path)
+        if not full_path:
+            print(f"Skipping blob outside storage directory: {storage_path}")
+            continue
+        try:
+            os.remove(full_path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing blob {storage_path}: {str(e)}")
+    return removed
+
+def remove_unreferenced_blobs(blob_hashes):
+    """Drop blobs no file row uses anymore, row and bytes; returns the number removed.
+
+    Many tickets can share one blob, so a blob only goes with its last file.
+    """
+    blob_hashes = set(h for h in blob_hashes if h)
+    if not blob_hashes:
+        return 0
+
+    with session_scope() as db:
+        # Waits for submits registering these blobs, which then reference them
+        lock_blobs(db, blob_hashes)
+        storage_paths = db.execute(
+            delete(Blob)
+            .where(Blob.hash.in_(blob_hashes), ~exists().where(File.blob_hash == Blob.hash))
+            .returning(Blob.storage_path)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        # Removed before the locks are released; a submit that registers one of
+        # these blobs afterwards finds the bytes gone and stores them again
+        return remove_files(storage_paths)
+
+def remove_untracked_files(storage_paths):
+    """Delete stored files that no blob row points to; returns the number removed"""
+    storage_paths = set(path for path in storage_paths if path)
+    if not storage_paths:
+        return 0
+
+    with session_scope(read_only=True) as db:
+        # store_file names blobs by their hash
+        lock_blobs(db, [os.path.splitext(os.path.basename(path))[0] for path in storage_paths])
+        tracked = set(db.execute(
+            select(Blob.storage_path).where(Blob.storage_path.in_(storage_paths))
+        ).scalars())
+        return remove_files(storage_paths - tracked)
+
+def collect_garbage_async(blob_hashes=(), storage_paths=()):
+    """Remove unreferenced blobs and untracked files on a background thread so the UI does not wait on disk I/O"""
+    blob_hashes = list(blob_hashes)
+    storage_paths = list(storage_paths)
+    if not blob_hashes and not storage_paths:
+        return None
+
+    def run():
+        try:
+            removed = remove_unreferenced_blobs(blob_hashes) + remove_untracked_files(storage_paths)
+            print(f"Storage cleanup removed {removed} unreferenced blob(s)")
+        except Exception as e:
+            print(f"Storage cleanup failed: {str(e)}")
+
+    thread = threading.Thread(target=run, name="storage-gc", daemon=True)
+    thread.start()
+    return thread
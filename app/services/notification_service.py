@@ -3,9 +3,10 @@ from datetime import datetime
 from uuid import UUID
 import asyncio
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import update
 from zoneinfo import ZoneInfo
 
+from app.database.connection import get_async_db
 from app.models.models import Notification
 
 class NotificationModel(Protocol):
@@ -18,10 +19,11 @@ class NotificationModel(Protocol):
     created_at: datetime
 
 class DatabaseSession(Protocol):
-    def query(self, *entities: Any, **kwargs: Any) -> Any: ...
+    """An AsyncSession: the handlers await the database instead of blocking the event loop"""
     def add(self, instance: Any) -> None: ...
-    def commit(self) -> None: ...
-    def close(self) -> None: ...
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any: ...
+    async def commit(self) -> None: ...
+    async def close(self) -> None: ...
 
 class WebSocketConnection(Protocol):
     async def accept(self) -> None: ...
@@ -80,7 +82,7 @@ async def handle_notification_event(
     )
     
     db.add(notification)
-    db.commit()
+    await db.commit()
     
     notification_data: Dict[str, Any] = {
         "id": str(notification.id),
@@ -96,21 +98,19 @@ async def mark_notification_read(
     user_id: UUID,
     db: DatabaseSession
 ) -> bool:
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user_id
-    ).first()
-    
-    if notification:
-        notification.read = True
-        db.commit()
-        return True
-    return False
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.id == notification_id, Notification.user_id == user_id)
+        .values(read=True)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount > 0
 
 async def notification_websocket_endpoint(
     websocket: WebSocketConnection,
     user_id: UUID,
-    db: Session = Depends()
+    db: DatabaseSession = Depends(get_async_db)
 ) -> None:
     await websocket.accept()
     await notification_manager.connect(user_id, websocket)
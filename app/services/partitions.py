@@ -0,0 +1,105 @@
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from app.config import PARTITION_ARCHIVE_DIR, PARTITION_MONTHS_AHEAD
+from app.database.connection import engine
+
+# Tables range-partitioned by the month of created_at (migration 018)
+PARTITIONED_TABLES = ('activity_log',)
+
+def month_start(day):
+    return day.replace(day=1)
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+def current_month():
+    return month_start(datetime.now(timezone.utc).date())
+
+def partition_name(table, month):
+    """Name given by create_month_partition() to table's partition for month"""
+    return f"{table}_y{month:%Y}m{month:%m}"
+
+def list_partitions(connection, table):
+    """[(name, first day of the month)] of table's monthly partitions, oldest first"""
+    pattern = re.compile(rf'^{re.escape(table)}_y(\d{{4}})m(\d{{2}})$')
+    names = connection.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+    """), {'table': table}).scalars()
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+def ensure_partitions(table, months_ahead=PARTITION_MONTHS_AHEAD, bind=None):
+    """Create the partitions of this month and the next months_ahead; returns the names created.
+
+    Rows that landed in the default partition because their month had no
+    partition yet are moved into a new partition for that month.
+    """
+    bind = bind or engine
+    this_month = current_month()
+    with bind.begin() as connection:
+        stray_months = connection.execute(text(f"""
+            SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {table}_default
+        """)).scalars().all()
+        months = sorted(set(stray_months) | {add_months(this_month, offset) for offset in range(months_ahead + 1)})
+        created = []
+        for month in months:
+            if connection.execute(text("SELECT create_month_partition(:table, :month)"),
+                                  {'table': table, 'month': month}).scalar():
+                created.append(partition_name(table, month))
+    for name in created:
+        print(f"Created partition {name}")
+    return created
+
+def _archive_partition(connection, name, archive_dir):
+    """Write a detached partition to archive_dir as gzip CSV with COPY; returns the file path"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    cursor = connection.connection.cursor()
+    try:
+        with gzip.open(f"{path}.partial", 'wb', compresslevel=6) as f:
+            cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', f)
+    finally:
+        cursor.close()
+    os.replace(f"{path}.partial", path)
+    return path
+
+def detach_partitions(table, keep_months, archive=False, drop=False, archive_dir=PARTITION_ARCHIVE_DIR, bind=None):
+    """Detach table's partitions older than the last keep_months months; returns the names detached.
+
+    A detached month is no longer seen by queries on the table but stays in the
+    database as a table of its own, so it can be attached again. With archive
+    it is first written to archive_dir as compressed CSV and then dropped; with
+    drop it is dropped without a copy.
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1, the current month is always kept")
+    bind = bind or engine
+    cutoff = add_months(current_month(), 1 - keep_months)
+    with bind.connect() as connection:
+        old = [name for name, month in list_partitions(connection, table) if month < cutoff]
+
+    detached = []
+    for name in old:
+        # One transaction per month, so an interrupted run keeps what it finished
+        with bind.begin() as connection:
+            connection.execute(text(f'ALTER TABLE {table} DETACH PARTITION "{name}"'))
+            if archive:
+                path = _archive_partition(connection, name, archive_dir)
+                connection.execute(text(f'DROP TABLE "{name}"'))
+                print(f"Detached {name} and archived it to {path}")
+            elif drop:
+                connection.execute(text(f'DROP TABLE "{name}"'))
+                print(f"Detached and dropped {name}")
+            else:
+                print(f"Detached {name}")
+        detached.append(name)
+    return detached
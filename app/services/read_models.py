@@ -0,0 +1,240 @@
+from datetime import datetime, timedelta
+from typing import Any, List, NamedTuple, Optional
+from sqlalchemy import func, lambda_stmt, or_, select, true
+from sqlalchemy.orm import aliased
+from app.database.hot_queries import hot_query
+from app.models.models import Opportunity, User, File, Blob, Notification
+from app.services.search_service import sort_key
+
+# Read-only rows for the list views. Plain tuples with only the columns each
+# view shows: no identity map, change tracking or lazy loaders, and none of
+# the JSONB payloads the views never read.
+
+class PersonRow(NamedTuple):
+    id: Any
+    username: str
+    first_name: str
+    last_name: str
+    team: Optional[str]
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+class FileRow(NamedTuple):
+    id: Any
+    opportunity_id: Any
+    name: str
+    original_name: str
+    is_deleted: Optional[bool]
+    hash: str
+    storage_path: str
+    mime_type: Optional[str]
+    size: Optional[int]
+
+    @property
+    def display_name(self):
+        return self.original_name or self.name
+
+class TicketCard(NamedTuple):
+    """What a dashboard card shows; read like an Opportunity by the card code"""
+    id: Any
+    title: str
+    description: Optional[str]
+    status: Optional[str]
+    year: Optional[str]
+    make: Optional[str]
+    model: Optional[str]
+    systems: Optional[list]
+    creator_id: Any
+    acceptor_id: Any
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    response_time: Optional[timedelta]
+    work_time: Optional[timedelta]
+    comment_count: int
+    creator: Optional[PersonRow]
+    acceptor: Optional[PersonRow]
+    files: List[FileRow]
+
+    @property
+    def display_title(self):
+        return f"{self.year} {self.make} {self.model}" if all([self.year, self.make, self.model]) else "No Vehicle Specified"
+
+class TicketTableRow(NamedTuple):
+    """A row of the management portal's ticket table"""
+    id: Any
+    title: str
+    year: Optional[str]
+    make: Optional[str]
+    model: Optional[str]
+    systems: Optional[list]
+    status: Optional[str]
+    created_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    response_time: Optional[timedelta]
+    creator_username: Optional[str]
+    acceptor_first_name: Optional[str]
+    acceptor_last_name: Optional[str]
+
+    @property
+    def display_title(self):
+        return f"{self.year} {self.make} {self.model}" if all([self.year, self.make, self.model]) else "No Vehicle Specified"
+
+    @property
+    def acceptor_name(self):
+        return f"{self.acceptor_first_name} {self.acceptor_last_name}" if self.acceptor_first_name is not None else None
+
+class TicketTiming(NamedTuple):
+    """Who handled a ticket and when, for the statistics panels"""
+    id: Any
+    status: Optional[str]
+    creator_id: Any
+    acceptor_id: Any
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    response_time: Optional[timedelta]
+
+# User columns joined in for a PersonRow; its id is the ticket's creator_id or acceptor_id
+PERSON_COLUMNS = ('username', 'first_name', 'last_name', 'team')
+
+CREATOR = aliased(User, name='creator')
+ACCEPTOR = aliased(User, name='acceptor')
+
+TICKET_CARD_COLUMNS = [getattr(Opportunity, field) for field in TicketCard._fields[:TicketCard._fields.index('creator')]]
+CARD_COLUMNS = (TICKET_CARD_COLUMNS
+                + [getattr(CREATOR, column) for column in PERSON_COLUMNS]
+                + [getattr(ACCEPTOR, column) for column in PERSON_COLUMNS])
+FILE_COLUMNS = [File.id, File.opportunity_id, File.name, File.original_name, File.is_deleted,
+                Blob.hash, Blob.storage_path, Blob.mime_type, Blob.size]
+
+# The filters of a list arrive as one prebuilt WHERE clause; the lambdas take
+# it as a tracked closure variable, so only its bound values change per call
+
+@hot_query
+def card_rows(where):
+    """Card columns of the tickets matching where, in the dashboard's order"""
+    statement = lambda_stmt(lambda: (
+        select(*CARD_COLUMNS)
+        .select_from(Opportunity)
+        .outerjoin(CREATOR, Opportunity.creator_id == CREATOR.id)
+        .outerjoin(ACCEPTOR, Opportunity.acceptor_id == ACCEPTOR.id)
+        .order_by(*sort_key())
+    ))
+    statement += lambda s: s.where(where)
+    return statement
+
+@hot_query
+def file_rows(where):
+    """Files that are not deleted of the tickets matching where"""
+    statement = lambda_stmt(lambda: (
+        select(*FILE_COLUMNS)
+        .join(Blob, File.blob_hash == Blob.hash)
+        .where(File.is_deleted.isnot(True))
+        .order_by(File.created_at)
+    ))
+    statement += lambda s: s.where(File.opportunity_id.in_(select(Opportunity.id).where(where)))
+    return statement
+
+@hot_query
+def new_ticket_ids(user_id):
+    """Unarchived new tickets someone else created"""
+    return lambda_stmt(lambda: select(Opportunity.id).where(
+        Opportunity.status.ilike("new"),
+        Opportunity.archived_at.is_(None),
+        Opportunity.creator_id != user_id
+    ))
+
+@hot_query
+def unread_notification_ids(user_id):
+    return lambda_stmt(lambda: select(Notification.id).where(
+        Notification.user_id == user_id,
+        Notification.read == False
+    ))
+
+@hot_query
+def accepted_ticket_stats(user_id):
+    """(active, completed, average response seconds) of the tickets a user accepted"""
+    return lambda_stmt(lambda: select(
+        func.count().filter(Opportunity.status.in_(["new", "in progress"])),
+        func.count().filter(Opportunity.status == "completed"),
+        func.avg(func.extract('epoch', Opportunity.response_time)).filter(
+            Opportunity.status == "completed", Opportunity.response_time.isnot(None))
+    ).where(Opportunity.acceptor_id == user_id))
+
+@hot_query
+def handled_ticket_stats(user_id):
+    """(active, completed, average seconds to completion) of the tickets a user created or accepted"""
+    return lambda_stmt(lambda: select(
+        func.count().filter(Opportunity.status.in_(["new", "in progress"])),
+        func.count().filter(Opportunity.status.ilike("completed")),
+        func.avg(func.extract('epoch', Opportunity.completed_at - Opportunity.created_at)).filter(
+            Opportunity.status.ilike("completed"),
+            Opportunity.completed_at.isnot(None),
+            Opportunity.created_at.isnot(None))
+    ).where(or_(Opportunity.creator_id == user_id, Opportunity.acceptor_id == user_id)))
+
+@hot_query
+def user_id_by_name(first_name, last_name):
+    return lambda_stmt(lambda: select(User.id).where(
+        User.first_name == first_name,
+        User.last_name == last_name
+    ).limit(1))
+
+def _person(person_id, row, offset, people):
+    """PersonRow from the user columns at offset; one shared instance per user"""
+    if person_id is None or row[offset] is None:
+        return None
+    person = people.get(person_id)
+    if person is None:
+        person = people[person_id] = PersonRow(person_id, *row[offset:offset + len(PERSON_COLUMNS)])
+    return person
+
+def ticket_files(db, where) -> dict:
+    """Files that are not deleted of the tickets matching where, by ticket id"""
+    files = {}
+    for row in file_rows(db, where):
+        files.setdefault(row.opportunity_id, []).append(FileRow(*row))
+    return files
+
+def ticket_cards(db, query) -> List[TicketCard]:
+    """Cards for the tickets an Opportunity query filters to, newest first, with their people, files and comment count"""
+    where = query.whereclause if query.whereclause is not None else true()
+    rows = card_rows(db, where).all()
+    files = ticket_files(db, where) if rows else {}
+    people = {}
+    offset = len(TICKET_CARD_COLUMNS)
+    return [
+        TicketCard(*row[:offset], _person(row.creator_id, row, offset, people),
+                   _person(row.acceptor_id, row, offset + len(PERSON_COLUMNS), people), files.get(row.id, []))
+        for row in rows
+    ]
+
+def ticket_table_rows(db, *criteria) -> List[TicketTableRow]:
+    """Rows of the management ticket table, with the creator's username and acceptor's name joined in"""
+    creator = aliased(User)
+    acceptor = aliased(User)
+    rows = db.execute(
+        select(
+            Opportunity.id, Opportunity.title, Opportunity.year, Opportunity.make, Opportunity.model,
+            Opportunity.systems, Opportunity.status, Opportunity.created_at, Opportunity.completed_at,
+            Opportunity.response_time, creator.username, acceptor.first_name, acceptor.last_name
+        )
+        .outerjoin(creator, Opportunity.creator_id == creator.id)
+        .outerjoin(acceptor, Opportunity.acceptor_id == acceptor.id)
+        .where(*criteria)
+    )
+    return [TicketTableRow(*row) for row in rows]
+
+def ticket_timings(db, *criteria) -> List[TicketTiming]:
+    """Status, people and timestamps of the tickets matching criteria"""
+    rows = db.execute(
+        select(
+            Opportunity.id, Opportunity.status, Opportunity.creator_id, Opportunity.acceptor_id,
+            Opportunity.created_at, Opportunity.started_at, Opportunity.completed_at, Opportunity.response_time
+        ).where(*criteria)
+    )
+    return [TicketTiming(*row) for row in rows]
@@ -0,0 +1,43 @@
+import threading
+from app.database.session_scope import session_scope
+from app.models.models import Vehicle, AdasSystem
+
+class ReferenceData:
+    """Vehicle catalog and ADAS systems, loaded once per session and shared by the forms.
+
+    The lists hold detached rows, so they can be loaded on a background thread
+    at startup and read from the UI afterwards. Call invalidate() after
+    changing a vehicle so the next read picks the change up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vehicles = None
+        self._adas_systems = None
+
+    def load(self):
+        """Load both lists if they are not loaded yet"""
+        self.vehicles()
+        self.adas_systems()
+
+    def vehicles(self):
+        with self._lock:
+            if self._vehicles is None:
+                with session_scope(read_only=True) as db:
+                    self._vehicles = db.query(Vehicle).all()
+                print(f"Loaded {len(self._vehicles)} vehicles")
+            return self._vehicles
+
+    def adas_systems(self):
+        with self._lock:
+            if self._adas_systems is None:
+                with session_scope(read_only=True) as db:
+                    self._adas_systems = db.query(AdasSystem).all()
+            return self._adas_systems
+
+    def invalidate(self):
+        with self._lock:
+            self._vehicles = None
+            self._adas_systems = None
+
+reference_data = ReferenceData()
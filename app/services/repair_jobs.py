@@ -0,0 +1,85 @@
+import re
+import zlib
+from sqlalchemy import or_, select
+from app.models.models import Opportunity, Vehicle
+from app.services.batch_jobs import BatchJob
+
+# "Vehicle: YYYY Make Model" on the first line of a ticket description
+VEHICLE_LINE = re.compile(r'Vehicle:\s*(\d{4})\s+([A-Za-z]+(?:\s+[A-Za-z]+)*?)\s+([A-Za-z0-9\-]+(?:\s+[A-Za-z0-9\-]*)*)')
+
+def missing_vehicle():
+    """Tickets with no year, make or model"""
+    return or_(*[or_(column.is_(None), column == '') for column in
+                 (Opportunity.year, Opportunity.make, Opportunity.model)])
+
+def vehicle_changes(vehicle):
+    year, make, model = vehicle
+    return {'year': year, 'make': make, 'model': model}
+
+class VehicleRepair(BatchJob):
+    """Fills in the vehicle of tickets that have none"""
+    table = Opportunity.__table__
+    columns = ('title', 'year', 'make', 'model')
+    updates = ('year', 'make', 'model')
+
+    def where(self):
+        return [missing_vehicle()]
+
+    def describe(self, row):
+        return row.title
+
+class ExtractVehicleFromDescription(VehicleRepair):
+    """Takes the vehicle from the "Vehicle: YYYY Make Model" line older tickets start with"""
+    name = 'extract_vehicle'
+    columns = VehicleRepair.columns + ('description',)
+
+    def fix(self, row):
+        if not row.description:
+            return None
+        match = VEHICLE_LINE.search(row.description.split('\n', 1)[0])
+        if not match:
+            return None
+        return vehicle_changes((match.group(1), match.group(2).strip(), match.group(3).strip()))
+
+class DefaultVehicle(VehicleRepair):
+    """Gives tickets without a vehicle the first 2025 catalog vehicle"""
+    name = 'default_vehicle'
+
+    def prepare(self, db):
+        vehicle = db.query(Vehicle).filter(Vehicle.year == '2025').order_by(Vehicle.make, Vehicle.model).first()
+        if not vehicle:
+            raise ValueError("No 2025 vehicle found, load the vehicle catalog first")
+        self.vehicle = (vehicle.year, vehicle.make, vehicle.model)
+        print(f"Using default vehicle: {' '.join(self.vehicle)}")
+
+    def fix(self, row):
+        return vehicle_changes(self.vehicle)
+
+class SmartFixVehicles(VehicleRepair):
+    """Gives tickets without a vehicle one used on other tickets or from the 2023-2025 catalog.
+
+    The pick depends only on the ticket id, so a dry run shows exactly what
+    the real run writes and a resumed run picks the same vehicles.
+    """
+    name = 'smart_fix_vehicles'
+
+    def prepare(self, db):
+        complete = [column.is_not(None) & (column != '') for column in
+                    (Opportunity.year, Opportunity.make, Opportunity.model)]
+        used = db.execute(
+            select(Opportunity.year, Opportunity.make, Opportunity.model).where(*complete).distinct()
+            .order_by(Opportunity.year, Opportunity.make, Opportunity.model)
+        ).all()
+        catalog = db.execute(
+            select(Vehicle.year, Vehicle.make, Vehicle.model).where(Vehicle.year.in_(['2023', '2024', '2025']))
+            .order_by(Vehicle.year, Vehicle.make, Vehicle.model).limit(20)
+        ).all()
+        self.options = [tuple(vehicle) for vehicle in used] + [tuple(vehicle) for vehicle in catalog]
+        if not self.options:
+            raise ValueError("No vehicles to choose from, load the vehicle catalog first")
+        print(f"Choosing from {len(used)} vehicle(s) used on tickets and {len(catalog)} from the catalog")
+
+    def fix(self, row):
+        return vehicle_changes(self.options[zlib.crc32(str(row.id).encode()) % len(self.options)])
+
+JOBS = {job.name: job for job in (ExtractVehicleFromDescription, DefaultVehicle, SmartFixVehicles)}
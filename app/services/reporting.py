@@ -0,0 +1,220 @@
+import csv
+from datetime import timedelta
+from sqlalchemy import text
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from app.services.export_service import format_duration
+
+ROLLUP_NAME = 'daily_rollups'
+DIMENSIONS = ('all', 'team', 'make', 'system')
+
+# Re-read changes this far behind the watermark; updated_at comes from client clocks
+# and a transaction may commit after a later one has been processed
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Days recomputed per statement during a rebuild
+DAYS_PER_BATCH = 31
+
+CHANGED_DAYS_SQL = text("""
+    WITH changed AS (
+        SELECT created_at, completed_at
+        FROM opportunities
+        WHERE updated_at > :since OR created_at > :since OR completed_at > :since
+    )
+    SELECT day FROM (
+        SELECT (created_at AT TIME ZONE 'UTC')::date AS day FROM changed
+        UNION
+        SELECT (completed_at AT TIME ZONE 'UTC')::date FROM changed
+    ) days
+    WHERE day IS NOT NULL
+    ORDER BY day
+""")
+
+# Days recorded by the triggers of migration 020 for deleted tickets and for
+# the days an updated ticket used to count towards; taken by this refresh
+TAKE_LOGGED_DAYS_SQL = text("""
+    DELETE FROM report_changed_days RETURNING day
+""")
+
+ALL_DAYS_SQL = text("""
+    SELECT day FROM (
+        SELECT (created_at AT TIME ZONE 'UTC')::date AS day FROM opportunities
+        UNION
+        SELECT (completed_at AT TIME ZONE 'UTC')::date FROM opportunities
+    ) days
+    WHERE day IS NOT NULL
+    ORDER BY day
+""")
+
+# Opened tickets count towards the creator's team, completed work towards the acceptor's
+RECOMPUTE_DAYS_SQL = text("""
+    WITH days AS (
+        SELECT unnest(CAST(:days AS date[])) AS day
+    ),
+    base AS (
+        SELECT
+            o.make,
+            o.systems,
+            (o.created_at AT TIME ZONE 'UTC')::date AS opened_day,
+            (o.completed_at AT TIME ZONE 'UTC')::date AS completed_day,
+            lower(o.status) = 'completed' AS is_completed,
+            EXTRACT(EPOCH FROM o.response_time) AS response_seconds,
+            EXTRACT(EPOCH FROM o.work_time) AS work_seconds,
+            creator.team AS creator_team,
+            COALESCE(acceptor.team, creator.team) AS acceptor_team
+        FROM opportunities o
+        JOIN users creator ON creator.id = o.creator_id
+        LEFT JOIN users acceptor ON acceptor.id = o.acceptor_id
+        WHERE (o.created_at >= :first_day AND o.created_at < :end_day)
+           OR (o.completed_at >= :first_day AND o.completed_at < :end_day)
+    ),
+    events AS (
+        SELECT opened_day AS day, 1 AS opened, 0 AS completed,
+               NULL::double precision AS response_seconds, NULL::double precision AS work_seconds,
+               creator_team AS team, make, systems
+        FROM base WHERE opened_day IN (SELECT day FROM days)
+        UNION ALL
+        SELECT completed_day, 0, 1, response_seconds, work_seconds, acceptor_team, make, systems
+        FROM base WHERE is_completed AND completed_day IN (SELECT day FROM days)
+    ),
+    expanded AS (
+        SELECT day, 'all' AS dimension, 'All' AS dimension_value,
+               opened, completed, response_seconds, work_seconds
+        FROM events
+        UNION ALL
+        SELECT day, 'team', COALESCE(NULLIF(team, ''), 'Unknown'),
+               opened, completed, response_seconds, work_seconds
+        FROM events
+        UNION ALL
+        SELECT day, 'make', COALESCE(NULLIF(make, ''), 'Unknown'),
+               opened, completed, response_seconds, work_seconds
+        FROM events
+        UNION ALL
+        SELECT e.day, 'system', s.entry->>'system',
+               e.opened, e.completed, e.response_seconds, e.work_seconds
+        FROM events e
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(e.systems) = 'array' THEN e.systems ELSE '[]'::jsonb END
+        ) AS s(entry)
+        WHERE s.entry->>'system' IS NOT NULL
+    )
+    INSERT INTO report_daily_rollups (
+        day, dimension, dimension_value, opened, completed,
+        response_seconds, response_count, work_seconds, work_count, refreshed_at
+    )
+    SELECT day, dimension, dimension_value, SUM(opened), SUM(completed),
+           COALESCE(SUM(response_seconds), 0), COUNT(response_seconds),
+           COALESCE(SUM(work_seconds), 0), COUNT(work_seconds), now()
+    FROM expanded
+    GROUP BY day, dimension, dimension_value
+""")
+
+def recompute_days(db, days):
+    """Replace the rollup rows of the given days with fresh aggregates"""
+    for start in range(0, len(days), DAYS_PER_BATCH):
+        batch = days[start:start + DAYS_PER_BATCH]
+        db.execute(text("DELETE FROM report_daily_rollups WHERE day = ANY(CAST(:days AS date[]))"),
+                   {'days': batch})
+        # The range only narrows the index scan; pad it so the session time zone
+        # cannot push a UTC day's tickets outside of it
+        db.execute(RECOMPUTE_DAYS_SQL, {
+            'days': batch,
+            'first_day': batch[0] - timedelta(days=1),
+            'end_day': batch[-1] + timedelta(days=2)
+        })
+
+def refresh_rollups(db, rebuild=False):
+    """Bring the daily rollups up to date and return the number of days recomputed.
+
+    Only days touched by tickets created, updated or completed since the last
+    refresh, and the days recorded for deleted or moved tickets, are
+    recomputed, so the cost follows the amount of change rather than the size
+    of the ticket history. rebuild=True recomputes everything.
+    The caller commits.
+    """
+    # Serialise concurrent refreshes; the lock is released at commit
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {'name': ROLLUP_NAME})
+    started_at = db.execute(text("SELECT now()")).scalar()
+    watermark = db.execute(
+        text("SELECT watermark FROM report_rollup_state WHERE name = :name"),
+        {'name': ROLLUP_NAME}
+    ).scalar()
+
+    logged_days = set(db.execute(TAKE_LOGGED_DAYS_SQL).scalars())
+    if rebuild or watermark is None:
+        db.execute(text("DELETE FROM report_daily_rollups"))
+        days = db.execute(ALL_DAYS_SQL).scalars().all()
+    else:
+        changed_days = db.execute(CHANGED_DAYS_SQL, {'since': watermark - WATERMARK_OVERLAP}).scalars()
+        days = sorted(logged_days.union(changed_days))
+
+    recompute_days(db, list(days))
+
+    db.execute(text("""
+        INSERT INTO report_rollup_state (name, watermark, refreshed_at)
+        VALUES (:name, :watermark, now())
+        ON CONFLICT (name) DO UPDATE
+        SET watermark = EXCLUDED.watermark, refreshed_at = EXCLUDED.refreshed_at
+    """), {'name': ROLLUP_NAME, 'watermark': started_at})
+    return len(days)
+
+def fetch_report(db, start_day, end_day, dimension='all', daily=False):
+    """Aggregate rollups over [start_day, end_day] by dimension value, optionally per day"""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown report dimension: {dimension}")
+    day_column = "day, " if daily else ""
+    rows = db.execute(text(f"""
+        SELECT {day_column}dimension_value,
+               SUM(opened) AS opened,
+               SUM(completed) AS completed,
+               SUM(response_seconds) / NULLIF(SUM(response_count), 0) AS avg_response_seconds,
+               SUM(work_seconds) / NULLIF(SUM(work_count), 0) AS avg_work_seconds
+        FROM report_daily_rollups
+        WHERE dimension = :dimension AND day BETWEEN :start_day AND :end_day
+        GROUP BY {day_column}dimension_value
+        ORDER BY {day_column}dimension_value
+    """), {'dimension': dimension, 'start_day': start_day, 'end_day': end_day}).all()
+    return [dict(row._mapping) for row in rows]
+
+def report_headers(dimension, daily=False):
+    label = "Total" if dimension == 'all' else dimension.title()
+    headers = [label, "Opened", "Completed", "Avg Total Time", "Avg Work Time"]
+    return ["Day"] + headers if daily else headers
+
+def report_values(row):
+    values = [
+        row['dimension_value'],
+        row['opened'],
+        row['completed'],
+        format_duration(timedelta(seconds=row['avg_response_seconds'])) if row['avg_response_seconds'] is not None else "N/A",
+        format_duration(timedelta(seconds=row['avg_work_seconds'])) if row['avg_work_seconds'] is not None else "N/A"
+    ]
+    if 'day' in row:
+        values.insert(0, row['day'].isoformat())
+    return values
+
+def write_report(rows, file_path, dimension, daily=False):
+    """Write report rows to .xlsx or .csv, chosen by the file extension"""
+    headers = report_headers(dimension, daily)
+    if file_path.lower().endswith('.csv'):
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(report_values(row) for row in rows)
+        return
+
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet(f"By {headers[1 if daily else 0]}")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True)
+    header_row = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        header_row.append(cell)
+    sheet.append(header_row)
+    for row in rows:
+        sheet.append(report_values(row))
+    wb.save(file_path)
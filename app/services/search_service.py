@@ -0,0 +1,221 @@
+import bisect
+import re
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import cast, func, literal, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import TSQUERY
+from app.models.models import Opportunity, Comment
+
+# Tickets returned per search
+SEARCH_LIMIT = 50
+
+# Words beyond this are ignored
+MAX_SEARCH_TERMS = 8
+
+# Newest matching tickets, and comments, that are ranked per search
+SEARCH_CANDIDATES = 250
+
+# Relative weight of the A/B/C fields, the defaults ts_rank_cd uses
+FIELD_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+# Letters and digits; underscores split words as they do in Postgres
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+def tokenize(text):
+    """Lowercased words of text"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+def search_terms(text):
+    """Distinct words of a search, in the order typed"""
+    return list(dict.fromkeys(tokenize(text)))[:MAX_SEARCH_TERMS]
+
+def search_query(db, terms):
+    """tsquery text matching documents that contain every term.
+
+    Each term matches as typed, for the identifier fields, or by its English
+    stem, for the prose. The last term may still be being typed and also
+    matches as a prefix. English stop words are left out unless they are last.
+    """
+    stems = db.execute(select(*[func.ts_lexize('english_stem', term) for term in terms])).one()
+    parts = []
+    for position, (term, term_stems) in enumerate(zip(terms, stems)):
+        prefix = position == len(terms) - 1
+        if not term_stems and not prefix:
+            continue
+        # Terms and stems are word characters only, so they need no quoting
+        alternatives = [f"'{term}':*" if prefix else f"'{term}'"]
+        for stem in term_stems or []:
+            if stem != term and not (prefix and stem.startswith(term)):
+                alternatives.append(f"'{stem}'")
+        parts.append(alternatives[0] if len(alternatives) == 1 else f"({' | '.join(alternatives)})")
+    return ' & '.join(parts)
+
+def search_opportunities(db, text, limit=SEARCH_LIMIT, options=()):
+    """Tickets matching every word of text, best match first; archived tickets are left out.
+
+    A ticket matches when its own fields contain every word, or one of its
+    comments does. Its rank adds up the ts_rank_cd of the ticket and of the
+    matching comments. Only the newest SEARCH_CANDIDATES matches of each kind
+    are ranked, which keeps searches for very common words fast.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    # A constant query lets the planner use the word statistics to choose
+    # between the GIN index and the newest-first scan
+    query = cast(literal(search_query(db, terms)), TSQUERY)
+
+    ticket_hits = (
+        select(Opportunity.id.label('opportunity_id'), Opportunity.search_vector)
+        .where(Opportunity.search_vector.op('@@')(query), Opportunity.archived_at.is_(None))
+        .order_by(Opportunity.created_at.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+    comment_hits = (
+        select(Comment.opportunity_id, Comment.search_vector)
+        .where(Comment.search_vector.op('@@')(query))
+        .order_by(Comment.created_at.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+    hits = union_all(
+        select(ticket_hits.c.opportunity_id, func.ts_rank_cd(ticket_hits.c.search_vector, query).label('rank')),
+        select(comment_hits.c.opportunity_id, func.ts_rank_cd(comment_hits.c.search_vector, query))
+    ).subquery()
+
+    rank = func.sum(hits.c.rank).label('rank')
+    ranked = (
+        select(Opportunity.id, rank)
+        .join(hits, hits.c.opportunity_id == Opportunity.id)
+        .where(Opportunity.archived_at.is_(None))
+        .group_by(Opportunity.id)
+        .order_by(rank.desc(), Opportunity.created_at.desc())
+        .limit(limit)
+    )
+    ids = [row.id for row in db.execute(ranked)]
+    if not ids:
+        return []
+
+    opportunities = db.query(Opportunity).options(*options).filter(Opportunity.id.in_(ids)).all()
+    order = {str(opportunity_id): index for index, opportunity_id in enumerate(ids)}
+    return sorted(opportunities, key=lambda opportunity: order[str(opportunity.id)])
+
+def find_opportunity(db, key, options=()):
+    """The ticket with id or ticket number key, or None; archived tickets are not returned"""
+    key = str(key or '').strip()
+    if not key:
+        return None
+    query = db.query(Opportunity).options(*options).filter(Opportunity.archived_at.is_(None))
+    try:
+        return query.filter(Opportunity.id == uuid.UUID(key)).first()
+    except ValueError:
+        pass
+    # Ticket numbers are not guaranteed unique; the newest ticket wins
+    return (query.filter(Opportunity.title == key.upper())
+            .order_by(Opportunity.created_at.desc().nulls_last()).first())
+
+def sort_key():
+    """Order of the dashboard lists, newest first with the id breaking ties"""
+    return (Opportunity.created_at.desc(), Opportunity.id.desc())
+
+def _keyset_mark(opportunity):
+    return tuple_(literal(opportunity.created_at, Opportunity.created_at.type),
+                  literal(uuid.UUID(str(opportunity.id)), Opportunity.id.type))
+
+def opportunity_position(query, opportunity):
+    """Number of tickets in query that come before opportunity in sort_key order"""
+    mark = _keyset_mark(opportunity)
+    return query.filter(tuple_(Opportunity.created_at, Opportunity.id) > mark).count()
+
+def page_around(query, opportunity, page_size):
+    """Up to page_size tickets of query in sort_key order, centred on opportunity.
+
+    Both directions are read with keyset conditions on (created_at, id), so
+    the cost does not depend on how far down the list the ticket is.
+    """
+    key = tuple_(Opportunity.created_at, Opportunity.id)
+    mark = _keyset_mark(opportunity)
+    newer = (query.filter(key > mark)
+             .order_by(Opportunity.created_at.asc(), Opportunity.id.asc())
+             .limit(page_size // 2).all())
+    older = (query.filter(key < mark)
+             .order_by(*sort_key())
+             .limit(max(page_size - len(newer) - 1, 0)).all())
+    return newer[::-1] + [opportunity] + older
+
+class InvertedIndex:
+    """In-memory word index over tickets for searching the local cache.
+
+    Mirrors search_opportunities: a ticket matches when its own fields, or one
+    of its comments, contain every word of the search, the last one as a
+    prefix. Tickets are scored by the field weights of the words they matched.
+    Words are not stemmed.
+    """
+
+    def __init__(self):
+        self.postings = {}  # word -> {document id: score}
+        self.terms = []  # Sorted words, for prefix lookups
+        self.tickets = {}  # document id -> ticket id
+        self.created_at = {}  # ticket id -> created_at
+
+    def add(self, doc_id, weighted_texts, created_at=None, ticket_id=None):
+        """Index (text, weight) pairs as one document; weight is 'A', 'B' or 'C'.
+
+        Comments are added as documents of their own with the ticket_id they belong to.
+        """
+        words = {}
+        for text, weight in weighted_texts:
+            field_weight = FIELD_WEIGHTS[weight]
+            for word in tokenize(text):
+                words[word] = words.get(word, 0.0) + field_weight
+        postings = self.postings
+        for word, score in words.items():
+            if word in postings:
+                postings[word][doc_id] = score
+            else:
+                postings[word] = {doc_id: score}
+        ticket_id = ticket_id or doc_id
+        self.tickets[doc_id] = ticket_id
+        if created_at is not None or ticket_id not in self.created_at:
+            self.created_at[ticket_id] = created_at
+        self.terms = []
+
+    def _matches(self, term, prefix=False):
+        """Score per document for term, or for every word starting with it"""
+        if not prefix:
+            return self.postings.get(term, {})
+        if not self.terms:
+            self.terms = sorted(self.postings)
+        matches = {}
+        index = bisect.bisect_left(self.terms, term)
+        while index < len(self.terms) and self.terms[index].startswith(term):
+            for doc_id, score in self.postings[self.terms[index]].items():
+                matches[doc_id] = matches.get(doc_id, 0.0) + score
+            index += 1
+        return matches
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """Ids of tickets matching every word of text, best match first"""
+        terms = search_terms(text)
+        if not terms:
+            return []
+        scores = None
+        for position, term in enumerate(terms):
+            matches = self._matches(term, prefix=position == len(terms) - 1)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {doc_id: score + matches[doc_id] for doc_id, score in scores.items() if doc_id in matches}
+            if not scores:
+                return []
+
+        ticket_scores = {}
+        for doc_id, score in scores.items():
+            ticket_id = self.tickets[doc_id]
+            ticket_scores[ticket_id] = ticket_scores.get(ticket_id, 0.0) + score
+
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        ranked = sorted(ticket_scores, key=lambda ticket_id: (ticket_scores[ticket_id],
+                                                              self.created_at.get(ticket_id) or epoch), reverse=True)
+        return ranked[:limit]
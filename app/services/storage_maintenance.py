@@ -0,0 +1,322 @@
+import csv
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import exists, select
+from app.config import STORAGE_DIR, STORAGE_SCAN_PATH
+from app.database.session_scope import session_scope
+from app.models.models import Blob, File
+from app.services.file_storage import calculate_file_hash, remove_unreferenced_blobs, remove_untracked_files
+
+# Blobs are stored when a file is attached, before the ticket is submitted, so
+# young unreferenced blobs may still be claimed by a form that is open somewhere
+ORPHAN_GRACE = timedelta(hours=24)
+
+# Storage paths per IN (...) lookup and file rows per streamed batch
+LOOKUP_BATCH = 1000
+
+SCAN_WORKERS = 8
+
+# Directories listed ahead of the one being processed
+PREFETCH_DIRECTORIES = SCAN_WORKERS * 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    storage_path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    verified_at TEXT NOT NULL,
+    run_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scan_progress (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Key prefix of blobs whose content hash was never recorded
+LEGACY_PREFIX = 'legacy-'
+
+REPORT_HEADERS = ["Problem", "Storage Path", "Size", "Detail"]
+
+def storage_key(storage_path):
+    """Storage paths are written with os.sep; compare them with forward slashes"""
+    return storage_path.replace('\\', '/')
+
+def path_variants(key):
+    """The spellings a key may have in files.storage_path"""
+    return {key, key.replace('/', '\\')}
+
+def directory_key(rel_dir):
+    return tuple(rel_dir.split('/')) if rel_dir else ()
+
+def storage_directories(root):
+    """Yield every directory under root relative to it, depth first in sorted order"""
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        yield rel_dir
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as entries:
+                names = [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+        except OSError as e:
+            print(f"Cannot list {rel_dir or root}: {str(e)}")
+            continue
+        stack.extend(f"{rel_dir}/{name}" if rel_dir else name for name in sorted(names, reverse=True))
+
+def list_blobs(root, rel_dir):
+    """Stat the regular files of one directory; returns (key, size, mtime_ns, changed_at) tuples"""
+    blobs = []
+    try:
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                key = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                # store_file keeps the source's mtime, ctime tells when the blob arrived
+                blobs.append((key, stat.st_size, stat.st_mtime_ns, max(stat.st_mtime, stat.st_ctime)))
+    except OSError as e:
+        print(f"Cannot list {rel_dir or root}: {str(e)}")
+    blobs.sort()
+    return blobs
+
+class StorageScan:
+    """Finds orphaned blobs, missing blobs and hash mismatches under STORAGE_DIR.
+
+    The disk walk lists directories on a thread pool and joins each one against
+    the blobs table with batched lookups; the blobs table is then streamed to
+    find rows whose bytes are gone. Only the current directory and one batch of
+    rows are held in memory. Hashes are recomputed only for blobs whose size
+    or mtime changed since they were last verified, and progress is saved
+    after every directory and batch so an interrupted scan resumes where it
+    stopped.
+    """
+
+    def __init__(self, root=STORAGE_DIR, state_path=STORAGE_SCAN_PATH, delete_orphans=False,
+                 verify_all=False, grace=ORPHAN_GRACE, workers=SCAN_WORKERS, report_path=None):
+        self.root = root
+        self.state_path = state_path
+        self.delete_orphans = delete_orphans
+        self.verify_all = verify_all
+        self.grace = grace
+        self.workers = workers
+        self.report_path = report_path
+        self.counts = dict.fromkeys([
+            'directories', 'blobs', 'bytes', 'referenced', 'recent', 'orphans', 'orphans_deleted',
+            'hashed', 'unchanged', 'mismatched', 'rows', 'missing'
+        ], 0)
+        self._conn = None
+        self._report = None
+        self._writer = None
+
+    # State
+
+    def _connection(self):
+        if self._conn is None:
+            if self.state_path != ':memory:':
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.state_path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def get_progress(self, name):
+        row = self._connection().execute("SELECT value FROM scan_progress WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_progress(self, **values):
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scan_progress (name, value) VALUES (?, ?)",
+                [(name, None if value is None else str(value)) for name, value in values.items()]
+            )
+
+    def fingerprints(self, keys):
+        rows = self._connection().execute(
+            f"SELECT storage_path, size, mtime_ns, sha256 FROM fingerprints "
+            f"WHERE storage_path IN ({','.join('?' * len(keys))})",
+            keys
+        )
+        return {row[0]: row[1:] for row in rows}
+
+    # Reporting
+
+    def report(self, problem, key, size=None, detail=""):
+        print(f"{problem}: {key} {detail}".rstrip())
+        if self.report_path:
+            if self._writer is None:
+                self._report = open(self.report_path, 'w', newline='', encoding='utf-8')
+                self._writer = csv.writer(self._report)
+                self._writer.writerow(REPORT_HEADERS)
+            self._writer.writerow([problem, key, size if size is not None else "", detail])
+
+    # Disk walk
+
+    def iter_directories(self, pool, after=None):
+        """Yield (rel_dir, blobs) in walk order while later directories are listed in the background"""
+        pending = deque()
+        after_key = directory_key(after) if after is not None else None
+        for rel_dir in storage_directories(self.root):
+            if after_key is not None and directory_key(rel_dir) <= after_key:
+                continue
+            pending.append((rel_dir, pool.submit(list_blobs, self.root, rel_dir)))
+            if len(pending) >= PREFETCH_DIRECTORIES:
+                rel_dir, future = pending.popleft()
+                yield rel_dir, future.result()
+        while pending:
+            rel_dir, future = pending.popleft()
+            yield rel_dir, future.result()
+
+    def blob_rows(self, keys):
+        """Map each tracked key to (blob hash, whether a file row still uses it)"""
+        tracked = {}
+        in_use = exists().where(File.blob_hash == Blob.hash)
+        with session_scope(read_only=True) as db:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                candidates = set()
+                for key in keys[start:start + LOOKUP_BATCH]:
+                    candidates |= path_variants(key)
+                rows = db.execute(
+                    select(Blob.storage_path, Blob.hash, in_use).where(Blob.storage_path.in_(candidates))
+                )
+                for storage_path, blob_hash, used in rows:
+                    tracked[storage_key(storage_path)] = (blob_hash, used)
+        return tracked
+
+    def process_directory(self, pool, rel_dir, blobs, run_id, cutoff):
+        self.counts['directories'] += 1
+        if not blobs:
+            return
+        keys = [blob[0] for blob in blobs]
+        tracked = self.blob_rows(keys)
+        known = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            known.update(self.fingerprints(keys[start:start + LOOKUP_BATCH]))
+
+        untracked = []
+        unused = []
+        to_hash = []
+        verified = []
+        for key, size, mtime_ns, changed_at in blobs:
+            self.counts['blobs'] += 1
+            self.counts['bytes'] += size
+            if key not in tracked:
+                if changed_at > cutoff:
+                    self.counts['recent'] += 1
+                else:
+                    self.counts['orphans'] += 1
+                    untracked.append(key)
+                    self.report("orphan", key, size)
+                continue
+
+            blob_hash, used = tracked[key]
+            if not used:
+                # The blob row outlived its last file, the row and the bytes can go
+                self.counts['orphans'] += 1
+                unused.append(blob_hash)
+                self.report("orphan", key, size, f"blob {blob_hash} has no files")
+                continue
+
+            self.counts['referenced'] += 1
+            fingerprint = known.get(key)
+            if not self.verify_all and fingerprint and fingerprint[:2] == (size, mtime_ns):
+                self.counts['unchanged'] += 1
+                verified.append((key, size, mtime_ns, fingerprint[2]))
+            else:
+                to_hash.append((key, size, mtime_ns))
+
+        hashes = pool.map(lambda blob: calculate_file_hash(os.path.join(self.root, blob[0])), to_hash)
+        for (key, size, mtime_ns), sha256 in zip(to_hash, hashes):
+            self.counts['hashed'] += 1
+            verified.append((key, size, mtime_ns, sha256))
+
+        now = datetime.now(timezone.utc).isoformat()
+        for key, size, mtime_ns, sha256 in verified:
+            blob_hash = tracked[key][0]
+            # Blobs migrated without a hash have a placeholder key and cannot be checked
+            if not blob_hash.startswith(LEGACY_PREFIX) and sha256 != blob_hash:
+                self.counts['mismatched'] += 1
+                self.report("hash mismatch", key, size, f"expected {blob_hash}, found {sha256}")
+
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (storage_path, size, mtime_ns, sha256, verified_at, run_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, size, mtime_ns, sha256, now, run_id) for key, size, mtime_ns, sha256 in verified]
+            )
+
+        if self.delete_orphans:
+            # Both re-check the database right before removing anything
+            self.counts['orphans_deleted'] += remove_unreferenced_blobs(unused)
+            self.counts['orphans_deleted'] += remove_untracked_files(key.replace('/', os.sep) for key in untracked)
+
+    def scan_disk(self, run_id):
+        cutoff = time.time() - self.grace.total_seconds()
+        after = self.get_progress('last_directory')
+        if after is not None:
+            print(f"Resuming storage scan after {after or '(root)'}")
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="storage-scan") as pool:
+            for rel_dir, blobs in self.iter_directories(pool, after):
+                self.process_directory(pool, rel_dir, blobs, run_id, cutoff)
+                self.set_progress(last_directory=rel_dir)
+
+    # Database pass
+
+    def scan_rows(self):
+        """Stream the blobs table and report blobs whose bytes do not exist"""
+        last_hash = self.get_progress('last_blob_hash')
+        query = select(Blob.hash, Blob.storage_path).order_by(Blob.hash)
+        if last_hash:
+            query = query.where(Blob.hash > last_hash)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="storage-scan") as pool, \
+                session_scope(read_only=True) as db:
+            result = db.execute(query.execution_options(yield_per=LOOKUP_BATCH))
+            for batch in result.partitions():
+                keys = [storage_key(row.storage_path) for row in batch]
+                found = pool.map(lambda key: os.path.isfile(os.path.join(self.root, key)), keys)
+                for row, key, present in zip(batch, keys, found):
+                    self.counts['rows'] += 1
+                    if not present:
+                        self.counts['missing'] += 1
+                        self.report("missing", key, detail=f"blob {row.hash}")
+                self.set_progress(last_blob_hash=batch[-1].hash)
+
+    def run(self, restart=False):
+        """Scan storage and the blobs table; returns the counts of this run"""
+        start = time.perf_counter()
+        if restart:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM scan_progress")
+
+        run_id = self.get_progress('run_id')
+        if run_id is None:
+            run_id = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+            self.set_progress(run_id=run_id, phase='disk')
+
+        try:
+            if self.get_progress('phase') == 'disk':
+                self.scan_disk(run_id)
+                self.set_progress(phase='rows')
+            self.scan_rows()
+
+            # Forget fingerprints of blobs this run did not see
+            with self._connection() as conn:
+                conn.execute("DELETE FROM fingerprints WHERE run_id != ?", (run_id,))
+                conn.execute("DELETE FROM scan_progress")
+        finally:
+            if self._report is not None:
+                self._report.close()
+                self._report = None
+                self._writer = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self.counts['elapsed_seconds'] = round(time.perf_counter() - start, 1)
+        return self.counts
@@ -0,0 +1,149 @@
+import mimetypes
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from PIL import Image, ImageOps
+from app.config import STORAGE_DIR, THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES
+
+# Longest edge in pixels of card thumbnails and of the in-app preview
+THUMBNAIL_SIZE = 160
+PREVIEW_SIZE = 1024
+
+THUMBNAIL_WORKERS = 2
+
+# Pruning stops once the cache is back under this share of its limit
+PRUNE_TARGET = 0.9
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff'}
+
+def is_image(file):
+    """True for attachments Pillow can render"""
+    mime_type = file.mime_type or mimetypes.guess_type(file.storage_path)[0] or ''
+    return mime_type.startswith('image/') or os.path.splitext(file.storage_path)[1].lower() in IMAGE_EXTENSIONS
+
+def render_image(source_path, target_path, size):
+    """Write a JPEG of the image scaled to fit size x size"""
+    with Image.open(source_path) as image:
+        # JPEGs decode straight at a reduced scale instead of full size
+        image.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (45, 45, 45))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        temp_path = f"{target_path}.tmp"
+        image.save(temp_path, 'JPEG', quality=85)
+    os.replace(temp_path, target_path)
+
+class ThumbnailCache:
+    """Size-bounded disk cache of downscaled attachment images keyed by File.hash.
+
+    Images are rendered on a small thread pool; request() returns a Future that
+    resolves to the cached JPEG path, or None if the image cannot be rendered.
+    Reading a cached entry refreshes its mtime, and the least recently used
+    entries are removed once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES, workers=THUMBNAIL_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = {}
+        self._total_bytes = None
+
+    def cache_path(self, file_hash, size):
+        return os.path.join(self.cache_dir, file_hash[:2], f"{file_hash}_{size}.jpg")
+
+    def cached(self, file_hash, size=THUMBNAIL_SIZE):
+        """Path of an existing entry, marked as recently used, or None"""
+        path = self.cache_path(file_hash, size)
+        try:
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+
+    def request(self, file, size=THUMBNAIL_SIZE):
+        """Future resolving to the path of the file's rendered image"""
+        path = self.cached(file.hash, size)
+        if path:
+            future = Future()
+            future.set_result(path)
+            return future
+
+        key = (file.hash, size)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnails")
+                future = self._pool.submit(self._render, os.path.join(STORAGE_DIR, file.storage_path), file.hash, size)
+                self._pending[key] = future
+                future.add_done_callback(lambda f, key=key: self._finish(key))
+        return future
+
+    def _finish(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _render(self, source_path, file_hash, size):
+        path = self.cache_path(file_hash, size)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            render_image(source_path, path, size)
+        except Exception as e:
+            print(f"Error rendering thumbnail for {source_path}: {str(e)}")
+            return None
+        self._account(os.path.getsize(path))
+        return path
+
+    def _account(self, added_bytes):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += added_bytes
+            if self._total_bytes > self.max_bytes:
+                self._prune()
+
+    def _entries(self):
+        """(path, size, mtime) of every cached file"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as buckets:
+                for bucket in buckets:
+                    if not bucket.is_dir():
+                        continue
+                    with os.scandir(bucket.path) as files:
+                        for entry in files:
+                            if entry.is_file():
+                                stat = entry.stat()
+                                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _prune(self):
+        """Remove least recently used entries until the cache is under PRUNE_TARGET of its limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes * PRUNE_TARGET:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        self._total_bytes = total
+        print(f"Thumbnail cache pruned {removed} entries, {total / 1024 / 1024:.1f} MB left")
+
+thumbnail_cache = ThumbnailCache()
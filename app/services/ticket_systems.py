@@ -0,0 +1,67 @@
+from sqlalchemy import select, text
+from app.models.models import Opportunity, opportunity_systems
+from app.services.reference_data import reference_data
+
+# Parts of a system's documentation a ticket can report, in the order the form lists them
+AFFECTED_PORTIONS = [
+    "R&I",
+    "Calibration Procedure",
+    "Justification",
+    "Full Document Missing",
+    "Highlighting Issue",
+    "Naming Issue"
+]
+
+def catalog_ids():
+    """{code: id} of the ADAS systems in the catalog"""
+    return {system.code: system.id for system in reference_data.adas_systems()}
+
+def system_criterion(code=None, portion=None, catalog=None):
+    """Criterion on Opportunity for tickets naming system code with portion among its affected portions.
+
+    Either may be None for any; returns None when both are. A catalog code is
+    looked up in opportunity_systems through its (system_id, opportunity_id)
+    index; triggers on both tables keep those rows complete (migrations 019
+    and 022). A portion on its own, and codes the catalog does not have, are
+    matched by containment on the systems JSON, which its GIN index answers.
+    """
+    if not code and not portion:
+        return None
+    catalog = catalog_ids() if catalog is None else catalog
+    if code in catalog:
+        rows = select(opportunity_systems.c.opportunity_id).where(opportunity_systems.c.system_id == catalog[code])
+        if portion:
+            rows = rows.where(opportunity_systems.c.affected_portions.contains([portion]))
+        return Opportunity.id.in_(rows)
+    entry = {}
+    if code:
+        entry['system'] = code
+    if portion:
+        entry['affected_portions'] = [portion]
+    return Opportunity.systems.contains([entry])
+
+def names_system(systems, code=None, portion=None):
+    """Whether a ticket's systems JSON matches system_criterion(code, portion); for cached tickets"""
+    if not code and not portion:
+        return True
+    if not isinstance(systems, list):
+        return False
+    for entry in systems:
+        if not isinstance(entry, dict):
+            continue
+        if code and entry.get('system') != code:
+            continue
+        if portion and portion not in (entry.get('affected_portions') or []):
+            continue
+        return True
+    return False
+
+def rebuild(db):
+    """Rebuild opportunity_systems from every ticket's JSON; returns the row count.
+
+    Triggers keep the rows current as tickets and the catalog change; this
+    repairs them, e.g. after triggers were disabled for a bulk load.
+    """
+    rows = db.execute(text("SELECT rebuild_opportunity_systems()")).scalar()
+    print(f"Rebuilt {rows} ticket system row(s)")
+    return rows
@@ -0,0 +1,135 @@
+import csv
+import io
+from sqlalchemy import text
+
+# Rows are streamed into this table with COPY and upserted from there in one statement
+STAGING_TABLE_SQL = """
+    DROP TABLE IF EXISTS vehicle_import;
+    CREATE TEMP TABLE vehicle_import (year text, make text, model text, notes text) ON COMMIT DROP
+"""
+
+# Catalog rows are inserted, or update the vehicle with the same (year, make, model)
+# when they bring something new: a vehicle added by hand that turns out to be in
+# the catalog stops being custom, and notes in the import replace the stored ones.
+# Rows that change nothing are not written, so re-running an import is a no-op.
+UPSERT_SQL = """
+    WITH incoming AS (
+        SELECT DISTINCT ON (year, make, model) year, make, model, notes
+        FROM vehicle_import
+        ORDER BY year, make, model, notes NULLS LAST
+    ), upserted AS (
+        INSERT INTO vehicles AS v (id, year, make, model, is_custom, notes, created_at)
+        SELECT gen_random_uuid(), year, make, model, false, notes, now() FROM incoming
+        ON CONFLICT (year, make, model) DO UPDATE
+            SET is_custom = false,
+                notes = COALESCE(EXCLUDED.notes, v.notes),
+                last_modified_at = now()
+            WHERE v.is_custom IS DISTINCT FROM false
+               OR (EXCLUDED.notes IS NOT NULL AND EXCLUDED.notes IS DISTINCT FROM v.notes)
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT
+        (SELECT COUNT(*) FROM incoming) AS vehicles,
+        COUNT(*) FILTER (WHERE inserted) AS inserted,
+        COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM upserted
+"""
+
+class _CopyStream:
+    """File-like view of rows as CSV text, read by COPY a chunk at a time"""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def read(self, size=-1):
+        while size < 0 or self.buffer.tell() < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(row)
+        data = self.buffer.getvalue()
+        if size < 0:
+            size = len(data)
+        # Keep the part of the last row that did not fit for the next read
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.buffer.write(data[size:])
+        return data[:size]
+
+def read_catalog(path, on_skip=None):
+    """(year, make, model, notes) rows of a catalog CSV.
+
+    The file needs Year, Make and Model columns and may have a Notes column;
+    commas and semicolons both work as delimiters. Rows without a valid year,
+    make or model are passed to on_skip and left out.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        sample = file.readline()
+        file.seek(0)
+        delimiter = ';' if ';' in sample and ',' not in sample else ','
+        for row in csv.DictReader(file, delimiter=delimiter):
+            make = str(row.get('Make') or '').strip()
+            model = str(row.get('Model') or '').strip()
+            notes = str(row.get('Notes') or '').strip() or None
+            try:
+                year = str(int(str(row.get('Year') or '').strip()))
+            except ValueError:
+                year = None
+            if not (year and make and model):
+                if on_skip:
+                    on_skip(row)
+                continue
+            yield year, make, model, notes
+
+def _upsert_staged(db, rows):
+    vehicles, inserted, updated = db.execute(text(UPSERT_SQL)).one()
+    counts = {
+        'rows': rows,
+        'vehicles': vehicles,
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': vehicles - inserted - updated
+    }
+    print(f"Catalog import: {inserted} inserted, {updated} updated, {counts['unchanged']} unchanged "
+          f"({rows} rows, {vehicles} distinct vehicles)")
+    return counts
+
+def import_rows(db, rows):
+    """Upsert (year, make, model, notes) rows into the catalog; returns the counts.
+
+    The rows are streamed into a temporary table with COPY and merged with a
+    single INSERT ... ON CONFLICT, so the cost is a few statements whatever
+    the number of rows. The caller commits.
+    """
+    db.execute(text(STAGING_TABLE_SQL))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY vehicle_import (year, make, model, notes) FROM STDIN WITH (FORMAT csv)",
+                           _CopyStream(rows))
+        staged = cursor.rowcount
+    finally:
+        cursor.close()
+    return _upsert_staged(db, staged)
+
+def import_csv(db, path):
+    """Upsert the vehicles of a catalog CSV; returns the counts, including rows skipped as invalid"""
+    skipped = []
+    counts = import_rows(db, read_catalog(path, on_skip=skipped.append))
+    counts['skipped'] = len(skipped)
+    if skipped:
+        print(f"Skipped {len(skipped)} row(s) without a valid year, make and model, e.g. {skipped[0]}")
+    return counts
+
+def copy_year(db, from_year, to_year):
+    """Add the catalog vehicles of from_year again for to_year, for a new model year; returns the counts.
+
+    Only catalog vehicles are copied, vehicles added by hand stay with their year.
+    """
+    db.execute(text(STAGING_TABLE_SQL))
+    staged = db.execute(text("""
+        INSERT INTO vehicle_import (year, make, model)
+        SELECT :to_year, make, model FROM vehicles WHERE year = :from_year AND is_custom IS NOT TRUE
+    """), {'from_year': str(from_year), 'to_year': str(to_year)}).rowcount
+    return _upsert_staged(db, staged)
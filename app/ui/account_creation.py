@@ -2,13 +2,10 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                            QLineEdit, QPushButton, QMessageBox, QComboBox, QFrame)
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QIcon
-from app.database.connection import SessionLocal
-from app.models.models import User
-from app.auth.auth_handler import hash_pin
 from datetime import datetime
 
 class AccountCreationWidget(QWidget):
-    account_created = pyqtSignal(User)
+    account_created = pyqtSignal(object)  # User
     
     # Define constants
     DEPARTMENT = "Information Solutions"
@@ -275,6 +272,10 @@ class AccountCreationWidget(QWidget):
         role_key = self.fields["role_key"].text()
         role = self.ROLE_KEYS.get(role_key, "user")
         
+        from app.auth.auth_handler import hash_pin
+        from app.database.connection import SessionLocal
+        from app.models.models import User
+
         # Create user
         db = SessionLocal()
         try:
@@ -2,12 +2,11 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QLineEdit,
                            QPushButton, QMessageBox, QCheckBox, QHBoxLayout,
                            QDialog, QFormLayout)
 from PyQt5.QtCore import pyqtSignal, QSettings
-from app.auth.auth_handler import hash_pin, create_access_token
-from app.database.connection import get_db_with_retry
-from app.models.models import User
-from sqlalchemy import func
 from datetime import datetime
 
+# The database and auth modules are imported when they are first used so the
+# login screen can be shown before SQLAlchemy has loaded
+
 class PinResetDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -143,6 +142,10 @@ class PinResetDialog(QDialog):
             QMessageBox.warning(self, "Error", "PINs do not match")
             return
             
+        from app.auth.auth_handler import hash_pin
+        from app.database.connection import get_db_with_retry
+        from app.models.models import User
+
         try:
             db = get_db_with_retry()
             try:
@@ -168,7 +171,7 @@ class PinResetDialog(QDialog):
             QMessageBox.critical(self, "Error", f"Failed to reset PIN: {str(e)}")
 
 class AuthWidget(QWidget):
-    authenticated = pyqtSignal(User)
+    authenticated = pyqtSignal(object)  # User
     create_account_requested = pyqtSignal()
     
     def __init__(self):
@@ -346,7 +349,12 @@ class AuthWidget(QWidget):
         if not username or not pin:
             QMessageBox.warning(self, "Error", "Please enter both username and PIN")
             return
-            
+
+        from app.auth.auth_handler import hash_pin, create_access_token
+        from app.auth.session_store import save_session, clear_session
+        from app.database.connection import get_db_with_retry
+        from app.models.models import User
+
         pin_hash = hash_pin(pin)
         
         try:
@@ -360,9 +368,13 @@ class AuthWidget(QWidget):
                 
                 if user:
                     now = datetime.utcnow()
+                    # Kept for the notification check, which looks at what changed since then
+                    user.previous_login = user.last_login
                     # Update last login and last active
                     user.last_login = now
                     user.last_active = now
+                    # The user is handed on as is; reloading it after the commit would cost a round trip
+                    db.expire_on_commit = False
                     db.commit()
                     
                     # Handle remember me
@@ -372,9 +384,13 @@ class AuthWidget(QWidget):
                         self.settings.remove('remembered_username')
                     
                     # Create JWT token
-                    token = create_access_token(str(user.id))
-                    # Store token (you might want to store this in the main application)
+                    token = create_access_token(str(user.id), role=user.role)
                     user.token = token
+                    # Remembered users skip this form on the next launch while the token is valid
+                    if self.remember_me.isChecked():
+                        save_session(user, token)
+                    else:
+                        clear_session()
                     self.authenticated.emit(user)
                     self.clear_fields()
                 else:
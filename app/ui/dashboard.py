@@ -1,10 +1,16 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                            QPushButton, QScrollArea, QFrame, QMessageBox, QComboBox, QDateEdit,
-                           QDialog, QTextEdit)
-from PyQt5.QtCore import Qt, QTimer, QDate, QPoint
-from PyQt5.QtGui import QCloseEvent
-from app.database.connection import SessionLocal
-from app.models.models import Opportunity, Notification, ActivityLog, User
+                           QDialog, QTextEdit, QLineEdit)
+from PyQt5.QtCore import Qt, QTimer, QDate, QPoint, QObject, QUrl
+from PyQt5.QtGui import QCloseEvent, QPixmap, QIcon, QDesktopServices
+from app.database.session_scope import session_scope
+from app.database.connection import connection_health, is_transient_error
+from app.database.local_cache import local_cache, CachedOpportunity
+from app.services import audit_log, comment_service, search_service, read_models, ticket_systems
+from app.services.reference_data import reference_data
+from app.services.ticket_systems import AFFECTED_PORTIONS
+from app.services.thumbnail_cache import thumbnail_cache, is_image, THUMBNAIL_SIZE, PREVIEW_SIZE
+from app.models.models import Opportunity, Notification, User
 from app.config import STORAGE_DIR
 import os
 import traceback
@@ -13,26 +19,116 @@ from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import pyqtSignal, QEvent
 from typing import Dict, List, Optional, Union, Any, cast, TypeVar, Iterable
 from zoneinfo import ZoneInfo
-from sqlalchemy.orm import Session
-from sqlalchemy import Column, ColumnElement, String, DateTime, Interval
+from sqlalchemy.orm import Session, joinedload, selectinload, undefer
+from sqlalchemy import Column, ColumnElement, String, Interval
 from sqlalchemy.sql.elements import BinaryExpression
 from sqlalchemy.sql.expression import cast as sql_cast
 
 T = TypeVar('T')
 
+# Edge length of the thumbnail icons on attachment buttons
+THUMBNAIL_ICON_SIZE = 96
+
+# Pause in typing after which the search box runs its query
+SEARCH_DEBOUNCE_MS = 250
+
+# Cards shown around a ticket opened with focus_ticket
+FOCUS_PAGE_SIZE = 20
+
+# Status shown by each filter button
+STATUS_FILTERS = {
+    "new": "new",
+    "in_progress": "in progress",
+    "completed": "completed",
+    "needs_info": "needs info",
+}
+
+# Filter and date range the dashboard opens with
+DEFAULT_FILTER = "new"
+DEFAULT_DAYS = 7
+
+def default_date_range():
+    """(start_date, end_date) of the date filter when the dashboard opens"""
+    today = datetime.now().date()
+    return today - timedelta(days=DEFAULT_DAYS), today
+
+def status_query(db: Session, filter_id: str, start_date=None, end_date=None):
+    """Unordered query for unarchived tickets of a filter button's status created between the dates"""
+    query = db.query(Opportunity).filter(Opportunity.archived_at.is_(None))
+    if filter_id in STATUS_FILTERS:
+        query = query.filter(sql_cast(Opportunity.status, String).ilike(STATUS_FILTERS[filter_id]))
+    if start_date and end_date:
+        utc = ZoneInfo('UTC')
+        # Compared as stored, so the range uses ix_opportunities_created_at instead of a cast per row
+        query = query.filter(
+            Opportunity.created_at >= datetime.combine(start_date, datetime.min.time(), tzinfo=utc),
+            Opportunity.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time(), tzinfo=utc)
+        )
+    return query
+
+def load_first_page():
+    """(date_range, tickets) for the view the dashboard opens with, ready to be shown.
+
+    Runs on the startup prefetch thread while the login screen is up; the
+    tickets come back as read-only cards with everything they show.
+    """
+    date_range = default_date_range()
+    with session_scope(replica=True) as db:
+        opportunities = read_models.ticket_cards(db, status_query(db, DEFAULT_FILTER, *date_range))
+    print(f"Prefetched {len(opportunities)} dashboard tickets")
+    return date_range, opportunities
+
+def open_with_default_app(file_path):
+    """Hand a file to the desktop's default viewer without blocking on it"""
+    if not QDesktopServices.openUrl(QUrl.fromLocalFile(file_path)):
+        raise OSError(f"No application is associated with {os.path.basename(file_path)}")
+
+class ThumbnailLoader(QObject):
+    """Delivers images rendered by the thumbnail pool back on the GUI thread"""
+    ready = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.callbacks = {}
+        self.next_token = 0
+        self.ready.connect(self.deliver)
+
+    def load(self, file, size, callback):
+        """Call callback(path) on the GUI thread once the image is rendered; path is '' on failure"""
+        self.next_token += 1
+        token = self.next_token
+        self.callbacks[token] = callback
+        future = thumbnail_cache.request(file, size)
+        # Emitted from the pool thread, the queued connection runs deliver on the GUI thread
+        future.add_done_callback(lambda f, token=token: self.ready.emit(token, f.result() or ''))
+
+    def deliver(self, token, path):
+        callback = self.callbacks.pop(token, None)
+        if callback:
+            callback(path)
+
 class DashboardWidget(QWidget):
     refresh_needed = pyqtSignal()  # Signal to trigger refresh of other components
     
-    def __init__(self, current_user: Optional[User] = None):
+    def __init__(self, current_user: Optional[User] = None, first_page=None):
         super().__init__()
         self.current_user = current_user
-        self.current_filter: str = "new"
+        self.current_filter: str = DEFAULT_FILTER
+        # (date_range, tickets) from load_first_page, shown instead of querying on the first load
+        self.first_page = first_page
         self.opportunity_widgets: Dict[str, QFrame] = {}  # Change to dict to store by ID
         self.is_loading: bool = False
         self.is_compact: bool = True
+        self.showing_cached: bool = False  # True while cards come from the local cache
+        self.thumbnail_loader = ThumbnailLoader(self)
         self.refresh_timer = QTimer()
         self.refresh_timer.setSingleShot(True)
         self.refresh_timer.timeout.connect(self.do_refresh)
+        # Searches run once typing pauses rather than on every keystroke
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_opportunities)
         self.initUI()
         
         # Set initial window size
@@ -81,6 +177,26 @@ class DashboardWidget(QWidget):
         """)
         title_row.addWidget(title)
 
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search tickets, vehicles, systems and comments...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setMinimumWidth(280)
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                background-color: #2d2d2d;
+                color: white;
+                border: 1px solid #3d3d3d;
+                border-radius: 16px;
+                padding: 8px 14px;
+                font-size: 13px;
+            }
+            QLineEdit:focus {
+                border-color: #0078d4;
+            }
+        """)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
+        title_row.addWidget(self.search_input, stretch=1)
+
         # Add view toggle button with clearer text
         self.view_toggle_btn = QPushButton("Compact View" if self.is_compact else "Expanded View")
         self.view_toggle_btn.setToolTip("Toggle between compact and expanded view")
@@ -209,7 +325,7 @@ class DashboardWidget(QWidget):
         date_layout.addWidget(QLabel("Date Range:"))
         self.date_from = QDateEdit()
         self.date_from.setCalendarPopup(True)
-        self.date_from.setDate(QDate.currentDate().addDays(-7))  # Default to 7 days ago
+        self.date_from.setDate(QDate.currentDate().addDays(-DEFAULT_DAYS))
         date_layout.addWidget(self.date_from)
         date_layout.addWidget(QLabel("to"))
         self.date_to = QDateEdit()
@@ -218,6 +334,18 @@ class DashboardWidget(QWidget):
         date_layout.addWidget(self.date_to)
         advanced_filter_layout.addLayout(date_layout)
         
+        # ADAS system and affected portion filters
+        system_layout = QHBoxLayout()
+        system_layout.addWidget(QLabel("System:"))
+        self.system_filter = QComboBox()
+        self.system_filter.addItems(["All"] + self.system_codes())
+        system_layout.addWidget(self.system_filter)
+        system_layout.addWidget(QLabel("Portion:"))
+        self.portion_filter = QComboBox()
+        self.portion_filter.addItems(["All"] + AFFECTED_PORTIONS)
+        system_layout.addWidget(self.portion_filter)
+        advanced_filter_layout.addLayout(system_layout)
+        
         # Create container for My Tickets specific filters
         self.my_tickets_filters = QWidget()
         my_tickets_layout = QHBoxLayout(self.my_tickets_filters)
@@ -283,6 +411,12 @@ class DashboardWidget(QWidget):
         self.advanced_filter_frame.hide()
         layout.addWidget(self.advanced_filter_frame)
         
+        # Explains the partial list shown after focus_ticket
+        self.focus_label = QLabel()
+        self.focus_label.setStyleSheet("color: #cccccc; font-size: 12px;")
+        self.focus_label.hide()
+        header_layout.addWidget(self.focus_label)
+        
         layout.addLayout(header_layout)
         
         # Create scroll area for opportunities
@@ -347,27 +481,64 @@ class DashboardWidget(QWidget):
 
     def reset_filters(self):
         """Reset advanced filters to default values"""
-        self.date_from.setDate(QDate.currentDate().addDays(-7))
+        self.date_from.setDate(QDate.currentDate().addDays(-DEFAULT_DAYS))
         self.date_to.setDate(QDate.currentDate())
+        self.system_filter.setCurrentText("All")
+        self.portion_filter.setCurrentText("All")
         if self.current_filter == "my_tickets":
             self.status_filter.setCurrentText("All")
             self.assignment_filter.setCurrentText("All")
         self.apply_advanced_filters()
 
-    def get_filtered_opportunities(self, db: Session) -> List[Opportunity]:
+    def system_codes(self) -> List[str]:
+        """ADAS system codes for the system filter, from the local cache when the server is unreachable"""
+        try:
+            systems = reference_data.adas_systems()
+        except Exception as e:
+            print(f"Error loading ADAS systems: {str(e)}")
+            systems = local_cache.get_systems()
+        return sorted(system.code for system in systems)
+
+    def system_filter_values(self) -> tuple:
+        """(system code, affected portion) of the system filters, None for All"""
+        if not hasattr(self, 'system_filter'):
+            return None, None
+        code, portion = self.system_filter.currentText(), self.portion_filter.currentText()
+        return (code if code != "All" else None), (portion if portion != "All" else None)
+
+    def search_text(self) -> str:
+        """Text in the search box, or an empty string when no search is active"""
+        return self.search_input.text().strip() if hasattr(self, 'search_input') else ""
+
+    @staticmethod
+    def card_options() -> tuple:
+        """Load the people and files each card shows together with the ticket rows"""
+        return (
+            joinedload(Opportunity.creator),
+            joinedload(Opportunity.acceptor),
+            selectinload(Opportunity.files),
+            undefer(Opportunity.comment_count)
+        )
+
+    def get_filtered_opportunities(self, db: Session) -> List[Union[Opportunity, read_models.TicketCard]]:
         """Get opportunities based on current filter and advanced filter settings"""
-        query = db.query(Opportunity)
-        
-        # Base filters
-        if self.current_filter == "new":
-            query = query.filter(sql_cast(Opportunity.status, String).ilike("new"))
-        elif self.current_filter == "in_progress":
-            query = query.filter(sql_cast(Opportunity.status, String).ilike("in progress"))
-        elif self.current_filter == "completed":
-            query = query.filter(sql_cast(Opportunity.status, String).ilike("completed"))
-        elif self.current_filter == "needs_info":
-            query = query.filter(sql_cast(Opportunity.status, String).ilike("needs info"))
-        elif self.current_filter == "my_tickets" and self.current_user:
+        # A search looks through every ticket regardless of the filters
+        if self.search_text():
+            return search_service.search_opportunities(db, self.search_text(), options=self.card_options())
+        
+        # The lists can be long, so they are read as plain rows rather than tracked entities
+        return read_models.ticket_cards(db, self.filtered_query(db))
+
+    def filtered_query(self, db: Session):
+        """Unordered query for the tickets the current filter and advanced filters show"""
+        # Status filters, and the date filter if it exists
+        query = status_query(db, self.current_filter, *self.date_range())
+        
+        criterion = ticket_systems.system_criterion(*self.system_filter_values())
+        if criterion is not None:
+            query = query.filter(criterion)
+        
+        if self.current_filter == "my_tickets" and self.current_user:
             # Show tickets where user is either creator or acceptor
             query = query.filter(
                 (Opportunity.creator_id == self.current_user.id) |
@@ -386,19 +557,24 @@ class DashboardWidget(QWidget):
                 elif assignment == "Assigned to me":
                     query = query.filter(Opportunity.acceptor_id == self.current_user.id)
         
-        # Apply date filters if they exist and are set
-        if hasattr(self, 'date_from') and hasattr(self, 'date_to'):
-            start_date = self.date_from.date().toPyDate()
-            end_date = self.date_to.date().toPyDate()
-            if start_date and end_date:
-                utc = ZoneInfo('UTC')
-                query = query.filter(
-                    sql_cast(Opportunity.created_at, DateTime).between(
-                        datetime.combine(start_date, datetime.min.time(), tzinfo=utc),
-                        datetime.combine(end_date, datetime.max.time(), tzinfo=utc)
-                    ))
-        
-        return query.order_by(Opportunity.created_at.desc()).all()
+        return query
+
+    def date_range(self) -> tuple:
+        """(start_date, end_date) of the date filter, or (None, None) before it is built"""
+        if not (hasattr(self, 'date_from') and hasattr(self, 'date_to')):
+            return None, None
+        return self.date_from.date().toPyDate(), self.date_to.date().toPyDate()
+
+    def take_first_page(self) -> Optional[list]:
+        """The prefetched tickets if they match the current view, once; None otherwise"""
+        first_page, self.first_page = self.first_page, None
+        if first_page is None:
+            return None
+        date_range, opportunities = first_page
+        if (self.current_filter != DEFAULT_FILTER or self.search_text() or date_range != self.date_range()
+                or any(self.system_filter_values())):
+            return None
+        return opportunities
 
     def load_opportunities(self):
         """Load opportunities based on current filter"""
@@ -409,75 +585,99 @@ class DashboardWidget(QWidget):
         try:
             # Clear existing widgets
             self.cleanup_widgets()
+            self.focus_label.hide()
             
-            db = SessionLocal()
             try:
-                # Get opportunities based on filter
-                opportunities = self.get_filtered_opportunities(db)
-                
-                # Mark new opportunities as viewed and update toolbar
-                parent = self.parent()
-                if parent and hasattr(parent, 'toolbar'):
-                    for opp in opportunities:
-                        if opp.status.lower() == "new":
-                            parent.toolbar.viewed_opportunities.add(opp.id)
-                    # Update notification badge
-                    parent.toolbar.check_updates()
+                if not connection_health.is_healthy and local_cache.has_data():
+                    # Server is known to be unreachable; serve the local copy instead of waiting
+                    self.show_cached_opportunities()
+                    return
                 
-                # Add opportunity widgets
-                for opportunity in opportunities:
-                    self.add_opportunity_widget(opportunity)
+                with session_scope(replica=True) as db:
+                    # Get opportunities based on filter, unless they were prefetched during login
+                    opportunities = self.take_first_page()
+                    if opportunities is None:
+                        opportunities = self.get_filtered_opportunities(db)
+                    
+                    # Mark new opportunities as viewed and update toolbar
+                    parent = self.parent()
+                    if parent and hasattr(parent, 'toolbar'):
+                        for opp in opportunities:
+                            if opp.status.lower() == "new":
+                                parent.toolbar.viewed_opportunities.add(opp.id)
+                        # Update notification badge
+                        parent.toolbar.check_updates()
                     
+                    # Add opportunity widgets
+                    for opportunity in opportunities:
+                        self.add_opportunity_widget(opportunity)
+                    
+                self.showing_cached = False
                 # Update scroll area contents
                 self.opportunities_container.adjustSize()
                 
             except Exception as e:
+                if is_transient_error(e) and local_cache.has_data():
+                    print(f"Database unreachable, showing cached opportunities: {str(e)}")
+                    self.cleanup_widgets()
+                    self.show_cached_opportunities()
+                    return
                 print(f"Error loading opportunities: {str(e)}")
                 import traceback
                 print(traceback.format_exc())
-            finally:
-                db.close()
                 
         finally:
             self.is_loading = False
 
+    def get_cached_opportunities(self) -> List[CachedOpportunity]:
+        """Get opportunities from the local cache using the same filters as get_filtered_opportunities"""
+        if self.search_text():
+            return local_cache.search(self.search_text())
+        
+        filters: Dict[str, Any] = {}
+        if self.current_filter in STATUS_FILTERS:
+            filters['status'] = STATUS_FILTERS[self.current_filter]
+        elif self.current_filter == "my_tickets" and self.current_user:
+            filters['user_id'] = self.current_user.id
+            if hasattr(self, 'status_filter') and self.status_filter.currentText() != "All":
+                filters['status'] = self.status_filter.currentText()
+            if hasattr(self, 'assignment_filter'):
+                assignment = self.assignment_filter.currentText()
+                if assignment == "Created by me":
+                    filters['creator_id'] = self.current_user.id
+                elif assignment == "Assigned to me":
+                    filters['acceptor_id'] = self.current_user.id
+        
+        start_date, end_date = self.date_range()
+        if start_date and end_date:
+            utc = ZoneInfo('UTC')
+            filters['created_from'] = datetime.combine(start_date, datetime.min.time(), tzinfo=utc)
+            filters['created_to'] = datetime.combine(end_date, datetime.max.time(), tzinfo=utc)
+        
+        filters['system'], filters['portion'] = self.system_filter_values()
+        return local_cache.get_opportunities(**filters)
+
+    def show_cached_opportunities(self):
+        """Render opportunities from the local cache while offline"""
+        opportunities = self.get_cached_opportunities()
+        
+        parent = self.parent()
+        if parent and hasattr(parent, 'toolbar'):
+            for opp in opportunities:
+                if (opp.status or "").lower() == "new":
+                    parent.toolbar.viewed_opportunities.add(opp.id)
+        
+        for opportunity in opportunities:
+            self.add_opportunity_widget(opportunity)
+        
+        self.showing_cached = True
+        self.opportunities_container.adjustSize()
+
     def do_refresh(self):
         """Actually perform the refresh"""
         if self.is_loading:
             return
-            
-        self.is_loading = True
-        db = SessionLocal()
-        try:
-            # Clear existing widgets
-            self.cleanup_widgets()
-            
-            # Get opportunities based on filter
-            opportunities = self.get_filtered_opportunities(db)
-            
-            # Mark new opportunities as viewed and update toolbar
-            parent = self.parent()
-            if parent and hasattr(parent, 'toolbar'):
-                for opp in opportunities:
-                    if opp.status.lower() == "new":
-                        parent.toolbar.viewed_opportunities.add(opp.id)
-                # Update notification badge
-                parent.toolbar.check_updates()
-            
-            # Add opportunity widgets
-            for opportunity in opportunities:
-                self.add_opportunity_widget(opportunity)
-                
-            # Update scroll area contents
-            self.opportunities_container.adjustSize()
-            
-        except Exception as e:
-            print(f"Error refreshing opportunities: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-        finally:
-            self.is_loading = False
-            db.close()
+        self.load_opportunities()
 
     def add_opportunity_widget(self, opportunity: Opportunity) -> Optional[QFrame]:
         """Add a widget for displaying an opportunity"""
@@ -609,6 +809,9 @@ class DashboardWidget(QWidget):
                 details_container_layout.setSpacing(8)
                 details_container.hide()  # Hide the container initially
                 
+                # Thumbnails are only requested once the details are opened
+                attachment_buttons = []
+                
                 # Add "More Details" button for compact mode
                 details_btn = QPushButton("More Details ▼")
                 details_btn.setStyleSheet("""
@@ -708,13 +911,14 @@ class DashboardWidget(QWidget):
                             """)
                             file_btn.clicked.connect(lambda checked, f=file: self.open_file(f))
                             files_layout.addWidget(file_btn)
+                            attachment_buttons.append((file_btn, file))
                     
                     files_layout.addStretch()
                     details_layout.addWidget(files_frame)
                 
                 # Add comments section
-                if opportunity.comments:
-                    comments_btn = QPushButton(f"View Comments ({len(opportunity.comments)})")
+                if opportunity.comment_count:
+                    comments_btn = QPushButton(f"View Comments ({opportunity.comment_count})")
                 else:
                     comments_btn = QPushButton("Add Comment")
                 comments_btn.setStyleSheet("""
@@ -743,6 +947,9 @@ class DashboardWidget(QWidget):
                     nonlocal details_visible
                     details_visible = not details_visible
                     details_container.setVisible(details_visible)  # Show/hide the container
+                    if details_visible and attachment_buttons:
+                        self.load_attachment_thumbnails(attachment_buttons)
+                        attachment_buttons.clear()
                     details_btn.setText("Less Details ▲" if details_visible else "More Details ▼")
                 
                 details_btn.clicked.connect(toggle_details)
@@ -897,6 +1104,7 @@ class DashboardWidget(QWidget):
                 if opportunity.files:
                     files_layout = QHBoxLayout()
                     files_layout.setSpacing(8)
+                    attachment_buttons = []
                     
                     for file in opportunity.files:
                         if not file.is_deleted:
@@ -918,9 +1126,11 @@ class DashboardWidget(QWidget):
                             """)
                             file_btn.clicked.connect(lambda checked, f=file: self.open_file(f))
                             files_layout.addWidget(file_btn)
+                            attachment_buttons.append((file_btn, file))
                     
                     files_layout.addStretch()
                     content.addLayout(files_layout)
+                    self.load_attachment_thumbnails(attachment_buttons)
                 
                 card_layout.addLayout(content)
             
@@ -941,20 +1151,32 @@ class DashboardWidget(QWidget):
             size_in_bytes /= 1024.0
         return f"{size_in_bytes:.1f} TB"
 
+    def load_attachment_thumbnails(self, attachment_buttons):
+        """Request thumbnails for image attachments; icons are set as they finish rendering"""
+        for button, file in attachment_buttons:
+            if not file.hash or not is_image(file):
+                continue
+            def show_thumbnail(path, button=button):
+                pixmap = QPixmap(path) if path else QPixmap()
+                if pixmap.isNull():
+                    return
+                try:
+                    button.setIcon(QIcon(pixmap))
+                    button.setIconSize(pixmap.size().scaled(THUMBNAIL_ICON_SIZE, THUMBNAIL_ICON_SIZE, Qt.KeepAspectRatio))
+                except RuntimeError:
+                    pass  # The card was rebuilt before the thumbnail arrived
+            self.thumbnail_loader.load(file, THUMBNAIL_SIZE, show_thumbnail)
+
     def open_file(self, file):
-        """Open the file using the system's default application"""
+        """Preview images in the app, open anything else with the system's default application"""
         try:
             file_path = os.path.join(STORAGE_DIR, file.storage_path)
-            if os.path.exists(file_path):
-                import platform
-                if platform.system() == 'Darwin':  # macOS
-                    os.system(f'open "{file_path}"')
-                elif platform.system() == 'Windows':  # Windows
-                    os.system(f'start "" "{file_path}"')
-                else:  # Linux
-                    os.system(f'xdg-open "{file_path}"')
-            else:
+            if not os.path.exists(file_path):
                 QMessageBox.warning(self, "File Not Found", "The file could not be found in the storage location.")
+            elif file.hash and is_image(file):
+                AttachmentPreviewDialog(file, self.thumbnail_loader, self).exec_()
+            else:
+                open_with_default_app(file_path)
         except Exception as e:
             QMessageBox.warning(self, "Error Opening File", f"An error occurred while trying to open the file: {e}")
 
@@ -1008,104 +1230,150 @@ class DashboardWidget(QWidget):
             print(f"Updating status for opportunity {opportunity.id}")
             print(f"New status: {new_status}")
             print(f"Current user: {self.current_user.id if self.current_user else None}")
+            opportunity_id = opportunity.id
             
-            db = SessionLocal()
             try:
-                # Get fresh opportunity from database
-                opportunity = cast(Opportunity, db.query(Opportunity).filter(Opportunity.id == opportunity.id).first())
-                if not opportunity:
-                    return
+                with session_scope() as db:
+                    # Get the opportunity through the identity map of this action
+                    opportunity = cast(Opportunity, db.get(Opportunity, opportunity.id))
+                    if not opportunity:
+                        return
                 
-                # Add comment if provided
-                if comment:
-                    comment_data = {
-                        "user_id": str(self.current_user.id) if self.current_user else None,
-                        "text": comment,
-                        "user_name": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else "Unknown"
-                    }
-                    if not getattr(opportunity, 'comments', None):
-                        setattr(opportunity, 'comments', [])
-                    getattr(opportunity, 'comments').append(comment_data)
+                    # Add comment if provided
+                    if comment:
+                        comment_service.add_comment(db, opportunity.id, self.current_user, comment, comment_type=new_status, created_at=now)
                 
-                # Debug prints
-                print(f"Old status: {str(opportunity.status)}")
-                print(f"Updating to: {new_status}")
+                    # Debug prints
+                    print(f"Old status: {str(opportunity.status)}")
+                    print(f"Updating to: {new_status}")
                 
-                # Update status and related fields
-                if new_status.lower() == "in progress":
-                    if not opportunity.acceptor_id and self.current_user:
-                        setattr(opportunity, 'acceptor_id', self.current_user.id)
-                    if not opportunity.started_at:
-                        setattr(opportunity, 'started_at', now)
+                    # Update status and related fields
+                    if new_status.lower() == "in progress":
+                        if not opportunity.acceptor_id and self.current_user:
+                            setattr(opportunity, 'acceptor_id', self.current_user.id)
+                        if not opportunity.started_at:
+                            setattr(opportunity, 'started_at', now)
                     
-                    activity_details = {
-                        "action": "status_change",
-                        "old_status": str(opportunity.status),
-                        "new_status": new_status,
-                        "acceptor": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None
-                    }
+                        activity_details = {
+                            "action": "status_change",
+                            "old_status": str(opportunity.status),
+                            "new_status": new_status,
+                            "acceptor": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None
+                        }
                     
-                elif new_status.lower() == "completed":
-                    setattr(opportunity, 'completed_at', now)
-                    if opportunity.started_at:
-                        setattr(opportunity, 'response_time', sql_cast(now - opportunity.created_at, Interval))
-                        setattr(opportunity, 'work_time', sql_cast(now - opportunity.started_at, Interval))
+                    elif new_status.lower() == "completed":
+                        setattr(opportunity, 'completed_at', now)
+                        if opportunity.started_at:
+                            setattr(opportunity, 'response_time', sql_cast(now - opportunity.created_at, Interval))
+                            setattr(opportunity, 'work_time', sql_cast(now - opportunity.started_at, Interval))
                     
-                    activity_details = {
-                        "action": "status_change",
-                        "old_status": str(opportunity.status),
-                        "new_status": new_status,
-                        "completed_by": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None
-                    }
+                        activity_details = {
+                            "action": "status_change",
+                            "old_status": str(opportunity.status),
+                            "new_status": new_status,
+                            "completed_by": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None
+                        }
                     
-                elif new_status.lower() == "needs info":
-                    activity_details = {
-                        "action": "needs_info",
-                        "old_status": str(opportunity.status),
-                        "new_status": new_status,
-                        "requested_by": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None,
-                        "info_needed": comment
-                    }
+                    elif new_status.lower() == "needs info":
+                        activity_details = {
+                            "action": "needs_info",
+                            "old_status": str(opportunity.status),
+                            "new_status": new_status,
+                            "requested_by": f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None,
+                            "info_needed": comment
+                        }
                     
-                else:
-                    activity_details = {
-                        "action": "status_change",
-                        "old_status": str(opportunity.status),
-                        "new_status": new_status
-                    }
+                    else:
+                        activity_details = {
+                            "action": "status_change",
+                            "old_status": str(opportunity.status),
+                            "new_status": new_status
+                        }
                 
-                # Create activity log entry
-                activity_log = ActivityLog(
-                    opportunity_id=str(opportunity.id),
-                    user_id=str(self.current_user.id) if self.current_user else None,
-                    activity_type="status_change",
-                    details=activity_details
-                )
-                db.add(activity_log)
+                    # Logged by the audit writer after the change commits, so the user does not wait on it
+                    if self.current_user:
+                        audit_log.record(db, self.current_user.id, "status_change", activity_details, opportunity.id)
                 
-                # Update opportunity status and timestamp
-                setattr(opportunity, 'status', new_status)
-                setattr(opportunity, 'updated_at', now)
+                    # Update opportunity status and timestamp
+                    setattr(opportunity, 'status', new_status)
+                    setattr(opportunity, 'updated_at', now)
                 
-                db.commit()
+                    # Flush only; the scope commits once the whole action has run
+                    db.flush()
                 
-                # Emit signal to refresh other components
-                self.refresh_needed.emit()
+                    # Emit signal to refresh other components
+                    self.refresh_needed.emit()
                 
-                # Refresh the dashboard
-                self.load_opportunities()
+                    # Refresh the dashboard
+                    self.load_opportunities()
                 
             except Exception as e:
+                if is_transient_error(e) and self.queue_offline_status_update(opportunity_id, new_status, comment, now):
+                    print(f"Database unreachable, status change queued for replay: {str(e)}")
+                    self.load_opportunities()
+                    return
                 print(f"ERROR in update_status: {str(e)}")
                 print("Traceback:", traceback.format_exc())
-                db.rollback()
                 QMessageBox.critical(self, "Error", f"An error occurred while updating the ticket status: {str(e)}")
-            finally:
-                db.close()
         except Exception as e:
             print(f"ERROR in update_status: {str(e)}")
             print("Traceback:", traceback.format_exc())
 
+    def queue_offline_status_update(self, opportunity_id, new_status: str, comment: Optional[str], now: datetime) -> bool:
+        """Queue a status change in the local outbox; returns False if the ticket is not cached"""
+        data = local_cache.get_row('opportunities', opportunity_id)
+        if not data:
+            return False
+        opportunity = CachedOpportunity(data, {})
+        user_name = f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else None
+        
+        changes: Dict[str, Any] = {'status': new_status, 'updated_at': now}
+        
+        activity_details = {
+            "action": "status_change",
+            "old_status": str(opportunity.status),
+            "new_status": new_status,
+            "queued_offline": True
+        }
+        if new_status.lower() == "in progress":
+            if not opportunity.acceptor_id and self.current_user:
+                changes['acceptor_id'] = self.current_user.id
+            if not opportunity.started_at:
+                changes['started_at'] = now
+            activity_details["acceptor"] = user_name
+        elif new_status.lower() == "completed":
+            changes['completed_at'] = now
+            if opportunity.started_at:
+                changes['response_time'] = now - opportunity.created_at
+                changes['work_time'] = now - opportunity.started_at
+            activity_details["completed_by"] = user_name
+        elif new_status.lower() == "needs info":
+            activity_details["action"] = "needs_info"
+            activity_details["requested_by"] = user_name
+            activity_details["info_needed"] = comment
+        
+        # Both writes replay in one transaction, and only if nobody changed the ticket meanwhile
+        group_id = local_cache.new_group()
+        local_cache.queue_update('opportunities', opportunity_id, changes, opportunity.updated_at, group_id=group_id)
+        if comment:
+            local_cache.queue_insert('comments', {
+                'opportunity_id': opportunity_id,
+                'user_id': self.current_user.id if self.current_user else None,
+                'user_name': user_name or "Unknown",
+                'text': comment,
+                'comment_type': new_status,
+                'created_at': now
+            }, group_id=group_id)
+        if self.current_user:
+            local_cache.queue_insert('activity_log', {
+                'opportunity_id': opportunity_id,
+                'user_id': self.current_user.id,
+                'action': "status_change",
+                'details': activity_details,
+                'created_at': now
+            }, group_id=group_id)
+        return True
+
     def format_duration(self, duration: Optional[timedelta]) -> str:
         """Format a timedelta into a readable string with error handling"""
         try:
@@ -1200,37 +1468,138 @@ class DashboardWidget(QWidget):
         self.load_opportunities() 
 
     def focus_ticket(self, ticket_id):
-        """Focus on a specific ticket by ID"""
-        if not ticket_id:
+        """Show a ticket, given by id or ticket number, among the tickets around it in the list"""
+        if not ticket_id or self.is_loading:
             return
-            
-        # Ensure the ticket is loaded
-        self.current_filter = "all"  # Switch to all tickets view
-        self.load_opportunities()
         
-        # Find and scroll to the ticket widget
-        if ticket_id in self.opportunity_widgets:
-            widget = self.opportunity_widgets[ticket_id]
-            # Ensure the widget is visible
-            scroll_area = self.findChild(QScrollArea)
-            if scroll_area:
-                # Calculate position to scroll to
-                widget_pos = widget.mapTo(scroll_area.widget(), QPoint(0, 0))
-                scroll_area.ensureVisible(0, widget_pos.y(), 0, widget.height() // 2)
-                
-                # Highlight the ticket briefly
-                original_style = widget.styleSheet()
-                highlight_style = """
-                    QFrame {
-                        background-color: #0078d4;
-                        border-radius: 6px;
-                        padding: 12px;
-                    }
-                """
-                widget.setStyleSheet(highlight_style)
-                
-                # Reset style after a delay
-                QTimer.singleShot(1000, lambda: widget.setStyleSheet(original_style)) 
+        # A pending search would replace the page, and search results would hide the ticket
+        self.search_timer.stop()
+        self.search_input.blockSignals(True)
+        self.search_input.clear()
+        self.search_input.blockSignals(False)
+        
+        self.is_loading = True
+        widget = None
+        try:
+            try:
+                if not connection_health.is_healthy and local_cache.has_data():
+                    widget = self.show_cached_ticket_page(ticket_id)
+                else:
+                    with session_scope(read_only=True) as db:
+                        widget = self.show_ticket_page(db, ticket_id)
+            except Exception as e:
+                if is_transient_error(e) and local_cache.has_data():
+                    print(f"Database unreachable, looking up ticket in the cache: {str(e)}")
+                    widget = self.show_cached_ticket_page(ticket_id)
+                else:
+                    print(f"Error focusing ticket {ticket_id}: {str(e)}")
+                    print(traceback.format_exc())
+        finally:
+            self.is_loading = False
+        
+        if widget:
+            # Scroll once the layout has placed the new cards
+            QTimer.singleShot(0, lambda: self.highlight_ticket(widget))
+
+    def show_ticket_page(self, db: Session, ticket_id) -> Optional[QFrame]:
+        """Render the page of the current list around one ticket; returns its card"""
+        opportunity = search_service.find_opportunity(db, ticket_id, options=self.card_options())
+        if opportunity is None:
+            print(f"Ticket {ticket_id} not found")
+            return None
+        
+        if opportunity.created_at is None:
+            # Without a timestamp the ticket has no place in the list
+            self.show_ticket_cards([opportunity], 0, opportunity)
+            return self.opportunity_widgets.get(str(opportunity.id))
+        
+        query = self.filtered_query(db)
+        if not db.query(query.filter(Opportunity.id == opportunity.id).exists()).scalar():
+            self.widen_filters_for(opportunity.created_at)
+            query = self.filtered_query(db)
+        
+        position = search_service.opportunity_position(query, opportunity)
+        page = search_service.page_around(query.options(*self.card_options()), opportunity, FOCUS_PAGE_SIZE)
+        first = position - next(i for i, opp in enumerate(page) if opp is opportunity)
+        print(f"Ticket {opportunity.title} is number {position + 1} in the current list")
+        self.show_ticket_cards(page, first, opportunity)
+        return self.opportunity_widgets.get(str(opportunity.id))
+
+    def show_cached_ticket_page(self, ticket_id) -> Optional[QFrame]:
+        """Offline version of show_ticket_page, working on the cached list"""
+        key = str(ticket_id).strip()
+        
+        def index_of(opportunities):
+            return next((i for i, opp in enumerate(opportunities)
+                         if str(opp.id) == key or (opp.title or "").upper() == key.upper()), None)
+        
+        opportunities = self.get_cached_opportunities()
+        index = index_of(opportunities)
+        if index is None:
+            every_ticket = local_cache.get_opportunities()
+            match = index_of(every_ticket)
+            if match is None or every_ticket[match].created_at is None:
+                print(f"Ticket {ticket_id} not found in the cache")
+                return None
+            self.widen_filters_for(every_ticket[match].created_at)
+            opportunities = self.get_cached_opportunities()
+            index = index_of(opportunities)
+            if index is None:
+                return None
+        
+        first = max(0, index - FOCUS_PAGE_SIZE // 2)
+        opportunity = opportunities[index]
+        self.show_ticket_cards(opportunities[first:first + FOCUS_PAGE_SIZE], first, opportunity, cached=True)
+        return self.opportunity_widgets.get(str(opportunity.id))
+
+    def widen_filters_for(self, created_at: datetime) -> None:
+        """Switch to all tickets with a date range that includes created_at, without reloading"""
+        for button in self.findChildren(QPushButton):
+            if button.property("filter_id"):
+                button.setChecked(button.property("filter_id") == "all")
+        self.current_filter = "all"
+        self.my_tickets_filters.setVisible(False)
+        
+        created = QDate(created_at.astimezone(ZoneInfo('UTC')).date())
+        if created < self.date_from.date():
+            self.date_from.setDate(created)
+        if created > self.date_to.date():
+            self.date_to.setDate(created)
+
+    def show_ticket_cards(self, page: List[Any], first: int, opportunity: Any, cached: bool = False) -> None:
+        """Replace the cards with one page of the list; first is the list position of page[0]"""
+        self.cleanup_widgets()
+        for opp in page:
+            self.add_opportunity_widget(opp)
+        self.focus_label.setText(
+            f"Showing tickets {first + 1}-{first + len(page)} around {opportunity.title}. "
+            f"Refresh to show the full list."
+        )
+        self.focus_label.show()
+        self.showing_cached = cached
+        self.opportunities_container.adjustSize()
+
+    def highlight_ticket(self, widget: QFrame) -> None:
+        """Scroll a card into view and flash it"""
+        scroll_area = self.findChild(QScrollArea)
+        if scroll_area:
+            # Calculate position to scroll to
+            widget_pos = widget.mapTo(scroll_area.widget(), QPoint(0, 0))
+            scroll_area.ensureVisible(0, widget_pos.y(), 0, widget.height() // 2)
+        
+        # Highlight the ticket briefly
+        original_style = widget.styleSheet()
+        highlight_style = """
+            QFrame {
+                background-color: #0078d4;
+                border-radius: 6px;
+                padding: 12px;
+            }
+        """
+        widget.setStyleSheet(highlight_style)
+        
+        # Reset style after a delay
+        QTimer.singleShot(1000, lambda: widget.setStyleSheet(original_style))
 
     def show_comments_dialog(self, opportunity):
         """Show dialog for viewing and adding comments"""
@@ -1239,53 +1608,70 @@ class DashboardWidget(QWidget):
             comment = dialog.get_comment()
             if comment:
                 self.add_comment(opportunity, comment)
-                self.do_refresh()  # Refresh to show the new comment
 
     def add_comment(self, opportunity, comment):
-        """Add a comment to an opportunity"""
+        """Add a comment to an opportunity and show it; queued for replay while the server is unreachable"""
+        now = datetime.now(timezone.utc)
         try:
-            now = datetime.now(timezone.utc)
-            db = SessionLocal()
-            
-            opp = db.query(Opportunity).filter(Opportunity.id == opportunity.id).first()
-            if not opp:
-                return
-            
-            # Initialize comments list if it doesn't exist
-            if not opp.comments:
-                opp.comments = []
-            
-            # Add the new comment
-            comment_data = {
-                'user_id': str(self.current_user.id),
-                'user_name': f"{self.current_user.first_name} {self.current_user.last_name}",
-                'text': comment,
-                'timestamp': now.strftime("%Y-%m-%d %H:%M")
-            }
-            opp.comments.append(comment_data)
-            
-            # Create notification for the other party
-            target_user_id = opp.creator_id if self.current_user.id != opp.creator_id else opp.acceptor_id
-            if target_user_id:
-                notification = Notification(
-                    user_id=target_user_id,
-                    opportunity_id=opp.id,
-                    type="comment",
-                    message=f"New comment on ticket '{opp.title}' from {self.current_user.first_name} {self.current_user.last_name}",
-                    created_at=now,
-                    read=False
-                )
-                db.add(notification)
-            
-            db.commit()
+            # Saving and re-rendering are one action sharing one session, committed here
+            with session_scope() as db:
+                opp = db.get(Opportunity, opportunity.id)
+                if not opp:
+                    return
+                
+                # Append-only insert, so concurrent commenters never overwrite each other
+                comment_service.add_comment(db, opp.id, self.current_user, comment, created_at=now)
+                
+                # Create notification for the other party
+                target_user_id = opp.creator_id if self.current_user.id != opp.creator_id else opp.acceptor_id
+                if target_user_id:
+                    notification = Notification(
+                        user_id=target_user_id,
+                        opportunity_id=opp.id,
+                        type="comment",
+                        message=f"New comment on ticket '{opp.title}' from {self.current_user.first_name} {self.current_user.last_name}",
+                        created_at=now,
+                        read=False
+                    )
+                    db.add(notification)
+                
+                db.flush()
+                self.do_refresh()  # Refresh to show the new comment
             
         except Exception as e:
+            if is_transient_error(e) and self.queue_offline_comment(opportunity.id, comment, now):
+                print(f"Database unreachable, comment queued for replay: {str(e)}")
+                self.load_opportunities()
+                return
             print(f"ERROR adding comment: {str(e)}")
             print("Traceback:", traceback.format_exc())
-            db.rollback()
             QMessageBox.critical(self, "Error", f"An error occurred while adding the comment: {str(e)}")
-        finally:
-            db.close()
+
+    def queue_offline_comment(self, opportunity_id, comment: str, now: datetime) -> bool:
+        """Queue a comment and its notification in the local outbox; returns False if the ticket is not cached"""
+        data = local_cache.get_row('opportunities', opportunity_id)
+        if not data:
+            return False
+        opportunity = CachedOpportunity(data, {})
+        group_id = local_cache.new_group()
+        local_cache.queue_insert('comments', {
+            'opportunity_id': opportunity_id,
+            'user_id': self.current_user.id if self.current_user else None,
+            'user_name': f"{self.current_user.first_name} {self.current_user.last_name}" if self.current_user else "Unknown",
+            'text': comment,
+            'created_at': now
+        }, group_id=group_id)
+        target_user_id = opportunity.creator_id if str(self.current_user.id) != str(opportunity.creator_id) else opportunity.acceptor_id
+        if target_user_id:
+            local_cache.queue_insert('notifications', {
+                'user_id': target_user_id,
+                'opportunity_id': opportunity_id,
+                'type': "comment",
+                'message': f"New comment on ticket '{opportunity.title}' from {self.current_user.first_name} {self.current_user.last_name}",
+                'created_at': now,
+                'read': False
+            }, group_id=group_id)
+        return True
 
 class StatusChangeDialog(QDialog):
     def __init__(self, opportunity, new_status, parent=None):
@@ -1381,7 +1767,9 @@ class CommentDialog(QDialog):
         super().__init__(parent)
         self.opportunity = opportunity
         self.comment = None
+        self.cursor = None  # (created_at, id) of the oldest comment shown
         self.initUI()
+        self.load_older_comments()
         
     def initUI(self):
         layout = QVBoxLayout()
@@ -1396,48 +1784,41 @@ class CommentDialog(QDialog):
         """)
         layout.addWidget(title)
         
-        # Previous comments
-        if self.opportunity.comments:
-            comments_frame = QFrame()
-            comments_frame.setStyleSheet("""
-                QFrame {
-                    background-color: #2d2d2d;
-                    border: 1px solid #3d3d3d;
-                    border-radius: 4px;
-                    padding: 8px;
-                }
-            """)
-            comments_layout = QVBoxLayout(comments_frame)
-            
-            for comment in self.opportunity.comments:
-                comment_widget = QFrame()
-                comment_widget.setStyleSheet("""
-                    QFrame {
-                        background-color: #262626;
-                        border-radius: 4px;
-                        padding: 8px;
-                        margin-bottom: 4px;
-                    }
-                """)
-                comment_layout = QVBoxLayout(comment_widget)
-                
-                header = QLabel(f"{comment['user_name']} • {comment['timestamp']}")
-                header.setStyleSheet("color: #888888; font-size: 11px;")
-                comment_layout.addWidget(header)
-                
-                text = QLabel(comment['text'])
-                text.setWordWrap(True)
-                text.setStyleSheet("color: white; font-size: 12px;")
-                comment_layout.addWidget(text)
-                
-                if comment.get('type'):
-                    type_label = QLabel(f"Status changed to: {comment['type']}")
-                    type_label.setStyleSheet("color: #0078d4; font-size: 11px;")
-                    comment_layout.addWidget(type_label)
-                
-                comments_layout.addWidget(comment_widget)
-            
-            layout.addWidget(comments_frame)
+        # Comment history: the newest page loads first, older pages on demand
+        self.comments_frame = QFrame()
+        self.comments_frame.setStyleSheet("""
+            QFrame {
+                background-color: #2d2d2d;
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                padding: 8px;
+            }
+        """)
+        self.comments_layout = QVBoxLayout(self.comments_frame)
+        
+        self.load_more_btn = QPushButton("Load older comments")
+        self.load_more_btn.setStyleSheet("""
+            QPushButton {
+                background: none;
+                border: none;
+                color: #0078d4;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                color: #2196F3;
+            }
+        """)
+        self.load_more_btn.clicked.connect(self.load_older_comments)
+        self.load_more_btn.hide()
+        self.comments_layout.addWidget(self.load_more_btn)
+        
+        self.comments_scroll = QScrollArea()
+        self.comments_scroll.setWidgetResizable(True)
+        self.comments_scroll.setWidget(self.comments_frame)
+        self.comments_scroll.setMaximumHeight(320)
+        self.comments_scroll.setStyleSheet("QScrollArea { border: none; }")
+        self.comments_scroll.hide()
+        layout.addWidget(self.comments_scroll)
         
         # Comment field
         comment_label = QLabel("Your Response:")
@@ -1501,6 +1882,119 @@ class CommentDialog(QDialog):
         self.setWindowTitle("Add Response")
         self.setMinimumWidth(500)
         self.setMinimumHeight(400)
+    
+    def load_older_comments(self):
+        """Fetch the next page of older comments and show it above the ones already loaded"""
+        try:
+            with session_scope(read_only=True) as db:
+                page = comment_service.fetch_comments(db, self.opportunity.id, before=self.cursor)
+        except Exception as e:
+            if not is_transient_error(e):
+                print(f"Error loading comments: {str(e)}")
+                print(traceback.format_exc())
+                QMessageBox.warning(self, "Error", f"Could not load older comments: {str(e)}")
+                return
+            print(f"Database unreachable, showing cached comments: {str(e)}")
+            page = local_cache.get_comments(self.opportunity.id, before=self.cursor)
+        
+        if page:
+            self.cursor = comment_service.comment_cursor(page[-1])
+        # Pages arrive newest first; inserting each right below the button leaves the oldest on top
+        for comment in page:
+            self.comments_layout.insertWidget(1, self.create_comment_widget(comment))
+        
+        self.load_more_btn.setVisible(len(page) == comment_service.COMMENT_PAGE_SIZE)
+        self.comments_scroll.setVisible(self.comments_layout.count() > 1)
+    
+    def create_comment_widget(self, comment):
+        comment_widget = QFrame()
+        comment_widget.setStyleSheet("""
+            QFrame {
+                background-color: #262626;
+                border-radius: 4px;
+                padding: 8px;
+                margin-bottom: 4px;
+            }
+        """)
+        comment_layout = QVBoxLayout(comment_widget)
+        
+        timestamp = comment.created_at.strftime("%Y-%m-%d %H:%M") if comment.created_at else ""
+        header = QLabel(f"{comment.user_name or 'Unknown'} • {timestamp}")
+        header.setStyleSheet("color: #888888; font-size: 11px;")
+        comment_layout.addWidget(header)
+        
+        text = QLabel(comment.text)
+        text.setWordWrap(True)
+        text.setStyleSheet("color: white; font-size: 12px;")
+        comment_layout.addWidget(text)
+        
+        if comment.comment_type:
+            type_label = QLabel(f"Status changed to: {comment.comment_type}")
+            type_label.setStyleSheet("color: #0078d4; font-size: 11px;")
+            comment_layout.addWidget(type_label)
+        
+        return comment_widget
         
     def get_comment(self):
-        return self.comment_edit.toPlainText().strip() 
\ No newline at end of file
+        return self.comment_edit.toPlainText().strip() 
+
+class AttachmentPreviewDialog(QDialog):
+    """Shows a downscaled copy of an image attachment, rendered off the GUI thread"""
+
+    def __init__(self, file, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.file = file
+        self.setWindowTitle(file.display_name)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #1e1e1e;
+            }
+            QLabel {
+                color: #cccccc;
+            }
+            QPushButton {
+                background-color: #0078d4;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #1084d8;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        self.image_label = QLabel("Loading preview...")
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.setMinimumSize(320, 240)
+        layout.addWidget(self.image_label)
+        
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        open_btn = QPushButton("Open Original")
+        open_btn.clicked.connect(self.open_original)
+        buttons.addWidget(open_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        
+        thumbnail_loader.load(file, PREVIEW_SIZE, self.show_preview)
+
+    def show_preview(self, path):
+        pixmap = QPixmap(path) if path else QPixmap()
+        try:
+            if pixmap.isNull():
+                self.image_label.setText("Preview not available.")
+            else:
+                self.image_label.setPixmap(pixmap)
+        except RuntimeError:
+            pass  # Closed before the preview was ready
+
+    def open_original(self):
+        try:
+            open_with_default_app(os.path.join(STORAGE_DIR, self.file.storage_path))
+        except Exception as e:
+            QMessageBox.warning(self, "Error Opening File", f"An error occurred while trying to open the file: {e}")
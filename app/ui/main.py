@@ -5,7 +5,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QPushButton, QLabel, QStackedWidget, QSystemTrayIcon,
                            QMenu, QStyle, QHBoxLayout, QFrame, QSlider, QDialog, QMessageBox)
-from PyQt5.QtCore import Qt, QSize, QPoint, QTimer, QSettings
+from PyQt5.QtCore import Qt, QSize, QPoint, QTimer, QSettings, QThread, pyqtSignal
 from PyQt5.QtGui import (QIcon, QPixmap, QImage, QTransform, QPainter, QColor, QLinearGradient,
                       QPaintEvent, QMouseEvent, QResizeEvent, QMoveEvent, QCloseEvent)
 from app.ui.qt_types import (
@@ -15,24 +15,21 @@ from app.ui.qt_types import (
     NoPen, WindowMinimized, AA_EnableHighDpiScaling, AA_UseHighDpiPixmaps,
     AA_UseStyleSheetPropagationInWidgetStyles, AA_DontCreateNativeWidgetSiblings
 )
-from app.ui.dashboard import DashboardWidget
-from app.ui.opportunity_form import OpportunityForm
 from app.ui.auth import AuthWidget
 from app.ui.account_creation import AccountCreationWidget
 from app.ui.settings import SettingsWidget
-from app.ui.management_portal import ManagementPortal
-from app.ui.profile import ProfileWidget
-from app.database.connection import SessionLocal
-from app.models.models import Opportunity, Notification, User
 from datetime import datetime, timedelta, timezone
-from win10toast import ToastNotifier
-from sqlalchemy import and_, or_
+import threading
+import time
 import traceback
 from typing import Optional, Dict, List, Union, cast, Any, Protocol, TypeVar, TYPE_CHECKING
 import asyncio
-import websockets
 import json
 
+# Only the login screen is imported up front. The other screens, the database
+# layer, websockets and win10toast are imported where they are first used, and
+# StartupPrefetch loads the database layer in the background meanwhile.
+
 T = TypeVar('T')
 
 if TYPE_CHECKING:
@@ -50,6 +47,18 @@ class Query(Protocol[T]):
     def first(self) -> Optional[T]: ...
     def all(self) -> list[T]: ...
 
+def tinted_pixmap(pixmap: QPixmap, color: QColor) -> QPixmap:
+    """Copy of pixmap painted in color, keeping its transparency"""
+    tinted = QPixmap(pixmap.size())
+    tinted.fill(Qt.transparent)
+    painter = QPainter(tinted)
+    painter.drawPixmap(0, 0, pixmap)
+    # SourceIn keeps the icon's alpha and replaces its colour in one pass
+    painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+    painter.fillRect(tinted.rect(), color)
+    painter.end()
+    return tinted
+
 class NotificationBadge(QLabel):
     """A badge showing the number of unread notifications"""
     def __init__(self, parent: Optional['QWidgetType'] = None) -> None:
@@ -198,7 +207,7 @@ class FloatingToolbar(QWidget):
         self.last_checked_time = datetime.now(timezone.utc) - timedelta(minutes=5)
         self.viewed_opportunities = set()
         self.viewed_notifications = set()
-        self.toaster = ToastNotifier()
+        self.toaster = None  # Created with the first notification
         
         # Load last position or set default
         self.load_position()
@@ -317,20 +326,9 @@ class FloatingToolbar(QWidget):
                 print(f"DEBUG: Loading icon from {icon_path}")
                 icon_pixmap = QPixmap(icon_path)
                 
-                # Convert icon to specified color
-                temp_image = icon_pixmap.toImage()
-                for x in range(temp_image.width()):
-                    for y in range(temp_image.height()):
-                        color = temp_image.pixelColor(x, y)
-                        if color.alpha() > 0:
-                            new_color = QColor(icon_color)
-                            new_color.setAlpha(color.alpha())
-                            temp_image.setPixelColor(x, y, new_color)
-                icon_pixmap = QPixmap.fromImage(temp_image)
-                
-                # Scale icon to proper size (24x24)
+                # Scale icon to proper size (24x24), then convert it to the specified color
                 scaled_pixmap = icon_pixmap.scaled(24, 24, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                btn.setIcon(QIcon(scaled_pixmap))
+                btn.setIcon(QIcon(tinted_pixmap(scaled_pixmap, QColor(icon_color))))
                 btn.setIconSize(QSize(24, 24))
             else:
                 print(f"DEBUG: Icon file not found: {icon_path}")
@@ -703,65 +701,62 @@ class FloatingToolbar(QWidget):
         print(f"\nDEBUG: Checking updates at {current_time}")
         print(f"DEBUG: Last check time was {self.last_checked_time}")
         
-        db = SessionLocal()
+        from app.database.session_scope import session_scope
+        from app.services import read_models
+
         try:
-            # Check new opportunities (notify about all new tickets)
-            new_opportunities = db.query(Opportunity).filter(
-                Opportunity.status.ilike("New"),  # Case-insensitive status check
-                Opportunity.creator_id != str(self.parent().current_user.id)  # Don't notify for own tickets
-            ).all()
+            with session_scope(read_only=True) as db:
+                user_id = self.parent().current_user.id
+                # Check new opportunities (notify about all new tickets, except the user's own)
+                new_opportunity_ids = read_models.new_ticket_ids(db, user_id).scalars().all()
             
-            # Count unviewed opportunities (only those that haven't been viewed)
-            unviewed_opportunities = [opp for opp in new_opportunities if opp.id not in self.viewed_opportunities]
-            print(f"DEBUG: Found {len(unviewed_opportunities)} unviewed opportunities")
+                # Count unviewed opportunities (only those that haven't been viewed)
+                unviewed_opportunities = [opp_id for opp_id in new_opportunity_ids if opp_id not in self.viewed_opportunities]
+                print(f"DEBUG: Found {len(unviewed_opportunities)} unviewed opportunities")
             
-            # Check new notifications (these are already filtered by user_id)
-            new_notifications = db.query(Notification).filter(
-                Notification.user_id == str(self.parent().current_user.id),
-                Notification.read == False
-            ).all()
+                # Check new notifications (these are already filtered by user_id)
+                new_notifications = read_models.unread_notification_ids(db, user_id).scalars().all()
             
-            print(f"DEBUG: Found {len(new_notifications)} new notifications")
+                print(f"DEBUG: Found {len(new_notifications)} new notifications")
             
-            # Update total notification count (unviewed opportunities + unread notifications)
-            total_count = len(unviewed_opportunities) + len(new_notifications)
-            print(f"DEBUG: Total notification count: {total_count}")
+                # Update total notification count (unviewed opportunities + unread notifications)
+                total_count = len(unviewed_opportunities) + len(new_notifications)
+                print(f"DEBUG: Total notification count: {total_count}")
             
-            # Only update notification count if it's different
-            if total_count != self.notification_count:
-                self.notification_count = total_count
-                self.update_notification_badge()
+                # Only update notification count if it's different
+                if total_count != self.notification_count:
+                    self.notification_count = total_count
+                    self.update_notification_badge()
             
-            # Show aggregate notification for new opportunities only if there are new ones since last check
-            if len(unviewed_opportunities) > 0 and current_time > self.last_checked_time:
-                self.show_windows_notification(
-                    "New Opportunities",
-                    f"There are {len(unviewed_opportunities)} new opportunities in the dashboard"
-                )
+                # Show aggregate notification for new opportunities only if there are new ones since last check
+                if len(unviewed_opportunities) > 0 and current_time > self.last_checked_time:
+                    self.show_windows_notification(
+                        "New Opportunities",
+                        f"There are {len(unviewed_opportunities)} new opportunities in the dashboard"
+                    )
             
-            # Show aggregate notification for new notifications only if there are new ones since last check
-            if len(new_notifications) > 0 and current_time > self.last_checked_time:
-                self.show_windows_notification(
-                    "New Notifications",
-                    f"You have {len(new_notifications)} new notifications"
-                )
-                # Add all new notifications to viewed set
-                for notif in new_notifications:
-                    self.viewed_notifications.add(notif.id)
+                # Show aggregate notification for new notifications only if there are new ones since last check
+                if len(new_notifications) > 0 and current_time > self.last_checked_time:
+                    self.show_windows_notification(
+                        "New Notifications",
+                        f"You have {len(new_notifications)} new notifications"
+                    )
+                    # Add all new notifications to viewed set
+                    for notification_id in new_notifications:
+                        self.viewed_notifications.add(notification_id)
             
-            # Update last check time only for future notifications
-            self.last_checked_time = current_time
+                # Update last check time only for future notifications
+                self.last_checked_time = current_time
             
         except Exception as e:
             print(f"Error checking updates: {str(e)}")
-        finally:
-            db.close()
 
     def show_windows_notification(self, title, message):
         """Show Windows notification"""
         try:
             # Ensure the toaster is initialized
-            if not hasattr(self, 'toaster'):
+            if self.toaster is None:
+                from win10toast import ToastNotifier
                 self.toaster = ToastNotifier()
             
             # Show the notification in a non-blocking way
@@ -1015,22 +1010,8 @@ class FloatingToolbar(QWidget):
                 if not icon.isNull():
                     pixmap = icon.pixmap(24, 24)
                     if not pixmap.isNull():
-                        # Convert to image for color manipulation
-                        image = pixmap.toImage()
-                        
                         # Apply new color while preserving alpha
-                        for x in range(image.width()):
-                            for y in range(image.height()):
-                                pixel_color = image.pixelColor(x, y)
-                                if pixel_color.alpha() > 0:
-                                    new_color = QColor(color)
-                                    new_color.setAlpha(pixel_color.alpha())
-                                    image.setPixelColor(x, y, new_color)
-                        
-                        # Convert back to pixmap and update button
-                        colored_pixmap = QPixmap.fromImage(image)
-                        if not colored_pixmap.isNull():
-                            btn.setIcon(QIcon(colored_pixmap))
+                        btn.setIcon(QIcon(tinted_pixmap(pixmap, color)))
             
             return 0  # Return success to Windows message handler
             
@@ -1070,21 +1051,8 @@ class FloatingToolbar(QWidget):
                     print(f"Updating icon for button: {btn_id}")
                     pixmap = icon.pixmap(24, 24)
                     
-                    # Convert to image for color manipulation
-                    image = pixmap.toImage()
-                    
                     # Apply new color while preserving alpha
-                    for x in range(image.width()):
-                        for y in range(image.height()):
-                            pixel_color = image.pixelColor(x, y)
-                            if pixel_color.alpha() > 0:
-                                new_color = QColor(color)
-                                new_color.setAlpha(pixel_color.alpha())
-                                image.setPixelColor(x, y, new_color)
-                    
-                    # Convert back to pixmap and update button
-                    colored_pixmap = QPixmap.fromImage(image)
-                    btn.setIcon(QIcon(colored_pixmap))
+                    btn.setIcon(QIcon(tinted_pixmap(pixmap, color)))
         else:
             print(f"Warning: Unknown theme color: {self.current_theme}")
 
@@ -1105,32 +1073,33 @@ class FloatingToolbar(QWidget):
 
     def clear_notifications(self):
         """Clear all notifications and reset the badge"""
-        db = SessionLocal()
+        from app.database.session_scope import session_scope
+        from app.models.models import Notification
+
         try:
-            # Mark all notifications as read
-            notifications = db.query(Notification).filter(
-                Notification.user_id == str(self.parent().current_user.id),
-                Notification.read == False
-            ).all()
+            with session_scope() as db:
+                # Mark all notifications as read
+                notifications = db.query(Notification).filter(
+                    Notification.user_id == str(self.parent().current_user.id),
+                    Notification.read == False
+                ).all()
             
-            for notification in notifications:
-                notification.read = True
+                for notification in notifications:
+                    notification.read = True
             
-            db.commit()
+                db.flush()
             
-            # Reset notification count and hide badge
-            self.notification_count = 0
-            if hasattr(self, 'dashboard_badge'):
-                self.dashboard_badge.hide()
+                # Reset notification count and hide badge
+                self.notification_count = 0
+                if hasattr(self, 'dashboard_badge'):
+                    self.dashboard_badge.hide()
             
-            # Clear viewed sets
-            self.viewed_opportunities.clear()
-            self.viewed_notifications.clear()
+                # Clear viewed sets
+                self.viewed_opportunities.clear()
+                self.viewed_notifications.clear()
             
         except Exception as e:
             print(f"Error clearing notifications: {str(e)}")
-        finally:
-            db.close()
 
 class LoadingOverlay(QWidget):
     def __init__(self, parent=None):
@@ -1207,9 +1176,112 @@ class LoadingOverlay(QWidget):
         painter.setBrush(QColor(0, 0, 0, 180))
         painter.drawRoundedRect(self.rect(), 15, 15)  # Added rounded corners
 
+class CacheSyncWorker(QThread):
+    """Replays the offline outbox and pulls remote changes into the local cache"""
+    synced = pyqtSignal(dict)
+
+    def __init__(self, full=False, parent=None):
+        super().__init__(parent)
+        self.full = full
+
+    def run(self):
+        try:
+            from app.database.local_cache import local_cache
+            replay = local_cache.replay_outbox()
+            stored = local_cache.sync(full=self.full)
+            self.synced.emit({'replay': replay, 'stored': stored})
+        except Exception as e:
+            print(f"Local cache sync failed: {str(e)}")
+
+class SessionRevalidator(QThread):
+    """Checks a resumed session against the server and records the login.
+
+    Emits the user as stored on the server, or None when the account is gone
+    or disabled. When the server cannot be reached nothing is emitted and the
+    session carries on from the cached profile.
+    """
+    checked = pyqtSignal(object)  # User or None
+
+    def __init__(self, user_id, parent=None):
+        super().__init__(parent)
+        self.user_id = user_id
+
+    def run(self):
+        try:
+            from app.database.session_scope import session_scope
+            from app.models.models import User
+            with session_scope() as db:
+                user = db.query(User).filter(User.id == self.user_id, User.is_active == True).first()
+                if user:
+                    now = datetime.utcnow()
+                    user.last_login = now
+                    user.last_active = now
+            self.checked.emit(user)
+        except Exception as e:
+            print(f"Session revalidation failed, continuing from the cached profile: {str(e)}")
+
+class StartupPrefetch:
+    """Gets the screens after login ready while the login form is idle.
+
+    On a background thread it loads the database layer, then concurrently opens
+    pooled connections, loads the vehicle catalog and ADAS systems and fetches
+    the dashboard's first page, so logging in needs no round trips.
+    """
+
+    def __init__(self):
+        self.first_page = None
+        self.loaded_at = None
+        self.done = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="startup-prefetch", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            # Imported here so the GUI thread never waits on SQLAlchemy
+            from concurrent.futures import ThreadPoolExecutor
+            from app.config import STARTUP_POOL_CONNECTIONS
+            from app.database.connection import warm_pool
+            from app.services.reference_data import reference_data
+            from app.ui.dashboard import load_first_page
+
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup") as pool:
+                tasks = {
+                    "connections": pool.submit(warm_pool, STARTUP_POOL_CONNECTIONS),
+                    "reference data": pool.submit(reference_data.load),
+                    "first page": pool.submit(load_first_page),
+                }
+            for name, task in tasks.items():
+                try:
+                    result = task.result()
+                    if name == "first page":
+                        self.first_page = result
+                        self.loaded_at = time.monotonic()
+                except Exception as e:
+                    print(f"Startup prefetch of {name} failed: {str(e)}")
+            print(f"Startup prefetch finished in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            print(f"Startup prefetch failed: {str(e)}")
+        finally:
+            self.done.set()
+
+    def take_first_page(self):
+        """The prefetched dashboard page if it is ready and still fresh, once; None otherwise"""
+        from app.config import STARTUP_PREFETCH_MAX_AGE
+        if not self.done.is_set() or self.first_page is None:
+            return None
+        first_page, self.first_page = self.first_page, None
+        if time.monotonic() - self.loaded_at > STARTUP_PREFETCH_MAX_AGE:
+            return None
+        return first_page
+
 class MainWindow(QMainWindow):
-    def __init__(self, parent: Optional[QMainWindow] = None) -> None:
+    def __init__(self, parent: Optional[QMainWindow] = None, prefetch: Optional[StartupPrefetch] = None) -> None:
         super().__init__(parent)
+        self.prefetch = prefetch
         
         # Initialize asyncio loop
         self.loop = asyncio.new_event_loop()
@@ -1228,6 +1300,13 @@ class MainWindow(QMainWindow):
         self.websocket = None
         self.websocket_task = None
         self.notification_queue = asyncio.Queue()
+        self.cache_sync_worker = None
+        
+        # Keep the local cache fresh and replay offline writes once the server is back
+        self.cache_sync_timer = QTimer(self)
+        self.cache_sync_timer.timeout.connect(self.sync_local_cache)
+        
+        self.session_revalidator = None
         
         # Initialize UI
         self.initUI()
@@ -1235,8 +1314,9 @@ class MainWindow(QMainWindow):
         # Hide the main window - only auth widget should be visible
         self.hide()
         
-        # Show auth widget
-        self.auth.show()
+        # Show auth widget unless the saved session is still valid
+        if not self.resume_session():
+            self.auth.show()
         
     def _process_asyncio_events(self):
         """Process pending asyncio events"""
@@ -1254,7 +1334,17 @@ class MainWindow(QMainWindow):
             # Stop asyncio timer first
             if hasattr(self, 'asyncio_timer'):
                 self.asyncio_timer.stop()
-            
+            if hasattr(self, 'cache_sync_timer'):
+                self.cache_sync_timer.stop()
+
+            # How often the hot queries reused their compiled SQL this run
+            from app.database.hot_queries import compile_cache_stats
+            print(compile_cache_stats.report())
+
+            # Write the activity entries still queued before the process goes
+            from app.services import audit_log
+            audit_log.close_all()
+
             # Clean up asyncio loop safely
             if hasattr(self, 'loop') and self.loop and not self.loop.is_closed():
                 try:
@@ -1296,6 +1386,7 @@ class MainWindow(QMainWindow):
             return
             
         try:
+            import websockets
             self.websocket = await websockets.connect(
                 f"ws://localhost:8000/ws/notifications/{self.current_user.id}"
             )
@@ -1312,6 +1403,60 @@ class MainWindow(QMainWindow):
                 print(f"WebSocket initialization skipped due to event loop issue: {e}")
                 # Continue without WebSocket - the app will still function
 
+    def resume_session(self):
+        """Log in from the saved session without a round trip; False when there is none"""
+        try:
+            from app.auth.session_store import load_session
+            user = load_session()
+        except Exception as e:
+            print(f"Could not resume the saved session: {str(e)}")
+            return False
+        if user is None:
+            return False
+        print(f"DEBUG: Resuming session of {user.username}")
+        # What changed since the last login is reported, as after a login with the form
+        user.previous_login = user.last_login
+        self.on_authentication(user)
+        self.session_revalidator = SessionRevalidator(user.id, parent=self)
+        self.session_revalidator.checked.connect(self.on_session_revalidated)
+        self.session_revalidator.start()
+        return True
+
+    def on_session_revalidated(self, server_user):
+        """Bring the resumed user up to date with the server, or log out if the account is no longer active"""
+        from app.auth.auth_handler import create_access_token
+        from app.auth.session_store import save_session, clear_session
+        from app.models.models import User
+
+        if self.current_user is None:
+            return
+        if server_user is None:
+            clear_session()
+            self.sign_out("Your account is no longer active. Please log in again.")
+            return
+        for column in User.__table__.columns:
+            setattr(self.current_user, column.name, getattr(server_user, column.name))
+        # Valid for another day from this launch
+        self.current_user.token = create_access_token(str(server_user.id), role=server_user.role)
+        save_session(self.current_user, self.current_user.token)
+
+    def sign_out(self, message=None):
+        """Close the user's windows and go back to the login form"""
+        self.cache_sync_timer.stop()
+        for attr_name in ['toolbar', 'dashboard', 'opportunity_form', 'profile', 'management_portal']:
+            widget = getattr(self, attr_name, None)
+            if widget is not None:
+                widget.close()
+                widget.deleteLater()
+                if attr_name == 'toolbar':
+                    del self.toolbar  # Only there while someone is logged in
+                else:
+                    setattr(self, attr_name, None)
+        self.current_user = None
+        self.auth.show()
+        if message:
+            QMessageBox.information(self.auth, "Logged Out", message)
+
     def on_authentication(self, user):
         """Handle successful authentication"""
         print(f"DEBUG: User authenticated - Role: {user.role}")
@@ -1327,41 +1472,61 @@ class MainWindow(QMainWindow):
         # Start WebSocket connection
         self.start_websocket()
         
-        # Recreate dashboard with current user
-        if hasattr(self, 'dashboard'):
+        # Full sync once per login so rows deleted remotely drop out of the cache
+        self.sync_local_cache(full=True)
+        self.cache_sync_timer.start(60000)
+        
+        # Recreate dashboard with current user, from the page prefetched during login if there is one
+        if self.dashboard is not None:
             self.dashboard.deleteLater()
-        self.dashboard = DashboardWidget(current_user=user)
+            self.dashboard = None
+        self.build_dashboard()
         
-        # Create management portal if user is admin/manager
-        if user.role.lower() in ["admin", "manager"]:
-            print("DEBUG: Creating management portal for admin/manager")
-            self.management_portal = ManagementPortal(user, self)
-            self.management_portal.refresh_needed.connect(self.on_management_refresh)
+        # The management portal is built the first time it is opened
         
-        # Initialize notification system
-        db = SessionLocal()
-        try:
-            # Get last login time or use a default (24 hours ago)
-            last_login = db.query(User.last_login).filter(User.id == user.id).scalar()
-            if last_login:
-                self.toolbar.last_checked_time = last_login
-            else:
-                # For new users or first login, check last 24 hours
-                self.toolbar.last_checked_time = datetime.now(timezone.utc) - timedelta(hours=24)
-            
-            # Update last login time
-            user_obj = db.query(User).filter(User.id == user.id).first()
-            if user_obj:
-                user_obj.last_login = datetime.now(timezone.utc)
-                db.commit()
-            
-            # Start notification check timer
-            self.toolbar.check_updates()
-            
-        except Exception as e:
-            print(f"Error initializing notifications: {e}")
-        finally:
-            db.close()
+        # Notify about what happened since the previous login; AuthWidget has
+        # already recorded this one. For first logins, check the last 24 hours.
+        previous_login = getattr(user, 'previous_login', None)
+        if previous_login:
+            self.toolbar.last_checked_time = previous_login.replace(tzinfo=previous_login.tzinfo or timezone.utc)
+        else:
+            self.toolbar.last_checked_time = datetime.now(timezone.utc) - timedelta(hours=24)
+        
+        # Checked once the toolbar has been drawn
+        QTimer.singleShot(0, self.toolbar.check_updates)
+
+    def build_dashboard(self, wait=True):
+        """Build the dashboard once the startup prefetch has its first page, so the toolbar never waits on it"""
+        from app.ui.dashboard import DashboardWidget
+
+        if self.dashboard is not None or self.current_user is None:
+            return
+        if wait and self.prefetch and not self.prefetch.done.is_set():
+            QTimer.singleShot(50, self.build_dashboard)
+            return
+        first_page = self.prefetch.take_first_page() if self.prefetch else None
+        self.dashboard = DashboardWidget(current_user=self.current_user, first_page=first_page)
+
+    def sync_local_cache(self, full=False):
+        """Start a background cache sync unless one is already running"""
+        if self.cache_sync_worker and self.cache_sync_worker.isRunning():
+            return
+        self.cache_sync_worker = CacheSyncWorker(full=full, parent=self)
+        self.cache_sync_worker.synced.connect(self.on_local_cache_synced)
+        self.cache_sync_worker.start()
+
+    def on_local_cache_synced(self, result):
+        """Report outbox conflicts and leave cached mode once the server answers again"""
+        replay = result['replay']
+        if replay['conflicts'] or replay['failed']:
+            QMessageBox.warning(
+                self,
+                "Offline Changes Not Applied",
+                f"{replay['conflicts'] + replay['failed']} change(s) made while offline could not be applied "
+                "because the tickets were changed by someone else or rejected by the server."
+            )
+        if self.dashboard is not None and (replay['applied'] or self.dashboard.showing_cached):
+            self.dashboard.load_opportunities()
 
     def on_account_created(self, user):
         self.account_creation.hide()
@@ -1382,6 +1547,7 @@ class MainWindow(QMainWindow):
     def show_profile(self):
         """Show the user profile window"""
         if not self.profile:
+            from app.ui.profile import ProfileWidget
             self.profile = ProfileWidget(self.current_user)
             self.profile.profile_updated.connect(self.on_profile_updated)
         self.profile.show()
@@ -1390,30 +1556,33 @@ class MainWindow(QMainWindow):
     def on_profile_updated(self):
         """Handle profile updates"""
         print("Profile update received")
-        db = SessionLocal()
+        from app.database.session_scope import session_scope
+        from app.models.models import User
+
         try:
-            # Refresh current user data
-            print(f"Refreshing user data for ID: {self.current_user.id}")
-            self.current_user = db.query(User).filter(User.id == self.current_user.id).first()
-            print(f"User data refreshed, theme: {self.current_user.icon_theme}")
+            with session_scope(read_only=True) as db:
+                # Refresh current user data
+                print(f"Refreshing user data for ID: {self.current_user.id}")
+                self.current_user = db.query(User).filter(User.id == self.current_user.id).first()
+                print(f"User data refreshed, theme: {self.current_user.icon_theme}")
             
-            # Update toolbar theme if it exists
-            if hasattr(self, 'toolbar'):
-                print("Updating toolbar theme")
-                self.toolbar.update_theme(self.current_user.icon_theme)
-            else:
-                print("Warning: Toolbar not found")
+                # Update toolbar theme if it exists
+                if hasattr(self, 'toolbar'):
+                    print("Updating toolbar theme")
+                    self.toolbar.update_theme(self.current_user.icon_theme)
+                else:
+                    print("Warning: Toolbar not found")
             
-            # Update other windows that might need refreshing
-            if hasattr(self, 'dashboard'):
-                print("Refreshing dashboard")
-                self.dashboard.load_opportunities()
-            if hasattr(self, 'management_portal') and self.management_portal is not None:
-                try:
-                    print("Refreshing management portal")
-                    self.management_portal.load_data()
-                except Exception as e:
-                    print(f"Error updating management portal: {str(e)}\nTraceback: {traceback.format_exc()}")
+                # Update other windows that might need refreshing
+                if self.dashboard is not None:
+                    print("Refreshing dashboard")
+                    self.dashboard.load_opportunities()
+                if hasattr(self, 'management_portal') and self.management_portal is not None:
+                    try:
+                        print("Refreshing management portal")
+                        self.management_portal.load_data()
+                    except Exception as e:
+                        print(f"Error updating management portal: {str(e)}\nTraceback: {traceback.format_exc()}")
         except Exception as e:
             print(f"Error in profile update: {str(e)}\nTraceback: {traceback.format_exc()}")
         finally:
@@ -1423,6 +1592,7 @@ class MainWindow(QMainWindow):
     def show_opportunity_form(self):
         # Create form if it doesn't exist
         if not self.opportunity_form:
+            from app.ui.opportunity_form import OpportunityForm
             self.opportunity_form = OpportunityForm(str(self.current_user.id))
             # Connect the opportunity created signal to the toolbar
             self.opportunity_form.opportunity_created.connect(self.on_new_opportunity)
@@ -1435,13 +1605,22 @@ class MainWindow(QMainWindow):
         if not self.current_user:
             QMessageBox.warning(self, "Error", "Please log in first")
             return
-            
+
+        from app.database.session_scope import session_scope
+
+        self.build_dashboard(wait=False)
         self.dashboard.show()
         self.dashboard.raise_()
         self.dashboard.activateWindow()
-        self.dashboard.load_opportunities()
-        if hasattr(self, 'toolbar'):
-            self.toolbar.clear_notifications()
+        # Reload and clear notifications as one action
+        try:
+            with session_scope():
+                self.dashboard.load_opportunities()
+                if hasattr(self, 'toolbar'):
+                    self.toolbar.clear_notifications()
+        except Exception as e:
+            print(f"Error refreshing the dashboard: {str(e)}")
+            print(traceback.format_exc())
         
     def show_account_creation(self):
         self.account_creation.show()
@@ -1455,6 +1634,7 @@ class MainWindow(QMainWindow):
             return
             
         if not self.management_portal:
+            from app.ui.management_portal import ManagementPortal
             self.management_portal = ManagementPortal(self.current_user, self)
             self.management_portal.refresh_needed.connect(self.on_management_refresh)
             
@@ -1465,7 +1645,7 @@ class MainWindow(QMainWindow):
         
     def on_management_refresh(self):
         """Handle refresh requests from management portal"""
-        if hasattr(self, 'dashboard'):
+        if self.dashboard is not None:
             self.dashboard.load_opportunities()
             
     def initUI(self):
@@ -1497,15 +1677,12 @@ class MainWindow(QMainWindow):
         self.account_creation = AccountCreationWidget()
         self.account_creation.account_created.connect(self.on_account_created)
         
-        # Initialize dashboard with None user (will be set after authentication)
-        self.dashboard = DashboardWidget()
+        # The dashboard is built for the user once they have logged in
+        self.dashboard = None
         self.opportunity_form = None
         self.settings = SettingsWidget()
         self.profile = None
         self.management_portal = None
-        
-        # Show auth widget first
-        self.auth.show()
 
 def main():
     # Enable High DPI scaling before creating QApplication
@@ -1542,9 +1719,19 @@ def main():
         }
     """)
     
-    # Create main window but don't show it (only auth widget should be visible)
-    window = MainWindow()
-    # Don't show the main window - only the auth widget will be shown
+    # Put the splash up before anything else is built
+    splash = LoadingOverlay()
+    splash.show()
+    app.processEvents()
+    prefetch = StartupPrefetch()
+    prefetch.start()
+
+    def show_login():
+        # Create main window but don't show it (only auth widget should be visible)
+        app.main_window = MainWindow(prefetch=prefetch)
+        splash.close()
+
+    QTimer.singleShot(0, show_login)
     
     # Start the event loop
     sys.exit(app.exec_())
@@ -1,18 +1,53 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                            QTabWidget, QTableWidget, QTableWidgetItem, QComboBox,
                            QScrollArea, QFrame, QMessageBox, QLineEdit, QFormLayout,
-                           QDialog, QCheckBox, QMainWindow, QHeaderView, QTextEdit, QFileDialog)
-from PyQt5.QtCore import Qt, pyqtSignal
+                           QDialog, QCheckBox, QMainWindow, QHeaderView, QTextEdit, QFileDialog,
+                           QProgressDialog)
+from PyQt5.QtCore import Qt, pyqtSignal, QThread
 from app.database.connection import SessionLocal
-from app.models.models import User, Opportunity, ActivityLog, Notification, File, FileAttachment, Attachment, Vehicle
+from app.database.session_scope import session_scope
+from app.models.models import User, Opportunity, Vehicle
 from datetime import datetime, timedelta, timezone
-import statistics
 from app.ui.dashboard import DashboardWidget
 from sqlalchemy import text
-import openpyxl
-from openpyxl.styles import Font, PatternFill
+from app.services.export_service import TicketExporter, ExportCancelled
+from app.services import bulk_operations, read_models, ticket_systems
+from app.services.ticket_systems import AFFECTED_PORTIONS
+from app.services.file_storage import collect_garbage_async
+from app.services.reference_data import reference_data
 import os
 
+class ExportWorker(QThread):
+    """Runs a TicketExporter off the GUI thread"""
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, export_format, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.export_format = export_format
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            TicketExporter(
+                self.file_path,
+                self.export_format,
+                progress=self.progress.emit,
+                should_cancel=lambda: self.cancelled
+            ).run()
+            self.completed.emit(self.file_path)
+        except ExportCancelled:
+            print("Export cancelled")
+            self.failed.emit("")
+        except Exception as e:
+            print(f"Export failed: {str(e)}")
+            self.failed.emit(str(e))
+
 class TicketViewDialog(QDialog):
     def __init__(self, opportunity_id, current_user, parent=None):
         super().__init__(parent)
@@ -242,6 +277,8 @@ class ManagementPortal(QMainWindow):
         self.is_admin = current_user.role == "admin"
         self.main_window = parent
         self.dashboard = None
+        self.export_worker = None
+        self.export_progress = None
         self.initUI()
         
     def closeEvent(self, event):
@@ -578,7 +615,7 @@ class ManagementPortal(QMainWindow):
         
         # Enable row selection
         self.opportunities_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.opportunities_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.opportunities_table.setSelectionMode(QTableWidget.ExtendedSelection)
         
         # Connect double-click handler
         self.opportunities_table.itemDoubleClicked.connect(self.handle_opportunity_double_click)
@@ -596,6 +633,30 @@ class ManagementPortal(QMainWindow):
         self.opportunities_table.setColumnWidth(9, 100)  # Response Time
         self.opportunities_table.setColumnWidth(10, 100) # Actions
 
+        # Bulk actions on the selected rows
+        bulk_layout = QHBoxLayout()
+        self.show_archived_checkbox = QCheckBox("Show archived")
+        self.show_archived_checkbox.toggled.connect(self.load_opportunities)
+        bulk_layout.addWidget(self.show_archived_checkbox)
+        bulk_layout.addWidget(QLabel("System:"))
+        self.system_filter = QComboBox()
+        self.system_filter.addItems(["All"] + sorted(system.code for system in reference_data.adas_systems()))
+        self.system_filter.currentTextChanged.connect(self.load_opportunities)
+        bulk_layout.addWidget(self.system_filter)
+        bulk_layout.addWidget(QLabel("Portion:"))
+        self.portion_filter = QComboBox()
+        self.portion_filter.addItems(["All"] + AFFECTED_PORTIONS)
+        self.portion_filter.currentTextChanged.connect(self.load_opportunities)
+        bulk_layout.addWidget(self.portion_filter)
+        bulk_layout.addStretch()
+        for label, handler in (("Archive Selected", self.archive_selected_opportunities),
+                               ("Restore Selected", self.restore_selected_opportunities),
+                               ("Delete Selected", self.delete_selected_opportunities)):
+            button = QPushButton(label)
+            button.clicked.connect(handler)
+            bulk_layout.addWidget(button)
+
+        layout.addLayout(bulk_layout)
         layout.addWidget(self.opportunities_table)
         tab.setLayout(layout)
         return tab
@@ -608,9 +669,16 @@ class ManagementPortal(QMainWindow):
 
     def load_opportunities(self):
         """Load opportunities into the table"""
-        try:
-            db = SessionLocal()
-            opportunities = db.query(Opportunity).all()
+        with session_scope(read_only=True) as db:
+            criteria = []
+            if not self.show_archived_checkbox.isChecked():
+                criteria.append(Opportunity.archived_at.is_(None))
+            code, portion = self.system_filter.currentText(), self.portion_filter.currentText()
+            criterion = ticket_systems.system_criterion(code if code != "All" else None,
+                                                        portion if portion != "All" else None)
+            if criterion is not None:
+                criteria.append(criterion)
+            opportunities = read_models.ticket_table_rows(db, *criteria)
             
             self.opportunities_table.setRowCount(len(opportunities))
             
@@ -657,8 +725,7 @@ class ManagementPortal(QMainWindow):
                 self.opportunities_table.setItem(i, 4, status_item)
                 
                 # Created By
-                creator = db.query(User).filter(User.id == opp.creator_id).first()
-                creator_item = QTableWidgetItem(creator.username if creator else "Unknown")
+                creator_item = QTableWidgetItem(opp.creator_username or "Unknown")
                 creator_item.setFlags(creator_item.flags() & ~Qt.ItemIsEditable)
                 self.opportunities_table.setItem(i, 5, creator_item)
                 
@@ -669,11 +736,7 @@ class ManagementPortal(QMainWindow):
                 self.opportunities_table.setItem(i, 6, created_date_item)
                 
                 # Assigned To
-                assigned_to = "Unassigned"
-                if opp.acceptor_id:
-                    acceptor = db.query(User).filter(User.id == opp.acceptor_id).first()
-                    if acceptor:
-                        assigned_to = f"{acceptor.first_name} {acceptor.last_name}"
+                assigned_to = opp.acceptor_name or "Unassigned"
                 assigned_item = QTableWidgetItem(assigned_to)
                 assigned_item.setFlags(assigned_item.flags() & ~Qt.ItemIsEditable)
                 self.opportunities_table.setItem(i, 7, assigned_item)
@@ -741,88 +804,104 @@ class ManagementPortal(QMainWindow):
                 actions_layout.addWidget(delete_btn)
                 
                 self.opportunities_table.setCellWidget(i, 10, actions_widget)
-                
-        finally:
-            db.close()
+
+    def selected_opportunity_ids(self):
+        """Ids of the rows selected in the opportunities table"""
+        rows = sorted(set(index.row() for index in self.opportunities_table.selectionModel().selectedRows()))
+        return [self.opportunities_table.item(row, 0).text() for row in rows]
+
+    def permitted_opportunity_ids(self, db, opportunity_ids):
+        """Filter ids down to the tickets the current user may delete or archive"""
+        if self.is_admin:
+            return opportunity_ids
+        return [
+            str(opp_id) for (opp_id,) in db.query(Opportunity.id).filter(
+                Opportunity.id.in_(opportunity_ids),
+                Opportunity.creator_id == self.current_user.id
+            )
+        ]
 
     def delete_opportunity(self, opportunity_id):
         """Delete an opportunity after confirmation"""
+        self.delete_opportunities([opportunity_id])
+
+    def delete_selected_opportunities(self):
+        self.delete_opportunities(self.selected_opportunity_ids())
+
+    def delete_opportunities(self, opportunity_ids):
+        """Delete opportunities and their files after confirmation"""
+        if not opportunity_ids:
+            QMessageBox.information(self, "Delete", "Select the opportunities to delete first.")
+            return
+
+        count = len(opportunity_ids)
         reply = QMessageBox.question(
             self,
             'Confirm Deletion',
-            'Are you sure you want to delete this opportunity? This action cannot be undone.',
+            'Are you sure you want to delete this opportunity? This action cannot be undone.' if count == 1
+            else f'Are you sure you want to delete {count} opportunities? This action cannot be undone.',
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            db = SessionLocal()
             try:
-                # Get the opportunity
-                opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
-                
-                if not opportunity:
-                    QMessageBox.warning(self, "Error", "Opportunity not found.")
-                    return
-                
-                # Check if user has permission (admin or creator)
-                if not self.is_admin and str(opportunity.creator_id) != str(self.current_user.id):
-                    QMessageBox.warning(
-                        self,
-                        "Permission Denied",
-                        "You don't have permission to delete this opportunity."
-                    )
-                    return
-
-                # Delete related records in the correct order to maintain referential integrity
-                
-                # Delete notifications first
-                db.query(Notification).filter(Notification.opportunity_id == opportunity_id).delete()
-                
-                # Delete activity logs
-                db.query(ActivityLog).filter(ActivityLog.opportunity_id == opportunity_id).delete()
-                
-                # Delete files
-                db.query(File).filter(File.opportunity_id == opportunity_id).delete()
-                
-                # Delete file attachments
-                db.query(FileAttachment).filter(FileAttachment.opportunity_id == opportunity_id).delete()
-                
-                # Delete attachments
-                db.query(Attachment).filter(Attachment.opportunity_id == opportunity_id).delete()
-                
-                # Create activity log for the deletion
-                activity = ActivityLog(
-                    user_id=self.current_user.id,
-                    action="deleted",
-                    details={
-                        "title": opportunity.title,
-                        "status": opportunity.status,
-                        "deleted_at": datetime.utcnow().isoformat()
-                    },
-                    created_at=datetime.utcnow()
-                )
-                db.add(activity)
+                with session_scope() as db:
+                    permitted = self.permitted_opportunity_ids(db, opportunity_ids)
+                    if len(permitted) < count:
+                        QMessageBox.warning(
+                            self,
+                            "Permission Denied",
+                            "You don't have permission to delete this opportunity." if count == 1
+                            else "You can only delete opportunities you created."
+                        )
+                        return
+                    
+                    deleted, blob_hashes = bulk_operations.delete_opportunities(db, permitted, self.current_user)
                 
-                # Finally delete the opportunity
-                db.delete(opportunity)
-                db.commit()
+                # Blobs go only after the rows are committed
+                collect_garbage_async(blob_hashes)
                 
                 # Refresh the table
                 self.load_opportunities()
                 
-                QMessageBox.information(self, "Success", "Opportunity deleted successfully.")
+                if not deleted:
+                    QMessageBox.warning(self, "Error", "Opportunity not found.")
+                else:
+                    QMessageBox.information(self, "Success", "Opportunity deleted successfully." if deleted == 1
+                                            else f"{deleted} opportunities deleted successfully.")
                 
             except Exception as e:
-                db.rollback()
                 QMessageBox.critical(self, "Error", f"Failed to delete opportunity: {str(e)}")
-            finally:
-                db.close()
+
+    def archive_selected_opportunities(self):
+        """Archive the selected opportunities"""
+        self.set_archived(self.selected_opportunity_ids(), True)
+
+    def restore_selected_opportunities(self):
+        """Restore the selected archived opportunities"""
+        self.set_archived(self.selected_opportunity_ids(), False)
+
+    def set_archived(self, opportunity_ids, archived):
+        """Archive or restore opportunities in one statement"""
+        if not opportunity_ids:
+            QMessageBox.information(self, "Archive", "Select the opportunities first.")
+            return
+        try:
+            with session_scope() as db:
+                permitted = self.permitted_opportunity_ids(db, opportunity_ids)
+                if archived:
+                    changed = bulk_operations.archive_opportunities(db, permitted, self.current_user)
+                else:
+                    changed = bulk_operations.restore_opportunities(db, permitted, self.current_user)
+            self.load_opportunities()
+            QMessageBox.information(self, "Success", f"{changed} opportunities {'archived' if archived else 'restored'}.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to update opportunities: {str(e)}")
 
     def load_data(self):
         """Load all data for the management portal"""
-        db = SessionLocal()
-        try:
+        with session_scope(replica=True) as db:
             # Get team members
             if self.is_admin:
                 team_members = db.query(User).all()
@@ -835,28 +914,11 @@ class ManagementPortal(QMainWindow):
                 row = self.team_table.rowCount()
                 self.team_table.insertRow(row)
                 
-                # Get member statistics
-                active_tickets = db.query(Opportunity).filter(
-                    Opportunity.acceptor_id == member.id,
-                    Opportunity.status.in_(["new", "in progress"])
-                ).count()
-                
-                completed_tickets = db.query(Opportunity).filter(
-                    Opportunity.acceptor_id == member.id,
-                    Opportunity.status == "completed"
-                ).count()
-                
-                # Calculate average response time
-                completed_opps = db.query(Opportunity).filter(
-                    Opportunity.acceptor_id == member.id,
-                    Opportunity.status == "completed",
-                    Opportunity.response_time.isnot(None)
-                ).all()
+                # Get member statistics, with the average response time of their completed tickets
+                active_tickets, completed_tickets, avg_seconds = read_models.accepted_ticket_stats(db, member.id).one()
                 
                 avg_response = "N/A"
-                if completed_opps:
-                    response_times = [opp.response_time.total_seconds() for opp in completed_opps]
-                    avg_seconds = statistics.mean(response_times)
+                if avg_seconds is not None:
                     avg_response = str(timedelta(seconds=int(avg_seconds)))
                 
                 # Add data to table
@@ -944,9 +1006,6 @@ class ManagementPortal(QMainWindow):
             # Load opportunities
             self.load_opportunities()
             
-        finally:
-            db.close()
-            
     def update_statistics(self, db):
         """Update the statistics cards with current data"""
         try:
@@ -973,12 +1032,13 @@ class ManagementPortal(QMainWindow):
             self.findChild(QLabel, "stat_team_members").setText(str(team_count))
             
             # Average response time and completion rate
-            completed_opps = db.query(Opportunity).filter(
+            completed_opps = read_models.ticket_timings(
+                db,
                 team_filter if self.is_admin else True,
                 Opportunity.status.ilike("completed"),
                 Opportunity.completed_at.isnot(None),
                 Opportunity.created_at.isnot(None)
-            ).all()
+            )
             
             total_tickets = db.query(Opportunity).filter(
                 team_filter if self.is_admin else True
@@ -1022,49 +1082,20 @@ class ManagementPortal(QMainWindow):
                 if name_item:
                     name_parts = name_item.text().split()
                     if len(name_parts) >= 2:
-                        user = db.query(User).filter(
-                            User.first_name == name_parts[0],
-                            User.last_name == name_parts[1]
-                        ).first()
+                        user_id = read_models.user_id_by_name(db, name_parts[0], name_parts[1]).scalar()
                         
-                        if user:
-                            # Count active tickets for user
-                            active_count = db.query(Opportunity).filter(
-                                (Opportunity.creator_id == user.id) | (Opportunity.acceptor_id == user.id),
-                                Opportunity.status.in_(["new", "in progress"])
-                            ).count()
+                        if user_id:
+                            # Active and completed tickets the user created or accepted, and how long completing took
+                            active_count, completed_count, avg_secs = read_models.handled_ticket_stats(db, user_id).one()
                             self.team_table.setItem(row, 2, QTableWidgetItem(str(active_count)))
-                            
-                            # Count completed tickets
-                            completed_count = db.query(Opportunity).filter(
-                                (Opportunity.creator_id == user.id) | (Opportunity.acceptor_id == user.id),
-                                Opportunity.status.ilike("completed")
-                            ).count()
                             self.team_table.setItem(row, 3, QTableWidgetItem(str(completed_count)))
                             
-                            # Calculate average response time for user
-                            user_completed = db.query(Opportunity).filter(
-                                (Opportunity.creator_id == user.id) | (Opportunity.acceptor_id == user.id),
-                                Opportunity.status.ilike("completed"),
-                                Opportunity.completed_at.isnot(None),
-                                Opportunity.created_at.isnot(None)
-                            ).all()
-                            
-                            if user_completed:
-                                user_times = []
-                                for opp in user_completed:
-                                    if opp.completed_at and opp.created_at:
-                                        duration = opp.completed_at - opp.created_at
-                                        user_times.append(duration.total_seconds())
-                                
-                                if user_times:
-                                    avg_secs = sum(user_times) / len(user_times)
-                                    days = int(avg_secs // 86400)
-                                    hours = int((avg_secs % 86400) // 3600)
-                                    user_avg = f"{days}d {hours}h" if days > 0 else f"{hours}h"
-                                    self.team_table.setItem(row, 4, QTableWidgetItem(user_avg))
-                                else:
-                                    self.team_table.setItem(row, 4, QTableWidgetItem("N/A"))
+                            if avg_secs is not None:
+                                avg_secs = float(avg_secs)
+                                days = int(avg_secs // 86400)
+                                hours = int((avg_secs % 86400) // 3600)
+                                user_avg = f"{days}d {hours}h" if days > 0 else f"{hours}h"
+                                self.team_table.setItem(row, 4, QTableWidgetItem(user_avg))
                             else:
                                 self.team_table.setItem(row, 4, QTableWidgetItem("N/A"))
             
@@ -1117,68 +1148,52 @@ class ManagementPortal(QMainWindow):
             QMessageBox.warning(self, "Error", "Admin accounts cannot be deleted.")
             return
         
-        # Check if user has active tickets
-        db = SessionLocal()
         try:
-            active_tickets = db.query(Opportunity).filter(
-                (Opportunity.creator_id == user.id) | (Opportunity.acceptor_id == user.id),
-                Opportunity.status.in_(["new", "in progress"])
-            ).count()
+            with session_scope() as db:
+                # Check if user has active tickets
+                active_tickets = db.query(Opportunity).filter(
+                    (Opportunity.creator_id == user.id) | (Opportunity.acceptor_id == user.id),
+                    Opportunity.status.in_(["new", "in progress"])
+                ).count()
+                
+                if active_tickets > 0:
+                    reply = QMessageBox.question(
+                        self,
+                        'Warning',
+                        f'This user has {active_tickets} active tickets. Are you sure you want to delete this user?',
+                        QMessageBox.Yes | QMessageBox.No,
+                        QMessageBox.No
+                    )
+                else:
+                    reply = QMessageBox.question(
+                        self,
+                        'Confirm Deletion',
+                        f'Are you sure you want to delete user {user.first_name} {user.last_name}?',
+                        QMessageBox.Yes | QMessageBox.No,
+                        QMessageBox.No
+                    )
+                
+                if reply != QMessageBox.Yes:
+                    return
+                
+                deleted, blocked = bulk_operations.delete_users(db, [user], self.current_user)
+                if blocked:
+                    # Their tickets and uploads keep them as author, so only the login goes
+                    bulk_operations.deactivate_users(db, [u.id for u in blocked], self.current_user)
             
-            if active_tickets > 0:
-                reply = QMessageBox.question(
+            if blocked:
+                QMessageBox.information(
                     self,
-                    'Warning',
-                    f'This user has {active_tickets} active tickets. Are you sure you want to delete this user?',
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.No
+                    "User Deactivated",
+                    f"{user.first_name} {user.last_name} created tickets or uploaded files, "
+                    "so the account was deactivated instead of deleted."
                 )
             else:
-                reply = QMessageBox.question(
-                    self,
-                    'Confirm Deletion',
-                    f'Are you sure you want to delete user {user.first_name} {user.last_name}?',
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.No
-                )
-            
-            if reply == QMessageBox.Yes:
-                # Create activity log for the deletion
-                activity = ActivityLog(
-                    user_id=self.current_user.id,
-                    action="user_deleted",
-                    details={
-                        "deleted_user": {
-                            "id": str(user.id),
-                            "username": user.username,
-                            "name": f"{user.first_name} {user.last_name}",
-                            "role": user.role,
-                            "team": user.team
-                        },
-                        "deleted_at": datetime.utcnow().isoformat()
-                    },
-                    created_at=datetime.utcnow()
-                )
-                db.add(activity)
-                
-                # Delete user's notifications
-                db.query(Notification).filter(Notification.user_id == user.id).delete()
-                
-                # Delete user's activity logs
-                db.query(ActivityLog).filter(ActivityLog.user_id == user.id).delete()
-                
-                # Delete the user
-                db.delete(user)
-                db.commit()
-                
                 QMessageBox.information(self, "Success", "User deleted successfully.")
-                self.load_data()  # Refresh the display
+            self.load_data()  # Refresh the display
                 
         except Exception as e:
-            db.rollback()
             QMessageBox.critical(self, "Error", f"Failed to delete user: {str(e)}")
-        finally:
-            db.close() 
 
     def create_vehicles_tab(self):
         """Create the custom vehicles management tab"""
@@ -1435,6 +1450,7 @@ class ManagementPortal(QMainWindow):
                 vehicle.last_modified_by_id = self.current_user.id
                 
                 db.commit()
+                reference_data.invalidate()
                 self.load_custom_vehicles()  # Refresh the table
                 QMessageBox.information(self, "Success", "Vehicle updated successfully!")
             except Exception as e:
@@ -1529,6 +1545,7 @@ class ManagementPortal(QMainWindow):
             if msg.exec_() == QMessageBox.Yes:
                 db.delete(vehicle)
                 db.commit()
+                reference_data.invalidate()
                 self.load_custom_vehicles()  # Refresh the table
                 
                 # Show success message
@@ -1554,118 +1571,60 @@ class ManagementPortal(QMainWindow):
             db.close()
 
     def export_to_excel(self):
-        """Export ticket data to Excel with multiple sheets"""
-        try:
-            # Create a new workbook
-            wb = openpyxl.Workbook()
-            
-            # Get data from database
-            db = SessionLocal()
-            try:
-                # Get all tickets
-                all_tickets = db.query(Opportunity).all()
-                
-                # Separate tickets by status
-                completed_tickets = [t for t in all_tickets if t.status.lower() == "completed"]
-                in_progress_tickets = [t for t in all_tickets if t.status.lower() == "in progress"]
-                needs_info_tickets = [t for t in all_tickets if t.status.lower() == "needs info"]
-                new_tickets = [t for t in all_tickets if t.status.lower() == "new"]
-                
-                # Create sheets
-                completed_sheet = wb.active
-                completed_sheet.title = "Completed Tickets"
-                in_progress_sheet = wb.create_sheet("In Progress Tickets")
-                needs_info_sheet = wb.create_sheet("Needs Info Tickets")
-                new_sheet = wb.create_sheet("New Tickets")
-                
-                # Define headers
-                headers = [
-                    "Ticket Number", "Year", "Make", "Model", 
-                    "Creator", "Acceptor", "Date Created", 
-                    "Date Completed", "Total Time", "Work Time"
-                ]
-                
-                # Style for headers
-                header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                header_font = Font(color="FFFFFF", bold=True)
-                
-                # Function to write headers
-                def write_headers(sheet):
-                    for col, header in enumerate(headers, 1):
-                        cell = sheet.cell(row=1, column=col)
-                        cell.value = header
-                        cell.fill = header_fill
-                        cell.font = header_font
-                
-                # Function to format duration
-                def format_duration(duration):
-                    if duration is None:
-                        return "N/A"
-                    total_seconds = int(duration.total_seconds())
-                    days = total_seconds // 86400
-                    hours = (total_seconds % 86400) // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    return f"{days}d {hours}h {minutes}m"
-                
-                # Function to write ticket data
-                def write_ticket_data(sheet, tickets):
-                    write_headers(sheet)
-                    for row, ticket in enumerate(tickets, 2):
-                        sheet.cell(row=row, column=1).value = str(ticket.id)
-                        sheet.cell(row=row, column=2).value = ticket.year
-                        sheet.cell(row=row, column=3).value = ticket.make
-                        sheet.cell(row=row, column=4).value = ticket.model
-                        sheet.cell(row=row, column=5).value = f"{ticket.creator.first_name} {ticket.creator.last_name}"
-                        sheet.cell(row=row, column=6).value = f"{ticket.acceptor.first_name} {ticket.acceptor.last_name}" if ticket.acceptor else "N/A"
-                        sheet.cell(row=row, column=7).value = ticket.created_at.strftime("%Y-%m-%d %H:%M") if ticket.created_at else "N/A"
-                        sheet.cell(row=row, column=8).value = ticket.completed_at.strftime("%Y-%m-%d %H:%M") if ticket.completed_at else "N/A"
-                        sheet.cell(row=row, column=9).value = format_duration(ticket.response_time) if ticket.response_time else "N/A"
-                        sheet.cell(row=row, column=10).value = format_duration(ticket.work_time) if ticket.work_time else "N/A"
-                
-                # Write data to each sheet
-                write_ticket_data(completed_sheet, completed_tickets)
-                write_ticket_data(in_progress_sheet, in_progress_tickets)
-                write_ticket_data(needs_info_sheet, needs_info_tickets)
-                write_ticket_data(new_sheet, new_tickets)
-                
-                # Auto-adjust column widths
-                for sheet in wb.sheetnames:
-                    worksheet = wb[sheet]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column = [cell for cell in column]
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = (max_length + 2)
-                        worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
-                
-                # Get save location from user
-                file_name = f"SI_Opportunity_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                file_path, _ = QFileDialog.getSaveFileName(
-                    self,
-                    "Save Export File",
-                    file_name,
-                    "Excel Files (*.xlsx)"
-                )
-                
-                if file_path:
-                    wb.save(file_path)
-                    QMessageBox.information(
-                        self,
-                        "Export Successful",
-                        f"Data has been exported to:\n{file_path}"
-                    )
-                
-            finally:
-                db.close()
-                
-        except Exception as e:
+        """Export ticket data to Excel (one sheet per status), CSV or Parquet in the background"""
+        if self.export_worker and self.export_worker.isRunning():
+            QMessageBox.information(self, "Export Running", "An export is already in progress.")
+            return
+        
+        file_name = f"SI_Opportunity_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Save Export File",
+            file_name,
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
+        )
+        if not file_path:
+            return
+        
+        # The chosen filter decides the format; keep the extension consistent with it
+        export_format = {"CSV": "csv", "Parquet": "parquet"}.get(selected_filter.split(" ")[0], "xlsx")
+        root, ext = os.path.splitext(file_path)
+        if ext.lower() != f".{export_format}":
+            file_path = f"{root}.{export_format}"
+        
+        self.export_progress = QProgressDialog("Exporting tickets...", "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        
+        self.export_worker = ExportWorker(file_path, export_format, self)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.completed.connect(self.on_export_completed)
+        self.export_worker.failed.connect(self.on_export_failed)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.start()
+    
+    def on_export_progress(self, done, total):
+        """Update the progress dialog from the export worker"""
+        if self.export_progress:
+            self.export_progress.setMaximum(max(total, 1))
+            self.export_progress.setValue(done)
+            self.export_progress.setLabelText(f"Exporting tickets... {done} of {total}")
+    
+    def on_export_completed(self, file_path):
+        self.export_progress.close()
+        QMessageBox.information(
+            self,
+            "Export Successful",
+            f"Data has been exported to:\n{file_path}"
+        )
+    
+    def on_export_failed(self, message):
+        self.export_progress.close()
+        # An empty message means the user cancelled
+        if message:
             QMessageBox.critical(
                 self,
                 "Export Error",
-                f"An error occurred while exporting data:\n{str(e)}"
-            ) 
\ No newline at end of file
+                f"An error occurred while exporting data:\n{message}"
+            )
@@ -4,40 +4,13 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                            QCheckBox, QGroupBox, QDialog, QFormLayout)
 from PyQt5.QtCore import Qt, pyqtSignal
 from app.database.connection import SessionLocal
-from app.models.models import Opportunity, Vehicle, AdasSystem, File, User
-from app.config import STORAGE_DIR
+from app.models.models import Opportunity, Vehicle, File, User
+from app.services.file_storage import calculate_file_hash, store_file, register_blob, collect_garbage_async
+from app.services.reference_data import reference_data
+from app.services.ticket_systems import AFFECTED_PORTIONS
 import os
 import mimetypes
 from datetime import datetime
-import shutil
-import hashlib
-
-def calculate_file_hash(file_path):
-    """Calculate SHA-256 hash of a file"""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
-
-def store_file(source_path, file_hash):
-    """Store file in storage directory with hash-based name"""
-    # Create year/month based subdirectories
-    date_dir = datetime.now().strftime('%Y/%m')
-    target_dir = os.path.join(STORAGE_DIR, date_dir)
-    os.makedirs(target_dir, exist_ok=True)
-    
-    # Get file extension
-    _, ext = os.path.splitext(source_path)
-    
-    # Create target path with hash name
-    target_path = os.path.join(target_dir, f"{file_hash}{ext}")
-    
-    # Copy file to storage
-    shutil.copy2(source_path, target_path)
-    
-    # Return relative storage path
-    return os.path.relpath(target_path, STORAGE_DIR)
 
 class CustomVehicleDialog(QDialog):
     def __init__(self, parent=None):
@@ -286,6 +259,7 @@ class CustomVehicleDialog(QDialog):
             
             db.add(new_vehicle)
             db.commit()
+            reference_data.invalidate()
             
             QMessageBox.information(self, "Success", "Vehicle added successfully!")
             self.accept()
@@ -665,10 +639,9 @@ class OpportunityForm(QWidget):
         
     def load_data(self):
         """Load vehicle and system data from database"""
-        db = SessionLocal()
         try:
-            # Load vehicles
-            self.vehicles = db.query(Vehicle).all()  # Store vehicles in instance variable
+            # Usually already loaded while the login screen was up
+            self.vehicles = reference_data.vehicles()
             
             if self.vehicles:
                 # Populate year combo
@@ -683,8 +656,6 @@ class OpportunityForm(QWidget):
             
         except Exception as e:
             print(f"Error loading data: {str(e)}")
-        finally:
-            db.close()
             
     def update_makes(self, year):
         """Update makes combo box based on selected year"""
@@ -773,16 +744,7 @@ class OpportunityForm(QWidget):
         portions_layout = QVBoxLayout()
         
         portions_checkboxes = {}
-        portions = [
-            "R&I",
-            "Calibration Procedure",
-            "Justification",
-            "Full Document Missing",
-            "Highlighting Issue",
-            "Naming Issue"
-        ]
-        
-        for portion in portions:
+        for portion in AFFECTED_PORTIONS:
             checkbox = QCheckBox(portion)
             checkbox.setStyleSheet(self.checkbox_style)
             # Ensure ampersand is displayed as text, not as a shortcut
@@ -806,13 +768,9 @@ class OpportunityForm(QWidget):
         self.system_rows.append(row_data)
         
         # Load systems into combo
-        db = SessionLocal()
-        try:
-            systems = db.query(AdasSystem).all()
-            if systems:
-                system_combo.addItems([f"{s.code} - {s.name}" for s in systems])
-        finally:
-            db.close()
+        systems = reference_data.adas_systems()
+        if systems:
+            system_combo.addItems([f"{s.code} - {s.name}" for s in systems])
 
     def remove_system_row(self, row_widget):
         """Remove a system row"""
@@ -890,10 +848,15 @@ class OpportunityForm(QWidget):
 
     def remove_attachment(self, row_widget, file_path):
         """Remove an attachment"""
-        index = self.attachments.index(file_path)
-        self.attachments.pop(index)
+        index = next(i for i, attachment in enumerate(self.attachments) if attachment['path'] == file_path)
+        attachment = self.attachments.pop(index)
         self.attachment_labels.pop(index)
         row_widget.deleteLater()
+        
+        # The file was stored when it was attached; drop it unless it is shared content,
+        # including another attachment of this form with the same contents
+        if all(other['storage_path'] != attachment['storage_path'] for other in self.attachments):
+            collect_garbage_async(storage_paths=[attachment['storage_path']])
 
     def submit_opportunity(self):
         if not self.validate_form():
@@ -935,15 +898,20 @@ class OpportunityForm(QWidget):
             
             # Handle file attachments
             for attachment in self.attachments:
+                blob_hash = register_blob(
+                    db,
+                    attachment['hash'],
+                    attachment['storage_path'],
+                    size=attachment['size'],
+                    mime_type=attachment['mime_type'],
+                    source_path=attachment['path']
+                )
                 file_attachment = File(
                     opportunity_id=new_opp.id,
                     uploader_id=self.current_user_id,
+                    blob_hash=blob_hash,
                     name=attachment['name'],
                     original_name=attachment['name'],
-                    storage_path=attachment['storage_path'],
-                    size=attachment['size'],
-                    mime_type=attachment['mime_type'],
-                    hash=attachment['hash'],
                     created_at=datetime.utcnow()
                 )
                 db.add(file_attachment)
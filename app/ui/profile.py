@@ -5,8 +5,10 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtGui import QShowEvent, QCloseEvent
 from app.database.connection import SessionLocal
+from app.database.session_scope import session_scope
 from app.models.models import User, Opportunity
 from app.auth.auth_handler import hash_pin
+from app.services import read_models
 from sqlalchemy import update
 import traceback
 
@@ -371,36 +373,40 @@ class ProfileWidget(QWidget):
             
     def load_statistics(self) -> None:
         """Load and display user statistics"""
-        with SessionLocal() as db:
+        with session_scope(replica=True) as db:
             try:
                 # Get opportunities created by the user
-                created_opps = db.query(Opportunity).filter(
+                created_opps = read_models.ticket_timings(
+                    db,
                     Opportunity.creator_id == self.current_user.id
-                ).all()
+                )
                 print(f"Created opportunities: {len(created_opps)}")
                 
                 # Get opportunities accepted by the user
-                accepted_opps = db.query(Opportunity).filter(
+                accepted_opps = read_models.ticket_timings(
+                    db,
                     Opportunity.acceptor_id == self.current_user.id
-                ).all()
+                )
                 print(f"Accepted opportunities: {len(accepted_opps)}")
                 
                 # Get active opportunities (both created and accepted)
-                active_opps = db.query(Opportunity).filter(
+                active_opps = read_models.ticket_timings(
+                    db,
                     (Opportunity.creator_id == self.current_user.id) | 
                     (Opportunity.acceptor_id == self.current_user.id),
                     Opportunity.status.ilike("new") |
                     Opportunity.status.ilike("in progress") |
                     Opportunity.status.ilike("needs info")
-                ).all()
+                )
                 print(f"Active opportunities: {len(active_opps)}")
                 
                 # Get completed opportunities with case-insensitive comparison
-                completed_opps = db.query(Opportunity).filter(
+                completed_opps = read_models.ticket_timings(
+                    db,
                     (Opportunity.creator_id == self.current_user.id) | 
                     (Opportunity.acceptor_id == self.current_user.id),
                     Opportunity.status.ilike("completed")
-                ).all()
+                )
                 
                 # Debug logging for completed opportunities
                 print(f"Completed opportunities found: {len(completed_opps)}")
@@ -440,9 +446,6 @@ class ProfileWidget(QWidget):
                     if opp.started_at and created_time:
                         response_time = opp.started_at - created_time
                         print(f"Using started_at for ticket {opp.id}")
-                    elif opp.accepted_at and created_time:
-                        response_time = opp.accepted_at - created_time
-                        print(f"Using accepted_at for ticket {opp.id}")
                     elif opp.status.lower() == "completed" and opp.completed_at and created_time:
                         response_time = opp.completed_at - created_time
                         print(f"Using completed_at for ticket {opp.id}")
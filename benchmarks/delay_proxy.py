@@ -0,0 +1,56 @@
+import socket
+import threading
+import time
+
+class DelayProxy:
+    """TCP proxy that adds a fixed delay to every chunk forwarded in either direction.
+
+    Used by the benchmarks to simulate the round-trip cost of a remote database
+    while running against a local Postgres instance.
+    """
+
+    def __init__(self, upstream_host, upstream_port, delay_ms=20):
+        self.upstream = (upstream_host, upstream_port)
+        self.delay = delay_ms / 1000.0
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(32)
+        self.port = self._server.getsockname()[1]
+        self._running = False
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._server.close()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.upstream)
+            for src, dst in ((client, upstream), (upstream, client)):
+                threading.Thread(target=self._pump, args=(src, dst), daemon=True).start()
+
+    def _pump(self, src, dst):
+        try:
+            while True:
+                data = src.recv(65536)
+                if not data:
+                    break
+                time.sleep(self.delay)
+                dst.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (src, dst):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
@@ -0,0 +1,29 @@
+-- Daily reporting rollups, maintained incrementally by app/services/reporting.py
+CREATE TABLE IF NOT EXISTS report_daily_rollups (
+    day DATE NOT NULL,
+    dimension VARCHAR NOT NULL,        -- 'all', 'team', 'make' or 'system'
+    dimension_value VARCHAR NOT NULL,
+    opened INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    response_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    response_count INTEGER NOT NULL DEFAULT 0,
+    work_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    work_count INTEGER NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, dimension, dimension_value)
+);
+
+CREATE INDEX IF NOT EXISTS ix_report_daily_rollups_dimension_day
+    ON report_daily_rollups (dimension, day);
+
+-- High-water mark of the last processed change
+CREATE TABLE IF NOT EXISTS report_rollup_state (
+    name VARCHAR PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE,
+    refreshed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Lets the refresh find changed tickets without scanning the table
+CREATE INDEX IF NOT EXISTS ix_opportunities_updated_at ON opportunities (updated_at);
+CREATE INDEX IF NOT EXISTS ix_opportunities_completed_at ON opportunities (completed_at);
+CREATE INDEX IF NOT EXISTS ix_opportunities_created_at ON opportunities (created_at);
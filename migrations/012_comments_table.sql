@@ -0,0 +1,41 @@
+-- Move comments from the opportunities.comments JSONB array into their own table
+CREATE TABLE IF NOT EXISTS comments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    opportunity_id UUID NOT NULL REFERENCES opportunities(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id),
+    user_name VARCHAR,
+    text TEXT NOT NULL,
+    comment_type VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_comments_opportunity_created
+    ON comments (opportunity_id, created_at, id);
+
+-- Backfill from the JSONB array, keeping its order. Old entries store the time
+-- as 'YYYY-MM-DD HH24:MI' in UTC or not at all; those fall back to the ticket's
+-- timestamps. Tickets that already have rows are skipped, so this can be re-run.
+INSERT INTO comments (id, opportunity_id, user_id, user_name, text, comment_type, created_at)
+SELECT
+    gen_random_uuid(),
+    o.id,
+    (SELECT u.id FROM users u WHERE u.id::text = c.entry->>'user_id'),
+    c.entry->>'user_name',
+    COALESCE(c.entry->>'text', ''),
+    c.entry->>'type',
+    COALESCE(
+        CASE WHEN c.entry->>'timestamp' ~ '^\d{4}-\d{2}-\d{2} \d{2}:\d{2}'
+             THEN to_timestamp(left(c.entry->>'timestamp', 16), 'YYYY-MM-DD HH24:MI')::timestamp AT TIME ZONE 'UTC'
+        END,
+        o.updated_at,
+        o.created_at,
+        CURRENT_TIMESTAMP
+    ) + c.position * INTERVAL '1 microsecond'
+FROM opportunities o
+CROSS JOIN LATERAL jsonb_array_elements(o.comments) WITH ORDINALITY AS c(entry, position)
+WHERE jsonb_typeof(o.comments) = 'array'
+  AND NOT EXISTS (SELECT 1 FROM comments existing WHERE existing.opportunity_id = o.id);
+
+-- opportunities.comments is no longer written. It stays until every client has
+-- been updated and can be dropped in a later migration.
+COMMENT ON COLUMN opportunities.comments IS 'Deprecated: migrated to the comments table (migration 012)';
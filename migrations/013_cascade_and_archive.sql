@@ -0,0 +1,70 @@
+-- Let the database remove a ticket's dependent rows in one pass instead of the
+-- client deleting them table by table, and add soft-delete for tickets
+
+ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS ix_opportunities_archived_at
+    ON opportunities (archived_at) WHERE archived_at IS NOT NULL;
+
+-- Recreate the foreign keys with the wanted ON DELETE action. Existing
+-- constraint names differ between databases created by create_all and by
+-- 001_initial_schema.sql, so they are looked up by column.
+DO $$
+DECLARE
+    spec TEXT[];
+    constraint_name TEXT;
+BEGIN
+    FOREACH spec SLICE 1 IN ARRAY ARRAY[
+        -- table, column, referenced table, action
+        ['notifications',       'opportunity_id',      'opportunities', 'CASCADE'],
+        ['activity_log',        'opportunity_id',      'opportunities', 'CASCADE'],
+        ['files',               'opportunity_id',      'opportunities', 'CASCADE'],
+        ['file_attachments',    'opportunity_id',      'opportunities', 'CASCADE'],
+        ['attachments',         'opportunity_id',      'opportunities', 'CASCADE'],
+        ['opportunity_systems', 'opportunity_id',      'opportunities', 'CASCADE'],
+        ['comments',            'opportunity_id',      'opportunities', 'CASCADE'],
+        ['opportunities',       'acceptor_id',         'users',         'SET NULL'],
+        ['notifications',       'user_id',             'users',         'CASCADE'],
+        ['activity_log',        'user_id',             'users',         'CASCADE'],
+        ['comments',            'user_id',             'users',         'SET NULL'],
+        ['file_attachments',    'uploaded_by_id',      'users',         'SET NULL'],
+        ['vehicles',            'created_by_id',       'users',         'SET NULL'],
+        ['vehicles',            'last_modified_by_id', 'users',         'SET NULL']
+    ]
+    LOOP
+        IF to_regclass(spec[1]) IS NULL THEN
+            CONTINUE;
+        END IF;
+
+        FOR constraint_name IN
+            SELECT c.conname
+            FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+            WHERE c.contype = 'f'
+              AND c.conrelid = to_regclass(spec[1])
+              AND array_length(c.conkey, 1) = 1
+              AND a.attname = spec[2]
+        LOOP
+            EXECUTE 'ALTER TABLE ' || quote_ident(spec[1])
+                 || ' DROP CONSTRAINT ' || quote_ident(constraint_name);
+        END LOOP;
+
+        EXECUTE 'ALTER TABLE ' || quote_ident(spec[1])
+             || ' ADD CONSTRAINT ' || quote_ident(spec[1] || '_' || spec[2] || '_fkey')
+             || ' FOREIGN KEY (' || quote_ident(spec[2]) || ')'
+             || ' REFERENCES ' || quote_ident(spec[3]) || ' (id) ON DELETE ' || spec[4];
+    END LOOP;
+END $$;
+
+-- Cascades and the set-based deletes look children up by these columns
+CREATE INDEX IF NOT EXISTS ix_notifications_opportunity_id ON notifications (opportunity_id);
+CREATE INDEX IF NOT EXISTS ix_notifications_user_id ON notifications (user_id);
+CREATE INDEX IF NOT EXISTS ix_activity_log_opportunity_id ON activity_log (opportunity_id);
+CREATE INDEX IF NOT EXISTS ix_activity_log_user_id ON activity_log (user_id);
+CREATE INDEX IF NOT EXISTS ix_files_opportunity_id ON files (opportunity_id);
+CREATE INDEX IF NOT EXISTS ix_files_storage_path ON files (storage_path);
+CREATE INDEX IF NOT EXISTS ix_file_attachments_opportunity_id ON file_attachments (opportunity_id);
+CREATE INDEX IF NOT EXISTS ix_attachments_opportunity_id ON attachments (opportunity_id);
+CREATE INDEX IF NOT EXISTS ix_opportunity_systems_opportunity_id ON opportunity_systems (opportunity_id);
+CREATE INDEX IF NOT EXISTS ix_opportunities_creator_id ON opportunities (creator_id);
+CREATE INDEX IF NOT EXISTS ix_opportunities_acceptor_id ON opportunities (acceptor_id);
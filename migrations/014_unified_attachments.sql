@@ -0,0 +1,135 @@
+-- One attachment table. files rows point at a content-addressed blob so
+-- identical uploads share one stored copy, and the rows of the older
+-- file_attachments and attachments tables are merged into files.
+
+CREATE TABLE IF NOT EXISTS blobs (
+    hash VARCHAR PRIMARY KEY,
+    storage_path VARCHAR NOT NULL UNIQUE,
+    size INTEGER,
+    mime_type VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE files ADD COLUMN IF NOT EXISTS blob_hash VARCHAR REFERENCES blobs(hash);
+ALTER TABLE files ALTER COLUMN storage_path DROP NOT NULL;
+
+-- Existing files. Rows saved without a hash get a placeholder key derived
+-- from their path; duplicates of the same content keep the oldest copy.
+INSERT INTO blobs (hash, storage_path, size, mime_type, created_at)
+SELECT DISTINCT ON (blob_key) blob_key, storage_path, size, mime_type, created_at
+FROM (
+    SELECT COALESCE(NULLIF(hash, ''), 'legacy-' || md5(storage_path)) AS blob_key,
+           storage_path, size, mime_type, created_at
+    FROM files
+    WHERE blob_hash IS NULL AND storage_path IS NOT NULL
+) legacy
+ORDER BY blob_key, created_at NULLS LAST
+ON CONFLICT DO NOTHING;
+
+UPDATE files f SET blob_hash = b.hash
+FROM blobs b
+WHERE f.blob_hash IS NULL AND f.storage_path IS NOT NULL
+  AND b.hash = COALESCE(NULLIF(f.hash, ''), 'legacy-' || md5(f.storage_path));
+
+-- Paths already claimed by a blob with another key
+UPDATE files f SET blob_hash = b.hash
+FROM blobs b
+WHERE f.blob_hash IS NULL AND b.storage_path = f.storage_path;
+
+-- Older clients read storage_path; point duplicates at the copy that is kept
+UPDATE files f SET storage_path = b.storage_path
+FROM blobs b
+WHERE b.hash = f.blob_hash AND f.storage_path IS DISTINCT FROM b.storage_path;
+
+-- file_attachments and attachments rows become files rows. Neither stored a
+-- content hash, and attachments had no uploader; the ticket creator stands in.
+DO $$
+BEGIN
+    IF to_regclass('file_attachments') IS NOT NULL THEN
+        EXECUTE $q$
+            INSERT INTO blobs (hash, storage_path, size, mime_type, created_at)
+            SELECT DISTINCT ON (file_path) 'legacy-' || md5(file_path), file_path, file_size, file_type, uploaded_at
+            FROM file_attachments
+            WHERE opportunity_id IS NOT NULL
+            ORDER BY file_path, uploaded_at NULLS LAST
+            ON CONFLICT DO NOTHING
+        $q$;
+        EXECUTE $q$
+            INSERT INTO files (id, opportunity_id, uploader_id, blob_hash, name, original_name,
+                               storage_path, size, mime_type, hash, created_at, is_deleted)
+            SELECT fa.id, fa.opportunity_id, COALESCE(fa.uploaded_by_id, o.creator_id), b.hash,
+                   fa.filename, fa.filename, b.storage_path, b.size, b.mime_type, b.hash, fa.uploaded_at, false
+            FROM file_attachments fa
+            JOIN opportunities o ON o.id = fa.opportunity_id
+            JOIN blobs b ON b.storage_path = fa.file_path
+            ON CONFLICT (id) DO NOTHING
+        $q$;
+        COMMENT ON TABLE file_attachments IS 'Deprecated: merged into files (migration 014)';
+    END IF;
+
+    -- Databases created from 001_initial_schema.sql have an integer opportunity_id here
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'attachments' AND column_name = 'opportunity_id' AND data_type = 'uuid'
+    ) THEN
+        EXECUTE $q$
+            INSERT INTO blobs (hash, storage_path, mime_type, created_at)
+            SELECT DISTINCT ON (file_path) 'legacy-' || md5(file_path), file_path, file_type, created_at
+            FROM attachments
+            WHERE opportunity_id IS NOT NULL
+            ORDER BY file_path, created_at NULLS LAST
+            ON CONFLICT DO NOTHING
+        $q$;
+        EXECUTE $q$
+            INSERT INTO files (id, opportunity_id, uploader_id, blob_hash, name, original_name,
+                               storage_path, size, mime_type, hash, created_at, is_deleted)
+            SELECT gen_random_uuid(), a.opportunity_id, o.creator_id, b.hash,
+                   regexp_replace(a.file_path, '^.*[/\\]', ''), regexp_replace(a.file_path, '^.*[/\\]', ''),
+                   b.storage_path, b.size, b.mime_type, b.hash, a.created_at, false
+            FROM attachments a
+            JOIN opportunities o ON o.id = a.opportunity_id
+            JOIN blobs b ON b.storage_path = a.file_path
+            WHERE NOT EXISTS (
+                SELECT 1 FROM files f WHERE f.opportunity_id = a.opportunity_id AND f.blob_hash = b.hash
+            )
+        $q$;
+    END IF;
+
+    IF to_regclass('attachments') IS NOT NULL THEN
+        COMMENT ON TABLE attachments IS 'Deprecated: merged into files (migration 014)';
+    END IF;
+END $$;
+
+ALTER TABLE files ALTER COLUMN blob_hash SET NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_files_blob_hash ON files (blob_hash);
+
+-- Clients from before this migration write storage_path/hash/size/mime_type and
+-- read them back; keep those columns and blob_hash in step until they are gone.
+CREATE OR REPLACE FUNCTION files_sync_blob() RETURNS trigger AS $$
+BEGIN
+    IF NEW.blob_hash IS NULL AND NEW.storage_path IS NOT NULL THEN
+        NEW.blob_hash := COALESCE(NULLIF(NEW.hash, ''), 'legacy-' || md5(NEW.storage_path));
+        INSERT INTO blobs (hash, storage_path, size, mime_type, created_at)
+        VALUES (NEW.blob_hash, NEW.storage_path, NEW.size, NEW.mime_type, COALESCE(NEW.created_at, now()))
+        ON CONFLICT DO NOTHING;
+        SELECT hash INTO NEW.blob_hash FROM blobs
+        WHERE hash = NEW.blob_hash OR storage_path = NEW.storage_path
+        ORDER BY hash = NEW.blob_hash DESC
+        LIMIT 1;
+    ELSIF NEW.storage_path IS NULL THEN
+        SELECT storage_path, size, mime_type INTO NEW.storage_path, NEW.size, NEW.mime_type
+        FROM blobs WHERE hash = NEW.blob_hash;
+        NEW.hash := NEW.blob_hash;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS files_sync_blob ON files;
+CREATE TRIGGER files_sync_blob BEFORE INSERT ON files
+    FOR EACH ROW EXECUTE FUNCTION files_sync_blob();
+
+COMMENT ON COLUMN files.storage_path IS 'Deprecated: read blobs.storage_path through blob_hash (migration 014)';
+COMMENT ON COLUMN files.hash IS 'Deprecated: same as blob_hash (migration 014)';
+COMMENT ON COLUMN files.size IS 'Deprecated: read blobs.size (migration 014)';
+COMMENT ON COLUMN files.mime_type IS 'Deprecated: read blobs.mime_type (migration 014)';
@@ -0,0 +1,72 @@
+-- Full-text search. Each ticket carries a tsvector of its title, vehicle,
+-- ADAS system codes and description; each comment carries one of its text.
+-- Comments keep their own vector so adding one never locks the ticket row.
+--
+-- Weights: A for title, year/make/model and system codes, B for the
+-- description, C for comments. Identifiers use the 'simple' configuration so
+-- ticket numbers and codes are kept verbatim; prose is stemmed as English.
+-- Punctuation is turned into spaces first so 'SI-1234' and 'F-150' index as
+-- separate words, the way the search box and the local cache split them.
+
+ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS search_vector tsvector;
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION search_words(value TEXT) RETURNS TEXT AS $$
+    SELECT regexp_replace(coalesce(value, ''), '[\W_]+', ' ', 'g');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION comment_search_vector(value TEXT) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', search_words(value)), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION opportunity_search_vector(
+    title TEXT, description TEXT, year TEXT, make TEXT, model TEXT, systems JSONB
+) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', search_words(
+               concat_ws(' ', title, year, make, model,
+                         CASE WHEN jsonb_typeof(systems) = 'array'
+                              THEN jsonb_path_query_array(systems, '$[*].system')::text
+                         END))), 'A')
+        || setweight(to_tsvector('english', search_words(description)), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION opportunities_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := opportunity_search_vector(
+        NEW.title, NEW.description, NEW.year, NEW.make, NEW.model, NEW.systems);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION comments_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := comment_search_vector(NEW.text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS opportunities_search_vector ON opportunities;
+CREATE TRIGGER opportunities_search_vector
+    BEFORE INSERT OR UPDATE OF title, description, year, make, model, systems ON opportunities
+    FOR EACH ROW EXECUTE FUNCTION opportunities_search_vector_update();
+
+DROP TRIGGER IF EXISTS comments_search_vector ON comments;
+CREATE TRIGGER comments_search_vector
+    BEFORE INSERT OR UPDATE OF text ON comments
+    FOR EACH ROW EXECUTE FUNCTION comments_search_vector_update();
+
+-- Backfill. Direct assignments leave updated_at alone, so the local caches
+-- do not download every ticket again.
+UPDATE opportunities
+SET search_vector = opportunity_search_vector(title, description, year, make, model, systems)
+WHERE search_vector IS NULL;
+
+UPDATE comments
+SET search_vector = comment_search_vector(text)
+WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_opportunities_search_vector ON opportunities USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS ix_comments_search_vector ON comments USING GIN (search_vector);
+-- Searches rank the newest matches; these let broad searches stop early
+CREATE INDEX IF NOT EXISTS ix_opportunities_created_at ON opportunities (created_at);
+CREATE INDEX IF NOT EXISTS ix_comments_created_at ON comments (created_at);
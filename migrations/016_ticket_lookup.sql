@@ -0,0 +1,5 @@
+-- Direct ticket lookups from notifications and the dashboard.
+-- Tickets are found by ticket number, and their position in the newest-first
+-- lists is counted with keyset conditions on (created_at, id).
+CREATE INDEX IF NOT EXISTS ix_opportunities_title ON opportunities (title);
+CREATE INDEX IF NOT EXISTS ix_opportunities_created_at_id ON opportunities (created_at, id);
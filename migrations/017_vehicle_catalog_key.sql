@@ -0,0 +1,23 @@
+-- One catalog row per (year, make, model), so catalog imports can upsert.
+-- Earlier imports and the yearly copy scripts could add the same vehicle twice.
+-- No table references vehicles by id, so the duplicates are simply removed,
+-- keeping the oldest row of each vehicle.
+DELETE FROM vehicles v
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY year, make, model
+        ORDER BY created_at NULLS LAST, id
+    ) AS copy
+    FROM vehicles
+) ranked
+WHERE v.id = ranked.id AND ranked.copy > 1;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_vehicles_year_make_model'
+    ) THEN
+        ALTER TABLE vehicles
+            ADD CONSTRAINT uq_vehicles_year_make_model UNIQUE (year, make, model);
+    END IF;
+END $$;
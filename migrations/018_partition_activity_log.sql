@@ -0,0 +1,83 @@
+-- activity_log becomes a table range-partitioned by the month of created_at.
+-- It is append-only and read by date (the local cache syncs it by created_at),
+-- so queries on recent entries only touch recent partitions, and retention
+-- detaches whole months (app/scripts/partitions.py) instead of mass DELETEs.
+-- opportunities stays a plain table: five tables reference it by id alone,
+-- which a partitioned table cannot back with a foreign key.
+
+-- Creates the partition of parent for the month holding `month`; false if it exists.
+-- Rows of that month already in the default partition are moved into it.
+CREATE OR REPLACE FUNCTION create_month_partition(parent text, month date) RETURNS boolean AS $$
+DECLARE
+    first_day date := date_trunc('month', month)::date;
+    partition_name text := format('%s_y%sm%s', parent, to_char(first_day, 'YYYY'), to_char(first_day, 'MM'));
+    range_start timestamptz := first_day::timestamp AT TIME ZONE 'UTC';
+    range_end timestamptz := (first_day + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent);
+    IF to_regclass(parent || '_default') IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE created_at >= %L AND created_at < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            parent || '_default', range_start, range_end, partition_name);
+    END IF;
+    -- Attaching builds the partition's copies of the parent's indexes and foreign keys
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   parent, partition_name, range_start, range_end);
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    month date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'activity_log'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- The partition key cannot be NULL; undated entries take their ticket's creation time
+    UPDATE activity_log a
+    SET created_at = COALESCE((SELECT o.created_at FROM opportunities o WHERE o.id = a.opportunity_id), now())
+    WHERE a.created_at IS NULL;
+
+    ALTER TABLE activity_log RENAME TO activity_log_unpartitioned;
+    ALTER INDEX IF EXISTS activity_log_pkey RENAME TO activity_log_unpartitioned_pkey;
+    DROP INDEX IF EXISTS ix_activity_log_opportunity_id;
+    DROP INDEX IF EXISTS ix_activity_log_user_id;
+
+    CREATE TABLE activity_log (LIKE activity_log_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (created_at);
+    ALTER TABLE activity_log ALTER COLUMN created_at SET NOT NULL;
+    ALTER TABLE activity_log ALTER COLUMN created_at SET DEFAULT now();
+    -- Unique constraints on a partitioned table must include the partition key
+    ALTER TABLE activity_log ADD CONSTRAINT activity_log_pkey PRIMARY KEY (id, created_at);
+    ALTER TABLE activity_log
+        ADD CONSTRAINT activity_log_user_id_fkey
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        ADD CONSTRAINT activity_log_opportunity_id_fkey
+            FOREIGN KEY (opportunity_id) REFERENCES opportunities(id) ON DELETE CASCADE;
+    CREATE INDEX ix_activity_log_opportunity_id ON activity_log (opportunity_id);
+    CREATE INDEX ix_activity_log_user_id ON activity_log (user_id);
+    CREATE INDEX ix_activity_log_created_at ON activity_log (created_at);
+
+    -- Catches rows of a month whose partition was not created in time
+    CREATE TABLE activity_log_default PARTITION OF activity_log DEFAULT;
+
+    -- One partition per month with entries, and the coming months
+    FOR month IN
+        SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM activity_log_unpartitioned
+        UNION
+        SELECT generate_series(date_trunc('month', now() AT TIME ZONE 'UTC'),
+                               date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+                               interval '1 month')::date
+    LOOP
+        PERFORM create_month_partition('activity_log', month);
+    END LOOP;
+
+    INSERT INTO activity_log SELECT * FROM activity_log_unpartitioned;
+    DROP TABLE activity_log_unpartitioned;
+END $$;
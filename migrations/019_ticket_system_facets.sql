@@ -0,0 +1,127 @@
+-- ADAS system facets. opportunity_systems gets one row per ticket and
+-- catalog system named in opportunities.systems, with that system's affected
+-- portions, so "tickets involving ACC 2" reads an index instead of parsing
+-- the JSON of every ticket. A trigger keeps the rows in step with the JSON on
+-- every write, including restores and scripts. Codes missing from
+-- adas_systems have no rows; those are found through a GIN index on the JSON.
+
+-- The rows are derived from the JSON, so they are rebuilt below
+DELETE FROM opportunity_systems;
+
+-- One catalog row per code, so a ticket's codes resolve to a single system.
+-- populate_systems.py upserts on it.
+DELETE FROM adas_systems a
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY code
+        ORDER BY created_at NULLS LAST, id
+    ) AS copy
+    FROM adas_systems
+) ranked
+WHERE a.id = ranked.id AND ranked.copy > 1;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_adas_systems_code'
+    ) THEN
+        ALTER TABLE adas_systems ADD CONSTRAINT uq_adas_systems_code UNIQUE (code);
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_opportunity_systems_ticket_system'
+    ) THEN
+        ALTER TABLE opportunity_systems
+            ADD CONSTRAINT uq_opportunity_systems_ticket_system UNIQUE (opportunity_id, system_id);
+    END IF;
+END $$;
+
+ALTER TABLE opportunity_systems ADD COLUMN IF NOT EXISTS affected_portions TEXT[] NOT NULL DEFAULT '{}';
+ALTER TABLE opportunity_systems ALTER COLUMN opportunity_id SET NOT NULL;
+ALTER TABLE opportunity_systems ALTER COLUMN system_id SET NOT NULL;
+
+-- Removing a catalog system takes its derived rows with it
+ALTER TABLE opportunity_systems DROP CONSTRAINT IF EXISTS opportunity_systems_system_id_fkey;
+ALTER TABLE opportunity_systems
+    ADD CONSTRAINT opportunity_systems_system_id_fkey
+    FOREIGN KEY (system_id) REFERENCES adas_systems(id) ON DELETE CASCADE;
+
+-- The unique constraint leads with opportunity_id and serves the cascade now
+DROP INDEX IF EXISTS ix_opportunity_systems_opportunity_id;
+CREATE INDEX IF NOT EXISTS ix_opportunity_systems_system ON opportunity_systems (system_id, opportunity_id);
+-- Containment (systems @> '[{"system": "X", "affected_portions": ["R&I"]}]') for
+-- portion filters and codes outside the catalog
+CREATE INDEX IF NOT EXISTS ix_opportunities_systems ON opportunities USING GIN (systems jsonb_path_ops);
+
+-- (code, portions) per system in a ticket's JSON. Entries without a code are
+-- skipped, a code listed twice has its portions merged, and malformed values
+-- (not a list) count as no systems.
+CREATE OR REPLACE FUNCTION opportunity_system_entries(systems JSONB)
+RETURNS TABLE (code TEXT, affected_portions TEXT[]) AS $$
+    SELECT e.entry->>'system',
+           coalesce(array_agg(DISTINCT p.portion ORDER BY p.portion)
+                    FILTER (WHERE p.portion IS NOT NULL), '{}')
+    FROM jsonb_array_elements(
+             CASE WHEN jsonb_typeof(systems) = 'array' THEN systems ELSE '[]' END
+         ) AS e(entry)
+    LEFT JOIN LATERAL jsonb_array_elements_text(
+             CASE WHEN jsonb_typeof(e.entry->'affected_portions') = 'array'
+                  THEN e.entry->'affected_portions' ELSE '[]' END
+         ) AS p(portion) ON true
+    WHERE e.entry->>'system' IS NOT NULL
+    GROUP BY e.entry->>'system';
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Statement-level, so a restore or bulk update resyncs its tickets in one
+-- pass; inserted tickets have no rows yet, and deletes cascade.
+CREATE OR REPLACE FUNCTION opportunities_systems_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM opportunity_systems WHERE opportunity_id IN (
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.systems IS DISTINCT FROM o.systems
+        );
+        INSERT INTO opportunity_systems (id, opportunity_id, system_id, affected_portions)
+        SELECT gen_random_uuid(), n.id, s.id, e.affected_portions
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        CROSS JOIN LATERAL opportunity_system_entries(n.systems) e
+        JOIN adas_systems s ON s.code = e.code
+        WHERE n.systems IS DISTINCT FROM o.systems;
+    ELSE
+        INSERT INTO opportunity_systems (id, opportunity_id, system_id, affected_portions)
+        SELECT gen_random_uuid(), n.id, s.id, e.affected_portions
+        FROM new_rows n
+        CROSS JOIN LATERAL opportunity_system_entries(n.systems) e
+        JOIN adas_systems s ON s.code = e.code;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS opportunities_systems_insert ON opportunities;
+CREATE TRIGGER opportunities_systems_insert
+    AFTER INSERT ON opportunities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opportunities_systems_sync();
+
+DROP TRIGGER IF EXISTS opportunities_systems_update ON opportunities;
+CREATE TRIGGER opportunities_systems_update
+    AFTER UPDATE ON opportunities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opportunities_systems_sync();
+
+-- Rebuilds every ticket's rows; run after the catalog gains or renames a
+-- code, which the trigger does not see. Returns the number of rows.
+CREATE OR REPLACE FUNCTION rebuild_opportunity_systems() RETURNS BIGINT AS $$
+    DELETE FROM opportunity_systems;
+    INSERT INTO opportunity_systems (id, opportunity_id, system_id, affected_portions)
+    SELECT gen_random_uuid(), o.id, s.id, e.affected_portions
+    FROM opportunities o
+    CROSS JOIN LATERAL opportunity_system_entries(o.systems) e
+    JOIN adas_systems s ON s.code = e.code;
+    SELECT COUNT(*) FROM opportunity_systems;
+$$ LANGUAGE sql;
+
+SELECT rebuild_opportunity_systems();
+
+ANALYZE opportunity_systems;
@@ -0,0 +1,47 @@
+-- Days whose rollups a ticket change affected, consumed by the next refresh.
+-- The refresh finds new and updated tickets by their timestamps, but cannot
+-- see a deleted ticket or the day a ticket used to count towards, e.g. when
+-- completed_at moves to another day. These triggers record those days.
+CREATE TABLE IF NOT EXISTS report_changed_days (
+    day DATE NOT NULL,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Statement-level, so a bulk delete or update records its days in one insert
+CREATE OR REPLACE FUNCTION opportunities_rollup_days() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO report_changed_days (day)
+        SELECT DISTINCT (t.at AT TIME ZONE 'UTC')::date
+        FROM old_rows o
+        CROSS JOIN LATERAL (VALUES (o.created_at), (o.completed_at)) AS t(at)
+        WHERE t.at IS NOT NULL;
+    ELSE
+        -- Both the old and the new days, for the columns the rollups read
+        INSERT INTO report_changed_days (day)
+        SELECT DISTINCT (t.at AT TIME ZONE 'UTC')::date
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES (o.created_at), (o.completed_at), (n.created_at), (n.completed_at)) AS t(at)
+        WHERE t.at IS NOT NULL
+          AND (o.created_at, o.completed_at, o.status, o.make, o.systems, o.response_time,
+               o.work_time, o.creator_id, o.acceptor_id)
+              IS DISTINCT FROM
+              (n.created_at, n.completed_at, n.status, n.make, n.systems, n.response_time,
+               n.work_time, n.creator_id, n.acceptor_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS opportunities_rollup_days_delete ON opportunities;
+CREATE TRIGGER opportunities_rollup_days_delete
+    AFTER DELETE ON opportunities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opportunities_rollup_days();
+
+DROP TRIGGER IF EXISTS opportunities_rollup_days_update ON opportunities;
+CREATE TRIGGER opportunities_rollup_days_update
+    AFTER UPDATE ON opportunities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opportunities_rollup_days();
@@ -0,0 +1,41 @@
+-- Tombstones of rows deleted from the backed-up tables. Backups only carry
+-- rows that exist, so without these a restore would bring deleted tickets,
+-- comments and users back. Recorded by triggers, so bulk deletes, cascades
+-- and scripts are covered; kept for as long as a backup chain may need them.
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    table_name VARCHAR NOT NULL,
+    row_id UUID NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, row_id)
+);
+
+-- Lets an incremental backup find the tombstones since its parent
+CREATE INDEX IF NOT EXISTS ix_deleted_rows_deleted_at ON deleted_rows (deleted_at);
+
+-- Statement-level, so a bulk or cascading delete records its rows in one insert
+CREATE OR REPLACE FUNCTION record_deleted_rows() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id)
+    SELECT TG_TABLE_NAME, id FROM old_rows
+    ON CONFLICT (table_name, row_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_deleted_rows ON users;
+CREATE TRIGGER users_deleted_rows
+    AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_deleted_rows();
+
+DROP TRIGGER IF EXISTS opportunities_deleted_rows ON opportunities;
+CREATE TRIGGER opportunities_deleted_rows
+    AFTER DELETE ON opportunities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_deleted_rows();
+
+DROP TRIGGER IF EXISTS comments_deleted_rows ON comments;
+CREATE TRIGGER comments_deleted_rows
+    AFTER DELETE ON comments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_deleted_rows();
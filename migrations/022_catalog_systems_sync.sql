@@ -0,0 +1,49 @@
+-- Keep opportunity_systems in step with the catalog. Tickets can name a code
+-- before it is added to adas_systems; adding the code, or renaming a system
+-- to it, gives those tickets their rows, and a renamed system loses the rows
+-- of its old code. The tickets are found through the GIN index on the JSON.
+
+-- Statement-level, so populate_systems.py's upsert resyncs in one pass
+CREATE OR REPLACE FUNCTION adas_systems_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM opportunity_systems WHERE system_id IN (
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.code IS DISTINCT FROM o.code
+        );
+        INSERT INTO opportunity_systems (id, opportunity_id, system_id, affected_portions)
+        SELECT gen_random_uuid(), t.id, n.id, e.affected_portions
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN opportunities t ON t.systems @> jsonb_build_array(jsonb_build_object('system', n.code))
+        CROSS JOIN LATERAL opportunity_system_entries(t.systems) e
+        WHERE e.code = n.code AND n.code IS DISTINCT FROM o.code;
+    ELSE
+        INSERT INTO opportunity_systems (id, opportunity_id, system_id, affected_portions)
+        SELECT gen_random_uuid(), t.id, n.id, e.affected_portions
+        FROM new_rows n
+        JOIN opportunities t ON t.systems @> jsonb_build_array(jsonb_build_object('system', n.code))
+        CROSS JOIN LATERAL opportunity_system_entries(t.systems) e
+        WHERE e.code = n.code;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS adas_systems_sync_insert ON adas_systems;
+CREATE TRIGGER adas_systems_sync_insert
+    AFTER INSERT ON adas_systems
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION adas_systems_sync();
+
+DROP TRIGGER IF EXISTS adas_systems_sync_update ON adas_systems;
+CREATE TRIGGER adas_systems_sync_update
+    AFTER UPDATE ON adas_systems
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION adas_systems_sync();
+
+-- With these triggers, migration 019's note that rebuild_opportunity_systems()
+-- must run after the catalog gains or renames a code no longer holds; it is
+-- only needed to repair the rows, e.g. after triggers were disabled.
+COMMENT ON FUNCTION rebuild_opportunity_systems() IS
+    'Rebuilds opportunity_systems from every ticket''s JSON. The triggers on opportunities and adas_systems keep it current; use this to repair it.';
@@ -0,0 +1,70 @@
+-- Clients from before migration 012 still append comments to the
+-- opportunities.comments JSONB array. Copy entries that have no comments row
+-- yet, now and on every write of the array, until those clients are gone and
+-- the column is dropped. An entry matches a row of the same ticket, user and
+-- text within the minute of its timestamp; entries without a timestamp only
+-- predate the migration and match on ticket, user and text.
+
+-- Copies the missing entries of the given tickets; returns the number of rows added
+CREATE OR REPLACE FUNCTION copy_legacy_comments(ticket_ids UUID[]) RETURNS BIGINT AS $$
+    WITH entries AS (
+        SELECT
+            o.id AS opportunity_id,
+            (SELECT u.id FROM users u WHERE u.id::text = c.entry->>'user_id') AS user_id,
+            c.entry->>'user_name' AS user_name,
+            COALESCE(c.entry->>'text', '') AS text,
+            c.entry->>'type' AS comment_type,
+            CASE WHEN c.entry->>'timestamp' ~ '^\d{4}-\d{2}-\d{2} \d{2}:\d{2}'
+                 THEN to_timestamp(left(c.entry->>'timestamp', 16), 'YYYY-MM-DD HH24:MI')::timestamp AT TIME ZONE 'UTC'
+            END AS stamped_at,
+            COALESCE(o.updated_at, o.created_at, CURRENT_TIMESTAMP) AS fallback_at,
+            c.position
+        FROM opportunities o
+        CROSS JOIN LATERAL jsonb_array_elements(o.comments) WITH ORDINALITY AS c(entry, position)
+        WHERE o.id = ANY(ticket_ids) AND jsonb_typeof(o.comments) = 'array'
+    ), inserted AS (
+        -- Same created_at as the migration 012 backfill, so the order is kept
+        INSERT INTO comments (id, opportunity_id, user_id, user_name, text, comment_type, created_at)
+        SELECT gen_random_uuid(), e.opportunity_id, e.user_id, e.user_name, e.text, e.comment_type,
+               COALESCE(e.stamped_at, e.fallback_at) + e.position * INTERVAL '1 microsecond'
+        FROM entries e
+        WHERE NOT EXISTS (
+            SELECT 1 FROM comments existing
+            WHERE existing.opportunity_id = e.opportunity_id
+              AND existing.user_id IS NOT DISTINCT FROM e.user_id
+              AND existing.text = e.text
+              AND (e.stamped_at IS NULL OR date_trunc('minute', existing.created_at) = e.stamped_at)
+        )
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM inserted;
+$$ LANGUAGE sql;
+
+-- Statement-level, like the other opportunities triggers
+CREATE OR REPLACE FUNCTION opportunities_legacy_comments() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        PERFORM copy_legacy_comments(ARRAY(
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.comments IS DISTINCT FROM o.comments
+        ));
+    ELSE
+        PERFORM copy_legacy_comments(ARRAY(
+            SELECT n.id FROM new_rows n WHERE jsonb_typeof(n.comments) = 'array'
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS opportunities_legacy_comments_insert ON opportunities;
+CREATE TRIGGER opportunities_legacy_comments_insert
+    AFTER INSERT ON opportunities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opportunities_legacy_comments();
+
+DROP TRIGGER IF EXISTS opportunities_legacy_comments_update ON opportunities;
+CREATE TRIGGER opportunities_legacy_comments_update
+    AFTER UPDATE ON opportunities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opportunities_legacy_comments();
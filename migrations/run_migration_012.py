@@ -0,0 +1,37 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 012: Move comments into their own table...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '012_comments_table.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the backfill
+        legacy_count = db.execute(text("""
+            SELECT COALESCE(SUM(jsonb_array_length(comments)), 0)
+            FROM opportunities WHERE jsonb_typeof(comments) = 'array'
+        """)).scalar()
+        migrated_count = db.execute(text("SELECT COUNT(*) FROM comments")).scalar()
+        print(f"✓ Comments in JSONB: {legacy_count}, rows in comments table: {migrated_count}")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 013: Cascading deletes and ticket archiving...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '013_cascade_and_archive.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the constraints
+        actions = db.execute(text("""
+            SELECT conrelid::regclass::text, conname, confdeltype
+            FROM pg_constraint
+            WHERE contype = 'f' AND confdeltype IN ('c', 'n')
+            ORDER BY 1, 2
+        """)).all()
+        for table_name, constraint_name, action in actions:
+            print(f"✓ {table_name}.{constraint_name}: ON DELETE {'CASCADE' if action == 'c' else 'SET NULL'}")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 014: Merge attachment tables into files and blobs...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '014_unified_attachments.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the merge
+        files_count, blob_count, shared_count = db.execute(text("""
+            SELECT
+                (SELECT COUNT(*) FROM files),
+                (SELECT COUNT(*) FROM blobs),
+                (SELECT COUNT(*) FROM (SELECT blob_hash FROM files GROUP BY blob_hash HAVING COUNT(*) > 1) shared)
+        """)).one()
+        print(f"✓ {files_count} files stored as {blob_count} blobs, {shared_count} shared by several files")
+        print("  Run app/scripts/storage_maintenance.py --delete-orphans to remove the duplicate copies left on disk")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
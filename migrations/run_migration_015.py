@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 015: Add full-text search over tickets and comments...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '015_ticket_search.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the backfill
+        indexed, total, comments_indexed = db.execute(text("""
+            SELECT
+                (SELECT COUNT(search_vector) FROM opportunities),
+                (SELECT COUNT(*) FROM opportunities),
+                (SELECT COUNT(search_vector) FROM comments)
+        """)).one()
+        print(f"✓ {indexed} of {total} tickets and {comments_indexed} comments indexed for search")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 016: Add indexes for direct ticket lookups...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '016_ticket_lookup.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the indexes
+        indexes = db.execute(text("""
+            SELECT indexname FROM pg_indexes
+            WHERE tablename = 'opportunities'
+              AND indexname IN ('ix_opportunities_title', 'ix_opportunities_created_at_id')
+            ORDER BY indexname
+        """)).scalars().all()
+        for index in indexes:
+            print(f"✓ {index} present")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
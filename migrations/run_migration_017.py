@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 017: Make (year, make, model) unique in the vehicle catalog...")
+    
+    db = get_db_with_retry()
+    try:
+        before = db.execute(text("SELECT COUNT(*) FROM vehicles")).scalar()
+        
+        sql_file = os.path.join(os.path.dirname(__file__), '017_vehicle_catalog_key.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the constraint and the duplicates removed
+        after = db.execute(text("SELECT COUNT(*) FROM vehicles")).scalar()
+        constraint = db.execute(text("""
+            SELECT conname FROM pg_constraint WHERE conname = 'uq_vehicles_year_make_model'
+        """)).scalar()
+        print(f"✓ {constraint} present, {before - after} duplicate vehicle(s) removed, {after} remain")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
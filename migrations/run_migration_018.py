@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 018: Partition activity_log by month...")
+    
+    db = get_db_with_retry()
+    try:
+        before = db.execute(text("SELECT COUNT(*) FROM activity_log")).scalar()
+        
+        sql_file = os.path.join(os.path.dirname(__file__), '018_partition_activity_log.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+        
+        # Verify the rows were carried over and list the partitions
+        after = db.execute(text("SELECT COUNT(*) FROM activity_log")).scalar()
+        partitions = db.execute(text("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'activity_log'::regclass ORDER BY c.relname
+        """)).scalars().all()
+        print(f"✓ {after} of {before} activity entries in {len(partitions)} partition(s): {', '.join(partitions)}")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
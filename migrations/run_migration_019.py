@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 019: Maintain opportunity_systems for ADAS system filters...")
+
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '019_ticket_system_facets.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Migration completed successfully")
+
+        # Verify the backfill and the codes that are not in the catalog
+        rows, tickets = db.execute(text(
+            "SELECT COUNT(*), COUNT(DISTINCT opportunity_id) FROM opportunity_systems"
+        )).one()
+        print(f"✓ {rows} ticket system(s) backfilled for {tickets} ticket(s)")
+        unknown = db.execute(text("""
+            SELECT DISTINCT e.code FROM opportunities o
+            CROSS JOIN LATERAL opportunity_system_entries(o.systems) e
+            WHERE NOT EXISTS (SELECT 1 FROM adas_systems s WHERE s.code = e.code)
+            ORDER BY e.code
+        """)).scalars().all()
+        if unknown:
+            print(f"  Codes not in adas_systems, filtered through the JSON index: {', '.join(unknown)}")
+
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+from app.services.reporting import refresh_rollups
+
+def run_migration():
+    print("Running migration 020: Record the rollup days of deleted and moved tickets...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '020_rollup_changed_days.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Changed-day triggers created")
+        
+        # Deletes and moves before this migration went unrecorded; start from a clean history
+        days = refresh_rollups(db, rebuild=True)
+        db.commit()
+        print(f"✓ Rebuilt rollups for {days} days")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
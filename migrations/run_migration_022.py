@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+from app.services import ticket_systems
+
+def run_migration():
+    print("Running migration 022: Resync ticket systems when the catalog changes...")
+
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '022_catalog_systems_sync.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Catalog triggers created")
+
+        # Codes added to the catalog before this migration went unsynced
+        rows = ticket_systems.rebuild(db)
+        db.commit()
+        print(f"✓ {rows} ticket system row(s) in step with the catalog")
+
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
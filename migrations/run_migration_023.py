@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from app.database.connection import get_db_with_retry
+
+def run_migration():
+    print("Running migration 023: Keep copying comments written by old clients...")
+    
+    db = get_db_with_retry()
+    try:
+        sql_file = os.path.join(os.path.dirname(__file__), '023_legacy_comment_sync.sql')
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+        
+        db.execute(text(sql_content))
+        db.commit()
+        print("✓ Legacy comment triggers created")
+        
+        # Comments old clients appended since migration 012
+        copied = db.execute(text("""
+            SELECT copy_legacy_comments(ARRAY(
+                SELECT id FROM opportunities WHERE jsonb_typeof(comments) = 'array'
+            ))
+        """)).scalar()
+        db.commit()
+        print(f"✓ Copied {copied} comment(s) missing from the comments table")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
@@ -1,77 +1,13 @@
-from app.models import SessionLocal, Opportunity, Vehicle
+from app.services.batch_jobs import BatchRunner
+from app.services.repair_jobs import SmartFixVehicles
 
 def preview_fix_vehicles():
     """Preview what vehicles would be used for fixing - NO CHANGES MADE"""
-    db = SessionLocal()
-    try:
-        # Get all opportunities
-        opportunities = db.query(Opportunity).all()
-        
-        # Separate good and broken opportunities
-        good_opps = [opp for opp in opportunities if all([opp.year, opp.make, opp.model])]
-        broken_opps = [opp for opp in opportunities if not all([opp.year, opp.make, opp.model])]
-        
-        print("=== PREVIEW MODE - NO CHANGES WILL BE MADE ===")
-        print(f"Found {len(good_opps)} opportunities with good vehicle data")
-        print(f"Found {len(broken_opps)} opportunities needing fixes")
-        
-        # Extract vehicle data from good opportunities (REAL DATA)
-        good_vehicles = []
-        for opp in good_opps:
-            good_vehicles.append({
-                'year': opp.year,
-                'make': opp.make,
-                'model': opp.model,
-                'source': 'EXISTING_TICKET'
-            })
-        
-        print("\n=== EXISTING GOOD VEHICLE DATA (from real tickets) ===")
-        for i, vehicle in enumerate(good_vehicles):
-            print(f"  {i+1}. {vehicle['year']} {vehicle['make']} {vehicle['model']} [Source: Real ticket data]")
-        
-        # Get additional vehicles from database (REAL VEHICLES FROM DATABASE)
-        popular_vehicles = db.query(Vehicle).filter(
-            Vehicle.year.in_(['2024', '2025', '2023'])
-        ).limit(20).all()
-        
-        additional_vehicles = []
-        for vehicle in popular_vehicles:
-            additional_vehicles.append({
-                'year': vehicle.year,
-                'make': vehicle.make,
-                'model': vehicle.model,
-                'source': 'DATABASE'
-            })
-        
-        print(f"\n=== ADDITIONAL VEHICLES FROM DATABASE ===")
-        for i, vehicle in enumerate(additional_vehicles):
-            print(f"  {i+1}. {vehicle['year']} {vehicle['make']} {vehicle['model']} [Source: Vehicle database]")
-        
-        # Combine all options
-        all_vehicle_options = good_vehicles + additional_vehicles
-        
-        print(f"\n=== SUMMARY ===")
-        print(f"Total vehicle options available: {len(all_vehicle_options)}")
-        print(f"- From existing tickets: {len(good_vehicles)}")
-        print(f"- From vehicle database: {len(additional_vehicles)}")
-        print(f"Opportunities that need fixing: {len(broken_opps)}")
-        
-        print(f"\n=== WHAT WOULD HAPPEN ===")
-        print("Each broken opportunity would be randomly assigned one of these vehicles.")
-        print("This ensures:")
-        print("1. All vehicle data is REAL (either from existing tickets or your vehicle database)")
-        print("2. The assignments are realistic and varied")
-        print("3. No fake or made-up vehicle data is used")
-        
-        print(f"\nThe script would update {len(broken_opps)} opportunities with realistic vehicle assignments.")
-        print("NO CHANGES HAVE BEEN MADE - this is just a preview.")
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        db.close()
+    print("=== PREVIEW MODE - NO CHANGES WILL BE MADE ===")
+    print("Each broken opportunity is assigned a vehicle from existing tickets or the vehicle database.")
+    counts = BatchRunner(SmartFixVehicles(), dry_run=True, diff_limit=100).run()
+    print(f"\nThe script would update {counts['changed']} opportunities with realistic vehicle assignments.")
+    print("NO CHANGES HAVE BEEN MADE - this is just a preview.")
 
 if __name__ == "__main__":
-    preview_fix_vehicles() 
\ No newline at end of file
+    preview_fix_vehicles() 
@@ -0,0 +1,164 @@
+import os
+import threading
+import uuid
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+from app.database import session_scope as scopes
+from app.database.connection import Base
+from app.models.models import User, ActivityLog
+from app.services import audit_log
+from app.services.audit_log import AuditWriter
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def test_unreachable_database_spills_to_disk(tmp_path, monkeypatch):
+    print("Testing audit spill...")
+    monkeypatch.setattr(audit_log, 'WRITE_ATTEMPTS', 1)
+    engine = create_engine("postgresql://postgres@127.0.0.1:1/none")
+    writer = AuditWriter(engine, spill_path=str(tmp_path / "spill.ndjson"), max_queue=1)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    audit_log.record(db, uuid.uuid4(), "first", {"n": 1})
+    audit_log.record(db, uuid.uuid4(), "second", {"n": 2})
+    # One fits in the queue and fails to write, the other overflows straight to disk
+    writer.submit(db.info.pop(audit_log.PENDING_KEY))
+    assert writer.flush()
+    writer.close()
+    with open(tmp_path / "spill.ndjson") as f:
+        assert sorted(audit_log._decode(line)['action'] for line in f) == ["first", "second"]
+
+def test_journal_survives_a_crash(tmp_path):
+    print("Testing audit journal...")
+    engine = create_engine("postgresql://postgres@127.0.0.1:1/none")
+    spill_path = str(tmp_path / "spill.ndjson")
+    writer = AuditWriter(engine, spill_path=spill_path)
+    # The write never finishes, as if the process died during it
+    crashed = threading.Event()
+    writer._write = lambda entries: crashed.wait(10)
+    db = sessionmaker(bind=engine)()
+    audit_log.record(db, uuid.uuid4(), "journaled")
+    writer.submit(db.info.pop(audit_log.PENDING_KEY))
+    with open(writer.journal_path, 'a') as f:
+        f.write('{"cut short')
+
+    # The next start moves the journal to the spill file for replay
+    restarted = AuditWriter(engine, spill_path=spill_path)
+    assert not os.path.exists(restarted.journal_path)
+    with open(spill_path) as f:
+        assert [audit_log._decode(line)['action'] for line in f] == ["journaled"]
+    crashed.set()
+    writer.close()
+    restarted.close(timeout=0)
+
+def test_journal_is_cleared_after_a_failed_batch(tmp_path):
+    print("Testing audit journal after errors...")
+    engine = create_engine("postgresql://postgres@127.0.0.1:1/none")
+    writer = AuditWriter(engine, spill_path=str(tmp_path / "spill.ndjson"))
+
+    def fail(entries):
+        raise RuntimeError("unexpected")
+
+    def submit(action):
+        db = sessionmaker(bind=engine)()
+        audit_log.record(db, uuid.uuid4(), action)
+        writer.submit(db.info.pop(audit_log.PENDING_KEY))
+        assert writer.flush()
+
+    # The failed batch is spilled, so the journal is not needed for it
+    writer._write = fail
+    submit("failed")
+    assert not os.path.exists(writer.journal_path)
+    with open(tmp_path / "spill.ndjson") as f:
+        assert [audit_log._decode(line)['action'] for line in f] == ["failed"]
+
+    writer._write = lambda entries: True
+    submit("written")
+    assert not os.path.exists(writer.journal_path)
+    writer.close()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_entries_follow_the_transaction(tmp_path):
+    print("Testing audit writer...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    marker = f"audit{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        user = User(username=f"user_{marker}", email="a@example.com", pin="x", first_name="Ada",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    def actions():
+        with Session() as db:
+            return sorted(db.execute(select(ActivityLog.action).where(ActivityLog.user_id == user_id)).scalars())
+
+    writer = audit_log.audit_writer(engine)
+    try:
+        with Session() as db:
+            audit_log.record(db, user_id, "kept", {"n": 1})
+            db.commit()
+            audit_log.record(db, user_id, "rolled_back")
+            db.rollback()
+        assert writer.flush()
+        assert actions() == ["kept"]
+        assert not os.path.exists(writer.journal_path)
+
+        # Spilled entries are replayed, the ones already written only once
+        spill = AuditWriter(engine, spill_path=str(tmp_path / "spill.ndjson"))
+        db = Session()
+        audit_log.record(db, user_id, "spilled")
+        audit_log.record(db, uuid.uuid4(), "unknown_user")
+        entries = db.info.pop(audit_log.PENDING_KEY)
+        db.close()
+        spill._spill(entries + entries[:1])
+        assert spill.replay_spill() == 3
+        spill.close()
+        assert actions() == ["kept", "spilled"]
+        assert not os.path.exists(tmp_path / "spill.ndjson")
+        # The entry for a user that does not exist is set aside, not retried forever
+        with open(tmp_path / "spill.ndjson.rejected") as f:
+            assert [audit_log._decode(line)['action'] for line in f] == ["unknown_user"]
+    finally:
+        with Session() as db:
+            db.query(ActivityLog).filter(ActivityLog.user_id == user_id).delete()
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_failed_nested_scope_keeps_the_actions_entries(monkeypatch):
+    print("Testing audit entries across savepoints...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(scopes, 'engine', engine)
+    Session = sessionmaker(bind=engine)
+    marker = f"audit{uuid.uuid4().hex[:8]}"
+    user_id = str(uuid.uuid4())
+    with Session() as db:
+        db.add(User(id=user_id, username=f"user_{marker}", email="a@example.com", pin="x", first_name="Ada",
+                    last_name=marker, team="QA", department="QA", role="user"))
+        db.commit()
+
+    try:
+        # As in update_status(): the action logs its change, then a nested step fails
+        with scopes.session_scope() as db:
+            audit_log.record(db, user_id, "status_changed")
+            with pytest.raises(Exception):
+                with scopes.session_scope() as nested:
+                    audit_log.record(nested, user_id, "undone")
+                    nested.execute(text("SELECT no_such_column FROM users"))
+            audit_log.record(db, user_id, "after_the_failure")
+        assert audit_log.audit_writer(engine).flush()
+        with Session() as db:
+            logged = sorted(db.execute(select(ActivityLog.action).where(ActivityLog.user_id == user_id)).scalars())
+        assert logged == ["after_the_failure", "status_changed"]
+    finally:
+        with Session() as db:
+            db.query(ActivityLog).filter(ActivityLog.user_id == user_id).delete()
+            db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
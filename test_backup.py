@@ -0,0 +1,147 @@
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity, Comment
+from app.services.backup import _CopyLines, backup_chain, create_backup, restore_backup
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+TOMBSTONES_MIGRATION = os.path.join(os.path.dirname(__file__), 'migrations', '021_backup_tombstones.sql')
+
+def test_copy_lines_escapes_backslashes():
+    print("Testing COPY stream...")
+    stream = _CopyLines(['{"a": "C:\\\\x"}\n', '{"b": 1}\n'], 3)
+    assert stream.read(5) + stream.read() == '3\t{"a": "C:\\\\\\\\x"}\n3\t{"b": 1}\n'
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_incremental_backup_and_restore(tmp_path):
+    print("Testing backup and restore...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    marker = f"backup{uuid.uuid4().hex[:8]}"
+    # Older than the overlap, so the incremental backup leaves it out
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    with Session() as db:
+        user = User(username=f"backup_{marker}", email="b@example.com", pin="x", first_name="Backup",
+                    last_name="User", team="QA", department="QA", role="user", created_at=old)
+        db.add(user)
+        db.flush()
+        ticket = Opportunity(title=f"{marker}-1", status="new", creator_id=user.id, description="Tab\there \\ quote\"",
+                             systems=[{"system": "ACC"}], response_time=timedelta(hours=2), created_at=old,
+                             updated_at=old)
+        other = Opportunity(title=f"{marker}-2", status="new", creator_id=user.id, created_at=old, updated_at=old)
+        db.add_all([ticket, other])
+        db.flush()
+        db.add(Comment(opportunity_id=ticket.id, user_id=user.id, text="First", created_at=old))
+        db.commit()
+
+    def backed_up_ids(manifest, table):
+        path = tmp_path / manifest['id'] / manifest['tables'][table]['file']
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return {json.loads(line)['id'] for line in f}
+
+    try:
+        full = create_backup(full=True, compression='gzip', backup_dir=str(tmp_path), bind=engine)
+        assert full['parent'] is None
+
+        with Session() as db:
+            db.get(Opportunity, ticket.id).status = "completed"
+            db.get(Opportunity, ticket.id).updated_at = datetime.now(timezone.utc)
+            db.add(Comment(opportunity_id=ticket.id, user_id=user.id, text="Second",
+                           created_at=datetime.now(timezone.utc)))
+            db.commit()
+        incremental = create_backup(compression='gzip', backup_dir=str(tmp_path), bind=engine)
+        assert incremental['parent'] == full['id']
+        # Only what changed since the full backup
+        assert backed_up_ids(incremental, 'opportunities') & {str(ticket.id), str(other.id)} == {str(ticket.id)}
+        assert str(user.id) not in backed_up_ids(incremental, 'users')
+        assert [m['id'] for m in backup_chain(backup_dir=str(tmp_path))] == [full['id'], incremental['id']]
+
+        # Lose the tickets and break the user, then restore
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).delete(synchronize_session=False)
+            db.get(User, user.id).first_name = "Changed"
+            db.commit()
+        counts = restore_backup(backup_dir=str(tmp_path), bind=engine)
+        assert counts['opportunities'] >= 2
+        # Rows that still match the backup are not rewritten
+        assert restore_backup(backup_dir=str(tmp_path), bind=engine)['opportunities'] == 0
+
+        with Session() as db:
+            restored = db.get(Opportunity, ticket.id)
+            assert restored.status == "completed"
+            assert restored.description == "Tab\there \\ quote\""
+            assert restored.systems == [{"system": "ACC"}]
+            assert restored.response_time == timedelta(hours=2)
+            assert db.get(Opportunity, other.id).title == f"{marker}-2"
+            assert db.get(User, user.id).first_name == "Backup"
+            texts = [c.text for c in db.query(Comment).filter(Comment.opportunity_id == ticket.id)
+                     .order_by(Comment.created_at)]
+            assert texts == ["First", "Second"]
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).delete(synchronize_session=False)
+            db.query(User).filter(User.username == f"backup_{marker}").delete()
+            db.commit()
+        engine.dispose()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_restore_keeps_deleted_rows_deleted(tmp_path):
+    print("Testing deletes across backups...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection, open(TOMBSTONES_MIGRATION) as f:
+        connection.execute(text(f.read()))
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    marker = f"tomb{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        user = User(username=f"backup_{marker}", email="t@example.com", pin="x", first_name="Tomb",
+                    last_name="User", team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        kept = Opportunity(title=f"{marker}-kept", status="new", creator_id=user.id)
+        deleted = Opportunity(title=f"{marker}-deleted", status="new", creator_id=user.id)
+        db.add_all([kept, deleted])
+        db.flush()
+        comment = Comment(opportunity_id=deleted.id, user_id=user.id, text="Gone with the ticket",
+                          created_at=datetime.now(timezone.utc))
+        db.add(comment)
+        db.commit()
+
+    def exists(model, row_id):
+        with Session() as db:
+            return db.get(model, row_id) is not None
+
+    try:
+        full = create_backup(full=True, compression='gzip', backup_dir=str(tmp_path), bind=engine)
+        # A hard delete, as the management portal's bulk delete does; the comment goes with the ticket
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM opportunities WHERE id = :id"), {'id': deleted.id})
+        incremental = create_backup(compression='gzip', backup_dir=str(tmp_path), bind=engine)
+        assert incremental['tables']['deleted_rows']['rows'] >= 2
+
+        restore_backup(backup_dir=str(tmp_path), bind=engine)
+        assert not exists(Opportunity, deleted.id)
+        assert not exists(Comment, comment.id)
+        assert exists(Opportunity, kept.id)
+
+        # Back to before the delete, then forward again
+        restore_backup(full['id'], backup_dir=str(tmp_path), bind=engine)
+        assert exists(Opportunity, deleted.id) and exists(Comment, comment.id)
+        restore_backup(incremental['id'], backup_dir=str(tmp_path), bind=engine)
+        assert not exists(Opportunity, deleted.id) and not exists(Comment, comment.id)
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).delete(synchronize_session=False)
+            db.query(User).filter(User.username == f"backup_{marker}").delete()
+            db.commit()
+        engine.dispose()
@@ -0,0 +1,104 @@
+import os
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity
+from app.services.batch_jobs import BatchRunner
+from app.services.repair_jobs import VEHICLE_LINE, ExtractVehicleFromDescription
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def test_vehicle_line_extraction():
+    print("Testing vehicle extraction...")
+    match = VEHICLE_LINE.search("Vehicle: 2021 Land Rover Range Rover Sport")
+    assert match.group(1) == "2021"
+    assert VEHICLE_LINE.search("No vehicle here") is None
+
+class MarkedExtract(ExtractVehicleFromDescription):
+    """Only the tickets of one test run"""
+    name = 'test_extract_vehicle'
+
+    def __init__(self, marker):
+        self.marker = marker
+
+    def where(self):
+        return super().where() + [Opportunity.title.like(f"{self.marker}%")]
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_runner_dry_run_resume_and_conflicts(tmp_path):
+    print("Testing batch repairs...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    marker = f"batch{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        user = User(username=f"batch_{marker}", email="b@example.com", pin="x", first_name="Batch",
+                    last_name="User", team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        for i in range(25):
+            description = f"Vehicle: 2020 Subaru Outback {i}\nWindshield" if i % 5 else "No vehicle line"
+            db.add(Opportunity(title=f"{marker}-{i:02d}", status="new", creator_id=user.id,
+                               description=description, created_at=now))
+        db.commit()
+
+    class InterruptedRunner(BatchRunner):
+        """Stops after two chunks, as if the run had been killed"""
+        def record(self, chunk, fixed, written):
+            super().record(chunk, fixed, written)
+            if self.counts['chunks'] == 2:
+                raise KeyboardInterrupt
+
+    class ConcurrentEditRunner(BatchRunner):
+        """Someone fixes a ticket by hand between the read and the write"""
+        def write_chunk(self, fixed):
+            if fixed and not self.edited:
+                self.edited = True
+                with engine.begin() as connection:
+                    connection.execute(update(Opportunity).where(Opportunity.id == fixed[0][0].id)
+                                       .values(make="Honda"))
+            return super().write_chunk(fixed)
+
+    def run(runner_class=BatchRunner, **options):
+        runner = runner_class(MarkedExtract(marker), chunk_size=4, checkpoint_dir=str(tmp_path), bind=engine,
+                              **options)
+        runner.edited = False
+        return runner, runner.run()
+
+    try:
+        shown = []
+        _, counts = run(out=shown.append)
+        assert (counts['scanned'], counts['changed'], counts['written']) == (25, 20, 0)
+        assert any("'Subaru'" in line for line in shown)
+        with Session() as db:
+            assert db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%"),
+                                                Opportunity.year.is_not(None)).count() == 0
+
+        with pytest.raises(KeyboardInterrupt):
+            run(InterruptedRunner, dry_run=False)
+        runner, counts = run(ConcurrentEditRunner, dry_run=False, workers=3)
+        print(f"Resumed run: {counts}")
+        assert not os.path.exists(runner.checkpoint_path)
+        # The ticket changed under the resumed run is left as it was edited
+        assert counts['conflicts'] == 1
+
+        with Session() as db:
+            tickets = db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).all()
+            fixed = [t for t in tickets if t.year == "2020"]
+            assert len(fixed) == 19
+            assert all(t.make == "Subaru" and t.updated_at for t in fixed)
+            assert [t.make for t in tickets if t.year is None and t.make] == ["Honda"]
+            # Whichever ticket was edited by hand is not among them, so check them all
+            assert all(t.model == f"Outback {int(t.title[-2:])}" for t in fixed)
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).delete(synchronize_session=False)
+            db.query(User).filter(User.username == f"batch_{marker}").delete()
+            db.commit()
+        engine.dispose()
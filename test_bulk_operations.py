@@ -0,0 +1,83 @@
+import os
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity, Blob, File, Comment, Notification, ActivityLog
+from app.services import audit_log, bulk_operations
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_bulk_delete_removes_children_and_keeps_authors():
+    print("Testing bulk deletes...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    suffix = uuid.uuid4().hex[:8]
+    with Session() as db:
+        admin, creator, helper = [
+            User(username=f"{name}_{suffix}", email=f"{name}@example.com", pin="x", first_name=name.title(),
+                 last_name="User", team="QA", department="QA", role="user", is_active=True)
+            for name in ("admin", "creator", "helper")
+        ]
+        db.add_all([admin, creator, helper])
+        db.flush()
+        tickets = [
+            Opportunity(title=f"Bulk {i}", status="new", creator_id=creator.id, acceptor_id=helper.id,
+                        created_at=now, updated_at=now)
+            for i in range(2)
+        ]
+        db.add_all(tickets)
+        db.flush()
+        blob = Blob(hash=f"test-{suffix}", storage_path=f"test/{suffix}.txt")
+        db.add(blob)
+        db.flush()
+        for ticket in tickets:
+            db.add(File(opportunity_id=ticket.id, uploader_id=creator.id, blob_hash=blob.hash,
+                        name="a.txt", original_name="a.txt"))
+            db.add(Comment(opportunity_id=ticket.id, user_id=helper.id, text="hi", created_at=now))
+            db.add(Notification(user_id=helper.id, opportunity_id=ticket.id, type="new", message="m"))
+        db.commit()
+
+    ticket_ids = [ticket.id for ticket in tickets]
+    try:
+        with Session() as db:
+            deleted, blob_hashes = bulk_operations.delete_opportunities(db, ticket_ids, admin)
+            db.commit()
+            assert deleted == 2
+            # Both tickets shared one blob
+            assert blob_hashes == [f"test-{suffix}"]
+            for model in (File, Comment, Notification):
+                remaining = db.execute(
+                    select(func.count()).select_from(model).where(model.opportunity_id.in_(ticket_ids))
+                ).scalar()
+                assert remaining == 0
+
+            db.add(Opportunity(title="Kept", status="new", creator_id=creator.id, created_at=now))
+            db.commit()
+            deleted_users, blocked = bulk_operations.delete_users(db, [creator, helper], admin)
+            db.commit()
+            print(f"Deleted {len(deleted_users)} user(s), kept {len(blocked)}")
+            assert [user.username for user in deleted_users] == [helper.username]
+            assert [user.username for user in blocked] == [creator.username]
+
+            # The audit entries are written after the commits, by the background writer
+            assert audit_log.audit_writer(engine).flush()
+            actions = db.execute(
+                select(ActivityLog.action).where(ActivityLog.user_id == admin.id).order_by(ActivityLog.created_at)
+            ).scalars().all()
+            assert actions == ["deleted", "user_deleted"]
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.creator_id == creator.id).delete()
+            db.query(ActivityLog).filter(ActivityLog.user_id == admin.id).delete()
+            db.query(User).filter(User.username.like(f"%_{suffix}")).delete(synchronize_session=False)
+            db.query(Blob).filter(Blob.hash == f"test-{suffix}").delete()
+            db.commit()
+        engine.dispose()
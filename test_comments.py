@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity, Comment
+from app.services.comment_service import add_comment, fetch_comments, comment_cursor
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+LEGACY_MIGRATION = os.path.join(os.path.dirname(__file__), 'migrations', '023_legacy_comment_sync.sql')
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_concurrent_comments_both_persist():
+    print("Testing concurrent comments...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    with Session() as db:
+        users = [
+            User(username=f"commenter_{i}_{uuid.uuid4().hex[:8]}", email=f"c{i}@example.com", pin="x",
+                 first_name="Test", last_name=f"User {i}", team="QA", department="QA", role="user")
+            for i in range(2)
+        ]
+        db.add_all(users)
+        db.flush()
+        opportunity = Opportunity(title="Concurrent comments", status="new", creator_id=users[0].id, created_at=now)
+        db.add(opportunity)
+        db.commit()
+
+    # Both transactions are open before either commits, which is where the old
+    # read-append-write on the JSONB array lost one of the two comments
+    both_open = threading.Barrier(2)
+    errors = []
+
+    def comment(user, text):
+        try:
+            with Session() as db:
+                db.get(Opportunity, opportunity.id)
+                add_comment(db, opportunity.id, user, text)
+                db.flush()
+                both_open.wait(timeout=10)
+                db.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=comment, args=(users[0], "First")),
+        threading.Thread(target=comment, args=(users[1], "Second")),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert not errors, errors
+        with Session() as db:
+            count = db.execute(
+                select(func.count()).select_from(Comment).where(Comment.opportunity_id == opportunity.id)
+            ).scalar()
+            print(f"Comments stored: {count}")
+            assert count == 2
+
+            # Keyset pages walk the history without overlap
+            first_page = fetch_comments(db, opportunity.id, limit=1)
+            second_page = fetch_comments(db, opportunity.id, before=comment_cursor(first_page[0]), limit=1)
+            assert {first_page[0].text, second_page[0].text} == {"First", "Second"}
+    finally:
+        with Session() as db:
+            db.query(Comment).filter(Comment.opportunity_id == opportunity.id).delete()
+            db.query(Opportunity).filter(Opportunity.id == opportunity.id).delete()
+            db.query(User).filter(User.id.in_([u.id for u in users])).delete()
+            db.commit()
+        engine.dispose()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_comments_from_old_clients_are_copied():
+    print("Testing legacy comment copy...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # The deprecated column, which create_all no longer makes
+        connection.execute(text("ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS comments JSONB"))
+        with open(LEGACY_MIGRATION) as f:
+            connection.execute(text(f.read()))
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    marker = f"legacy{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        user = User(username=f"user_{marker}", email="l@example.com", pin="x", first_name="Lee",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        ticket = Opportunity(title=marker, status="new", creator_id=user.id, created_at=datetime.now(timezone.utc))
+        db.add(ticket)
+        db.commit()
+
+    def append_as_old_client(comment_text, timestamp):
+        # What clients from before migration 012 do
+        entry = {'user_id': str(user.id), 'user_name': "Lee", 'text': comment_text, 'timestamp': timestamp}
+        with engine.begin() as connection:
+            connection.execute(text(
+                "UPDATE opportunities SET comments = COALESCE(comments, '[]'::jsonb) || jsonb_build_array(CAST(:entry AS jsonb)) "
+                "WHERE id = :id"), {'entry': json.dumps(entry), 'id': ticket.id})
+
+    def texts():
+        with Session() as db:
+            return [c.text for c in fetch_comments(db, ticket.id)][::-1]
+
+    try:
+        append_as_old_client("First", "2025-05-01 10:15")
+        append_as_old_client("Second", "2025-05-01 10:16")
+        assert texts() == ["First", "Second"]
+        # Rewriting the array, e.g. by another old client, does not copy an entry twice
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE opportunities SET comments = comments || '[]'::jsonb, title = title "
+                                    "WHERE id = :id"), {'id': ticket.id})
+            connection.execute(text("UPDATE opportunities SET comments = jsonb_build_array(comments->0, comments->1) "
+                                    "WHERE id = :id"), {'id': ticket.id})
+        assert texts() == ["First", "Second"]
+        # The same words again in a later minute are a new comment
+        append_as_old_client("First", "2025-05-01 10:20")
+        assert texts() == ["First", "Second", "First"]
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title == marker).delete(synchronize_session=False)
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
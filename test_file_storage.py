@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import session_scope as scopes
+from app.database.connection import Base
+from app.models.models import User, Opportunity, Blob, File
+from app.services import file_storage
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_cleanup_cannot_take_a_blob_from_a_submit(tmp_path, monkeypatch):
+    print("Testing blob cleanup against submits...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(scopes, 'engine', engine)
+    monkeypatch.setattr(file_storage, 'STORAGE_DIR', str(tmp_path / 'storage'))
+    Session = sessionmaker(bind=engine)
+
+    marker = uuid.uuid4().hex
+    source = tmp_path / 'report.txt'
+    source.write_text(f"contents {marker}")
+    file_hash = file_storage.calculate_file_hash(str(source))
+    with Session() as db:
+        user = User(username=f"user_{marker[:8]}", email="f@example.com", pin="x", first_name="Fay",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        ticket = Opportunity(title=marker, status="new", creator_id=user.id, created_at=datetime.now(timezone.utc))
+        db.add(ticket)
+        db.commit()
+        user_id, ticket_id = user.id, ticket.id
+
+    def submit(db, storage_path):
+        blob_hash = file_storage.register_blob(db, file_hash, storage_path, source_path=str(source))
+        db.add(File(opportunity_id=ticket_id, uploader_id=user_id, blob_hash=blob_hash,
+                    name="report.txt", original_name="report.txt"))
+        db.flush()
+
+    try:
+        # An unreferenced blob is reused when the file is attached, then cleaned up before the submit
+        storage_path = file_storage.store_file(str(source), file_hash)
+        with Session() as db:
+            file_storage.register_blob(db, file_hash, storage_path)
+            db.commit()
+        assert file_storage.store_file(str(source), file_hash) == storage_path
+        assert file_storage.remove_unreferenced_blobs([file_hash]) == 1
+        assert not os.path.exists(os.path.join(file_storage.STORAGE_DIR, storage_path))
+
+        # The submit stores the bytes again
+        with Session() as db:
+            submit(db, storage_path)
+            db.commit()
+        assert os.path.isfile(os.path.join(file_storage.STORAGE_DIR, storage_path))
+
+        # A cleanup started while a submit is registering the blob waits for it and keeps the blob
+        with Session() as db:
+            db.query(File).filter(File.opportunity_id == ticket_id).delete()
+            db.commit()
+        removed = []
+        with Session() as db:
+            submit(db, storage_path)
+            cleanup = threading.Thread(target=lambda: removed.append(file_storage.remove_unreferenced_blobs([file_hash])))
+            cleanup.start()
+            time.sleep(0.5)
+            assert cleanup.is_alive()
+            db.commit()
+        cleanup.join(10)
+        assert removed == [0]
+        assert os.path.isfile(os.path.join(file_storage.STORAGE_DIR, storage_path))
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.id == ticket_id).delete(synchronize_session=False)
+            db.query(Blob).filter(Blob.hash == file_hash).delete(synchronize_session=False)
+            db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
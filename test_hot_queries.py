@@ -0,0 +1,78 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.database.hot_queries import CompileCacheStats, track_compile_cache
+from app.models.models import User, Opportunity
+from app.services import read_models
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def test_hit_ratio():
+    print("Testing cache statistics...")
+    stats = CompileCacheStats()
+    for outcome in (CacheStats.CACHE_MISS, CacheStats.CACHE_HIT, CacheStats.CACHE_HIT, CacheStats.CACHE_HIT):
+        stats.record('card_rows', outcome)
+    assert stats.snapshot()['card_rows'] == {'hits': 3, 'misses': 1, 'hit_ratio': 0.75}
+    assert "card_rows: 3 hit(s), 1 miss(es), 75% hit ratio" in stats.report()
+    stats.reset()
+    assert stats.snapshot() == {}
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_cached_statements_use_the_new_values():
+    print("Testing hot queries...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    stats = CompileCacheStats()
+    track_compile_cache(engine, stats)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    marker = f"hot{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        users = [User(username=f"{name}_{marker}", email="h@example.com", pin="x", first_name=name,
+                      last_name=marker, team="QA", department="QA", role="user") for name in ("Hana", "Ivo")]
+        db.add_all(users)
+        db.flush()
+        hana, ivo = users
+        db.add_all([
+            Opportunity(title=f"{marker}-new", status="new", creator_id=hana.id, created_at=now),
+            Opportunity(title=f"{marker}-done", status="completed", creator_id=hana.id, acceptor_id=ivo.id,
+                        created_at=now - timedelta(hours=3), completed_at=now, response_time=timedelta(hours=3)),
+        ])
+        db.commit()
+
+    try:
+        with Session() as db:
+            def titles(status):
+                query = db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%"),
+                                                     Opportunity.status == status)
+                return [card.title for card in read_models.ticket_cards(db, query)]
+
+            assert titles("new") == [f"{marker}-new"]
+            # Same statement, so a cache hit, but with the new status bound
+            assert titles("completed") == [f"{marker}-done"]
+            assert stats.snapshot()['card_rows']['hits'] >= 1
+
+            assert read_models.accepted_ticket_stats(db, ivo.id).one() == (0, 1, 10800)
+            assert read_models.accepted_ticket_stats(db, hana.id).one() == (0, 0, None)
+            active, completed, seconds = read_models.handled_ticket_stats(db, hana.id).one()
+            assert (active, completed, float(seconds)) == (1, 1, 10800.0)
+            assert str(read_models.user_id_by_name(db, "Ivo", marker).scalar()) == str(ivo.id)
+
+            new_for_ivo = read_models.new_ticket_ids(db, ivo.id).scalars().all()
+            new_for_hana = read_models.new_ticket_ids(db, hana.id).scalars().all()
+            ticket_id = db.query(Opportunity.id).filter(Opportunity.title == f"{marker}-new").scalar()
+            assert ticket_id in new_for_ivo and ticket_id not in new_for_hana
+            assert stats.snapshot()['new_ticket_ids'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).delete(synchronize_session=False)
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
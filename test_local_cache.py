@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import session_scope as scopes
+from app.database.connection import Base
+from app.database.local_cache import LocalCache
+from app.models.models import User, Opportunity
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def seed(cache, table_name, data):
+    """Store a row the way sync_table does"""
+    conn = cache._connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO cached_rows (table_name, id, changed_at, data) VALUES (?, ?, ?, ?)",
+            (table_name, data['id'], data.get('updated_at'), json.dumps(data))
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (table_name, watermark, synced_at) VALUES (?, ?, ?)",
+            (table_name, data.get('updated_at'), datetime.now(timezone.utc).isoformat())
+        )
+
+def test_offline_reads_and_outbox():
+    print("Testing local cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LocalCache(os.path.join(tmp, 'cache.db'))
+        creator_id = str(uuid.uuid4())
+        opportunity_id = str(uuid.uuid4())
+        created_at = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+        seed(cache, 'users', {'id': creator_id, 'first_name': 'Ana', 'last_name': 'Ruiz', 'role': 'user'})
+        seed(cache, 'opportunities', {
+            'id': opportunity_id, 'title': 'SI-1', 'status': 'New', 'creator_id': creator_id,
+            'acceptor_id': None, 'year': '2024', 'make': 'Honda', 'model': 'Civic',
+            'systems': [], 'created_at': created_at.isoformat(),
+            'updated_at': created_at.isoformat(), 'started_at': None
+        })
+
+        assert cache.has_data()
+        new_tickets = cache.get_opportunities(status='new')
+        assert len(new_tickets) == 1
+        ticket = new_tickets[0]
+        print(f"Cached ticket: {ticket.display_title} by {ticket.creator.first_name}")
+        assert ticket.id == uuid.UUID(opportunity_id)
+        assert ticket.created_at == created_at
+        assert ticket.comment_count == 0
+        assert cache.get_opportunities(status='completed') == []
+
+        # An offline write shows up locally right away and waits in the outbox
+        now = created_at + timedelta(hours=2)
+        group_id = cache.new_group()
+        cache.queue_update('opportunities', opportunity_id,
+                           {'status': 'In Progress', 'started_at': now, 'updated_at': now},
+                           ticket.updated_at, group_id=group_id)
+        cache.queue_insert('activity_log', {'opportunity_id': opportunity_id, 'action': 'status_change'},
+                           group_id=group_id)
+
+        assert cache.pending_count() == 2
+        assert cache.get_opportunities(status='new') == []
+        updated = cache.get_opportunities(status='in progress')[0]
+        assert updated.started_at == now
+        print(f"Pending outbox entries: {cache.pending_count()}")
+        cache.close()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_rejected_offline_edit_is_replaced_by_the_server_row(tmp_path, monkeypatch):
+    print("Testing outbox conflicts...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(scopes, 'engine', engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    cache = LocalCache(str(tmp_path / 'cache.db'))
+
+    marker = f"cache{uuid.uuid4().hex[:8]}"
+    seen = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+    with Session() as db:
+        user = User(username=f"user_{marker}", email="c@example.com", pin="x", first_name="Cy",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        ticket = Opportunity(title=marker, status="new", creator_id=user.id, created_at=seen, updated_at=seen)
+        db.add(ticket)
+        db.commit()
+    ticket_id = str(ticket.id)
+
+    def cached_status():
+        row = cache._connection().execute(
+            "SELECT data FROM cached_rows WHERE table_name = 'opportunities' AND id = ?", (ticket_id,)).fetchone()
+        return json.loads(row[0])['status'] if row else None
+
+    try:
+        seed(cache, 'opportunities', {'id': ticket_id, 'title': marker, 'status': 'new',
+                                      'creator_id': str(user.id), 'updated_at': seen.isoformat()})
+        cache.queue_update('opportunities', ticket_id, {'status': 'in progress'}, seen)
+        # Someone else completes the ticket before the edit is replayed
+        with Session() as db:
+            db.get(Opportunity, ticket.id).status = "completed"
+            db.get(Opportunity, ticket.id).updated_at = seen + timedelta(hours=1)
+            db.commit()
+        # A sync passes the ticket by while its edit is pending
+        cache.sync_table('opportunities')
+        assert cached_status() == "in progress"
+
+        assert cache.replay_outbox()['conflicts'] == 1
+        assert cached_status() == "completed"
+        assert len(cache.conflicts()) == 1
+    finally:
+        cache.close()
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title == marker).delete(synchronize_session=False)
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
@@ -1,7 +1,7 @@
 from datetime import datetime
 import uuid
 from app.database.connection import SessionLocal
-from app.models.models import User, Opportunity, AdasSystem, File, FileAttachment
+from app.models.models import User, Opportunity, AdasSystem, File, Blob
 from app.auth.auth_handler import hash_pin
 
 def test_database_connection():
@@ -64,16 +64,26 @@ def test_database_connection():
         # Test file handling
         print("\nTesting file handling:")
         
+        # Create a test blob
+        test_blob = Blob(
+            hash="abc123",
+            storage_path="2024/01/abc123.txt",
+            size=1024,
+            mime_type="text/plain",
+            created_at=datetime.utcnow()
+        )
+        
+        db.add(test_blob)
+        db.flush()
+        print(f"Created test blob with hash: {test_blob.hash}")
+        
         # Create a test file
         test_file = File(
             opportunity_id=test_opportunity.id,
             uploader_id=test_user.id,
+            blob_hash=test_blob.hash,
             name="test.txt",
-            path="/uploads/test.txt",
-            size=1024,
-            mime_type="text/plain",
-            hash="abc123",
-            data=b"Test file content",
+            original_name="test.txt",
             created_at=datetime.utcnow()
         )
         
@@ -81,15 +91,14 @@ def test_database_connection():
         db.flush()
         print(f"Created test file with ID: {test_file.id}")
         
-        # Create a test file attachment
-        test_attachment = FileAttachment(
+        # A second attachment with the same content shares the blob
+        test_attachment = File(
             opportunity_id=test_opportunity.id,
-            filename="test_attachment.pdf",
-            file_type="application/pdf",
-            file_path="/attachments/test.pdf",
-            file_size=2048,
-            uploaded_by_id=test_user.id,
-            uploaded_at=datetime.utcnow()
+            uploader_id=test_user.id,
+            blob_hash=test_blob.hash,
+            name="copy.txt",
+            original_name="copy.txt",
+            created_at=datetime.utcnow()
         )
         
         db.add(test_attachment)
@@ -101,7 +110,7 @@ def test_database_connection():
         print(f"Opportunity creator: {test_opportunity.creator.username}")
         print(f"User's created opportunities: {len(test_user.created_opportunities)}")
         print(f"Opportunity files: {len(test_opportunity.files)}")
-        print(f"Opportunity file attachments: {len(test_opportunity.file_attachments)}")
+        print(f"Opportunity file blobs: {len(set(f.blob_hash for f in test_opportunity.files))}")
         
         # Don't actually commit the test data
         print("\nRolling back test data...")
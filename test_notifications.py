@@ -0,0 +1,73 @@
+import asyncio
+import importlib.util
+import os
+import uuid
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base, make_async_engine
+from app.models.models import User, Notification
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+ASYNC_STACK = all(importlib.util.find_spec(name) for name in ('asyncpg', 'fastapi'))
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+@pytest.mark.skipif(not ASYNC_STACK, reason="asyncpg and fastapi are not installed")
+def test_async_notification_handlers():
+    print("Testing async notification handlers...")
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.services.notification_service import (
+        notification_manager, handle_notification_event, mark_notification_read
+    )
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    marker = f"note{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        user = User(username=f"user_{marker}", email="n@example.com", pin="x", first_name="Nia",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    async def scenario():
+        async_engine = make_async_engine(TEST_DATABASE_URL, connect_args={'ssl': False})
+        AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+        websocket = RecordingWebSocket()
+        await notification_manager.connect(user_id, websocket)
+        try:
+            async with AsyncSession() as db:
+                await handle_notification_event(user_id, None, "comment", "First", db)
+                await handle_notification_event(user_id, None, "comment", "Second", db)
+            assert [data["message"] for data in websocket.sent] == ["First", "Second"]
+
+            notification_id = uuid.UUID(websocket.sent[0]["id"])
+            async with AsyncSession() as db:
+                assert await mark_notification_read(notification_id, user_id, db) is True
+                assert await mark_notification_read(uuid.uuid4(), user_id, db) is False
+        finally:
+            await notification_manager.disconnect(user_id, websocket)
+            await async_engine.dispose()
+        return notification_id
+
+    try:
+        notification_id = asyncio.run(scenario())
+        with Session() as db:
+            rows = dict(db.execute(select(Notification.id, Notification.read)
+                                   .where(Notification.user_id == user_id)).all())
+            assert len(rows) == 2 and rows[notification_id] is True
+            assert sum(rows.values()) == 1
+    finally:
+        with Session() as db:
+            db.query(Notification).filter(Notification.user_id == user_id).delete(synchronize_session=False)
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
@@ -0,0 +1,80 @@
+import csv
+import gzip
+import os
+import uuid
+from datetime import date, datetime, timezone
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, ActivityLog
+from app.services.partitions import add_months, current_month, detach_partitions, ensure_partitions, partition_name
+
+# Partitions activity_log, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+MIGRATION = os.path.join(os.path.dirname(__file__), 'migrations', '018_partition_activity_log.sql')
+
+def test_month_arithmetic():
+    print("Testing partition months...")
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name('activity_log', date(2024, 3, 1)) == 'activity_log_y2024m03'
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_partition_maintenance(tmp_path):
+    print("Testing partition maintenance...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        with open(MIGRATION) as f:
+            connection.execute(text(f.read()))
+    Session = sessionmaker(bind=engine)
+
+    marker = f"part{uuid.uuid4().hex[:8]}"
+    # A month far enough ahead to have no partition yet, and one old enough to retire
+    ahead = add_months(current_month(), 40)
+    old = add_months(current_month(), -70)
+    with Session() as db:
+        user = User(username=f"user_{marker}", email="p@example.com", pin="x", first_name="Pia",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        for month in (ahead, old, current_month()):
+            db.add(ActivityLog(user_id=user.id, action=marker,
+                               created_at=datetime.combine(month.replace(day=2), datetime.min.time(), tzinfo=timezone.utc)))
+        db.commit()
+        user_id = user.id
+
+    def partition_of(month):
+        with engine.connect() as connection:
+            return connection.execute(text("""
+                SELECT tableoid::regclass::text FROM activity_log
+                WHERE action = :action AND created_at >= :start AND created_at < :end
+            """), {'action': marker, 'start': month, 'end': add_months(month, 1)}).scalar()
+
+    try:
+        assert partition_of(current_month()) == partition_name('activity_log', current_month())
+        assert partition_of(ahead) == 'activity_log_default'
+        ensure_partitions('activity_log', months_ahead=1, bind=engine)
+        # The stray entry moved into a partition of its own month
+        assert partition_of(ahead) == partition_name('activity_log', ahead)
+
+        with engine.begin() as connection:
+            connection.execute(text("SELECT create_month_partition('activity_log', :month)"), {'month': old})
+        detached = detach_partitions('activity_log', keep_months=60, archive=True,
+                                     archive_dir=str(tmp_path), bind=engine)
+        assert partition_name('activity_log', old) in detached
+        assert partition_of(old) is None
+        with gzip.open(tmp_path / f"{partition_name('activity_log', old)}.csv.gz", 'rt') as f:
+            archived = [row for row in csv.DictReader(f) if row['action'] == marker]
+        assert len(archived) == 1 and archived[0]['user_id'] == str(user_id)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT to_regclass(:name)"),
+                                      {'name': partition_name('activity_log', old)}).scalar() is None
+    finally:
+        with Session() as db:
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {partition_name('activity_log', ahead)}"))
+        engine.dispose()
@@ -0,0 +1,80 @@
+import os
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity, Comment, Blob, File
+from app.services.read_models import ticket_cards, ticket_table_rows, ticket_timings
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_projections_match_the_entities():
+    print("Testing read models...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    marker = f"read{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        creator = User(username=f"creator_{marker}", email="c@example.com", pin="x", first_name="Cara",
+                       last_name="Creator", team="QA", department="QA", role="user")
+        acceptor = User(username=f"acceptor_{marker}", email="a@example.com", pin="x", first_name="Ari",
+                        last_name="Acceptor", team="ADAS", department="QA", role="user")
+        db.add_all([creator, acceptor])
+        db.flush()
+        accepted = Opportunity(title=f"{marker}-1", status="in progress", creator_id=creator.id,
+                               acceptor_id=acceptor.id, year="2024", make="Subaru", model="Outback",
+                               systems=[{"system": "ACC"}], created_at=now, started_at=now)
+        unassigned = Opportunity(title=f"{marker}-2", status="new", creator_id=creator.id, created_at=now)
+        db.add_all([accepted, unassigned])
+        db.flush()
+        db.add(Blob(hash=f"hash-{marker}", storage_path=f"{marker}/photo.jpg", size=10, mime_type="image/jpeg"))
+        db.flush()
+        db.add_all([
+            File(opportunity_id=accepted.id, uploader_id=creator.id, blob_hash=f"hash-{marker}",
+                 name="photo.jpg", original_name="Photo.jpg", created_at=now),
+            File(opportunity_id=accepted.id, uploader_id=creator.id, blob_hash=f"hash-{marker}",
+                 name="gone.jpg", original_name="Gone.jpg", created_at=now, is_deleted=True),
+            Comment(opportunity_id=accepted.id, user_id=creator.id, text="One", created_at=now),
+            Comment(opportunity_id=accepted.id, user_id=acceptor.id, text="Two", created_at=now),
+        ])
+        db.commit()
+
+    try:
+        with Session() as db:
+            query = db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%"))
+            cards = {card.title: card for card in ticket_cards(db, query)}
+            assert sorted(cards) == [f"{marker}-1", f"{marker}-2"]
+            card, other = cards[f"{marker}-1"], cards[f"{marker}-2"]
+            assert card.display_title == "2024 Subaru Outback"
+            assert card.systems == [{"system": "ACC"}]
+            assert card.comment_count == 2 and other.comment_count == 0
+            assert (card.creator.full_name, card.creator.team) == ("Cara Creator", "QA")
+            assert card.acceptor.full_name == "Ari Acceptor" and other.acceptor is None
+            # One shared row per person
+            assert card.creator is other.creator
+            assert [(f.display_name, f.storage_path, f.hash) for f in card.files] == [
+                ("Photo.jpg", f"{marker}/photo.jpg", f"hash-{marker}")]
+            assert other.files == []
+            # Nothing is added to the session
+            assert not db.identity_map
+
+            rows = {row.title: row for row in ticket_table_rows(db, Opportunity.title.like(f"{marker}%"))}
+            assert rows[f"{marker}-1"].acceptor_name == "Ari Acceptor"
+            assert rows[f"{marker}-2"].acceptor_name is None
+            assert rows[f"{marker}-2"].creator_username == f"creator_{marker}"
+
+            timings = ticket_timings(db, Opportunity.acceptor_id == accepted.acceptor_id)
+            assert [(t.status, t.started_at) for t in timings] == [("in progress", now)]
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}%")).delete(synchronize_session=False)
+            db.query(Blob).filter(Blob.hash == f"hash-{marker}").delete()
+            db.query(User).filter(User.username.like(f"%_{marker}")).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
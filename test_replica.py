@@ -0,0 +1,79 @@
+import os
+import time
+import uuid
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.database.replica import ReplicaRouter
+from app.models.models import User
+
+# Two scratch databases, e.g. two local Postgres instances standing in for the primary and the replica
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+TEST_REPLICA_URL = os.getenv('TEST_REPLICA_URL')
+
+def test_unreachable_replica_falls_back_to_the_primary():
+    print("Testing replica fallback...")
+    primary = create_engine("postgresql://postgres@127.0.0.1:1/primary")
+    replica = create_engine("postgresql://postgres@127.0.0.1:1/replica", connect_args={"connect_timeout": 2})
+    router = ReplicaRouter(primary, replica, max_lag=10, check_interval=5, max_backoff=30)
+    # Each failed probe doubles the wait before the next one, up to max_backoff
+    for delay in (10, 20, 30):
+        assert router.probe() is None
+        assert router.next_check - router.checked_at == delay
+    assert router.read_bind() is primary
+
+    # The probe runs in the background, so a read does not wait for it
+    router = ReplicaRouter(primary, replica, max_lag=10, check_interval=5)
+    started = time.monotonic()
+    assert router.read_bind() is primary
+    assert time.monotonic() - started < 1
+    assert ReplicaRouter(primary).read_bind() is primary
+
+@pytest.mark.skipif(not (TEST_DATABASE_URL and TEST_REPLICA_URL),
+                    reason="TEST_DATABASE_URL and TEST_REPLICA_URL are not set")
+def test_reads_follow_lag_and_own_writes():
+    print("Testing replica routing...")
+    primary = create_engine(TEST_DATABASE_URL)
+    replica = create_engine(TEST_REPLICA_URL)
+    user_id = str(uuid.uuid4())
+    marker = f"replica{user_id[:8]}"
+    # The same user on both servers, under a different name, to tell which one answered
+    for bind, name in ((primary, "Primary"), (replica, "Replica")):
+        Base.metadata.create_all(bind)
+        with sessionmaker(bind=bind)() as db:
+            db.add(User(id=user_id, username=f"user_{marker}", email="r@example.com", pin="x",
+                        first_name=name, last_name=marker, team="QA", department="QA", role="user"))
+            db.commit()
+
+    def reader(router):
+        with sessionmaker(bind=router.read_bind())() as db:
+            return db.execute(select(User.first_name).where(User.id == user_id)).scalar()
+
+    try:
+        router = ReplicaRouter(primary, replica, max_lag=0.5, check_interval=60)
+        assert router.probe() == 0
+        assert reader(router) == "Replica"
+
+        # A commit on the primary keeps this client's reads there for max_lag seconds
+        with sessionmaker(bind=primary)() as db:
+            db.execute(select(User.id).where(User.id == user_id))
+            db.commit()
+        assert reader(router) == "Primary"
+        time.sleep(0.6)
+        assert reader(router) == "Replica"
+
+        # Background writers such as the audit log commit on connections, not sessions
+        with primary.begin() as connection:
+            connection.execute(select(User.id).where(User.id == user_id))
+        assert reader(router) == "Replica"
+
+        # A replica further behind than the bound is not used
+        router.max_lag = -1
+        assert reader(router) == "Primary"
+    finally:
+        for bind in (primary, replica):
+            with sessionmaker(bind=bind)() as db:
+                db.query(User).filter(User.id == user_id).delete()
+                db.commit()
+            bind.dispose()
@@ -0,0 +1,69 @@
+import os
+import uuid
+from datetime import date, datetime, timezone
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity
+from app.services.reporting import refresh_rollups, fetch_report
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+MIGRATIONS = [os.path.join(os.path.dirname(__file__), 'migrations', name)
+              for name in ('011_reporting_rollups.sql', '020_rollup_changed_days.sql')]
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_rollups_follow_moves_and_deletes():
+    print("Testing rollup refresh...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for migration in MIGRATIONS:
+            with open(migration) as f:
+                connection.execute(text(f.read()))
+    Session = sessionmaker(bind=engine)
+
+    # A make of its own, on days long past, so the timestamp scan cannot see the changes below
+    marker = f"roll{uuid.uuid4().hex[:8]}"
+    first, second = date(2001, 1, 5), date(2001, 1, 9)
+
+    def at(day):
+        return datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc)
+
+    def report():
+        with Session() as db:
+            refresh_rollups(db)
+            db.commit()
+            rows = fetch_report(db, first, second, dimension='make', daily=True)
+        return [(row['day'], row['opened'], row['completed']) for row in rows if row['dimension_value'] == marker]
+
+    with Session() as db:
+        user = User(username=f"user_{marker}", email="r@example.com", pin="x", first_name="Ria",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        db.add(Opportunity(title=marker, status="completed", make=marker, creator_id=user.id,
+                           created_at=at(first), completed_at=at(first), updated_at=at(first)))
+        db.commit()
+    try:
+        with Session() as db:
+            refresh_rollups(db, rebuild=True)
+            db.commit()
+        assert report() == [(first, 1, 1)]
+
+        # Completion moved to another day without touching updated_at
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE opportunities SET completed_at = :at WHERE title = :title"),
+                               {'at': at(second), 'title': marker})
+        assert report() == [(first, 1, 0), (second, 0, 1)]
+
+        # A hard delete, as the management portal's bulk delete does
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM opportunities WHERE title = :title"), {'title': marker})
+        assert report() == []
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title == marker).delete(synchronize_session=False)
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
@@ -0,0 +1,125 @@
+import os
+import uuid
+from datetime import datetime, timezone, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity, Comment
+from app.services.search_service import (InvertedIndex, search_opportunities, find_opportunity,
+                                         opportunity_position, page_around)
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def test_inverted_index_ranks_and_matches_prefixes():
+    print("Testing the local search index...")
+    now = datetime.now(timezone.utc)
+    index = InvertedIndex()
+    index.add("title-match", [("SI-1001 2021 Subaru Outback", 'A'), ("ACC", 'A')], now - timedelta(days=2))
+    index.add("comment-match", [("SI-1002 2020 Honda Civic", 'A')], now - timedelta(days=1))
+    index.add("comment-1", [("Radar bracket is bent", 'C')], ticket_id="comment-match")
+    index.add("description-match", [("SI-1003 2019 Ford F-150", 'A'), ("Outback of the shop", 'B')], now)
+
+    # Title words outrank description words
+    assert index.search("outback") == ["title-match", "description-match"]
+    # The last word matches as a prefix, earlier words must be whole
+    assert index.search("subaru outb") == ["title-match"]
+    assert index.search("subar outback") == []
+    # Comments match on their own
+    assert index.search("radar bracket") == ["comment-match"]
+    assert index.search("civic bracket") == []
+    assert index.search("si 1003") == ["description-match"]
+    assert index.search("  ") == []
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_search_finds_tickets_by_fields_and_comments():
+    print("Testing ticket search...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    marker = f"zq{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        user = User(username=f"searcher_{marker}", email="s@example.com", pin="x", first_name="Search",
+                    last_name="User", team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        tickets = [
+            Opportunity(title=f"{marker}-1", status="new", creator_id=user.id, year="2021", make="Subaru",
+                        model="Outback", systems=[{"system": "ACC", "affected_portions": []}],
+                        description="Calibration fails after windshield replacement", created_at=now),
+            Opportunity(title=f"{marker}-2", status="new", creator_id=user.id, year="2020", make="Honda",
+                        model="Civic", description="Camera shows a blocked view", created_at=now),
+            Opportunity(title=f"{marker}-3", status="new", creator_id=user.id, description="Archived",
+                        archived_at=now, created_at=now),
+        ]
+        db.add_all(tickets)
+        db.flush()
+        db.add(Comment(opportunity_id=tickets[1].id, user_id=user.id,
+                       text=f"Waiting on the radar bracket for {marker}", created_at=now))
+        db.commit()
+
+    try:
+        with Session() as db:
+            def titles(text):
+                return [opportunity.title for opportunity in search_opportunities(db, text)]
+
+            assert titles(f"{marker} subaru acc") == [f"{marker}-1"]
+            # Stemmed prose and a prefix on the last word
+            assert titles(f"{marker} calibrating") == [f"{marker}-1"]
+            assert titles(f"{marker} windsh") == [f"{marker}-1"]
+            # Comment text, and archived tickets stay hidden
+            assert titles(f"radar brackets {marker}") == [f"{marker}-2"]
+            assert titles(f"{marker} archived") == []
+            print(f"Found {len(titles(marker))} tickets for {marker}")
+            assert set(titles(marker)) == {f"{marker}-1", f"{marker}-2"}
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.creator_id == user.id).delete()
+            db.query(User).filter(User.id == user.id).delete()
+            db.commit()
+        engine.dispose()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_page_around_ticket():
+    print("Testing direct ticket lookup...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    marker = f"ZQ{uuid.uuid4().hex[:8].upper()}"
+    with Session() as db:
+        user = User(username=f"lookup_{marker}", email="l@example.com", pin="x", first_name="Lookup",
+                    last_name="User", team="QA", department="QA", role="user")
+        db.add(user)
+        db.flush()
+        # Two tickets share a timestamp so the id has to break the tie
+        db.add_all([
+            Opportunity(title=f"{marker}-{i}", status="new", creator_id=user.id,
+                        created_at=now - timedelta(minutes=min(i, 5)))
+            for i in range(10)
+        ])
+        db.commit()
+
+    try:
+        with Session() as db:
+            query = db.query(Opportunity).filter(Opportunity.creator_id == user.id)
+            ordered = query.order_by(Opportunity.created_at.desc(), Opportunity.id.desc()).all()
+            ticket = find_opportunity(db, f"{marker.lower()}-7")
+            assert find_opportunity(db, str(ticket.id)) is ticket
+
+            position = opportunity_position(query, ticket)
+            assert ordered[position] is ticket
+            page = page_around(query, ticket, 4)
+            print(f"Ticket at position {position}, page {[opp.title for opp in page]}")
+            assert page == ordered[position - 2:position + 2]
+            assert page_around(query, ordered[0], 4) == ordered[:4]
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.creator_id == user.id).delete()
+            db.query(User).filter(User.id == user.id).delete()
+            db.commit()
+        engine.dispose()
@@ -0,0 +1,54 @@
+import os
+import uuid
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from app.database import session_scope as scopes
+from app.database.connection import Base
+from app.models.models import User
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_failed_nested_scope_keeps_the_outer_action(monkeypatch):
+    print("Testing nested scope failure...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(scopes, 'engine', engine)
+    marker = f"scope{uuid.uuid4().hex[:8]}"
+    try:
+        with scopes.session_scope() as db:
+            db.add(User(username=f"user_{marker}", email="s@example.com", pin="x", first_name="Sol",
+                        last_name=marker, team="QA", department="QA", role="user"))
+            db.flush()
+            # A step that fails inside the action
+            with pytest.raises(Exception):
+                with scopes.session_scope() as nested:
+                    nested.execute(text("SELECT no_such_column FROM users"))
+            # The session is still usable and the flushed change is kept
+            assert db.query(User).filter(User.last_name == marker).count() == 1
+
+        with sessionmaker(bind=engine)() as db:
+            assert db.query(User).filter(User.last_name == marker).count() == 1
+    finally:
+        with sessionmaker(bind=engine)() as db:
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_nested_reads_take_no_savepoint(monkeypatch):
+    print("Testing nested read round trips...")
+    engine = create_engine(TEST_DATABASE_URL)
+    monkeypatch.setattr(scopes, 'engine', engine)
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    try:
+        with scopes.session_scope() as db:
+            # As load_opportunities() and check_updates() do inside update_status()
+            with scopes.session_scope(read_only=True) as nested:
+                assert nested is db
+                nested.execute(text("SELECT 1"))
+        assert not [statement for statement in statements if 'SAVEPOINT' in statement]
+    finally:
+        engine.dispose()
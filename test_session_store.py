@@ -0,0 +1,54 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.auth.auth_handler import create_access_token
+from app.auth.session_store import save_session, load_session
+from app.models.models import User
+
+def make_user():
+    return User(id=uuid.uuid4(), username="resume_user", email="r@example.com", pin="secret-hash",
+                first_name="Resume", last_name="User", team="QA", department="QA", role="manager",
+                last_login=datetime(2025, 6, 1, 8, 30, tzinfo=timezone.utc), is_active=True)
+
+def test_saved_session_resumes_without_pin(tmp_path):
+    print("Testing session resume...")
+    path = str(tmp_path / "session.dat")
+    user = make_user()
+    save_session(user, create_access_token(str(user.id), role=user.role), path=path)
+    assert b"secret-hash" not in open(path, 'rb').read()
+
+    resumed = load_session(path=path)
+    assert resumed.id == user.id
+    assert (resumed.username, resumed.role, resumed.last_login) == ("resume_user", "manager", user.last_login)
+    assert resumed.pin is None
+    assert resumed.token
+
+def test_expired_or_foreign_tokens_are_discarded(tmp_path):
+    print("Testing rejected sessions...")
+    path = tmp_path / "session.dat"
+    user = make_user()
+    assert load_session(path=str(path)) is None
+
+    save_session(user, create_access_token(str(user.id), timedelta(seconds=-1), role=user.role), path=str(path))
+    assert load_session(path=str(path)) is None
+    assert not path.exists()
+
+    # A token issued to someone else does not unlock this profile
+    save_session(user, create_access_token(str(uuid.uuid4()), role=user.role), path=str(path))
+    assert load_session(path=str(path)) is None
+
+    save_session(user, create_access_token(str(user.id), role=user.role), path=str(path))
+    session = json.loads(path.read_text())
+    session['token'] = session['token'][:-2] + "xx"
+    path.write_text(json.dumps(session))
+    assert load_session(path=str(path)) is None
+
+    # The cached profile is not signed, so it cannot raise the role
+    save_session(user, create_access_token(str(user.id), role="user"), path=str(path))
+    assert load_session(path=str(path)) is None
+    # Tokens saved before the role was signed
+    save_session(user, create_access_token(str(user.id)), path=str(path))
+    assert load_session(path=str(path)) is None
+
+    path.write_text("not a session")
+    assert load_session(path=str(path)) is None
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip("PyQt5.QtWidgets")
+
+# Time from importing the entry point to the splash being on screen
+STARTUP_BUDGET_MS = 300
+
+# Modules that must not load before the login screen is up
+DEFERRED_MODULES = ("sqlalchemy", "psycopg2", "jwt", "openpyxl", "websockets", "win10toast",
+                    "app.database.connection", "app.models.models", "app.ui.dashboard",
+                    "app.ui.management_portal")
+
+def run_python(code):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+               # Never used, importing the entry point must not connect
+               DATABASE_URL=os.getenv("DATABASE_URL", "postgresql://startup-test.invalid/none"),
+               SECRET_KEY=os.getenv("SECRET_KEY", "startup-test"))
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)), env=env, timeout=60)
+
+def imported_modules(importtime_output):
+    """Module name -> cumulative microseconds from -X importtime output"""
+    modules = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+def test_entry_point_defers_heavy_imports():
+    print("Testing entry point imports...")
+    result = run_python("import app.ui.main")
+    assert result.returncode == 0, result.stderr
+    modules = imported_modules(result.stderr)
+    print(f"app.ui.main imported in {modules['app.ui.main'] / 1000:.0f} ms")
+    loaded = [name for name in DEFERRED_MODULES if name in modules]
+    assert loaded == []
+
+def test_splash_within_budget():
+    print("Testing time to splash...")
+    result = run_python(
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "from PyQt5.QtWidgets import QApplication\n"
+        "from app.ui.main import LoadingOverlay\n"
+        "app = QApplication([])\n"
+        "splash = LoadingOverlay()\n"
+        "splash.show()\n"
+        "app.processEvents()\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed_ms = float(result.stdout.strip().splitlines()[-1])
+    print(f"Splash shown after {elapsed_ms:.0f} ms")
+    assert elapsed_ms < STARTUP_BUDGET_MS
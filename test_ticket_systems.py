@@ -0,0 +1,124 @@
+import os
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import User, Opportunity, AdasSystem, opportunity_systems
+from app.services import ticket_systems
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+MIGRATIONS = [os.path.join(os.path.dirname(__file__), 'migrations', name)
+              for name in ('019_ticket_system_facets.sql', '022_catalog_systems_sync.sql')]
+
+def test_names_system():
+    print("Testing cached system matching...")
+    systems = [{"system": "ACC 2", "affected_portions": ["R&I", "Justification"]}, {"system": "BUC"}]
+    assert ticket_systems.names_system(systems, "ACC 2")
+    assert ticket_systems.names_system(systems, "ACC 2", "R&I")
+    assert not ticket_systems.names_system(systems, "BUC", "R&I")
+    assert ticket_systems.names_system(systems, portion="Justification")
+    assert not ticket_systems.names_system(systems, "LKA 1")
+    assert not ticket_systems.names_system({"primary": "ACC 2"}, "ACC 2")
+    assert ticket_systems.names_system(None)
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_system_rows_and_filters():
+    print("Testing ticket system rows and filters...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for migration in MIGRATIONS:
+            with open(migration) as f:
+                connection.execute(text(f.read()))
+    Session = sessionmaker(bind=engine)
+
+    marker = f"sys{uuid.uuid4().hex[:8]}"
+    known, later, unknown = f"{marker}-A", f"{marker}-B", f"{marker}-X"
+    now = datetime.now(timezone.utc)
+    with Session() as db:
+        system = AdasSystem(code=known, name="Known system")
+        user = User(username=f"user_{marker}", email="s@example.com", pin="x", first_name="Sam",
+                    last_name=marker, team="QA", department="QA", role="user")
+        db.add_all([system, user])
+        db.flush()
+        both = Opportunity(title=f"{marker}-1", status="new", creator_id=user.id, created_at=now,
+                           systems=[{"system": known, "affected_portions": ["R&I"]},
+                                    {"system": known, "affected_portions": ["Justification"]},
+                                    {"system": unknown, "affected_portions": ["Naming Issue"]}])
+        later_only = Opportunity(title=f"{marker}-2", status="new", creator_id=user.id, created_at=now,
+                                 systems=[{"system": later, "affected_portions": ["R&I"]}])
+        malformed = Opportunity(title=f"{marker}-3", status="new", creator_id=user.id, created_at=now,
+                                systems={"primary": known})
+        db.add_all([both, later_only, malformed])
+        db.commit()
+        system_id, ids = system.id, {both.id: 1, later_only.id: 2, malformed.id: 3}
+
+    def rows():
+        with engine.connect() as connection:
+            return sorted(
+                (ids[ticket], portions) for ticket, portions in connection.execute(
+                    select(opportunity_systems.c.opportunity_id, opportunity_systems.c.affected_portions)
+                    .where(opportunity_systems.c.opportunity_id.in_(list(ids)))
+                )
+            )
+
+    def matching(db, code=None, portion=None):
+        catalog = {system.code: system.id for system in db.query(AdasSystem).filter(AdasSystem.code.like(f"{marker}%"))}
+        criterion = ticket_systems.system_criterion(code, portion, catalog=catalog)
+        return sorted(ids[ticket] for ticket, in db.query(Opportunity.id).filter(Opportunity.id.in_(list(ids)), criterion))
+
+    try:
+        # Written by the insert trigger, with the portions of a repeated code merged
+        assert rows() == [(1, ["Justification", "R&I"])]
+        with Session() as db:
+            assert matching(db, known) == [1]
+            assert matching(db, known, "R&I") == [1]
+            assert matching(db, known, "Naming Issue") == []
+            assert matching(db, unknown) == [1]
+            assert matching(db, unknown, "Naming Issue") == [1]
+            assert matching(db, portion="R&I") == [1, 2]
+
+            # Other columns leave the rows alone; a change to the systems resyncs them
+            db.query(Opportunity).filter(Opportunity.id.in_(list(ids))).update(
+                {Opportunity.status: "in progress"}, synchronize_session=False)
+            db.commit()
+            assert rows() == [(1, ["Justification", "R&I"])]
+            db.query(Opportunity).filter(Opportunity.title == f"{marker}-3").update(
+                {Opportunity.systems: [{"system": known, "affected_portions": ["Naming Issue"]}]},
+                synchronize_session=False)
+            db.commit()
+            assert rows() == [(1, ["Justification", "R&I"]), (3, ["Naming Issue"])]
+
+            # Tickets naming a code before the catalog has it are picked up when it is added
+            db.add(AdasSystem(code=later, name="Later system"))
+            db.commit()
+            assert rows() == [(1, ["Justification", "R&I"]), (2, ["R&I"]), (3, ["Naming Issue"])]
+            assert matching(db, later) == [2]
+
+            # A renamed system follows its new code
+            db.query(AdasSystem).filter(AdasSystem.code == later).update(
+                {AdasSystem.code: unknown}, synchronize_session=False)
+            db.commit()
+            renamed = [(1, ["Justification", "R&I"]), (1, ["Naming Issue"]), (3, ["Naming Issue"])]
+            assert rows() == renamed
+            assert matching(db, unknown, "Naming Issue") == [1]
+            # The old code is no longer in the catalog and is matched on the JSON
+            assert matching(db, later) == [2]
+            # The triggers leave nothing for a rebuild to fix
+            ticket_systems.rebuild(db)
+            db.commit()
+            assert rows() == renamed
+
+            # Deleting a catalog system removes its rows
+            db.query(AdasSystem).filter(AdasSystem.id == system_id).delete(synchronize_session=False)
+            db.commit()
+            assert rows() == [(1, ["Naming Issue"])]
+    finally:
+        with Session() as db:
+            db.query(Opportunity).filter(Opportunity.title.like(f"{marker}-%")).delete(synchronize_session=False)
+            db.query(User).filter(User.last_name == marker).delete(synchronize_session=False)
+            db.query(AdasSystem).filter(AdasSystem.code.like(f"{marker}%")).delete(synchronize_session=False)
+            db.commit()
+        engine.dispose()
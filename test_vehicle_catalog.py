@@ -0,0 +1,59 @@
+import os
+import uuid
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.models import Vehicle
+from app.services import vehicle_catalog
+
+# Writes test rows, so it only runs against a scratch database
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def test_read_catalog_skips_invalid_rows(tmp_path):
+    print("Testing catalog CSV parsing...")
+    path = tmp_path / "catalog.csv"
+    path.write_text("\ufeffYear;Make;Model\n2024; Subaru ;Outback\nabc;Honda;Civic\n2025;Ford;\n", encoding="utf-8")
+    skipped = []
+    rows = list(vehicle_catalog.read_catalog(path, on_skip=skipped.append))
+    assert rows == [("2024", "Subaru", "Outback", None)]
+    assert len(skipped) == 2
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_import_upserts_and_reruns_cleanly():
+    print("Testing catalog imports...")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    make = f"Make{uuid.uuid4().hex[:8]}"
+    with Session() as db:
+        db.add(Vehicle(year="2024", make=make, model="Custom", is_custom=True))
+        db.commit()
+
+    rows = [("2024", make, f"Model {i}", None) for i in range(500)]
+    rows += [("2024", make, "Custom", None), ("2024", make, "Model 1", None)]
+    try:
+        with Session() as db:
+            counts = vehicle_catalog.import_rows(db, rows)
+            db.commit()
+            assert (counts['rows'], counts['vehicles']) == (502, 501)
+            # The hand-added vehicle joins the catalog
+            assert (counts['inserted'], counts['updated'], counts['unchanged']) == (500, 1, 0)
+
+            counts = vehicle_catalog.import_rows(db, rows + [("2024", make, "Model 2", "Adjusted bumper")])
+            db.commit()
+            assert (counts['inserted'], counts['updated'], counts['unchanged']) == (0, 1, 500)
+
+            counts = vehicle_catalog.copy_year(db, "2024", "2099")
+            db.commit()
+            print(f"Copied year: {counts}")
+            assert counts['inserted'] >= 501
+            assert db.query(Vehicle).filter(Vehicle.make == make).count() == 1002
+            assert db.query(Vehicle).filter(Vehicle.make == make, Vehicle.is_custom == True).count() == 0
+    finally:
+        with Session() as db:
+            db.query(Vehicle).filter(Vehicle.make == make).delete()
+            db.query(Vehicle).filter(Vehicle.year == "2099").delete()
+            db.commit()
+        engine.dispose()